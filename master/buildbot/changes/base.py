@@ -52,6 +52,9 @@ class ChangeSource(service.ClusteredBuildbotService):
         return self.master.data.updates.trySetChangeSourceMaster(self.serviceid,
                                                                  None)
 
+    def _claimServices(self, serviceids):
+        return self.master.data.updates.claimChangeSources(serviceids, self.master.masterid)
+
 
 class ReconfigurablePollingChangeSource(ChangeSource):
     pollInterval = None
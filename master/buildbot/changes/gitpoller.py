@@ -14,7 +14,6 @@
 # Copyright Buildbot Team Members
 
 import os
-import re
 import stat
 from urllib.parse import quote as urlquote
 
@@ -271,75 +270,65 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         self.lastRev = revs
         yield self.setState('lastRev', self.lastRev)
 
-    def _get_commit_comments(self, rev):
-        args = ['--no-walk', r'--format=%s%n%b', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
-        return d
+    # Format of each commit in `git log -z --name-only` output: a NUL byte
+    # starting the commit followed by NUL separated fields. Git then appends
+    # the NUL terminated names of the changed files, the first one starting
+    # with a newline. As none of the fields nor file names can be empty, two
+    # consecutive NUL bytes always mark the start of a new commit.
+    COMMIT_LOG_FORMAT = '%x00%H%x00%ct%x00%aN <%aE>%x00%cN <%cE>%x00%s%n%b'
 
-    def _get_commit_timestamp(self, rev):
-        # unix timestamp
-        args = ['--no-walk', r'--format=%ct', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
+    def _get_commit_log_args(self):
+        return ['-z', '--name-only', '--format=' + self.COMMIT_LOG_FORMAT]
 
-        @d.addCallback
-        def process(git_output):
-            if self.usetimestamps:
-                try:
-                    stamp = int(git_output)
-                except Exception as e:
-                    log.msg(f'gitpoller: caught exception converting output \'{git_output}\' to '
-                            'timestamp')
-                    raise e
-                return stamp
-            return None
-        return d
+    def _split_commit_log(self, git_output):
+        """
+        Split the output of `git log` run with L{_get_commit_log_args} into
+        one raw record per commit, in the order given by git.
+        """
+        git_output = git_output.strip('\0\n')
+        if not git_output:
+            return []
+        return git_output.split('\0\0')
 
-    def _get_commit_files(self, rev):
-        args = ['--name-only', '--no-walk', r'--format=%n', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
+    def _parse_commit(self, record):
+        """
+        Parse a record returned by L{_split_commit_log}.
 
-        def decode_file(file):
-            # git use octal char sequences in quotes when non ASCII
-            match = re.match('^"(.*)"$', file)
-            if match:
-                file = bytes2unicode(match.groups()[0], encoding=self.encoding,
-                                     errors='unicode_escape')
-            return bytes2unicode(file, encoding=self.encoding)
+        @returns: tuple of (revision, timestamp, author, committer, files,
+            comments)
+        """
+        rev, timestamp, author, committer, comments, *files = record.split('\0')
 
-        @d.addCallback
-        def process(git_output):
-            fileList = [decode_file(file)
-                        for file in
-                        [s for s in git_output.splitlines() if len(s)]]
-            return fileList
-        return d
+        if self.usetimestamps:
+            try:
+                timestamp = int(timestamp)
+            except Exception as e:
+                log.msg(f'gitpoller: caught exception converting output \'{timestamp}\' to '
+                        'timestamp')
+                raise e
+        else:
+            timestamp = None
 
-    def _get_commit_author(self, rev):
-        args = ['--no-walk', r'--format=%aN <%aE>', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
+        author = author.strip()
+        if not author:
+            raise EnvironmentError(f'could not get commit author for rev {rev}')
+        committer = committer.strip()
+        if not committer:
+            raise EnvironmentError(f'could not get commit committer for rev {rev}')
 
-        @d.addCallback
-        def process(git_output):
-            if not git_output:
-                raise EnvironmentError('could not get commit author for rev')
-            return git_output
-        return d
+        # names are not quoted when using -z, the first one follows a newline
+        if files and files[0].startswith('\n'):
+            files[0] = files[0][1:]
+        files = [f for f in files if f]
 
-    @defer.inlineCallbacks
-    def _get_commit_committer(self, rev):
-        args = ['--no-walk', r'--format=%cN <%cE>', rev, '--']
-        res = yield self._dovccmd('log', args, path=self.workdir)
-        if not res:
-            raise EnvironmentError('could not get commit committer for rev')
-        return res
+        return rev, timestamp, author, committer, files, comments.strip()
 
     @defer.inlineCallbacks
     def _process_changes(self, newRev, branch):
         """
         Read changes since last change.
 
-        - Read list of commit hashes.
-        - Extract details from each commit.
+        - Read the metadata of all new commits with a single git log.
         - Add changes to database.
         """
 
@@ -347,9 +336,10 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         if not self.lastRev:
             return
 
-        # get the change list
+        # get the change list, along with the metadata of each change
         revListArgs = (['--ignore-missing'] +
-                       ['--format=%H', f'{newRev}'] +
+                       self._get_commit_log_args() +
+                       [f'{newRev}'] +
                        ['^' + rev
                         for rev in sorted(self.lastRev.values())] +
                        ['--'])
@@ -357,13 +347,17 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         results = yield self._dovccmd('log', revListArgs, path=self.workdir)
 
         # process oldest change first
-        revList = results.split()
-        revList.reverse()
+        commits = self._split_commit_log(results)
+        commits.reverse()
 
-        if self.buildPushesWithNoCommits and not revList:
+        if self.buildPushesWithNoCommits and not commits:
             existingRev = self.lastRev.get(branch)
             if existingRev != newRev:
-                revList = [newRev]
+                results = yield self._dovccmd('log',
+                                              ['--no-walk'] + self._get_commit_log_args() +
+                                              [newRev, '--'],
+                                              path=self.workdir)
+                commits = self._split_commit_log(results)
                 if existingRev is None:
                     # This branch was completely unknown, rebuild
                     log.msg(f'gitpoller: rebuilding {newRev} for new branch "{branch}"')
@@ -372,33 +366,16 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
                     # commit than last time we saw it, rebuild.
                     log.msg(f'gitpoller: rebuilding {newRev} for updated branch "{branch}"')
 
-        self.changeCount = len(revList)
+        self.changeCount = len(commits)
         self.lastRev[branch] = newRev
 
         if self.changeCount:
+            revList = [commit.split('\0', 1)[0] for commit in commits]
             log.msg(f'gitpoller: processing {self.changeCount} changes: {revList} from '
                     f'"{self.repourl}" branch "{branch}"')
 
-        for rev in revList:
-            dl = defer.DeferredList([
-                self._get_commit_timestamp(rev),
-                self._get_commit_author(rev),
-                self._get_commit_committer(rev),
-                self._get_commit_files(rev),
-                self._get_commit_comments(rev),
-            ], consumeErrors=True)
-
-            results = yield dl
-
-            # check for failures
-            failures = [r[1] for r in results if not r[0]]
-            if failures:
-                for failure in failures:
-                    log.err(failure, f"while processing changes for {newRev} {branch}")
-                # just fail on the first error; they're probably all related!
-                failures[0].raiseException()
-
-            timestamp, author, committer, files, comments = [r[1] for r in results]
+        for commit in commits:
+            rev, timestamp, author, committer, files, comments = self._parse_commit(commit)
 
             yield self.master.data.updates.addChange(
                 author=author,
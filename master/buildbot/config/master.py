@@ -137,9 +137,12 @@ class MasterConfig(util.ComparableMixin):
         self.changeHorizon = None
         self.logCompressionLimit = 4 * 1024
         self.logCompressionMethod = 'gz'
+        self.logCompressionLevel = None
+        self.logChunkCacheSize = 16 * 1024 * 1024
         self.logEncoding = 'utf-8'
         self.logMaxSize = None
         self.logMaxTailSize = None
+        self.logWriteBehind = None
         self.properties = properties.Properties()
         self.collapseRequests = None
         self.codebaseGenerator = None
@@ -192,11 +195,14 @@ class MasterConfig(util.ComparableMixin):
         "changeHorizon",
         'db',
         "db_url",
+        "logChunkCacheSize",
+        "logCompressionLevel",
         "logCompressionLimit",
         "logCompressionMethod",
         "logEncoding",
         "logMaxSize",
         "logMaxTailSize",
+        "logWriteBehind",
         "manhole",
         "machines",
         "collapseRequests",
@@ -354,9 +360,9 @@ class MasterConfig(util.ComparableMixin):
 
         self.logCompressionMethod = config_dict.get(
             'logCompressionMethod', 'gz')
-        if self.logCompressionMethod not in ('raw', 'bz2', 'gz', 'lz4'):
+        if self.logCompressionMethod not in ('raw', 'bz2', 'gz', 'lz4', 'zstd'):
             error(
-                "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz' or 'lz4'")
+                "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4' or 'zstd'")
 
         if self.logCompressionMethod == "lz4":
             try:
@@ -366,10 +372,36 @@ class MasterConfig(util.ComparableMixin):
                 error("To set c['logCompressionMethod'] to 'lz4' "
                       "you must install the lz4 library ('pip install lz4')")
 
+        if self.logCompressionMethod == "zstd":
+            try:
+                import zstandard  # pylint: disable=import-outside-toplevel
+                [zstandard]
+            except ImportError:
+                error("To set c['logCompressionMethod'] to 'zstd' "
+                      "you must install the zstandard library ('pip install zstandard')")
+
+        copy_int_param('logCompressionLevel')
+        if self.logCompressionLevel is not None:
+            levels = {'gz': (0, 9), 'bz2': (1, 9), 'zstd': (1, 22)}
+            if self.logCompressionMethod not in levels:
+                error(f"c['logCompressionLevel'] can not be used with "
+                      f"c['logCompressionMethod'] = '{self.logCompressionMethod}'")
+            else:
+                low, high = levels[self.logCompressionMethod]
+                if not low <= self.logCompressionLevel <= high:
+                    error(f"c['logCompressionLevel'] must be between {low} and {high} "
+                          f"for '{self.logCompressionMethod}'")
+
+        copy_int_param('logChunkCacheSize')
+        if self.logChunkCacheSize < 0:
+            error("c['logChunkCacheSize'] must not be negative")
+
         copy_int_param('logMaxSize')
         copy_int_param('logMaxTailSize')
         copy_param('logEncoding')
 
+        self.load_log_write_behind(config_dict)
+
         properties = config_dict.get('properties', {})
         if not isinstance(properties, dict):
             error("c['properties'] must be a dictionary")
@@ -444,6 +476,38 @@ class MasterConfig(util.ComparableMixin):
             else:
                 self.validation.update(validation)
 
+    LOG_WRITE_BEHIND_DEFAULTS = {
+        "flushInterval": 0.1,
+        "flushSize": 1024 * 1024,
+        "maxPendingSize": 16 * 1024 * 1024,
+    }
+
+    def load_log_write_behind(self, config_dict):
+        write_behind = config_dict.get('logWriteBehind')
+        if write_behind is None or write_behind is False:
+            self.logWriteBehind = None
+            return
+        if write_behind is True:
+            write_behind = {}
+        if not isinstance(write_behind, dict):
+            error("c['logWriteBehind'] must be a boolean or a dictionary")
+            return
+        unknown_keys = set(write_behind) - set(self.LOG_WRITE_BEHIND_DEFAULTS)
+        if unknown_keys:
+            error(f"unrecognized key(s) in c['logWriteBehind']: {', '.join(sorted(unknown_keys))}")
+            return
+        cfg = dict(self.LOG_WRITE_BEHIND_DEFAULTS)
+        cfg.update(write_behind)
+        for name, value in cfg.items():
+            if not isinstance(value, (int, float)) or value <= 0:
+                error(f"c['logWriteBehind']['{name}'] must be a positive number")
+                return
+        if cfg['maxPendingSize'] < cfg['flushSize']:
+            error("c['logWriteBehind']['maxPendingSize'] must not be smaller than "
+                  "c['logWriteBehind']['flushSize']")
+            return
+        self.logWriteBehind = cfg
+
     @staticmethod
     def getDbUrlFromConfig(config_dict, throwErrors=True):
 
@@ -696,6 +760,7 @@ class MasterConfig(util.ComparableMixin):
             'custom_templates_dir',
             'debug',
             'default_page',
+            'event_coalescing_window',
             'json_cache_seconds',
             'jsonp',
             'logRotateLength',
@@ -730,6 +795,13 @@ class MasterConfig(util.ComparableMixin):
                     cleaned_versions.append(v)
             www_cfg['versions'] = cleaned_versions
 
+        event_coalescing_window = www_cfg.get('event_coalescing_window')
+        if event_coalescing_window is not None:
+            if not isinstance(event_coalescing_window, (int, float)) or \
+                    event_coalescing_window < 0:
+                error('Invalid www["event_coalescing_window"] configuration should '
+                      'be a non-negative number of seconds')
+
         cookie_expiration_time = www_cfg.get('cookie_expiration_time')
         if cookie_expiration_time is not None:
             if not isinstance(cookie_expiration_time, datetime.timedelta):
@@ -51,6 +51,25 @@ class LogChunksJanitor(BuildStep):
         return SUCCESS
 
 
+class LogRecompressJanitor(BuildStep):
+    name = 'LogRecompressJanitor'
+    renderables = ["limit"]
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    @defer.inlineCallbacks
+    def run(self):
+        logids = yield self.master.db.logs.getLogIdsToRecompress(limit=self.limit)
+        saved = 0
+        for logid in logids:
+            saved += yield self.master.db.logs.compressLog(logid, recompress=True)
+        self.descriptionDone = ["recompressed", str(len(logids)), "logs,",
+                                "saved", str(saved), "bytes"]
+        return SUCCESS
+
+
 class BuildDataJanitor(BuildStep):
     name = 'BuildDataJanitor'
     renderables = ["build_data_horizon"]
@@ -70,10 +89,12 @@ class BuildDataJanitor(BuildStep):
 class JanitorConfigurator(ConfiguratorBase):
     """ Janitor is a configurator which create a Janitor Builder with all needed Janitor steps"""
 
-    def __init__(self, logHorizon=None, hour=0, build_data_horizon=None, **kwargs):
+    def __init__(self, logHorizon=None, hour=0, build_data_horizon=None,
+                 log_recompress_limit=None, **kwargs):
         super().__init__()
         self.logHorizon = logHorizon
         self.build_data_horizon = build_data_horizon
+        self.log_recompress_limit = log_recompress_limit
         self.hour = hour
         self.kwargs = kwargs
 
@@ -81,6 +102,8 @@ class JanitorConfigurator(ConfiguratorBase):
         steps = []
         if self.logHorizon is not None:
             steps.append(LogChunksJanitor(logHorizon=self.logHorizon))
+        if self.log_recompress_limit is not None:
+            steps.append(LogRecompressJanitor(limit=self.log_recompress_limit))
         if self.build_data_horizon is not None:
             steps.append(BuildDataJanitor(build_data_horizon=self.build_data_horizon))
 
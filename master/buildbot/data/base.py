@@ -112,6 +112,10 @@ class Endpoint:
     isPseudoCollection = False
     kind = EndpointKind.SINGLE
     parentMapping = {}
+    # query parameters of the endpoint which are not fields of its resource
+    # type, mapping their name to their type; they are given to get() as
+    # 'eq' filters
+    queryParameters = {}
 
     def __init__(self, rtype, master):
         self.rtype = rtype
@@ -132,6 +136,11 @@ class Endpoint:
     def get(self, resultSpec, kwargs):
         raise NotImplementedError
 
+    def stream(self, resultSpec, kwargs):
+        # like get, but for raw endpoints, the 'raw' value may be an object
+        # whose read() method returns the data piece by piece
+        return self.get(resultSpec, kwargs)
+
     def control(self, action, args, kwargs):
         # we convert the action into a mixedCase method name
         action_method = getattr(self, "action" + action.capitalize(), None)
@@ -13,15 +13,26 @@
 #
 # Copyright Buildbot Team Members
 
+import json
+
 from twisted.internet import defer
 
 from buildbot.data import base
 from buildbot.data import types
+from buildbot.data.graphql import get_subresource_arguments
 from buildbot.data.resultspec import ResultSpec
+from buildbot.process.results import RETRY
 
 
 class Db2DataMixin:
 
+    def _property_names(self, filters):
+        # the property names to load from the db for the given filters, None
+        # meaning all of them
+        if '*' in filters:
+            return None
+        return filters
+
     def _generate_filtered_properties(self, props, filters):
         """
         This method returns Build's properties according to property filters.
@@ -99,7 +110,9 @@ class BuildEndpoint(Db2DataMixin, base.BuildNestingMixin, base.Endpoint):
             # Avoid to request DB for Build's properties if not specified
             if filters:
                 try:
-                    props = yield self.master.db.builds.getBuildProperties(data['buildid'])
+                    props = yield self.master.db.builds.getBuildPropertiesForBuilds(
+                        [data['buildid']], self._property_names(filters))
+                    props = props[data['buildid']]
                 except (KeyError, TypeError):
                     props = {}
                 filtered_properties = self._generate_filtered_properties(
@@ -130,6 +143,32 @@ class BuildEndpoint(Db2DataMixin, base.BuildNestingMixin, base.Endpoint):
         return res
 
 
+class PreviousBuildEndpoint(Db2DataMixin, base.BuildNestingMixin, base.Endpoint):
+
+    """
+    The last completed build of the builder before the given build number,
+    skipping the builds which were retried.
+    """
+
+    kind = base.EndpointKind.SINGLE
+    pathPatterns = """
+        /builders/n:builderid/builds/n:number/previous
+        /builders/i:buildername/builds/n:number/previous
+    """
+
+    @defer.inlineCallbacks
+    def get(self, resultSpec, kwargs):
+        bldr = yield self.getBuilderId(kwargs)
+        if bldr is None:
+            return None
+        dbdict = yield self.master.db.builds.getPreviousCompletedBuild(
+            bldr, kwargs['number'], exclude_results=[RETRY])
+        if dbdict is None:
+            return None
+        data = yield self.db2data(dbdict)
+        return data
+
+
 class BuildsEndpoint(Db2DataMixin, base.BuildNestingMixin, base.Endpoint):
 
     kind = base.EndpointKind.COLLECTION
@@ -143,6 +182,24 @@ class BuildsEndpoint(Db2DataMixin, base.BuildNestingMixin, base.Endpoint):
     """
     rootLinkName = 'builds'
 
+    def get_kwargs_from_graphql(self, parent, resolve_info, args):
+        kwargs = super().get_kwargs_from_graphql(parent, resolve_info, args)
+        # when the properties are queried, load them for all builds at once
+        # instead of letting the graphql engine query them build by build
+        selections = get_subresource_arguments(resolve_info, '_properties')
+        if selections:
+            names = set()
+            for selection in selections:
+                selected = [selection[k] for k in ('name', 'name__eq', 'name__in')
+                            if k in selection]
+                if not selected:
+                    names = None
+                    break
+                for value in selected:
+                    names.update(value if isinstance(value, list) else [value])
+            kwargs['property_names'] = names
+        return kwargs
+
     @defer.inlineCallbacks
     def get(self, resultSpec, kwargs):
         changeid = kwargs.get('changeid')
@@ -169,19 +226,34 @@ class BuildsEndpoint(Db2DataMixin, base.BuildNestingMixin, base.Endpoint):
         # returns properties' list
         filters = resultSpec.popProperties()
 
+        # Avoid to request DB for Build's properties if not specified, and
+        # load them for all builds at once otherwise
+        props = {}
+        if kwargs.get('graphql'):
+            if 'property_names' in kwargs:
+                props = yield self.master.db.builds.getBuildPropertiesForBuilds(
+                    [b['id'] for b in builds], kwargs['property_names'])
+        elif filters:
+            props = yield self.master.db.builds.getBuildPropertiesForBuilds(
+                [b['id'] for b in builds], self._property_names(filters))
+
         buildscol = []
         for b in builds:
             data = yield self.db2data(b)
             if kwargs.get('graphql'):
-                # let the graphql engine manage the properties
+                # let the graphql engine manage the properties, from the
+                # subresource prepared here if they have been loaded already
                 del data['properties']
+                if data['buildid'] in props:
+                    data['_properties'] = [
+                        {'name': k, 'source': v[1], 'value': json.dumps(v[0])}
+                        for k, v in props[data['buildid']].items()
+                    ]
             else:
-                # Avoid to request DB for Build's properties if not specified
-                if filters:
-                    props = yield self.master.db.builds.getBuildProperties(data["buildid"])
-                    filtered_properties = self._generate_filtered_properties(props, filters)
-                    if filtered_properties:
-                        data["properties"] = filtered_properties
+                filtered_properties = self._generate_filtered_properties(
+                    props.get(data["buildid"]), filters)
+                if filtered_properties:
+                    data["properties"] = filtered_properties
 
             buildscol.append(data)
         return buildscol
@@ -191,7 +263,7 @@ class Build(base.ResourceType):
 
     name = "build"
     plural = "builds"
-    endpoints = [BuildEndpoint, BuildsEndpoint]
+    endpoints = [BuildEndpoint, PreviousBuildEndpoint, BuildsEndpoint]
     keyField = "buildid"
     eventPathPatterns = """
         /builders/:builderid/builds/:number
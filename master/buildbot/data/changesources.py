@@ -112,6 +112,10 @@ class ChangeSource(base.ResourceType):
 
         return d
 
+    @base.updateMethod
+    def claimChangeSources(self, changesourceids, masterid):
+        return self.master.db.changesources.claimChangeSources(changesourceids, masterid)
+
     @defer.inlineCallbacks
     def _masterDeactivated(self, masterid):
         changesources = yield self.master.db.changesources.getChangeSources(
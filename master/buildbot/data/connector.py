@@ -22,6 +22,7 @@ from twisted.python import reflect
 from buildbot.data import base
 from buildbot.data import exceptions
 from buildbot.data import resultspec
+from buildbot.data import types
 from buildbot.util import bytes2unicode
 from buildbot.util import pathmatch
 from buildbot.util import service
@@ -175,7 +176,8 @@ class DataConnector(service.AsyncService):
             })
         return paths
 
-    def resultspec_from_jsonapi(self, req_args, entityType, is_collection):
+    def resultspec_from_jsonapi(self, req_args, entityType, is_collection,
+                                queryParameters=None):
 
         def checkFields(fields, negOk=False):
             for field in fields:
@@ -185,10 +187,11 @@ class DataConnector(service.AsyncService):
                 if k not in entityType.fieldNames:
                     raise exceptions.InvalidQueryParameter(f"no such field '{k}'")
 
-        limit = offset = order = fields = None
-        filters, properties = [], []
-        limit = offset = order = fields = None
-        filters, properties = [], []
+        if queryParameters is None:
+            queryParameters = {}
+        limit = offset = order = fields = after = None
+        filters, parameters, properties = [], [], []
+        countTotal = True
         for arg in req_args:
             argStr = bytes2unicode(arg)
             if argStr == 'order':
@@ -207,6 +210,16 @@ class DataConnector(service.AsyncService):
                     offset = int(req_args[arg][0])
                 except Exception as e:
                     raise exceptions.InvalidQueryParameter('invalid offset') from e
+            elif argStr == 'after':
+                try:
+                    after = resultspec.decodeCursor(bytes2unicode(req_args[arg][0]))
+                except Exception as e:
+                    raise exceptions.InvalidQueryParameter('invalid after') from e
+            elif argStr == 'total':
+                total = bytes2unicode(req_args[arg][0])
+                if total not in ('count', 'none'):
+                    raise exceptions.InvalidQueryParameter('invalid total')
+                countTotal = total == 'count'
             elif argStr == 'property':
                 try:
                     props = []
@@ -218,6 +231,14 @@ class DataConnector(service.AsyncService):
                     raise exceptions.InvalidQueryParameter(
                         f'invalid property value for {arg}') from e
                 properties.append(resultspec.Property(arg, 'eq', props))
+            elif argStr in queryParameters:
+                try:
+                    values = [queryParameters[argStr].valueFromString(v)
+                              for v in req_args[arg]]
+                except Exception as e:
+                    raise exceptions.InvalidQueryParameter(
+                        f'invalid value for {argStr}') from e
+                parameters.append(resultspec.Filter(argStr, 'eq', values))
             elif argStr in entityType.fieldNames:
                 field = entityType.fields[argStr]
                 try:
@@ -255,13 +276,23 @@ class DataConnector(service.AsyncService):
                 if filter.field not in fieldsSet:
                     raise exceptions.InvalidQueryParameter("cannot filter on un-selected fields")
 
+        # rows whose ordering fields are NULL can not be compared with the
+        # cursor, and the databases do not agree on where they sort them
+        if after is not None:
+            for o in order or ():
+                if isinstance(entityType.fields[o.lstrip('-')], types.NoneOk):
+                    raise exceptions.InvalidQueryParameter(
+                        f"cannot use after when ordering on nullable field '{o.lstrip('-')}'")
+
         # build the result spec
         rspec = resultspec.ResultSpec(fields=fields, limit=limit, offset=offset,
-                                      order=order, filters=filters, properties=properties)
+                                      order=order, filters=filters + parameters,
+                                      properties=properties,
+                                      after=after, countTotal=countTotal)
 
         # for singular endpoints, only allow fields
         if not is_collection:
-            if rspec.filters:
+            if rspec.filters or rspec.after is not None:
                 raise exceptions.InvalidQueryParameter("this is not a collection")
 
         return rspec
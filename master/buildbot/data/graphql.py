@@ -40,6 +40,33 @@ def _enforce_list(v):
     return [v]
 
 
+def get_subresource_arguments(resolve_info, field_name):
+    """
+    Return the list of argument dictionaries of the selections of the
+    subresource C{field_name} in the field being resolved.
+
+    None is returned if the selection uses fragments, as the subresource may
+    then be selected in ways that are not visible here.
+    """
+    selections = []
+    for field_node in resolve_info.field_nodes:
+        if field_node.selection_set is not None:
+            selections.extend(field_node.selection_set.selections)
+
+    ret = []
+    for selection in selections:
+        if not isinstance(selection, graphql.FieldNode):
+            return None
+        if selection.name.value != field_name:
+            continue
+        ret.append({
+            arg.name.value: graphql.value_from_ast_untyped(arg.value,
+                                                           resolve_info.variable_values)
+            for arg in selection.arguments
+        })
+    return ret
+
+
 class GraphQLConnector(service.AsyncService):
     """Mixin class to separate the GraphQL traits for the data connector
 
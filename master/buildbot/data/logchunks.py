@@ -94,44 +94,149 @@ class LogChunkEndpoint(LogChunkEndpointBase):
         return {"logid": args["logid"]}
 
 
-class RawLogChunkEndpoint(LogChunkEndpointBase):
+class BuildLogChunksEndpoint(base.BuildNestingMixin, base.Endpoint):
 
-    # Note that this is a singular endpoint, even though it overrides the
-    # offset/limit query params in ResultSpec
-    kind = base.EndpointKind.RAW
+    """
+    The contents of the logs of a build, one log chunk per log, read with a
+    few queries.  The logs can be selected with a C{logid} filter, and the
+    C{max_bytes} parameter limits the contents of each log to its first lines
+    fitting in that many bytes, C{DEFAULT_MAX_BYTES} if not given.
+    """
+
+    kind = base.EndpointKind.COLLECTION
     pathPatterns = """
-        /logs/n:logid/raw
-        /steps/n:stepid/logs/i:log_slug/raw
-        /builds/n:buildid/steps/i:step_name/logs/i:log_slug/raw
-        /builds/n:buildid/steps/n:step_number/logs/i:log_slug/raw
-        /builders/n:builderid/builds/n:build_number/steps/i:step_name/logs/i:log_slug/raw
-        /builders/n:builderid/builds/n:build_number/steps/n:step_number/logs/i:log_slug/raw
+        /builds/n:buildid/logs/contents
+        /builders/n:builderid/builds/n:build_number/logs/contents
+        /builders/i:buildername/builds/n:build_number/logs/contents
     """
+    queryParameters = {'max_bytes': types.Integer()}
+
+    DEFAULT_MAX_BYTES = 1024 * 1024
 
     @defer.inlineCallbacks
     def get(self, resultSpec, kwargs):
+        buildid = yield self.getBuildid(kwargs)
+        if buildid is None:
+            return []
+        logids = resultSpec.popFilter('logid', 'in')
+        if logids is None:
+            logids = resultSpec.popFilter('logid', 'eq')
+        max_bytes = resultSpec.popOneFilter('max_bytes', 'eq')
+        if max_bytes is None:
+            max_bytes = self.DEFAULT_MAX_BYTES
+
+        logs = yield self.master.db.logs.getLogs(buildid=buildid)
+        build_logids = [log['id'] for log in logs]
+        if logids is not None:
+            logids = set(logids)
+            build_logids = [logid for logid in build_logids if logid in logids]
+
+        contents = yield self.master.db.logs.getLogsLines(build_logids,
+                                                          max_bytes=int(max_bytes))
+        return [{'logid': logid, 'firstline': 0, 'content': contents[logid]}
+                for logid in build_logids if logid in contents]
+
+
+class LogContentsReader:
+
+    """
+    Read the whole contents of a log, a few chunks at a time, so that it never
+    needs to be held in memory at once.  For stdio logs, the stream prefix of
+    each line is removed.
+    """
+
+    def __init__(self, master, logid, type, last_line):
+        self.type = type
+        self.is_first = True
+        self.lines = master.db.logs.getLogLinesReader(logid, 0, last_line)
+
+    @defer.inlineCallbacks
+    def read(self):
+        """
+        @returns: the next piece of the log, or None once everything has been
+            read, via Deferred
+        """
+        text = yield self.lines.read()
+        if text is None:
+            return None
+
+        is_first = self.is_first
+        self.is_first = False
+        if self.type == 's':
+            # lines are separated, not terminated, by newlines
+            text = "\n".join([line[1:] for line in text[:-1].split("\n")])
+            return text if is_first else "\n" + text
+        return text
+
+    @defer.inlineCallbacks
+    def readAll(self):
+        pieces = []
+        while True:
+            text = yield self.read()
+            if text is None:
+                return "".join(pieces)
+            pieces.append(text)
+
+
+class RawLogChunkEndpointBase(LogChunkEndpointBase):
+
+    @defer.inlineCallbacks
+    def getReaderAndDbDict(self, kwargs):
         logid, dbdict = yield self.getLogIdAndDbDictFromKwargs(kwargs)
         if logid is None:
-            return None
+            return (None, None)
 
         if not dbdict:
             dbdict = yield self.master.db.logs.getLog(logid)
             if not dbdict:
-                return None
+                return (None, None)
         lastline = max(0, dbdict['num_lines'] - 1)
 
-        logLines = yield self.master.db.logs.getLogLines(
-            logid, 0, lastline)
+        reader = LogContentsReader(self.master, logid, dbdict['type'], lastline)
+        return (reader, dbdict)
 
-        if dbdict['type'] == 's':
-            logLines = "\n".join([line[1:] for line in logLines.splitlines()])
+    def getRawData(self, dbdict):
+        raise NotImplementedError
 
-        return {'raw': logLines,
-                'mime-type': 'text/html' if dbdict['type'] == 'h' else 'text/plain',
+    @defer.inlineCallbacks
+    def get(self, resultSpec, kwargs):
+        reader, dbdict = yield self.getReaderAndDbDict(kwargs)
+        if reader is None:
+            return None
+        data = self.getRawData(dbdict)
+        data['raw'] = yield reader.readAll()
+        return data
+
+    @defer.inlineCallbacks
+    def stream(self, resultSpec, kwargs):
+        reader, dbdict = yield self.getReaderAndDbDict(kwargs)
+        if reader is None:
+            return None
+        data = self.getRawData(dbdict)
+        data['raw'] = reader
+        return data
+
+
+class RawLogChunkEndpoint(RawLogChunkEndpointBase):
+
+    # Note that this is a singular endpoint, even though it overrides the
+    # offset/limit query params in ResultSpec
+    kind = base.EndpointKind.RAW
+    pathPatterns = """
+        /logs/n:logid/raw
+        /steps/n:stepid/logs/i:log_slug/raw
+        /builds/n:buildid/steps/i:step_name/logs/i:log_slug/raw
+        /builds/n:buildid/steps/n:step_number/logs/i:log_slug/raw
+        /builders/n:builderid/builds/n:build_number/steps/i:step_name/logs/i:log_slug/raw
+        /builders/n:builderid/builds/n:build_number/steps/n:step_number/logs/i:log_slug/raw
+    """
+
+    def getRawData(self, dbdict):
+        return {'mime-type': 'text/html' if dbdict['type'] == 'h' else 'text/plain',
                 'filename': dbdict['slug']}
 
 
-class RawInlineLogChunkEndpoint(LogChunkEndpointBase):
+class RawInlineLogChunkEndpoint(RawLogChunkEndpointBase):
 
     # Note that this is a singular endpoint, even though it overrides the
     # offset/limit query params in ResultSpec
@@ -145,35 +250,16 @@ class RawInlineLogChunkEndpoint(LogChunkEndpointBase):
         /builders/n:builderid/builds/n:build_number/steps/n:step_number/logs/i:log_slug/raw_inline
     """
 
-    @defer.inlineCallbacks
-    def get(self, resultSpec, kwargs):
-        logid, dbdict = yield self.getLogIdAndDbDictFromKwargs(kwargs)
-        if logid is None:
-            return None
-
-        if not dbdict:
-            dbdict = yield self.master.db.logs.getLog(logid)
-            if not dbdict:
-                return None
-        lastline = max(0, dbdict['num_lines'] - 1)
-
-        logLines = yield self.master.db.logs.getLogLines(
-            logid, 0, lastline)
-
-        if dbdict['type'] == 's':
-            logLines = "\n".join([line[1:] for line in logLines.splitlines()])
-
-        return {
-            'raw': logLines,
-            'mime-type': 'text/html' if dbdict['type'] == 'h' else 'text/plain'
-        }
+    def getRawData(self, dbdict):
+        return {'mime-type': 'text/html' if dbdict['type'] == 'h' else 'text/plain'}
 
 
 class LogChunk(base.ResourceType):
 
     name = "logchunk"
     plural = "logchunks"
-    endpoints = [LogChunkEndpoint, RawLogChunkEndpoint, RawInlineLogChunkEndpoint]
+    endpoints = [LogChunkEndpoint, BuildLogChunksEndpoint, RawLogChunkEndpoint,
+                 RawInlineLogChunkEndpoint]
     keyField = "logid"
 
     class EntityType(types.Entity):
@@ -76,14 +76,24 @@ class LogsEndpoint(EndpointMixin, base.BuildNestingMixin, base.Endpoint):
         /builders/n:builderid/builds/n:build_number/steps/n:step_number/logs
         /builders/i:buildername/builds/n:build_number/steps/i:step_name/logs
         /builders/i:buildername/builds/n:build_number/steps/n:step_number/logs
+        /builds/n:buildid/logs
+        /builders/n:builderid/builds/n:build_number/logs
+        /builders/i:buildername/builds/n:build_number/logs
     """
 
     @defer.inlineCallbacks
     def get(self, resultSpec, kwargs):
-        stepid = yield self.getStepid(kwargs)
-        if not stepid:
-            return []
-        logs = yield self.master.db.logs.getLogs(stepid=stepid)
+        if not {'stepid', 'step_name', 'step_number'} & set(kwargs):
+            # the logs of all the steps of a build
+            buildid = yield self.getBuildid(kwargs)
+            if buildid is None:
+                return []
+            logs = yield self.master.db.logs.getLogs(buildid=buildid)
+        else:
+            stepid = yield self.getStepid(kwargs)
+            if not stepid:
+                return []
+            logs = yield self.master.db.logs.getLogs(stepid=stepid)
         results = []
         for dbdict in logs:
             results.append((yield self.db2data(dbdict)))
@@ -147,6 +157,10 @@ class Log(base.ResourceType):
         self.generateEvent(logid, "finished")
         return res
 
+    @base.updateMethod
+    def waitForLogAppendCapacity(self):
+        return self.master.db.logs.waitForAppendCapacity()
+
     @base.updateMethod
     def compressLog(self, logid):
         return self.master.db.logs.compressLog(logid=logid)
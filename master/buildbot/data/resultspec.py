@@ -13,11 +13,17 @@
 #
 # Copyright Buildbot Team Members
 
+import base64
+import datetime
+import json
+
 import sqlalchemy as sa
 
 from twisted.python import log
 
 from buildbot.data import base
+from buildbot.util import datetime2epoch
+from buildbot.util import unicode2bytes
 
 
 class FieldBase:
@@ -184,28 +190,97 @@ class ReverseComparator:
         return other.value > self.value
 
 
+def sortKey(elem, order):
+    """
+    Do a multi-level sort by passing in the keys
+    to sort by.
+
+    @param elem: each item in the list to sort.  It must be
+              a C{dict}
+    @param order: a list of keys to sort by, such as:
+                ('lastName', 'firstName', 'age')
+    @return: a key used by sorted(). This will be a
+             list such as:
+             [a['lastName', a['firstName'], a['age']]
+    @rtype: a C{list}
+    """
+    compareKey = []
+    for k in order:
+        doReverse = False
+        if k[0] == '-':
+            # If we get a key '-lastName',
+            # it means sort by 'lastName' in reverse.
+            k = k[1:]
+            doReverse = True
+        val = NoneComparator(cursorValue(elem[k]))
+        if doReverse:
+            val = ReverseComparator(val)
+        compareKey.append(val)
+    return compareKey
+
+
+def cursorValue(value):
+    # cursors hold the values as given in filters, where dates are timestamps
+    if isinstance(value, datetime.datetime):
+        return datetime2epoch(value)
+    return value
+
+
+def encodeCursor(values):
+    """
+    Encode the values of the ordering fields of an item into an opaque token
+    suitable for the C{after} query parameter
+    """
+    return base64.urlsafe_b64encode(unicode2bytes(json.dumps(values))).decode('ascii')
+
+
+def decodeCursor(token):
+    """
+    Decode a token built by L{encodeCursor}
+
+    @raises ValueError: if the token is invalid
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(unicode2bytes(token)))
+    except Exception as e:
+        raise ValueError(f"invalid cursor {token!r}") from e
+    if not isinstance(values, list) or \
+            any(not isinstance(v, (int, float, str)) for v in values):
+        raise ValueError(f"invalid cursor {token!r}")
+    return values
+
+
 class ResultSpec:
 
     __slots__ = ['filters', 'fields', 'properties',
-                 'order', 'limit', 'offset', 'fieldMapping']
+                 'order', 'limit', 'offset', 'after', 'countTotal', 'fieldMapping']
 
     def __init__(self, filters=None, fields=None, properties=None, order=None,
-                 limit=None, offset=None):
+                 limit=None, offset=None, after=None, countTotal=True):
         self.filters = filters or []
         self.properties = properties or []
         self.fields = fields
         self.order = order
         self.limit = limit
         self.offset = offset
+        # keyset pagination: values of the ordering fields of the last item
+        # of the previous page
+        self.after = after
+        # whether the total number of items is computed when paginating
+        self.countTotal = countTotal
         self.fieldMapping = {}
 
     def __repr__(self):
+        keyset = ''
+        if self.after is not None or not self.countTotal:
+            keyset = f", 'after': {self.after}, 'countTotal': {self.countTotal}"
         return (f"ResultSpec(**{{'filters': {self.filters}, 'fields': {self.fields}, "
                 f"'properties': {self.properties}, 'order': {self.order}, 'limit': {self.limit}, "
-                f"'offset': {self.offset}" + "})")
+                f"'offset': {self.offset}" + keyset + "})")
 
     def __eq__(self, b):
-        for i in ['filters', 'fields', 'properties', 'order', 'limit', 'offset']:
+        for i in ['filters', 'fields', 'properties', 'order', 'limit', 'offset', 'after',
+                  'countTotal']:
             if getattr(self, i) != getattr(b, i):
                 return False
         return True
@@ -259,7 +334,7 @@ class ResultSpec:
         return None
 
     def removePagination(self):
-        self.limit = self.offset = None
+        self.limit = self.offset = self.after = None
 
     def removeOrder(self):
         self.order = None
@@ -297,6 +372,28 @@ class ResultSpec:
             col = col.desc()
         return query.order_by(col)
 
+    def applyAfterToSQLQuery(self, query):
+        # the items after the cursor are the ones greater on the first
+        # ordering field, or equal on it and greater on the next ones; the
+        # ordering fields are never nullable, see resultspec_from_jsonapi
+        columns = []
+        clauses = []
+        for o, value in zip(self.order, self.after):
+            reverse = o.startswith('-')
+            col = self.findColumn(query, o.lstrip('-'))
+            after = col < value if reverse else col > value
+            clauses.append(sa.and_(*[c == v for c, v in columns], after))
+            columns.append((col, value))
+        return query.where(sa.or_(*clauses))
+
+    def isAfter(self, elem):
+        """
+        Tell whether C{elem} is ordered after the cursor in L{after}
+        """
+        key = sortKey(elem, self.order)
+        after = sortKey(dict(zip((o.lstrip('-') for o in self.order), self.after)), self.order)
+        return key > after
+
     def applyToSQLQuery(self, query):
         filters = self.filters
         order = self.order
@@ -324,14 +421,26 @@ class ResultSpec:
 
         # we cannot limit in sql if there is missing filtering or ordering
         if unmatched_filters or unmatched_order:
-            if self.offset is not None or self.limit is not None:
+            if self.offset is not None or self.limit is not None or self.after is not None:
                 log.msg("Warning: limited data api query is not backed by db "
                         "because of following filters",
                         unmatched_filters, unmatched_order)
             self.filters = unmatched_filters
-            self.order = tuple(unmatched_order)
+            if unmatched_order and self.after is not None:
+                # the cursor can only be applied after sorting everything
+                self.order = tuple(order)
+            else:
+                self.order = tuple(unmatched_order)
+                if self.after is not None:
+                    query = self.applyAfterToSQLQuery(query)
+                    self.after = None
             return query, None
+        # the total is the size of the whole collection, including the items
+        # before the cursor
         count_query = sa.select([sa.func.count()]).select_from(query.alias('query'))
+        if self.after is not None:
+            query = self.applyAfterToSQLQuery(query)
+            self.after = None
         self.order = None
         self.filters = []
         # finally, slice out the limit/offset
@@ -346,13 +455,13 @@ class ResultSpec:
         return query, count_query
 
     def thd_execute(self, conn, q, dictFromRow):
-        offset, limit = self.offset, self.limit
+        offset, limit, after = self.offset, self.limit, self.after
         q, qc = self.applyToSQLQuery(q)
         res = conn.execute(q)
         rv = [dictFromRow(row) for row in res.fetchall()]
 
-        if qc is not None and (offset or limit):
-            total = conn.execute(qc).scalar()
+        if qc is not None and (offset or limit or after is not None):
+            total = conn.execute(qc).scalar() if self.countTotal else None
             rv = base.ListResult(rv)
             rv.offset, rv.total, rv.limit = offset, total, limit
         return rv
@@ -399,39 +508,16 @@ class ResultSpec:
                 data = f.apply(data)
             data = list(data)
 
-            if total is None:
+            if total is None and self.countTotal:
                 total = len(data)
 
             if self.order:
-                def keyFunc(elem, order=self.order):
-                    """
-                    Do a multi-level sort by passing in the keys
-                    to sort by.
-
-                    @param elem: each item in the list to sort.  It must be
-                              a C{dict}
-                    @param order: a list of keys to sort by, such as:
-                                ('lastName', 'firstName', 'age')
-                    @return: a key used by sorted(). This will be a
-                             list such as:
-                             [a['lastName', a['firstName'], a['age']]
-                    @rtype: a C{list}
-                    """
-                    compareKey = []
-                    for k in order:
-                        doReverse = False
-                        if k[0] == '-':
-                            # If we get a key '-lastName',
-                            # it means sort by 'lastName' in reverse.
-                            k = k[1:]
-                            doReverse = True
-                        val = NoneComparator(elem[k])
-                        if doReverse:
-                            val = ReverseComparator(val)
-                        compareKey.append(val)
-                    return compareKey
-
-                data.sort(key=keyFunc)
+                data.sort(key=lambda elem: sortKey(elem, self.order))
+
+            if self.after is not None:
+                if offset is not None or limit is not None:
+                    raise AssertionError("endpoint must clear after")
+                data = [d for d in data if self.isAfter(d)]
 
             # finally, slice out the limit/offset
             if self.offset is not None or self.limit is not None:
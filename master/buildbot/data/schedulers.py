@@ -136,6 +136,10 @@ class Scheduler(base.ResourceType):
 
         return d
 
+    @base.updateMethod
+    def claimSchedulers(self, schedulerids, masterid):
+        return self.master.db.schedulers.claimSchedulers(schedulerids, masterid)
+
     @defer.inlineCallbacks
     def _masterDeactivated(self, masterid):
         schedulers = yield self.master.db.schedulers.getSchedulers(
@@ -18,6 +18,8 @@ import itertools
 
 import sqlalchemy as sa
 
+from twisted.python import log
+
 from buildbot.util import unicode2bytes
 
 
@@ -113,6 +115,41 @@ class DBConnectorComponent:
                 return thd(conn, no_recurse=True)
         return self.db.pool.do(thd)
 
+    def thdClaimServices(self, conn, tbl, claims_tbl, claim_col, ids, masterid):
+        """
+        Claim for C{masterid} all the services of C{tbl} with the given ids
+        which are not claimed in C{claims_tbl} yet, and return the set of
+        those ids which are now claimed by C{masterid}.  C{claim_col} is the
+        column of C{claims_tbl} referring to C{tbl}.
+
+        This takes two queries per batch of ids, whatever the number of
+        services which were unclaimed.
+        """
+        claimed = set()
+        for batch in self.doBatch(ids, 100):
+            unclaimed = sa.select(
+                [tbl.c.id, sa.literal(masterid)],
+                from_obj=tbl.outerjoin(claims_tbl, claim_col == tbl.c.id),
+                whereclause=sa.and_(tbl.c.id.in_(batch), claim_col.is_(None)))
+            q = claims_tbl.insert().from_select([claim_col.name, 'masterid'], unclaimed)
+            # another master may claim some of those services in the
+            # meantime; they are not unclaimed anymore when retrying
+            for _ in range(3):
+                try:
+                    conn.execute(q).close()
+                    break
+                except sa.exc.IntegrityError:
+                    pass
+            else:
+                log.msg(f"could not claim services {batch} of {tbl.name} for master "
+                        f"{masterid} after 3 attempts")
+
+            q = sa.select([claim_col],
+                          whereclause=sa.and_(claim_col.in_(batch),
+                                              claims_tbl.c.masterid == masterid))
+            claimed.update(row[0] for row in conn.execute(q))
+        return claimed
+
     def hashColumns(self, *args):
         def encode(x):
             if x is None:
@@ -14,15 +14,16 @@
 # Copyright Buildbot Team Members
 
 
-import itertools
-
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 
 from twisted.internet import defer
 from twisted.python import log
 
+from buildbot import util
 from buildbot.db import NULL
 from buildbot.db import base
+from buildbot.process import metrics
 from buildbot.process.results import RETRY
 from buildbot.util import datetime2epoch
 from buildbot.util import epoch2datetime
@@ -132,6 +133,67 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
         res = yield self.db.pool.do(thd)
         return res
 
+    # returns a Deferred that returns a value
+    def getUnclaimedBuildRequestsSummary(self, builderids):
+        """
+        For each of the given builders that has unclaimed, incomplete build
+        requests, return the highest priority and the oldest submission time
+        of these requests, as a dictionary mapping builderid to a dictionary
+        with keys C{priority} and C{submitted_at}.
+        """
+        def thd(conn):
+            reqs_tbl = self.db.model.buildrequests
+            claims_tbl = self.db.model.buildrequest_claims
+            from_clause = reqs_tbl.outerjoin(claims_tbl,
+                                             reqs_tbl.c.id == claims_tbl.c.brid)
+            rv = {}
+            for batch in self.doBatch(builderids, 100):
+                q = sa.select([reqs_tbl.c.builderid,
+                               sa.func.max(reqs_tbl.c.priority),
+                               sa.func.min(reqs_tbl.c.submitted_at)])
+                q = q.select_from(from_clause)
+                q = q.where(reqs_tbl.c.builderid.in_(batch))
+                q = q.where((claims_tbl.c.claimed_at == NULL) &
+                            (reqs_tbl.c.complete == 0))
+                q = q.group_by(reqs_tbl.c.builderid)
+                res = conn.execute(q)
+                for builderid, priority, submitted_at in res.fetchall():
+                    rv[builderid] = {
+                        "priority": priority,
+                        "submitted_at": epoch2datetime(submitted_at),
+                    }
+                res.close()
+            return rv
+        return self.db.pool.do(thd)
+
+    def _thdClaimBatch(self, conn, batch, claimed_at):
+        # claim a batch of build requests with a single statement, returning
+        # whether all of them were claimed
+        tbl = self.db.model.buildrequest_claims
+        rows = [{"brid": brid, "masterid": self.db.master.masterid, "claimed_at": claimed_at}
+                for brid in batch]
+        dialect = conn.dialect.name
+        try:
+            if dialect in ('postgresql', 'mysql'):
+                # skip the requests claimed by another master instead of
+                # failing, so that the conflicts do not show up as errors in
+                # the database logs; the number of inserted rows tells if there
+                # were any.  Requests which do not exist anymore still fail the
+                # foreign key constraint.
+                if dialect == 'postgresql':
+                    q = postgresql.insert(tbl).values(rows).on_conflict_do_nothing()
+                else:
+                    q = tbl.insert().values(rows).prefix_with('IGNORE')
+                res = conn.execute(q)
+                claimed = res.rowcount
+                res.close()
+                return claimed == len(batch)
+
+            conn.execute(tbl.insert().values(rows)).close()
+        except (sa.exc.IntegrityError, sa.exc.ProgrammingError):
+            return False
+        return True
+
     @defer.inlineCallbacks
     def claimBuildRequests(self, brids, claimed_at=None):
         if claimed_at is not None:
@@ -141,20 +203,25 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
 
         def thd(conn):
             transaction = conn.begin()
-            tbl = self.db.model.buildrequest_claims
 
-            try:
-                q = tbl.insert()
-                conn.execute(q, [
-                    {"brid": id, "masterid": self.db.master.masterid, "claimed_at": claimed_at}
-                    for id in brids])
-            except (sa.exc.IntegrityError, sa.exc.ProgrammingError) as e:
-                transaction.rollback()
-                raise AlreadyClaimedError() from e
+            # we'll need to batch the brids into groups of 100, so that the
+            # parameter lists supported by the DBAPI aren't exhausted
+            for batch in self.doBatch(brids, 100):
+                if not self._thdClaimBatch(conn, batch, claimed_at):
+                    transaction.rollback()
+                    return False
 
             transaction.commit()
+            return True
 
-        yield self.db.pool.do(thd)
+        started = util.now()
+        claimed = yield self.db.pool.do(thd)
+        metrics.MetricTimeEvent.log("BuildRequestsConnectorComponent.claimBuildRequests()",
+                                    util.now() - started)
+        if not claimed:
+            metrics.MetricCountEvent.log("BuildRequestsConnectorComponent.claim-conflicts")
+            raise AlreadyClaimedError()
+        metrics.MetricCountEvent.log("BuildRequestsConnectorComponent.claimed", len(brids))
 
     # returns a Deferred that returns None
     def unclaimBuildRequests(self, brids):
@@ -164,13 +231,7 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
 
             # we'll need to batch the brids into groups of 100, so that the
             # parameter lists supported by the DBAPI aren't exhausted
-            iterator = iter(brids)
-
-            while True:
-                batch = list(itertools.islice(iterator, 100))
-                if not batch:
-                    break  # success!
-
+            for batch in self.doBatch(brids, 100):
                 try:
                     q = claims_tbl.delete(
                         (claims_tbl.c.brid.in_(batch))
@@ -49,6 +49,28 @@ class BuildsConnectorComponent(base.DBConnectorComponent):
             (self.db.model.builds.c.builderid == builderid) &
             (self.db.model.builds.c.number == number))
 
+    # returns a Deferred that returns a value
+    def getPreviousCompletedBuild(self, builderid, number, exclude_results=None):
+        def thd(conn):
+            tbl = self.db.model.builds
+            # the builds_number index covers walking back the builds of the
+            # builder, so that only the skipped builds are scanned
+            q = tbl.select(whereclause=((tbl.c.builderid == builderid) &
+                                        (tbl.c.number < number) &
+                                        (tbl.c.results != NULL)),
+                           order_by=[sa.desc(tbl.c.number)],
+                           limit=1)
+            if exclude_results:
+                q = q.where(tbl.c.results.notin_(exclude_results))
+            res = conn.execute(q)
+            row = res.fetchone()
+            rv = None
+            if row:
+                rv = self._builddictFromRow(row)
+            res.close()
+            return rv
+        return self.db.pool.do(thd)
+
     # returns a Deferred that returns a value
     def _getRecentBuilds(self, whereclause, offset=0, limit=1):
         def thd(conn):
@@ -224,6 +246,22 @@ class BuildsConnectorComponent(base.DBConnectorComponent):
             return dict(props)
         return self.db.pool.do(thd)
 
+    # returns a Deferred that returns a value
+    def getBuildPropertiesForBuilds(self, buildids, names=None):
+        def thd(conn):
+            bp_tbl = self.db.model.build_properties
+            props = {buildid: {} for buildid in buildids}
+            for batch in self.doBatch(props):
+                q = sa.select(
+                    [bp_tbl.c.buildid, bp_tbl.c.name, bp_tbl.c.value, bp_tbl.c.source],
+                    whereclause=bp_tbl.c.buildid.in_(batch))
+                if names is not None:
+                    q = q.where(bp_tbl.c.name.in_(list(names)))
+                for row in conn.execute(q):
+                    props[row.buildid][row.name] = (json.loads(row.value), row.source)
+            return props
+        return self.db.pool.do(thd)
+
     @defer.inlineCallbacks
     def setBuildProperty(self, bid, name, value, source):
         """ A kind of create_or_update, that's between one or two queries per
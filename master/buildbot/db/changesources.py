@@ -59,6 +59,15 @@ class ChangeSourcesConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thd)
 
+    # returns a Deferred that returns a value
+    def claimChangeSources(self, changesourceids, masterid):
+        def thd(conn):
+            cs_tbl = self.db.model.changesources
+            cs_mst_tbl = self.db.model.changesource_masters
+            return self.thdClaimServices(
+                conn, cs_tbl, cs_mst_tbl, cs_mst_tbl.c.changesourceid, changesourceids, masterid)
+        return self.db.pool.do(thd)
+
     @defer.inlineCallbacks
     def getChangeSource(self, changesourceid):
         cs = yield self.getChangeSources(_changesourceid=changesourceid)
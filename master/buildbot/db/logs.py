@@ -13,12 +13,17 @@
 #
 # Copyright Buildbot Team Members
 
+import array
 import bz2
+import sys
+import threading
 import zlib
+from collections import OrderedDict
 
 import sqlalchemy as sa
 
 from twisted.internet import defer
+from twisted.python import failure
 from twisted.python import log
 
 from buildbot.db import base
@@ -40,23 +45,298 @@ except ImportError:
         def read_lz4(data):
             return data
 
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    # config.py actually forbid this code path
+    zstandard = None
+
 
-def dumps_gzip(data):
-    return zlib.compress(data, 9)
+def dumps_gzip(data, level=None):
+    return zlib.compress(data, 9 if level is None else level)
 
 
 def read_gzip(data):
     return zlib.decompress(data)
 
 
-def dumps_bz2(data):
-    return bz2.compress(data, 9)
+def dumps_bz2(data, level=None):
+    return bz2.compress(data, 9 if level is None else level)
 
 
 def read_bz2(data):
     return bz2.decompress(data)
 
 
+def dumps_zstd(data, level=None):
+    # compressor objects are not thread-safe, so each call needs its own
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+
+
+def read_zstd(data):
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def lineOffsets(data):
+    """
+    Return the offsets of the beginning of each line but the first in the
+    uncompressed chunk C{data}, as an array.
+    """
+    offsets = array.array('H' if len(data) <= 0xffff else 'I')
+    pos = data.find(b'\n')
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = data.find(b'\n', pos + 1)
+    return offsets
+
+
+def encodeLineOffsets(data):
+    """
+    Pack the line offsets of the uncompressed chunk C{data} for the
+    C{line_offsets} column.
+    """
+    offsets = lineOffsets(data)
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def decodeLineOffsets(packed, num_offsets):
+    """
+    Unpack the C{line_offsets} column of a chunk holding C{num_offsets + 1}
+    lines, or return None if the chunk was not indexed.
+    """
+    if packed is None:
+        return None
+    if num_offsets == 0:
+        return array.array('H')
+    width, rest = divmod(len(packed), num_offsets)
+    if rest or width not in (2, 4):
+        return None
+    offsets = array.array('H' if width == 2 else 'I')
+    offsets.frombytes(packed)
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets
+
+
+def sliceLines(data, offsets, chunk_first_line, chunk_last_line, first_line, last_line):
+    """
+    Return the lines C{first_line} to C{last_line} of the uncompressed chunk
+    C{data}, which holds lines C{chunk_first_line} to C{chunk_last_line}.
+    """
+    start = 0
+    if first_line > chunk_first_line:
+        start = offsets[first_line - chunk_first_line - 1]
+    end = len(data)
+    if last_line < chunk_last_line:
+        end = offsets[last_line - chunk_first_line] - 1
+    return data[start:end]
+
+
+class LogWriteBehindQueue:
+    """
+    Coalesce appendLog calls for all logs into a single database transaction
+    per flush.  A flush happens after C{flushInterval} seconds, or as soon as
+    C{flushSize} bytes are pending.  Appends are written in the order they
+    were queued, and only one flush runs at a time, so per-log line ordering
+    is preserved.
+    """
+
+    def __init__(self, component, flushInterval, flushSize, maxPendingSize):
+        self.component = component
+        self.flushInterval = flushInterval
+        self.flushSize = flushSize
+        self.maxPendingSize = maxPendingSize
+
+        self._pending = []
+        self._pending_size = 0
+        self._flush_timer = None
+        self._flushing = None
+        self._capacity_waiters = []
+
+    @property
+    def reactor(self):
+        return self.component.master.reactor
+
+    def configure(self, flushInterval, flushSize, maxPendingSize):
+        self.flushInterval = flushInterval
+        self.flushSize = flushSize
+        self.maxPendingSize = maxPendingSize
+
+    def append(self, logid, content):
+        d = defer.Deferred()
+        self._pending.append((logid, content, d))
+        self._pending_size += len(content)
+        if self._pending_size >= self.flushSize:
+            self._startFlush()
+        elif self._flush_timer is None and self._flushing is None:
+            self._flush_timer = self.reactor.callLater(self.flushInterval, self._startFlush)
+        return d
+
+    def isIdle(self):
+        return not self._pending and self._flushing is None
+
+    def hasCapacity(self):
+        return self._pending_size < self.maxPendingSize
+
+    def waitForCapacity(self):
+        if self.hasCapacity():
+            return defer.succeed(None)
+        d = defer.Deferred()
+        self._capacity_waiters.append(d)
+        return d
+
+    @defer.inlineCallbacks
+    def flush(self):
+        # wait until everything queued so far has been written
+        while self._pending or self._flushing is not None:
+            if self._flushing is None:
+                self._startFlush()
+            yield self._flushing
+
+    def _startFlush(self):
+        if self._flush_timer is not None:
+            if self._flush_timer.active():
+                self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._flushing is not None or not self._pending:
+            return
+        batch = self._pending
+        self._pending = []
+        self._pending_size = 0
+        waiters, self._capacity_waiters = self._capacity_waiters, []
+        for d in waiters:
+            d.callback(None)
+        self._flushing = d = self._flush(batch)
+        d.addBoth(self._flushDone)
+
+    @defer.inlineCallbacks
+    def _flush(self, batch):
+        try:
+            results = yield self.component.db.pool.do(
+                self.component.thdAppendLogBatch,
+                [(logid, content) for logid, content, _ in batch])
+        except Exception:
+            f = failure.Failure()
+            for _, _, d in batch:
+                d.errback(f)
+            return
+        for (_, _, d), res in zip(batch, results):
+            d.callback(res)
+
+    def _flushDone(self, _):
+        self._flushing = None
+        if self._pending:
+            if self._pending_size >= self.flushSize:
+                self._startFlush()
+            elif self._flush_timer is None:
+                self._flush_timer = self.reactor.callLater(self.flushInterval,
+                                                           self._startFlush)
+
+
+class LogChunkCache:
+    """
+    A least-recently-used cache of decompressed log chunks and their line
+    offsets, keyed by C{(logid, first_line)} and holding at most C{maxSize}
+    bytes.  L{LogsConnectorComponent.compressLog} rewrites chunks with a new
+    last line, so each entry remembers the last line of the chunk it was read
+    from and is only used while that still matches.  The cache is used from
+    database threads, so every access is locked.
+    """
+
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.size = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entrySize(data, offsets):
+        return len(data) + len(offsets) * offsets.itemsize
+
+    def get(self, logid, first_line, last_line):
+        """
+        @returns: tuple of (data, offsets), or None
+        """
+        key = (logid, first_line)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != last_line:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1:]
+
+    def put(self, logid, first_line, last_line, data, offsets):
+        size = self._entrySize(data, offsets)
+        if size > self.maxSize:
+            return
+        key = (logid, first_line)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= self._entrySize(*old[1:])
+            self._entries[key] = (last_line, data, offsets)
+            self.size += size
+            self._purge()
+
+    def invalidate(self, logid):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == logid]:
+                self.size -= self._entrySize(*self._entries.pop(key)[1:])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def setMaxSize(self, maxSize):
+        with self._lock:
+            self.maxSize = maxSize
+            self._purge()
+
+    def _purge(self):
+        while self.size > self.maxSize:
+            _, (_, data, offsets) = self._entries.popitem(last=False)
+            self.size -= self._entrySize(data, offsets)
+
+
+class LogLinesReader:
+    """
+    Read a range of log lines a few chunks at a time, so that a long log never
+    needs to be held in memory at once.  Each call to L{read} returns the next
+    lines in the same format as L{LogsConnectorComponent.getLogLines}.
+    """
+
+    # number of chunks fetched from the database with each read
+    chunksPerRead = 16
+
+    def __init__(self, component, logid, first_line, last_line):
+        self.component = component
+        self.logid = logid
+        self.next_line = first_line
+        self.last_line = last_line
+
+    @defer.inlineCallbacks
+    def read(self):
+        """
+        @returns: the next lines, each terminated by a newline, or None once
+            the whole range has been read, via Deferred
+        """
+        if self.next_line > self.last_line:
+            return None
+        chunks = yield self.component.getLogChunks(
+            self.logid, self.next_line, self.last_line, self.chunksPerRead)
+        if not chunks:
+            self.next_line = self.last_line + 1
+            return None
+        self.next_line = chunks[-1][1] + 1
+        return "".join([content + "\n" for _, _, content in chunks])
+
+
 class LogsConnectorComponent(base.DBConnectorComponent):
 
     # Postgres and MySQL will both allow bigger sizes than this.  The limit
@@ -64,13 +344,44 @@ class LogsConnectorComponent(base.DBConnectorComponent):
     # note that MAX_CHUNK_SIZE is equal to BUFFER_SIZE in buildbot_worker.runprocess
     MAX_CHUNK_SIZE = 65536  # a chunk may not be bigger than this
     MAX_CHUNK_LINES = 1000  # a chunk may not have more lines than this
-    COMPRESSION_MODE = {"raw": {"id": 0, "dumps": lambda x: x, "read": lambda x: x},
+    COMPRESSION_MODE = {"raw": {"id": 0, "dumps": lambda x, level=None: x,
+                                "read": lambda x: x},
                         "gz": {"id": 1, "dumps": dumps_gzip, "read": read_gzip},
                         "bz2": {"id": 2, "dumps": dumps_bz2, "read": read_bz2},
-                        "lz4": {"id": 3, "dumps": dumps_lz4, "read": read_lz4}}
+                        "lz4": {"id": 3, "dumps": lambda x, level=None: dumps_lz4(x),
+                                "read": read_lz4},
+                        "zstd": {"id": 4, "dumps": dumps_zstd, "read": read_zstd}}
     COMPRESSION_BYID = dict((x["id"], x) for x in COMPRESSION_MODE.values())
     total_raw_bytes = 0
     total_compressed_bytes = 0
+    _write_behind = None
+    _chunk_cache = None
+
+    def _configureChunkCache(self):
+        # called from the reactor thread before reading chunks, so that the
+        # database threads only ever see a fully configured cache
+        size = self.master.config.logChunkCacheSize
+        if not size:
+            self._chunk_cache = None
+        elif self._chunk_cache is None:
+            self._chunk_cache = LogChunkCache(size)
+        else:
+            self._chunk_cache.setMaxSize(size)
+
+    def _getWriteBehindQueue(self):
+        cfg = self.master.config.logWriteBehind
+        if cfg:
+            if self._write_behind is None:
+                self._write_behind = LogWriteBehindQueue(self, **cfg)
+            else:
+                self._write_behind.configure(**cfg)
+        elif self._write_behind is not None and not self._write_behind.isIdle():
+            # write-behind was disabled by a reconfig; keep using the queue
+            # until it drains so that appends stay ordered
+            return self._write_behind
+        else:
+            return None
+        return self._write_behind
 
     # returns a Deferred that returns a value
     def _getLog(self, whereclause):
@@ -94,52 +405,179 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         return self._getLog((tbl.c.slug == slug) & (tbl.c.stepid == stepid))
 
     # returns a Deferred that returns a value
-    def getLogs(self, stepid=None):
+    def getLogs(self, stepid=None, buildid=None):
         def thdGetLogs(conn):
             tbl = self.db.model.logs
             q = tbl.select()
             if stepid is not None:
                 q = q.where(tbl.c.stepid == stepid)
+            if buildid is not None:
+                steps_tbl = self.db.model.steps
+                q = q.where(tbl.c.stepid.in_(
+                    sa.select([steps_tbl.c.id], whereclause=steps_tbl.c.buildid == buildid)))
             q = q.order_by(tbl.c.id)
             res = conn.execute(q)
             return [self._logdictFromRow(row) for row in res.fetchall()]
         return self.db.pool.do(thdGetLogs)
 
-    # returns a Deferred that returns a value
-    def getLogLines(self, logid, first_line, last_line):
-        def thdGetLogLines(conn):
-            # get a set of chunks that completely cover the requested range
-            tbl = self.db.model.logchunks
-            q = sa.select([tbl.c.first_line, tbl.c.last_line,
-                           tbl.c.content, tbl.c.compressed])
+    def _thdGetLogChunks(self, conn, logid, first_line, last_line, limit=None):
+        if first_line > last_line:
+            return
+        for row_first_line, row_last_line, data, offsets in self._thdReadChunks(
+                conn, logid, first_line, last_line, limit):
+            if row_first_line < first_line or row_last_line > last_line:
+                if offsets is None:
+                    offsets = lineOffsets(data)
+                data = sliceLines(data, offsets, row_first_line, row_last_line,
+                                  first_line, last_line)
+            # Note that row.content is stored as bytes, and our caller expects unicode
+            yield (max(row_first_line, first_line), min(row_last_line, last_line),
+                   data.decode('utf-8'))
+
+    def _decompressChunk(self, row):
+        # Retrieve associated "reader" and extract the data
+        data = self.COMPRESSION_BYID[row.compressed]["read"](row.content)
+        offsets = decodeLineOffsets(row.line_offsets, row.last_line - row.first_line)
+        return data, offsets
+
+    def _thdReadChunks(self, conn, logid, first_line, last_line, limit):
+        # get a set of chunks that completely cover the requested range, as
+        # (first_line, last_line, data, offsets) tuples, where offsets may be
+        # None for chunks which were not indexed
+        tbl = self.db.model.logchunks
+        cache = self._chunk_cache
+        content_columns = [tbl.c.first_line, tbl.c.last_line, tbl.c.content,
+                           tbl.c.compressed, tbl.c.line_offsets]
+
+        def chunksQuery(columns):
+            q = sa.select(columns)
             q = q.where(tbl.c.logid == logid)
             q = q.where(tbl.c.first_line <= last_line)
             q = q.where(tbl.c.last_line >= first_line)
             q = q.order_by(tbl.c.first_line)
-            rv = []
-            for row in conn.execute(q):
-                # Retrieve associated "reader" and extract the data
-                # Note that row.content is stored as bytes, and our caller expects unicode
-                data = self.COMPRESSION_BYID[
-                    row.compressed]["read"](row.content)
-                content = data.decode('utf-8')
-
-                if row.first_line < first_line:
-                    idx = -1
-                    count = first_line - row.first_line
-                    for _ in range(count):
-                        idx = content.index('\n', idx + 1)
-                    content = content[idx + 1:]
-                if row.last_line > last_line:
-                    idx = len(content) + 1
-                    count = row.last_line - last_line
-                    for _ in range(count):
-                        idx = content.rindex('\n', 0, idx)
-                    content = content[:idx]
-                rv.append(content)
+            if limit is not None:
+                q = q.limit(limit)
+            return q
+
+        if cache is None:
+            return [(row.first_line, row.last_line) + self._decompressChunk(row)
+                    for row in conn.execute(chunksQuery(content_columns))]
+
+        while True:
+            # list the chunks first, and only fetch the content of those which
+            # are not cached yet
+            res = conn.execute(chunksQuery([tbl.c.first_line, tbl.c.last_line]))
+            bounds = [(row.first_line, row.last_line) for row in res.fetchall()]
+            res.close()
+            expected = dict(bounds)
+            contents = {}
+            missing = []
+            for row_first_line, row_last_line in bounds:
+                cached = cache.get(logid, row_first_line, row_last_line)
+                if cached is None:
+                    missing.append(row_first_line)
+                else:
+                    contents[row_first_line] = cached
+
+            for batch in self.doBatch(missing):
+                q = sa.select(content_columns)
+                q = q.where(tbl.c.logid == logid)
+                q = q.where(tbl.c.first_line.in_(batch))
+                res = conn.execute(q)
+                for row in res.fetchall():
+                    if expected.get(row.first_line) != row.last_line:
+                        continue
+                    data, offsets = self._decompressChunk(row)
+                    if offsets is None:
+                        # index the chunk once, so that later reads can slice
+                        # it directly
+                        offsets = lineOffsets(data)
+                    cache.put(logid, row.first_line, row.last_line, data, offsets)
+                    contents[row.first_line] = (data, offsets)
+                res.close()
+
+            if len(contents) == len(bounds):
+                return [(row_first_line, row_last_line) + contents[row_first_line]
+                        for row_first_line, row_last_line in bounds]
+            # compressLog rewrote some of these chunks in the meantime, start
+            # over with the new ones
+
+    # returns a Deferred that returns a value
+    def getLogLines(self, logid, first_line, last_line):
+        self._configureChunkCache()
+
+        def thdGetLogLines(conn):
+            rv = [content for _, _, content
+                  in self._thdGetLogChunks(conn, logid, first_line, last_line)]
             return '\n'.join(rv) + '\n' if rv else ''
         return self.db.pool.do(thdGetLogLines)
 
+    def getLogLinesReader(self, logid, first_line, last_line):
+        return LogLinesReader(self, logid, first_line, last_line)
+
+    # returns a Deferred that returns a value
+    def getLogsLines(self, logids, max_bytes=None):
+        """
+        Get the lines of several logs at once, as a dictionary mapping each
+        existing logid to its lines in the format of L{getLogLines}.  When
+        C{max_bytes} is given, only the first lines of each log fitting in
+        that many bytes are read and returned.
+        """
+        self._configureChunkCache()
+
+        def thdGetLogsLines(conn):
+            tbl = self.db.model.logs
+            num_lines = {}
+            for batch in self.doBatch(logids):
+                q = sa.select([tbl.c.id, tbl.c.num_lines], whereclause=tbl.c.id.in_(batch))
+                num_lines.update((row.id, row.num_lines) for row in conn.execute(q))
+
+            rv = {}
+            for logid in logids:
+                if logid in num_lines:
+                    rv[logid] = self._thdGetLogHead(conn, logid, num_lines[logid], max_bytes)
+            return rv
+        return self.db.pool.do(thdGetLogsLines)
+
+    def _thdGetLogHead(self, conn, logid, num_lines, max_bytes):
+        if max_bytes is None:
+            rv = [content for _, _, content
+                  in self._thdGetLogChunks(conn, logid, 0, num_lines - 1)]
+            return '\n'.join(rv) + '\n' if rv else ''
+
+        lines = []
+        size = 0
+        next_line = 0
+        while next_line < num_lines:
+            chunks = list(self._thdGetLogChunks(conn, logid, next_line, num_lines - 1,
+                                                LogLinesReader.chunksPerRead))
+            if not chunks:
+                break
+            for _, last_line, content in chunks:
+                chunk_size = len(content.encode('utf-8')) + 1
+                if size + chunk_size <= max_bytes:
+                    lines.append(content + '\n')
+                    size += chunk_size
+                    continue
+                # only keep the whole lines of the chunk which still fit
+                for line in content.split('\n'):
+                    line_size = len(line.encode('utf-8')) + 1
+                    if size + line_size > max_bytes:
+                        break
+                    lines.append(line + '\n')
+                    size += line_size
+                return ''.join(lines)
+            next_line = chunks[-1][1] + 1
+        return ''.join(lines)
+
+    # returns a Deferred that returns a value
+    def getLogChunks(self, logid, first_line, last_line, limit):
+        self._configureChunkCache()
+
+        def thdGetLogChunks(conn):
+            return list(self._thdGetLogChunks(conn, logid, first_line, last_line, limit))
+        return self.db.pool.do(thdGetLogChunks)
+
     # returns a Deferred that returns a value
     def addLog(self, stepid, name, slug, type):
         assert type in 'tsh', "Log type must be one of t, s, or h"
@@ -167,7 +605,8 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         if self.master.config.logCompressionMethod != "raw":
             compressed_mode = self.COMPRESSION_MODE[
                 self.master.config.logCompressionMethod]
-            compressed_chunk = compressed_mode["dumps"](chunk)
+            compressed_chunk = compressed_mode["dumps"](
+                chunk, self.master.config.logCompressionLevel)
             # Is it useful to compress the chunk?
             if len(chunk) > len(compressed_chunk):
                 compressed_id = compressed_mode["id"]
@@ -175,6 +614,19 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         self.total_compressed_bytes += len(chunk)
         return chunk, compressed_id
 
+    def thdChunkRow(self, logid, first_line, last_line, chunk):
+        # index and compress an uncompressed chunk into a logchunks row
+        line_offsets = encodeLineOffsets(chunk)
+        chunk, compressed_id = self.thdCompressChunk(chunk)
+        return {
+            "logid": logid,
+            "first_line": first_line,
+            "last_line": last_line,
+            "content": chunk,
+            "compressed": compressed_id,
+            "line_offsets": line_offsets
+        }
+
     def thdSplitAndAppendChunk(self, conn, logid, content, first_line):
         # Break the content up into chunks.  This takes advantage of the
         # fact that no character but u'\n' maps to b'\n' in UTF-8.
@@ -184,14 +636,8 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             chunk, remaining = self._splitBigChunk(remaining, logid)
             last_line = chunk_first_line + chunk.count(b'\n')
 
-            chunk, compressed_id = self.thdCompressChunk(chunk)
-            conn.execute(self.db.model.logchunks.insert(), {
-                "logid": logid,
-                "first_line": chunk_first_line,
-                "last_line": last_line,
-                "content": chunk,
-                "compressed": compressed_id
-            }).close()
+            conn.execute(self.db.model.logchunks.insert(),
+                         self.thdChunkRow(logid, chunk_first_line, last_line, chunk)).close()
             chunk_first_line = last_line + 1
         conn.execute(self.db.model.logs.update(whereclause=self.db.model.logs.c.id == logid),
                      num_lines=last_line + 1).close()
@@ -216,13 +662,69 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                                            content=content,
                                            first_line=num_lines[0])
 
+    def thdAppendLogBatch(self, conn, appends):
+        # write a list of (logid, content) appends in a single transaction,
+        # reading and updating num_lines only once per log.  Returns the
+        # (first_line, last_line) of each append, in order.
+        tbl = self.db.model.logs
+        logids = sorted(set(logid for logid, _ in appends))
+        num_lines = {}
+        for batch in self.doBatch(logids):
+            q = sa.select([tbl.c.id, tbl.c.num_lines]).where(tbl.c.id.in_(batch))
+            res = conn.execute(q)
+            num_lines.update((row.id, row.num_lines) for row in res.fetchall())
+            res.close()
+
+        rv = []
+        chunks = []
+        with conn.begin():
+            for logid, content in appends:
+                assert content[-1] == '\n'
+                if logid not in num_lines:
+                    rv.append(None)  # ignore a missing log
+                    continue
+                content = content[:-1].encode('utf-8')
+                first_line = chunk_first_line = last_line = num_lines[logid]
+                remaining = content
+                while remaining:
+                    chunk, remaining = self._splitBigChunk(remaining, logid)
+                    last_line = chunk_first_line + chunk.count(b'\n')
+                    chunks.append(self.thdChunkRow(logid, chunk_first_line, last_line, chunk))
+                    chunk_first_line = last_line + 1
+                num_lines[logid] = last_line + 1
+                rv.append((first_line, last_line))
+
+            if chunks:
+                conn.execute(self.db.model.logchunks.insert(), chunks).close()
+            for logid in logids:
+                if logid in num_lines:
+                    conn.execute(tbl.update(whereclause=tbl.c.id == logid),
+                                 num_lines=num_lines[logid]).close()
+        return rv
+
     # returns a Deferred that returns a value
     def appendLog(self, logid, content):
+        write_behind = self._getWriteBehindQueue()
+        if write_behind is not None:
+            return write_behind.append(logid, content)
+
         def thdappendLog(conn):
             return self.thdAppendLog(conn, logid, content)
 
         return self.db.pool.do(thdappendLog)
 
+    # returns a Deferred that returns None
+    def waitForAppendCapacity(self):
+        if self._write_behind is None:
+            return defer.succeed(None)
+        return self._write_behind.waitForCapacity()
+
+    # returns a Deferred that returns None
+    def flushPendingAppends(self):
+        if self._write_behind is None:
+            return defer.succeed(None)
+        return self._write_behind.flush()
+
     def _splitBigChunk(self, content, logid):
         """
         Split CONTENT on a line boundary into a prefix smaller than 64k and
@@ -255,19 +757,30 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         return truncline, content[i + 1:]
 
     # returns a Deferred that returns None
+    @defer.inlineCallbacks
     def finishLog(self, logid):
+        # make sure all the lines of the log are written before marking it
+        # complete
+        yield self.flushPendingAppends()
+
         def thdfinishLog(conn):
             tbl = self.db.model.logs
             q = tbl.update(whereclause=tbl.c.id == logid)
             conn.execute(q, complete=1)
-        return self.db.pool.do(thdfinishLog)
+        yield self.db.pool.do(thdfinishLog)
 
     @defer.inlineCallbacks
-    def compressLog(self, logid, force=False):
+    def compressLog(self, logid, force=False, recompress=False):
         def thdcompressLog(conn):
             tbl = self.db.model.logchunks
+            # with recompress, chunks compressed with another method than the
+            # configured one are rewritten even if they can not be gathered
+            outdated_ids = set()
+            if recompress:
+                method_id = self.COMPRESSION_MODE[self.master.config.logCompressionMethod]["id"]
+                outdated_ids = self._outdatedCompressionIds(method_id)
             q = sa.select([tbl.c.first_line, tbl.c.last_line, sa.func.length(tbl.c.content),
-                           tbl.c.compressed])
+                           tbl.c.compressed, tbl.c.line_offsets.is_(None).label('unindexed')])
             q = q.where(tbl.c.logid == logid)
             q = q.order_by(tbl.c.first_line)
 
@@ -279,17 +792,19 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             todo_first_line = 0
             todo_last_line = 0
             todo_length = 0
+            todo_outdated = False
             # first pass, we fetch the full list of chunks (without content) and find out
             # the chunk groups which could use some gathering.
             for row in rows:
                 if (todo_length + row.length_1 > self.MAX_CHUNK_SIZE or
                         (row.last_line - todo_first_line) > self.MAX_CHUNK_LINES):
-                    if todo_numchunks > 1 or (force and todo_numchunks):
+                    if todo_numchunks > 1 or ((force or todo_outdated) and todo_numchunks):
                         # this group is worth re-compressing
                         todo_gather_list.append((todo_first_line, todo_last_line))
                     todo_first_line = row.first_line
                     todo_length = 0
                     todo_numchunks = 0
+                    todo_outdated = False
 
                 todo_last_line = row.last_line
                 # note that we count the compressed size for efficiency reason
@@ -298,13 +813,17 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 totlength += row.length_1
                 todo_numchunks += 1
                 numchunks += 1
+                # chunks written before line offsets were introduced are
+                # rewritten too, so that they get indexed
+                if row.compressed in outdated_ids or (recompress and row.unindexed):
+                    todo_outdated = True
             rows.close()
 
             if totlength == 0:
                 # empty log
                 return 0
 
-            if todo_numchunks > 1 or (force and todo_numchunks):
+            if todo_numchunks > 1 or ((force or todo_outdated) and todo_numchunks):
                 # last chunk group
                 todo_gather_list.append((todo_first_line, todo_last_line))
             for todo_first_line, todo_last_line in todo_gather_list:
@@ -336,14 +855,8 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 conn.execute(d).close()
 
                 # and we recompress them in one big chunk
-                chunk, compressed_id = self.thdCompressChunk(chunk)
-                conn.execute(tbl.insert(), {
-                    "logid": logid,
-                    "first_line": todo_first_line,
-                    "last_line": todo_last_line,
-                    "content": chunk,
-                    "compressed": compressed_id
-                }).close()
+                conn.execute(tbl.insert(), self.thdChunkRow(
+                    logid, todo_first_line, todo_last_line, chunk)).close()
                 transaction.commit()
 
             # calculate how many bytes we saved
@@ -353,8 +866,40 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             return totlength - newsize
 
         saved = yield self.db.pool.do(thdcompressLog)
+        if self._chunk_cache is not None:
+            # the old chunks can not be read anymore
+            self._chunk_cache.invalidate(logid)
         return saved
 
+    def _outdatedCompressionIds(self, method_id):
+        # chunks stored raw are left alone: they are raw because compressing
+        # them did not save any space, and would be rewritten over and over
+        raw_id = self.COMPRESSION_MODE["raw"]["id"]
+        return {mode["id"] for mode in self.COMPRESSION_MODE.values()
+                if mode["id"] not in (method_id, raw_id)}
+
+    # returns a Deferred that returns a value
+    def getLogIdsToRecompress(self, limit=None):
+        def thdGetLogIdsToRecompress(conn):
+            method_id = self.COMPRESSION_MODE[self.master.config.logCompressionMethod]["id"]
+            outdated_ids = self._outdatedCompressionIds(method_id)
+            logs_tbl = self.db.model.logs
+            chunks_tbl = self.db.model.logchunks
+            q = sa.select([logs_tbl.c.id])
+            q = q.where(logs_tbl.c.complete == 1)
+            q = q.where(sa.exists()
+                        .where(chunks_tbl.c.logid == logs_tbl.c.id)
+                        .where(chunks_tbl.c.compressed.in_(outdated_ids) |
+                               chunks_tbl.c.line_offsets.is_(None)))
+            q = q.order_by(logs_tbl.c.id)
+            if limit is not None:
+                q = q.limit(limit)
+            res = conn.execute(q)
+            rv = [row.id for row in res]
+            res.close()
+            return rv
+        return self.db.pool.do(thdGetLogIdsToRecompress)
+
     # returns a Deferred that returns a value
     def deleteOldLogChunks(self, older_than_timestamp):
         def thddeleteOldLogs(conn):
@@ -415,7 +960,14 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             count2 = res.fetchone()[0]
             res.close()
             return count1 - count2
-        return self.db.pool.do(thddeleteOldLogs)
+
+        def clearChunkCache(count):
+            if self._chunk_cache is not None:
+                self._chunk_cache.clear()
+            return count
+        d = self.db.pool.do(thddeleteOldLogs)
+        d.addCallback(clearChunkCache)
+        return d
 
     def _logdictFromRow(self, row):
         rv = dict(row)
@@ -238,9 +238,13 @@ class Model(base.DBConnectorComponent):
         sa.Column('first_line', sa.Integer, nullable=False),
         sa.Column('last_line', sa.Integer, nullable=False),
         # log contents, including a terminating newline, encoded in utf-8 or,
-        # if 'compressed' is not 0, compressed with gzip, bzip2 or lz4
+        # if 'compressed' is not 0, compressed with gzip, bzip2, lz4 or zstd
         sa.Column('content', sa.LargeBinary(65536)),
         sa.Column('compressed', sa.SmallInteger, nullable=False),
+        # byte offsets of the beginning of each line but the first in the
+        # uncompressed content, packed as little-endian 16- or 32-bit
+        # integers; NULL for chunks written before this was introduced
+        sa.Column('line_offsets', sa.LargeBinary(65536), nullable=True),
     )
 
     # Tables related to buildsets
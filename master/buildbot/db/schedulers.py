@@ -156,6 +156,15 @@ class SchedulersConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thd)
 
+    # returns a Deferred that returns a value
+    def claimSchedulers(self, schedulerids, masterid):
+        def thd(conn):
+            sch_tbl = self.db.model.schedulers
+            sch_mst_tbl = self.db.model.scheduler_masters
+            return self.thdClaimServices(
+                conn, sch_tbl, sch_mst_tbl, sch_mst_tbl.c.schedulerid, schedulerids, masterid)
+        return self.db.pool.do(thd)
+
     @defer.inlineCallbacks
     def getScheduler(self, schedulerid):
         sch = yield self.getSchedulers(_schedulerid=schedulerid)
@@ -13,6 +13,8 @@
 #
 # Copyright Buildbot Team Members
 
+import collections
+
 import sqlalchemy as sa
 
 from twisted.internet import defer
@@ -26,61 +28,106 @@ class TestResultDict(dict):
 
 class TestResultsConnectorComponent(base.DBConnectorComponent):
 
+    # maximum number of test name and code path ids kept in memory, for all
+    # the builders
+    ID_CACHE_SIZE = 200000
+
+    def __init__(self, connector):
+        super().__init__(connector)
+        # builderid -> {(column name, value): id}, in least recently used
+        # order; test names and code paths are never deleted, so the ids stay
+        # valid
+        self._id_caches = collections.OrderedDict()
+        self._id_cache_entries = 0
+        # builderid -> (ids lock, insert lock)
+        self._builder_locks = {}
+
+    def _get_cached_ids(self, builderid, column_name, values):
+        cache = self._id_caches.get(builderid)
+        if cache is None:
+            return {}, values
+        self._id_caches.move_to_end(builderid)
+        ids = {}
+        missing = set()
+        for value in values:
+            id = cache.get((column_name, value))
+            if id is None:
+                missing.add(value)
+            else:
+                ids[value] = id
+        return ids, missing
+
+    def _cache_ids(self, builderid, column_name, ids):
+        cache = self._id_caches.setdefault(builderid, {})
+        self._id_caches.move_to_end(builderid)
+        for value, id in ids.items():
+            cache[(column_name, value)] = id
+        self._id_cache_entries += len(ids)
+
+        # the ids of the least recently used builders are dropped first
+        while self._id_cache_entries > self.ID_CACHE_SIZE and self._id_caches:
+            _, cache = self._id_caches.popitem(last=False)
+            self._id_cache_entries -= len(cache)
+
+    def _thd_add_ids(self, conn, table, column, builderid, values):
+        # returns a dictionary of value to id in table, inserting the values which are not there
+        # yet. Only one call at a time may add the values of a builder on this master.
+        ids = {}
+        for batch in self.doBatch(values, batch_n=3000):
+            batch = set(batch)
+
+            # Use expanding bindparam, because performance of sqlalchemy is very slow
+            # when filtering large sets otherwise.
+            select_q = sa.select([table.c.id, column]).where(
+                (column.in_(sa.bindparam('values', expanding=True))) &
+                (table.c.builderid == builderid))
+
+            res = conn.execute(select_q, {'values': list(batch)})
+            for row in res.fetchall():
+                ids[row[1]] = row.id
+                batch.discard(row[1])
+
+            if not batch:
+                continue
+
+            insert_values = [{'builderid': builderid, column.name: value} for value in batch]
+            if self.db.pool.engine.dialect.name in ['postgresql', 'mssql']:
+                # Use RETURNING, this way we won't need an additional select query
+                q = table.insert().values(insert_values).returning(table.c.id, column)
+                res = conn.execute(q)
+            else:
+                conn.execute(table.insert(), insert_values)
+                res = conn.execute(select_q, {'values': list(batch)})
+            for row in res.fetchall():
+                ids[row[1]] = row.id
+        return ids
+
     @defer.inlineCallbacks
-    def _add_code_paths(self, builderid, paths):
-        # returns a dictionary of path to id in the test_code_paths table.
-        # For paths that already exist, the id of the row in the test_code_paths is retrieved.
-        assert isinstance(paths, set)
+    def _add_ids(self, builderid, code_paths, names):
+        # returns dictionaries of path and name to id in the test_code_paths and test_names
+        # tables, adding the paths and names which do not exist yet
+        assert isinstance(code_paths, set)
+        assert isinstance(names, set)
 
-        def thd(conn):
+        paths_to_ids, missing_paths = self._get_cached_ids(builderid, 'path', code_paths)
+        names_to_ids, missing_names = self._get_cached_ids(builderid, 'name', names)
+        if not missing_paths and not missing_names:
+            return paths_to_ids, names_to_ids
 
-            paths_to_ids = {}
+        def thd(conn):
             paths_table = self.db.model.test_code_paths
-
-            for path_batch in self.doBatch(paths, batch_n=3000):
-
-                path_batch = set(path_batch)
-
-                while path_batch:
-                    # Use expanding bindparam, because performance of sqlalchemy is very slow
-                    # when filtering large sets otherwise.
-                    q = paths_table.select().where(
-                        (paths_table.c.path.in_(sa.bindparam('paths', expanding=True))) &
-                        (paths_table.c.builderid == builderid))
-
-                    res = conn.execute(q, {'paths': list(path_batch)})
-                    for row in res.fetchall():
-                        paths_to_ids[row.path] = row.id
-                        path_batch.remove(row.path)
-
-                    # paths now contains all the paths that need insertion.
-                    try:
-                        insert_values = [{'builderid': builderid, 'path': path}
-                                         for path in path_batch]
-
-                        q = paths_table.insert().values(insert_values)
-
-                        if self.db.pool.engine.dialect.name in ['postgresql', 'mssql']:
-                            # Use RETURNING, this way we won't need an additional select query
-                            q = q.returning(paths_table.c.id, paths_table.c.path)
-
-                            res = conn.execute(q)
-                            for row in res.fetchall():
-                                paths_to_ids[row.path] = row.id
-                                path_batch.remove(row.path)
-                        else:
-                            conn.execute(q)
-
-                    except (sa.exc.IntegrityError, sa.exc.ProgrammingError):
-                        # There was a competing addCodePaths() call that added a path for the same
-                        # builder. Depending on the DB driver, none or some rows were inserted, but
-                        # we will re-check what's got inserted in the next iteration of the loop
-                        pass
-
-            return paths_to_ids
-
-        paths_to_id = yield self.db.pool.do(thd)
-        return paths_to_id
+            names_table = self.db.model.test_names
+            return (self._thd_add_ids(conn, paths_table, paths_table.c.path, builderid,
+                                      missing_paths),
+                    self._thd_add_ids(conn, names_table, names_table.c.name, builderid,
+                                      missing_names))
+
+        new_paths_to_ids, new_names_to_ids = yield self.db.pool.do(thd)
+        self._cache_ids(builderid, 'path', new_paths_to_ids)
+        self._cache_ids(builderid, 'name', new_names_to_ids)
+        paths_to_ids.update(new_paths_to_ids)
+        names_to_ids.update(new_names_to_ids)
+        return paths_to_ids, names_to_ids
 
     @defer.inlineCallbacks
     def getTestCodePaths(self, builderid, path_prefix=None, result_spec=None):
@@ -96,60 +143,6 @@ class TestResultsConnectorComponent(base.DBConnectorComponent):
         res = yield self.db.pool.do(thd)
         return res
 
-    @defer.inlineCallbacks
-    def _add_names(self, builderid, names):
-        # returns a dictionary of name to id in the test_names table.
-        # For names that already exist, the id of the row in the test_names is retrieved.
-        assert isinstance(names, set)
-
-        def thd(conn):
-
-            names_to_ids = {}
-            names_table = self.db.model.test_names
-
-            for name_batch in self.doBatch(names, batch_n=3000):
-                name_batch = set(name_batch)
-                while name_batch:
-                    # Use expanding bindparam, because performance of sqlalchemy is very slow
-                    # when filtering large sets otherwise.
-                    q = names_table.select().where(
-                        (names_table.c.name.in_(sa.bindparam('names', expanding=True))) &
-                        (names_table.c.builderid == builderid))
-
-                    res = conn.execute(q, {'names': list(name_batch)})
-                    for row in res.fetchall():
-                        names_to_ids[row.name] = row.id
-                        name_batch.remove(row.name)
-
-                    # names now contains all the names that need insertion.
-                    try:
-                        insert_values = [{'builderid': builderid, 'name': name}
-                                         for name in name_batch]
-
-                        q = names_table.insert().values(insert_values)
-
-                        if self.db.pool.engine.dialect.name in ['postgresql', 'mssql']:
-                            # Use RETURNING, this way we won't need an additional select query
-                            q = q.returning(names_table.c.id, names_table.c.name)
-
-                            res = conn.execute(q)
-                            for row in res.fetchall():
-                                names_to_ids[row.name] = row.id
-                                name_batch.remove(row.name)
-                        else:
-                            conn.execute(q)
-
-                    except (sa.exc.IntegrityError, sa.exc.ProgrammingError):
-                        # There was a competing addNames() call that added a name for the same
-                        # builder. Depending on the DB driver, none or some rows were inserted, but
-                        # we will re-check what's got inserted in the next iteration of the loop
-                        pass
-
-            return names_to_ids
-
-        names_to_id = yield self.db.pool.do(thd)
-        return names_to_id
-
     @defer.inlineCallbacks
     def getTestNames(self, builderid, name_prefix=None, result_spec=None):
         def thd(conn):
@@ -164,6 +157,18 @@ class TestResultsConnectorComponent(base.DBConnectorComponent):
         res = yield self.db.pool.do(thd)
         return res
 
+    def _get_builder_locks(self, builderid):
+        locks = self._builder_locks.get(builderid)
+        if locks is None:
+            locks = self._builder_locks[builderid] = (defer.DeferredLock(), defer.DeferredLock())
+        return locks
+
+    def _release_builder_lock(self, builderid, lock):
+        lock.release()
+        ids_lock, insert_lock = self._builder_locks[builderid]
+        if not ids_lock.locked and not insert_lock.locked:
+            del self._builder_locks[builderid]
+
     @defer.inlineCallbacks
     def addTestResults(self, builderid, test_result_setid, result_values):
         # Adds multiple test results for a specific test result set.
@@ -189,37 +194,53 @@ class TestResultsConnectorComponent(base.DBConnectorComponent):
             if 'test_code_path' in result_value:
                 insert_code_paths.add(result_value['test_code_path'])
 
-        code_path_to_id = yield self._add_code_paths(builderid, insert_code_paths)
-        name_to_id = yield self._add_names(builderid, insert_names)
-
-        for result_value in result_values:
-            insert_value = {
-                'value': result_value['value'],
-                'builderid': builderid,
-                'test_result_setid': test_result_setid,
-                'test_nameid': None,
-                'test_code_pathid': None,
-                'line': None,
-                'duration_ns': None,
-            }
-
-            if 'test_name' in result_value:
-                insert_value['test_nameid'] = name_to_id[result_value['test_name']]
-            if 'test_code_path' in result_value:
-                insert_value['test_code_pathid'] = code_path_to_id[result_value['test_code_path']]
-            if 'line' in result_value:
-                insert_value['line'] = result_value['line']
-            if 'duration_ns' in result_value:
-                insert_value['duration_ns'] = result_value['duration_ns']
-
-            insert_values.append(insert_value)
-
-        def thd(conn):
-            results_table = self.db.model.test_results
-            q = results_table.insert().values(insert_values)
-            conn.execute(q)
-
-        yield self.db.pool.do(thd)
+        # Several calls can be in progress for a builder: the names and code paths of one call
+        # are resolved while the results of the previous one are inserted. The ids are
+        # resolved one call at a time, so that the same name is not inserted twice, and the
+        # results are inserted in the order of the calls.
+        ids_lock, insert_lock = self._get_builder_locks(builderid)
+        yield ids_lock.acquire()
+        try:
+            code_path_to_id, name_to_id = yield self._add_ids(
+                builderid, insert_code_paths, insert_names)
+            yield insert_lock.acquire()
+        finally:
+            self._release_builder_lock(builderid, ids_lock)
+
+        try:
+            for result_value in result_values:
+                insert_value = {
+                    'value': result_value['value'],
+                    'builderid': builderid,
+                    'test_result_setid': test_result_setid,
+                    'test_nameid': None,
+                    'test_code_pathid': None,
+                    'line': None,
+                    'duration_ns': None,
+                }
+
+                if 'test_name' in result_value:
+                    insert_value['test_nameid'] = name_to_id[result_value['test_name']]
+                if 'test_code_path' in result_value:
+                    insert_value['test_code_pathid'] = \
+                        code_path_to_id[result_value['test_code_path']]
+                if 'line' in result_value:
+                    insert_value['line'] = result_value['line']
+                if 'duration_ns' in result_value:
+                    insert_value['duration_ns'] = result_value['duration_ns']
+
+                insert_values.append(insert_value)
+
+            def thd(conn):
+                # executemany is much faster than a single INSERT with thousands of VALUES
+                # tuples, which takes longer to compile than to execute. The drivers batch the
+                # rows of executemany into multi-row statements themselves.
+                results_table = self.db.model.test_results
+                conn.execute(results_table.insert(), insert_values)
+
+            yield self.db.pool.do(thd)
+        finally:
+            self._release_builder_lock(builderid, insert_lock)
 
     @defer.inlineCallbacks
     def getTestResult(self, test_resultid):
@@ -342,7 +342,7 @@ class IConfigured(Interface):
 
 class IReportGenerator(Interface):
 
-    def generate(self, master, reporter, key, build):
+    def generate(self, master, reporter, key, build, report_context=None):
         pass
 
 
@@ -21,7 +21,90 @@ from twisted.python import log
 
 from buildbot.mq import base
 from buildbot.util import service
-from buildbot.util import tuplematch
+
+
+class RoutingTableNode:
+
+    __slots__ = ['children', 'qrefs']
+
+    def __init__(self):
+        self.children = {}
+        # qref -> registration serial
+        self.qrefs = {}
+
+
+class RoutingTable:
+    """
+    Index of queue refs by filter.  Filters are stored in a trie with one
+    level per routing key component, where C{None} wildcards get their own
+    branch.  Looking up a routing key only visits the branches that can match
+    it, so the cost scales with the number of matching consumers rather than
+    the number of registered ones.
+    """
+
+    def __init__(self):
+        # filter length -> root node
+        self.roots = {}
+        self.serial = 0
+
+    def add(self, qref):
+        node = self.roots.get(len(qref.filter))
+        if node is None:
+            node = self.roots[len(qref.filter)] = RoutingTableNode()
+        for k in qref.filter:
+            child = node.children.get(k)
+            if child is None:
+                child = node.children[k] = RoutingTableNode()
+            node = child
+        self.serial += 1
+        node.qrefs[qref] = self.serial
+
+    def remove(self, qref):
+        node = self.roots.get(len(qref.filter))
+        if node is None:
+            return
+        path = [node]
+        for k in qref.filter:
+            node = node.children.get(k)
+            if node is None:
+                return
+            path.append(node)
+        if node.qrefs.pop(qref, None) is None:
+            return
+        # prune the branches which are now empty
+        for parent, k, child in zip(reversed(path[:-1]), reversed(qref.filter),
+                                    reversed(path[1:])):
+            if child.children or child.qrefs:
+                break
+            del parent.children[k]
+        if not path[0].children and not path[0].qrefs:
+            del self.roots[len(qref.filter)]
+
+    def match(self, routingKey):
+        node = self.roots.get(len(routingKey))
+        if node is None:
+            return []
+        nodes = [node]
+        for k in routingKey:
+            next_nodes = []
+            for node in nodes:
+                if k is not None:
+                    child = node.children.get(k)
+                    if child is not None:
+                        next_nodes.append(child)
+                child = node.children.get(None)
+                if child is not None:
+                    next_nodes.append(child)
+            if not next_nodes:
+                return []
+            nodes = next_nodes
+
+        if len(nodes) == 1:
+            return list(nodes[0].qrefs)
+        # invoke the consumers in the order they were registered
+        matches = [(serial, qref) for node in nodes for qref, serial in node.qrefs.items()]
+        matches.sort(key=lambda m: m[0])
+        return [qref for _, qref in matches]
 
 
 class SimpleMQ(service.ReconfigurableServiceMixin, base.MQBase):
@@ -29,6 +112,7 @@ class SimpleMQ(service.ReconfigurableServiceMixin, base.MQBase):
     def __init__(self):
         super().__init__()
         self.qrefs = []
+        self.routing_table = RoutingTable()
         self.persistent_qrefs = {}
         self.debug = False
 
@@ -39,9 +123,8 @@ class SimpleMQ(service.ReconfigurableServiceMixin, base.MQBase):
     def produce(self, routingKey, data):
         if self.debug:
             log.msg(f"MSG: {routingKey}\n{pprint.pformat(data)}")
-        for qref in self.qrefs:
-            if tuplematch.matchTuple(routingKey, qref.filter):
-                self.invokeQref(qref, routingKey, data)
+        for qref in self.routing_table.match(routingKey):
+            self.invokeQref(qref, routingKey, data)
 
     def startConsuming(self, callback, filter, persistent_name=None):
         if any(not isinstance(k, str) and k is not None for k in filter):
@@ -52,13 +135,24 @@ class SimpleMQ(service.ReconfigurableServiceMixin, base.MQBase):
                 qref.startConsuming(callback)
             else:
                 qref = PersistentQueueRef(self, callback, filter)
-                self.qrefs.append(qref)
+                self.addQref(qref)
                 self.persistent_qrefs[persistent_name] = qref
         else:
             qref = QueueRef(self, callback, filter)
-            self.qrefs.append(qref)
+            self.addQref(qref)
         return defer.succeed(qref)
 
+    def addQref(self, qref):
+        self.qrefs.append(qref)
+        self.routing_table.add(qref)
+
+    def removeQref(self, qref):
+        try:
+            self.qrefs.remove(qref)
+        except ValueError:
+            return
+        self.routing_table.remove(qref)
+
 
 class QueueRef(base.QueueRef):
 
@@ -71,10 +165,7 @@ class QueueRef(base.QueueRef):
 
     def stopConsuming(self):
         self.callback = None
-        try:
-            self.mq.qrefs.remove(self)
-        except ValueError:
-            pass
+        self.mq.removeQref(self)
 
 
 class PersistentQueueRef(QueueRef):
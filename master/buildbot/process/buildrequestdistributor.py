@@ -29,7 +29,6 @@ from buildbot.process.buildrequest import BuildRequest
 from buildbot.util import deferwaiter
 from buildbot.util import epoch2datetime
 from buildbot.util import service
-from buildbot.util.async_sort import async_sort
 
 
 class BuildChooserBase:
@@ -370,24 +369,28 @@ class BuildRequestDistributor(service.AsyncMultiService):
         timer = metrics.Timer("BuildRequestDistributor._defaultSorter()")
         timer.start()
 
-        @defer.inlineCallbacks
+        builderids = {}
+        for bldr in builders:
+            builderids[bldr.name] = yield bldr.getBuilderId()
+
+        # fetch the highest priority and oldest request time of all builders
+        # in a single query
+        summaries = yield master.db.buildrequests.getUnclaimedBuildRequestsSummary(
+            list(set(builderids.values())))
+
         def key(bldr):
-            # Sort primarily highest priority of build requests
-            priority = yield bldr.get_highest_priority()
-            if priority is None:
+            summary = summaries.get(builderids[bldr.name])
+            if summary is None:
                 # for builders that do not have pending buildrequest, we just use large number
-                priority = -math.inf
-            # Break ties using the time of oldest build request
-            time = yield bldr.getOldestRequestTime()
-            if time is None:
-                # for builders that do not have pending buildrequest, we just use large number
-                time = math.inf
-            else:
-                if isinstance(time, datetime):
-                    time = time.timestamp()
-            return (-priority, time, bldr.name)
-
-        yield async_sort(builders, key)
+                return (math.inf, math.inf, bldr.name)
+            # Sort primarily highest priority of build requests, and break ties
+            # using the time of oldest build request
+            time = summary['submitted_at']
+            if isinstance(time, datetime):
+                time = time.timestamp()
+            return (-summary['priority'], time, bldr.name)
+
+        builders.sort(key=key)
 
         timer.stop()
         return builders
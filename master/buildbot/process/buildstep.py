@@ -286,6 +286,8 @@ class BuildStep(results.ResultComputingConfigMixin,
         self.results = None
         self._start_unhandled_deferreds = None
         self._test_result_submitters = {}
+        # the commands whose collected output is discarded when the step ends
+        self._collecting_commands = []
 
     def __new__(klass, *args, **kwargs):
         self = object.__new__(klass)
@@ -537,6 +539,10 @@ class BuildStep(results.ResultComputingConfigMixin,
         if not success:
             self.results = EXCEPTION
 
+        for cmd in self._collecting_commands:
+            cmd.closeOutputCollectors()
+        self._collecting_commands = []
+
         # update the summary one last time, make sure that completes,
         # and then don't update it any more.
         self.updateSummary()
@@ -767,6 +773,8 @@ class BuildStep(results.ResultComputingConfigMixin,
 
         self.cmd = command
         command.worker = self.worker
+        if getattr(command, 'collectStdout', False) or getattr(command, 'collectStderr', False):
+            self._collecting_commands.append(command)
         try:
             res = yield command.run(self, self.remote, self.build.builder.name)
             if command.remote_failure_reason in ("timeout", "timeout_without_output"):
@@ -840,6 +848,7 @@ class ShellMixin:
     sigtermTime = None
     initialStdin = None
     decodeRC = {0: SUCCESS}
+    collectMaxMemory = None
 
     _shellMixinArgs = [
         'command',
@@ -857,6 +866,7 @@ class ShellMixin:
         'sigtermTime',
         'initialStdin',
         'decodeRC',
+        'collectMaxMemory',
     ]
     renderables = _shellMixinArgs
 
@@ -13,8 +13,6 @@
 #
 # Copyright Buildbot Team Members
 
-import re
-
 from twisted.internet import defer
 from twisted.python import log
 
@@ -78,7 +76,18 @@ class Log:
         # formatted for the log type, and newline-terminated
         assert lines[-1] == '\n'
         assert not self.finished
-        yield self.lock.run(lambda: self.master.data.updates.appendLog(self.logid, lines))
+        if self.master.config.logWriteBehind:
+            # the write-behind queue keeps the appends ordered, so we only
+            # need the lock while queueing; the queue applies backpressure
+            # once too much data is waiting to be written
+            yield self.lock.run(self._queueRawLines, lines)
+            yield self.master.data.updates.waitForLogAppendCapacity()
+        else:
+            yield self.lock.run(lambda: self.master.data.updates.appendLog(self.logid, lines))
+
+    def _queueRawLines(self, lines):
+        d = self.master.data.updates.appendLog(self.logid, lines)
+        d.addErrback(log.err, f"while appending to log {self.logid}")
 
     # completion
 
@@ -168,8 +177,6 @@ Log._byType['h'] = HtmlLog
 
 class StreamLog(Log):
 
-    pat = re.compile('^', re.M)
-
     def __init__(self, step, name, type, logid, decoder):
         super().__init__(step, name, type, logid, decoder)
         self.lbfs = {}
@@ -184,9 +191,9 @@ class StreamLog(Log):
     def _on_whole_lines(self, stream, lines):
         # deliver the un-annotated version to subscribers
         self.subPoint.deliver(stream, lines)
-        # strip the last character, as the regexp will add a
-        # prefix character after the trailing newline
-        return self.addRawLines(self.pat.sub(stream, lines)[:-1])
+        # the lines are newline-terminated, so each newline but the last one
+        # starts a line; strip the prefix character added after the last one
+        return self.addRawLines(stream + lines.replace('\n', '\n' + stream)[:-1])
 
     def split_lines(self, stream, text):
         lbf = self._getLbf(stream)
@@ -17,6 +17,7 @@
 from zope.interface import implementer
 
 from buildbot import interfaces
+from buildbot.process.remotecommand import OutputCollector
 
 
 @implementer(interfaces.ILogObserver)
@@ -141,10 +142,10 @@ class OutputProgressObserver(LogObserver):
 
 class BufferLogObserver(LogObserver):
 
-    def __init__(self, wantStdout=True, wantStderr=False):
+    def __init__(self, wantStdout=True, wantStderr=False, maxMemory=None):
         super().__init__()
-        self.stdout = [] if wantStdout else None
-        self.stderr = [] if wantStderr else None
+        self.stdout = OutputCollector(maxMemory) if wantStdout else None
+        self.stderr = OutputCollector(maxMemory) if wantStderr else None
 
     def outReceived(self, data):
         if self.stdout is not None:
@@ -154,13 +155,19 @@ class BufferLogObserver(LogObserver):
         if self.stderr is not None:
             self.stderr.append(data)
 
-    def _get(self, chunks):
-        if chunks is None or not chunks:
+    def _get(self, collector):
+        if collector is None:
             return ''
-        return ''.join(chunks)
+        return collector.getvalue()
 
     def getStdout(self):
         return self._get(self.stdout)
 
     def getStderr(self):
         return self._get(self.stderr)
+
+    def close(self):
+        # discard the buffered output, and the temporary files holding it
+        for collector in (self.stdout, self.stderr):
+            if collector is not None:
+                collector.close()
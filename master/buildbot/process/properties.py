@@ -27,6 +27,7 @@ from buildbot import util
 from buildbot.interfaces import IProperties
 from buildbot.interfaces import IRenderable
 from buildbot.util import flatten
+from buildbot.util.secret_redaction import SecretRedactor
 
 
 @implementer(IProperties)
@@ -59,6 +60,7 @@ class Properties(util.ComparableMixin):
         self.runtime = set()
         self.build = None  # will be set by the Build when starting
         self._used_secrets = {}
+        self._secret_redactor = None
         if kwargs:
             self.update(kwargs, "TEST")
         self._master = None
@@ -125,12 +127,16 @@ class Properties(util.ComparableMixin):
     def __getstate__(self):
         d = self.__dict__.copy()
         d['build'] = None
+        d['_secret_redactor'] = None
         return d
 
     def __setstate__(self, d):
         self.__dict__ = d
         if not hasattr(self, 'runtime'):
             self.runtime = set()
+        if not hasattr(self, '_used_secrets'):
+            self._used_secrets = {}
+        self._secret_redactor = None
 
     def __contains__(self, name):
         return name in self.properties
@@ -213,16 +219,21 @@ class Properties(util.ComparableMixin):
     # so we have the renderable record here which secrets are used that we must remove
     def useSecret(self, secret_value, secret_name):
         if secret_value.strip():
-            self._used_secrets[secret_value] = "<" + secret_name + ">"
+            replacement = "<" + secret_name + ">"
+            if self._used_secrets.get(secret_value) != replacement:
+                self._used_secrets[secret_value] = replacement
+                # recompiled on next use
+                self._secret_redactor = None
+
+    def getSecretRedactor(self):
+        if self._secret_redactor is None:
+            self._secret_redactor = SecretRedactor(self._used_secrets)
+        return self._secret_redactor
 
     # This method shall then be called to remove secrets from any text that could be logged
     # somewhere and that could contain secrets
     def cleanupTextFromSecrets(self, text):
-        # Better be correct and inefficient than efficient and wrong
-        secrets = self._used_secrets
-        for k in sorted(secrets, key=len, reverse=True):
-            text = text.replace(k, secrets[k])
-        return text
+        return self.getSecretRedactor().redact(text)
 
 
 class PropertiesMixin:
@@ -13,6 +13,8 @@
 #
 # Copyright Buildbot Team Members
 
+import tempfile
+
 from twisted.internet import defer
 from twisted.internet import error
 from twisted.python import log
@@ -30,10 +32,115 @@ from buildbot.util.eventual import eventually
 from buildbot.worker.protocols import base
 
 
+# number of characters of collected output kept in memory before it is
+# spilled to a temporary file
+COLLECT_MAX_MEMORY = 8 * 1024 * 1024
+
+
 class RemoteException(Exception):
     pass
 
 
+class OutputCollector:
+    """
+    Accumulate the output of a command stream.  Appending does not copy the
+    output collected so far, and once more than C{max_memory} characters are
+    collected, the output is written to a temporary file instead of being
+    kept in memory.
+
+    Iterating over the collector yields the output by chunks, without
+    building it as a single string; L{getvalue} returns the whole output.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, max_memory=None):
+        if max_memory is None:
+            max_memory = COLLECT_MAX_MEMORY
+        self.max_memory = max_memory
+        self._pieces = []
+        self._size = 0
+        self._file = None
+
+    def append(self, data):
+        if not data:
+            return
+        self._size += len(data)
+        if self._file is not None:
+            self._file.write(data)
+            return
+        self._pieces.append(data)
+        if self._size > self.max_memory:
+            self._spill()
+
+    def _spill(self):
+        self._file = tempfile.TemporaryFile(mode='w+', encoding='utf-8',
+                                            errors='surrogatepass', newline='')
+        self._file.writelines(self._pieces)
+        self._pieces = []
+
+    @property
+    def spilled(self):
+        return self._file is not None
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __iter__(self):
+        if self._file is None:
+            # a copy, so that the output can be appended to while iterating
+            yield from list(self._pieces)
+            return
+        self._file.flush()
+        pos = 0
+        while True:
+            # the file is appended to between reads, so seek back to where
+            # the iteration is at each time
+            self._file.seek(pos)
+            data = self._file.read(self.READ_SIZE)
+            pos = self._file.tell()
+            self._file.seek(0, 2)
+            if not data:
+                return
+            yield data
+
+    def lines(self):
+        """
+        Yield the lines of the output, with their newline.  The last line
+        is yielded without one if the output does not end with a newline.
+        """
+        partial = []
+        for data in self:
+            end = data.rfind('\n') + 1
+            if not end:
+                partial.append(data)
+                continue
+            partial.append(data[:end - 1])
+            for line in ''.join(partial).split('\n'):
+                yield line + '\n'
+            partial = [data[end:]]
+        last = ''.join(partial)
+        if last:
+            yield last
+
+    def getvalue(self):
+        if self._file is None:
+            if len(self._pieces) > 1:
+                self._pieces = [''.join(self._pieces)]
+            return self._pieces[0] if self._pieces else ''
+        return ''.join(self)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._pieces = []
+        self._size = 0
+
+
 class RemoteCommand(base.RemoteCommandImpl):
 
     # class-level unique identifier generator for command ids
@@ -45,7 +152,7 @@ class RemoteCommand(base.RemoteCommandImpl):
 
     def __init__(self, remote_command, args, ignore_updates=False,
                  collectStdout=False, collectStderr=False, decodeRC=None,
-                 stdioLogName='stdio'):
+                 stdioLogName='stdio', collectMaxMemory=None):
         if decodeRC is None:
             decodeRC = {0: SUCCESS}
         self.logs = {}
@@ -53,8 +160,8 @@ class RemoteCommand(base.RemoteCommandImpl):
         self._closeWhenFinished = {}
         self.collectStdout = collectStdout
         self.collectStderr = collectStderr
-        self.stdout = ''
-        self.stderr = ''
+        self.stdout_collector = OutputCollector(collectMaxMemory)
+        self.stderr_collector = OutputCollector(collectMaxMemory)
         self.updates = {}
         self.stdioLogName = stdioLogName
         self._startTime = None
@@ -77,6 +184,25 @@ class RemoteCommand(base.RemoteCommandImpl):
         # wait for the Deferred from one method before invoking the next.
         self.loglock = defer.DeferredLock()
         self._line_boundary_finders = {}
+        # per stream raw text which may contain the beginning of a secret
+        self._secrets_carry = {}
+
+    # these build the whole output as a single string, again on each access
+    # once the output was written to a file; commands with a large output are
+    # better read through the lines of their collectors
+
+    @property
+    def stdout(self):
+        return self.stdout_collector.getvalue()
+
+    @property
+    def stderr(self):
+        return self.stderr_collector.getvalue()
+
+    def closeOutputCollectors(self):
+        # discard the collected output, and the temporary files holding it
+        self.stdout_collector.close()
+        self.stderr_collector.close()
 
     def __repr__(self):
         return f"<RemoteCommand '{self.remote_command}' at {id(self)}>"
@@ -204,6 +330,9 @@ class RemoteCommand(base.RemoteCommandImpl):
         try:
             for key, value in updates:
                 if self.active and not self.ignore_updates:
+                    # the worker only sends whole lines with the msgpack
+                    # protocol, with newlines already folded, so they are
+                    # used as they are, without going through split_line
                     if key in ['stdout', 'stderr', 'header']:
                         self.remoteUpdate(key, value[0], False)
                     elif key == "log":
@@ -281,7 +410,7 @@ class RemoteCommand(base.RemoteCommandImpl):
     @util.deferredLocked('loglock')
     def addStdout(self, data):
         if self.collectStdout:
-            self.stdout += data
+            self.stdout_collector.append(data)
         if self.stdioLogName is not None and self.stdioLogName in self.logs:
             self.logs[self.stdioLogName].addStdout(data)
         return defer.succeed(None)
@@ -291,7 +420,7 @@ class RemoteCommand(base.RemoteCommandImpl):
         if self.collectStdout:
             if is_flushed:
                 data = data[:-1]
-            self.stdout += data
+            self.stdout_collector.append(data)
         if self.stdioLogName is not None and self.stdioLogName in self.logs:
             self.logs[self.stdioLogName].add_stdout_lines(data)
         return defer.succeed(None)
@@ -299,7 +428,7 @@ class RemoteCommand(base.RemoteCommandImpl):
     @util.deferredLocked('loglock')
     def addStderr(self, data):
         if self.collectStderr:
-            self.stderr += data
+            self.stderr_collector.append(data)
         if self.stdioLogName is not None and self.stdioLogName in self.logs:
             self.logs[self.stdioLogName].addStderr(data)
         return defer.succeed(None)
@@ -309,7 +438,7 @@ class RemoteCommand(base.RemoteCommandImpl):
         if self.collectStderr:
             if is_flushed:
                 data = data[:-1]
-            self.stderr += data
+            self.stderr_collector.append(data)
         if self.stdioLogName is not None and self.stdioLogName in self.logs:
             self.logs[self.stdioLogName].add_stderr_lines(data)
         return defer.succeed(None)
@@ -342,28 +471,61 @@ class RemoteCommand(base.RemoteCommandImpl):
         else:
             log.msg(f"{self}.addToLog: no such log {logname}")
 
+    def _cleanup_secrets(self, stream, data, is_flushed):
+        if self.step is None:
+            return data
+        redactor = self.step.build.properties.getSecretRedactor()
+        if stream in self._secrets_carry:
+            data = self._secrets_carry.pop(stream) + data
+        if is_flushed:
+            return redactor.redact(data)
+        data, carry = redactor.redact_partial(data)
+        if carry:
+            self._secrets_carry[stream] = carry
+        return data
+
+    @defer.inlineCallbacks
+    def _flush_secrets_carry(self, stream):
+        data = self._secrets_carry.pop(stream, None)
+        if not data:
+            return
+        data = self.step.build.properties.cleanupTextFromSecrets(data)
+        if stream == "stdout":
+            yield self.add_stdout_lines(data, False)
+        elif stream == "stderr":
+            yield self.add_stderr_lines(data, False)
+        elif stream == "header":
+            yield self.add_header_lines(data)
+        else:
+            yield self.addToLog(stream[1], data)
+
     @metrics.countMethod('RemoteCommand.remoteUpdate()')
     @defer.inlineCallbacks
     def remoteUpdate(self, key, value, is_flushed):
-        def cleanup(data):
-            if self.step is None:
-                return data
-            return self.step.build.properties.cleanupTextFromSecrets(data)
-
         if self.debug:
             log.msg(f"Update[{key}]: {value}")
-        if key == "stdout":
-            yield self.add_stdout_lines(cleanup(value), is_flushed)
-        if key == "stderr":
-            yield self.add_stderr_lines(cleanup(value), is_flushed)
-        if key == "header":
-            yield self.add_header_lines(cleanup(value))
+        if key in ("stdout", "stderr", "header"):
+            # secrets may be split between updates, so part of the text may
+            # be held back until the next update of the same stream
+            value = self._cleanup_secrets(key, value, is_flushed)
+            if value:
+                if key == "stdout":
+                    yield self.add_stdout_lines(value, is_flushed)
+                elif key == "stderr":
+                    yield self.add_stderr_lines(value, is_flushed)
+                else:
+                    yield self.add_header_lines(value)
         if key == "log":
             logname, data = value
-            yield self.addToLog(logname, cleanup(data))
+            data = self._cleanup_secrets(("log", logname), data, is_flushed)
+            if data:
+                yield self.addToLog(logname, data)
         if key == "rc":
             rc = self.rc = value
             log.msg(f"{self} rc={rc}")
+            # the output held back so far precedes the exit code
+            for stream in list(self._secrets_carry):
+                yield self._flush_secrets_carry(stream)
             yield self.add_header_lines(f"program finished with exit code {rc}\n")
         if key == "elapsed":
             self._remoteElapsed = value
@@ -394,6 +556,9 @@ class RemoteCommand(base.RemoteCommandImpl):
                 if whole_line is not None:
                     yield self.remoteUpdate("log", value, True)
 
+        for stream in list(self._secrets_carry):
+            yield self._flush_secrets_carry(stream)
+
         try:
             yield self.loglock.acquire()
             for name, loog in self.logs.items():
@@ -443,7 +608,7 @@ class RemoteShellCommand(RemoteCommand):
                  collectStdout=False, collectStderr=False,
                  interruptSignal=None,
                  initialStdin=None, decodeRC=None,
-                 stdioLogName='stdio'):
+                 stdioLogName='stdio', collectMaxMemory=None):
         if logfiles is None:
             logfiles = {}
         if decodeRC is None:
@@ -483,7 +648,8 @@ class RemoteShellCommand(RemoteCommand):
         super().__init__("shell", args, collectStdout=collectStdout,
                          collectStderr=collectStderr,
                          decodeRC=decodeRC,
-                         stdioLogName=stdioLogName)
+                         stdioLogName=stdioLogName,
+                         collectMaxMemory=collectMaxMemory)
 
     def _start(self):
         if self.args['usePTY'] is None:
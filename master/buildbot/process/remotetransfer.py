@@ -18,10 +18,16 @@ module for regrouping all FileWriterImpl and FileReaderImpl away from steps
 """
 
 import os
+import queue
 import tarfile
 import tempfile
+import threading
 from io import BytesIO
 
+from twisted.internet import defer
+from twisted.internet import reactor
+from twisted.python import failure
+
 from buildbot.util import bytes2unicode
 from buildbot.util import unicode2bytes
 from buildbot.worker.protocols import base
@@ -45,6 +51,7 @@ class FileWriter(base.FileWriterImpl):
         fd, self.tmpname = tempfile.mkstemp(dir=dirname, prefix='buildbot-transfer-')
         self.fp = os.fdopen(fd, 'wb')
         self.remaining = maxsize
+        self.bytes_written = 0
 
     def remote_write(self, data):
         """
@@ -62,6 +69,7 @@ class FileWriter(base.FileWriterImpl):
             self.remaining = self.remaining - len(data)
         else:
             self.fp.write(data)
+        self.bytes_written += len(data)
 
     def remote_utime(self, accessed_modified):
         os.utime(self.destfile, accessed_modified)
@@ -93,41 +101,145 @@ class FileWriter(base.FileWriterImpl):
                 os.unlink(self.tmpname)
 
 
-class DirectoryWriter(FileWriter):
+class _EndOfStream:
+    pass
+
+
+class DirectoryWriter(base.FileWriterImpl):
 
     """
-    A DirectoryWriter is implemented as a FileWriter, with an added post-processing
-    step to unpack the archive, once the transfer has completed.
+    A DirectoryWriter unpacks the tarball sent by the worker into the
+    destination directory while it is being received.
+
+    The archive is read and extracted by a separate thread, so that neither
+    big archives nor slow disks block the reactor, and the archive itself is
+    never stored on the master. Each write is acknowledged once the thread has
+    taken its data, so that the data waiting in memory is limited to what the
+    worker may send ahead.
+
+    If the transfer is cancelled, the files extracted so far are left in
+    place.
     """
 
     def __init__(self, destroot, maxsize, compress, mode):
         self.destroot = destroot
+        self.remaining = maxsize
+        self.bytes_written = 0
         self.compress = compress
+        self.mode = mode
 
-        self.fd, self.tarname = tempfile.mkstemp(prefix='buildbot-transfer-')
-        os.close(self.fd)
+        self._chunks = queue.Queue()
+        self._buffer = b''
+        self._end_of_stream = False
+        self._thread = None
+        self._closed = False
+        # None while unpacking, then None or a Failure
+        self._result = None
+        self._done = False
+        self._waiters = []
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._thd_unpack, daemon=True)
+            self._thread.start()
+
+    def _stop(self):
+        if not self._closed:
+            self._closed = True
+            self._chunks.put((_EndOfStream, None))
 
-        super().__init__(self.tarname, maxsize, mode)
+    def remote_write(self, data):
+        """
+        Called from remote worker to write L{data} to the archive within
+        boundaries of L{maxsize}
+
+        @return: Deferred firing once the data has been taken by the
+        unpacking thread
+        """
+        if self._done and self._result is not None:
+            return defer.fail(self._result)
+        data = unicode2bytes(data)
+        if self.remaining is not None:
+            data = data[:self.remaining]
+            self.remaining -= len(data)
+        if not data or self._closed:
+            return None
+        self.bytes_written += len(data)
+        self._start()
+        d = defer.Deferred()
+        self._chunks.put((data, d))
+        return d
 
     def remote_unpack(self):
         """
         Called by remote worker to state that no more data will be transferred
+
+        @return: Deferred firing once the archive has been unpacked
         """
-        # Make sure remote_close is called, otherwise atomic rename won't happen
-        self.remote_close()
+        self._start()
+        self._stop()
+        d = defer.Deferred()
+        if self._done:
+            d.callback(self._result)
+        else:
+            self._waiters.append(d)
+        return d
 
+    def cancel(self):
+        # unclean shutdown, stop the unpacking thread where it is
+        self._stop()
+
+    def _unpack_done(self, result):
+        self._result = result
+        self._done = True
+        waiters, self._waiters = self._waiters, []
+        for d in waiters:
+            d.callback(result)
+
+    def _thd_next_chunk(self, result=None):
+        if self._end_of_stream:
+            return None
+        data, d = self._chunks.get()
+        if data is _EndOfStream:
+            self._end_of_stream = True
+            return None
+        if isinstance(result, failure.Failure):
+            reactor.callFromThread(d.errback, result)
+        else:
+            reactor.callFromThread(d.callback, None)
+        return data
+
+    def read(self, size):
+        # file-like interface used by tarfile, in the unpacking thread
+        while len(self._buffer) < size:
+            data = self._thd_next_chunk()
+            if data is None:
+                break
+            self._buffer += data
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _thd_unpack(self):
         # Map configured compression to a TarFile setting
         if self.compress == 'bz2':
             mode = 'r|bz2'
         elif self.compress == 'gz':
             mode = 'r|gz'
         else:
-            mode = 'r'
-
-        # Unpack archive and clean up after self
-        with tarfile.open(name=self.tarname, mode=mode) as archive:
-            archive.extractall(path=self.destroot)
-        os.remove(self.tarname)
+            mode = 'r|'
+
+        result = None
+        try:
+            with tarfile.open(mode=mode, fileobj=self) as archive:
+                archive.extractall(path=self.destroot)
+        except Exception:
+            result = failure.Failure()
+        # the end of the archive may be followed by padding, which is read
+        # too so that all writes are answered; after a failure, the remaining
+        # writes fail with the same error
+        while self._thd_next_chunk(result) is not None:
+            pass
+        reactor.callFromThread(self._unpack_done, result)
 
 
 class FileReader(base.FileReaderImpl):
@@ -14,6 +14,7 @@
 # Copyright Buildbot Team Members
 
 import abc
+import inspect
 
 from twisted.internet import defer
 from twisted.python import log
@@ -95,6 +96,10 @@ class ReporterBase(service.BuildbotService):
 
     @defer.inlineCallbacks
     def _got_event(self, key, msg):
+        # the data fetched by the generators is shared with the other
+        # reporters handling the same message
+        report_context = utils.ReportContext.acquire(self.master, msg)
+
         chain_key = self._get_chain_key_for_event(key, msg)
         if chain_key is not None:
             d = defer.Deferred()
@@ -109,7 +114,7 @@ class ReporterBase(service.BuildbotService):
             reports = []
             for g in self.generators:
                 if self._does_generator_want_key(g, key):
-                    report = yield g.generate(self.master, self, key, msg)
+                    report = yield self._generate(g, key, msg, report_context)
                     if report is not None:
                         reports.append(report)
 
@@ -117,12 +122,20 @@ class ReporterBase(service.BuildbotService):
                 yield self.sendMessage(reports)
         except Exception as e:
             log.err(e, 'Got exception when handling reporter events')
+        finally:
+            report_context.release()
 
         if chain_key is not None:
             if self._pending_got_event_calls.get(chain_key) == d:
                 del self._pending_got_event_calls[chain_key]
             d.callback(None)  # This event is now fully handled
 
+    def _generate(self, generator, key, msg, report_context):
+        # generators written before report contexts existed do not accept one
+        if 'report_context' in inspect.signature(generator.generate).parameters:
+            return generator.generate(self.master, self, key, msg, report_context=report_context)
+        return generator.generate(self.master, self, key, msg)
+
     def getResponsibleUsersForBuild(self, master, buildid):
         # Use library method but subclassers may want to override that
         return utils.getResponsibleUsersForBuild(master, buildid)
@@ -56,7 +56,7 @@ class BuildStatusGenerator(BuildStatusGeneratorMixin):
             ]
 
     @defer.inlineCallbacks
-    def generate(self, master, reporter, key, build):
+    def generate(self, master, reporter, key, build, report_context=None):
         _, _, event = key
         is_new = event == 'new'
         want_previous_build = False if is_new else self._want_previous_build()
@@ -66,14 +66,16 @@ class BuildStatusGenerator(BuildStatusGeneratorMixin):
                                        want_steps=self.formatter.want_steps,
                                        want_previous_build=want_previous_build,
                                        want_logs=self.formatter.want_logs,
-                                       want_logs_content=self.formatter.want_logs_content)
+                                       want_logs_content=self.formatter.want_logs_content,
+                                       report_context=report_context)
 
         if not self.is_message_needed_by_props(build):
             return None
         if not is_new and not self.is_message_needed_by_results(build):
             return None
 
-        report = yield self.build_message(self.formatter, master, reporter, build)
+        report = yield self.build_message(self.formatter, master, reporter, build,
+                                          report_context=report_context)
         return report
 
     def _want_previous_build(self):
@@ -102,7 +104,7 @@ class BuildStartEndStatusGenerator(BuildStatusGeneratorMixin):
             self.end_formatter = MessageFormatterRenderable('Build done.')
 
     @defer.inlineCallbacks
-    def generate(self, master, reporter, key, build):
+    def generate(self, master, reporter, key, build, report_context=None):
         _, _, event = key
         is_new = event == 'new'
 
@@ -112,10 +114,12 @@ class BuildStartEndStatusGenerator(BuildStatusGeneratorMixin):
                                        want_properties=formatter.want_properties,
                                        want_steps=formatter.want_steps,
                                        want_logs=formatter.want_logs,
-                                       want_logs_content=formatter.want_logs_content)
+                                       want_logs_content=formatter.want_logs_content,
+                                       report_context=report_context)
 
         if not self.is_message_needed_by_props(build):
             return None
 
-        report = yield self.build_message(formatter, master, reporter, build)
+        report = yield self.build_message(formatter, master, reporter, build,
+                                          report_context=report_context)
         return report
@@ -62,7 +62,7 @@ class BuildRequestGenerator(BuildStatusGeneratorMixin):
         return bdict
 
     @defer.inlineCallbacks
-    def generate(self, master, reporter, key, buildrequest):
+    def generate(self, master, reporter, key, buildrequest, report_context=None):
         build = yield self.partial_build_dict(master, buildrequest)
         _, _, event = key
         if event == 'cancel':
@@ -49,14 +49,15 @@ class BuildSetStatusGenerator(BuildStatusGeneratorMixin):
             self.formatter = MessageFormatter()
 
     @defer.inlineCallbacks
-    def generate(self, master, reporter, key, message):
+    def generate(self, master, reporter, key, message, report_context=None):
         bsid = message['bsid']
         res = yield utils.getDetailsForBuildset(master, bsid,
                                                 want_properties=self.formatter.want_properties,
                                                 want_steps=self.formatter.want_steps,
                                                 want_previous_build=self._want_previous_build(),
                                                 want_logs=self.formatter.want_logs,
-                                                want_logs_content=self.formatter.want_logs_content)
+                                                want_logs_content=self.formatter.want_logs_content,
+                                                report_context=report_context)
 
         builds = res['builds']
         buildset = res['buildset']
@@ -69,11 +70,12 @@ class BuildSetStatusGenerator(BuildStatusGeneratorMixin):
             return None
 
         report = yield self.buildset_message(self.formatter, master, reporter, builds,
-                                             buildset['results'])
+                                             buildset['results'], report_context=report_context)
         return report
 
     @defer.inlineCallbacks
-    def buildset_message(self, formatter, master, reporter, builds, results):
+    def buildset_message(self, formatter, master, reporter, builds, results,
+                         report_context=None):
         # The given builds must refer to builds from a single buildset
         patches = []
         logs = []
@@ -84,7 +86,8 @@ class BuildSetStatusGenerator(BuildStatusGeneratorMixin):
         for build in builds:
             patches.extend(self._get_patches_for_build(build))
 
-            build_logs = yield self._get_logs_for_build(master, build)
+            build_logs = yield self._get_logs_for_build(master, build,
+                                                        report_context=report_context)
             logs.extend(build_logs)
 
             blamelist = yield reporter.getResponsibleUsersForBuild(master, build['buildid'])
@@ -24,6 +24,7 @@ from buildbot.process.results import FAILURE
 from buildbot.process.results import SUCCESS
 from buildbot.process.results import WARNINGS
 from buildbot.process.results import statusToString
+from buildbot.reporters import utils
 
 
 class BuildStatusGeneratorMixin(util.ComparableMixin):
@@ -172,10 +173,10 @@ class BuildStatusGeneratorMixin(util.ComparableMixin):
                 if 'patch' in ss and ss['patch'] is not None]
 
     @defer.inlineCallbacks
-    def build_message(self, formatter, master, reporter, build):
+    def build_message(self, formatter, master, reporter, build, report_context=None):
         patches = self._get_patches_for_build(build)
 
-        logs = yield self._get_logs_for_build(master, build)
+        logs = yield self._get_logs_for_build(master, build, report_context=report_context)
 
         users = yield reporter.getResponsibleUsersForBuild(master, build['buildid'])
 
@@ -203,19 +204,31 @@ class BuildStatusGeneratorMixin(util.ComparableMixin):
         }
 
     @defer.inlineCallbacks
-    def _get_logs_for_build(self, master, build):
+    def _get_logs_for_build(self, master, build, report_context=None):
         if not self.add_logs:
             return []
 
+        data = report_context or master.data
+        steps, logs = yield defer.gatherResults([
+            data.get(('builds', build['buildid'], "steps")),
+            data.get(('builds', build['buildid'], "logs"))])
+
+        logs_by_stepid = {}
+        for l in logs:
+            logs_by_stepid.setdefault(l['stepid'], []).append(l)
         all_logs = []
-        steps = yield master.data.get(('builds', build['buildid'], "steps"))
         for step in steps:
-            logs = yield master.data.get(("steps", step['stepid'], 'logs'))
-            for l in logs:
+            for l in logs_by_stepid.get(step['stepid'], []):
                 l['stepname'] = step['name']
                 if self._should_attach_log(l):
-                    l['content'] = yield master.data.get(("logs", l['logid'], 'contents'))
                     all_logs.append(l)
+
+        if all_logs:
+            contents = yield utils.get_logs_contents(
+                master, build['buildid'], logids=[l['logid'] for l in all_logs],
+                max_bytes=utils.LOG_CONTENT_MAX_BYTES, report_context=report_context)
+            for l in all_logs:
+                l['content'] = contents[l['logid']]
         return all_logs
 
     def _verify_build_generator_mode(self, mode):
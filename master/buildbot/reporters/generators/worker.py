@@ -44,7 +44,7 @@ class WorkerMissingGenerator(util.ComparableMixin):
             config.error("workers must be 'all', or list of worker names")
 
     @defer.inlineCallbacks
-    def generate(self, master, reporter, key, worker):
+    def generate(self, master, reporter, key, worker, report_context=None):
         if not self._is_message_needed(worker):
             return None
 
@@ -13,47 +13,130 @@
 #
 # Copyright Buildbot Team Members
 
+import copy
+import weakref
 from collections import UserList
 
 from twisted.internet import defer
+from twisted.python import failure
 from twisted.python import log
 
 from buildbot.data import resultspec
 from buildbot.process.properties import renderer
-from buildbot.process.results import RETRY
 from buildbot.util import flatten
 
 
-@defer.inlineCallbacks
-def getPreviousBuild(master, build):
-    # naive n-1 algorithm. Still need to define what we should skip
-    # SKIP builds? forced builds? rebuilds?
-    # don't hesitate to contribute improvements to that algorithm
-    n = build['number'] - 1
-    while n >= 0:
-        prev = yield master.data.get(("builders", build['builderid'], "builds", n))
-
-        if prev and prev['results'] != RETRY:
-            return prev
-        n -= 1
-    return None
+# the contents of the logs included in the reports are truncated to that
+# size, so that a huge log is never loaded in memory to be reported
+LOG_CONTENT_MAX_BYTES = 1024 * 1024
+
+
+class ReportContext:
+
+    """
+    A short-lived cache of the data API results fetched while reporting on one
+    MQ message.  All the reporters consuming the message share the context
+    of the message, so that each piece of data is fetched once whatever the
+    number of reporters and generators handling the message.
+
+    Every caller of L{get} gets its own copy of the result, which it is free to
+    modify.  The context is dropped once no reporter handles the message
+    anymore.
+    """
+
+    _contexts = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def acquire(cls, master, message):
+        contexts = cls._contexts.setdefault(master, {})
+        context = contexts.get(id(message))
+        if context is None:
+            context = contexts[id(message)] = cls(master, message)
+        context._users += 1
+        return context
+
+    def __init__(self, master, message):
+        self.master = master
+        # keeping a reference to the message makes sure its id is not reused
+        # while the context is registered
+        self.message = message
+        self._users = 0
+        self._results = {}
+        self._pending = {}
+
+    def release(self):
+        self._users -= 1
+        if self._users == 0:
+            # the other consumers of the message may only be invoked once the
+            # first one is done with it, so keep the context until then
+            self.master.reactor.callLater(0, self._drop)
+
+    def _drop(self):
+        if self._users:
+            return
+        contexts = self._contexts.get(self.master, {})
+        if contexts.get(id(self.message)) is self:
+            del contexts[id(self.message)]
+
+    def get(self, path, filters=None, fields=None, order=None, limit=None, offset=None):
+        key = (tuple(path), repr(filters), repr(fields), repr(order), limit, offset)
+        if key in self._results:
+            return defer.succeed(copy.deepcopy(self._results[key]))
+
+        d = defer.Deferred()
+        waiters = self._pending.get(key)
+        if waiters is not None:
+            waiters.append(d)
+            return d
+        self._pending[key] = [d]
+        self.master.data.get(path, filters=filters, fields=fields, order=order,
+                             limit=limit, offset=offset).addBoth(self._gotResult, key)
+        return d
+
+    def _gotResult(self, result, key):
+        waiters = self._pending.pop(key)
+        if isinstance(result, failure.Failure):
+            # failures are not cached, the next caller tries again
+            for d in waiters:
+                d.errback(result)
+            return
+        self._results[key] = result
+        for d in waiters:
+            d.callback(copy.deepcopy(result))
+
+
+def _get_data(master, report_context):
+    if report_context is not None:
+        return report_context
+    return master.data
+
+
+def getPreviousBuild(master, build, report_context=None):
+    # the last completed build of the builder, skipping the retried builds.
+    # Still need to define what we should skip: SKIP builds? forced builds?
+    # rebuilds? don't hesitate to contribute improvements to that algorithm
+    data = _get_data(master, report_context)
+    return data.get(("builders", build['builderid'], "builds", build['number'], "previous"))
 
 
 @defer.inlineCallbacks
 def getDetailsForBuildset(master, bsid, want_properties=False, want_steps=False,
-                          want_previous_build=False, want_logs=False, want_logs_content=False):
+                          want_previous_build=False, want_logs=False, want_logs_content=False,
+                          report_context=None):
     # Here we will do a bunch of data api calls on behalf of the reporters
     # We do try to make *some* calls in parallel with the help of gatherResults, but don't commit
     # to much in that. The idea is to do parallelism while keeping the code readable
     # and maintainable.
 
+    data = _get_data(master, report_context)
+
     # first, just get the buildset and all build requests for our buildset id
-    dl = [master.data.get(("buildsets", bsid)),
-          master.data.get(('buildrequests', ),
-                          filters=[resultspec.Filter('buildsetid', 'eq', [bsid])])]
+    dl = [data.get(("buildsets", bsid)),
+          data.get(('buildrequests', ),
+                   filters=[resultspec.Filter('buildsetid', 'eq', [bsid])])]
     (buildset, breqs) = yield defer.gatherResults(dl)
     # next, get the bdictlist for each build request
-    dl = [master.data.get(("buildrequests", breq['buildrequestid'], 'builds'))
+    dl = [data.get(("buildrequests", breq['buildrequestid'], 'builds'))
           for breq in breqs]
 
     builds = yield defer.gatherResults(dl)
@@ -62,23 +145,27 @@ def getDetailsForBuildset(master, bsid, want_properties=False, want_steps=False,
         yield getDetailsForBuilds(master, buildset, builds, want_properties=want_properties,
                                   want_steps=want_steps, want_previous_build=want_previous_build,
                                   want_logs=want_logs,
-                                  want_logs_content=want_logs_content)
+                                  want_logs_content=want_logs_content,
+                                  report_context=report_context)
 
     return {"buildset": buildset, "builds": builds}
 
 
 @defer.inlineCallbacks
 def getDetailsForBuild(master, build, want_properties=False, want_steps=False,
-                       want_previous_build=False, want_logs=False, want_logs_content=False):
-    buildrequest = yield master.data.get(("buildrequests", build['buildrequestid']))
-    buildset = yield master.data.get(("buildsets", buildrequest['buildsetid']))
+                       want_previous_build=False, want_logs=False, want_logs_content=False,
+                       report_context=None):
+    data = _get_data(master, report_context)
+
+    buildrequest = yield data.get(("buildrequests", build['buildrequestid']))
+    buildset = yield data.get(("buildsets", buildrequest['buildsetid']))
     build['buildrequest'], build['buildset'] = buildrequest, buildset
 
     parentbuild = None
     parentbuilder = None
     if buildset['parent_buildid']:
-        parentbuild = yield master.data.get(("builds", buildset['parent_buildid']))
-        parentbuilder = yield master.data.get(("builders", parentbuild['builderid']))
+        parentbuild = yield data.get(("builds", buildset['parent_buildid']))
+        parentbuilder = yield data.get(("builders", parentbuild['builderid']))
     build['parentbuild'] = parentbuild
     build['parentbuilder'] = parentbuilder
 
@@ -86,7 +173,8 @@ def getDetailsForBuild(master, build, want_properties=False, want_steps=False,
                                     want_properties=want_properties, want_steps=want_steps,
                                     want_previous_build=want_previous_build,
                                     want_logs=want_logs,
-                                    want_logs_content=want_logs_content)
+                                    want_logs_content=want_logs_content,
+                                    report_context=report_context)
     return ret
 
 
@@ -106,11 +194,13 @@ def get_details_for_buildrequest(master, buildrequest, build):
 
 @defer.inlineCallbacks
 def getDetailsForBuilds(master, buildset, builds, want_properties=False, want_steps=False,
-                        want_previous_build=False, want_logs=False, want_logs_content=False):
+                        want_previous_build=False, want_logs=False, want_logs_content=False,
+                        report_context=None):
+    data = _get_data(master, report_context)
 
     builderids = {build['builderid'] for build in builds}
 
-    builders = yield defer.gatherResults([master.data.get(("builders", _id))
+    builders = yield defer.gatherResults([data.get(("builders", _id))
                                           for _id in builderids])
 
     buildersbyid = {builder['builderid']: builder
@@ -118,14 +208,15 @@ def getDetailsForBuilds(master, buildset, builds, want_properties=False, want_st
 
     if want_properties:
         buildproperties = yield defer.gatherResults(
-            [master.data.get(("builds", build['buildid'], 'properties'))
+            [data.get(("builds", build['buildid'], 'properties'))
              for build in builds])
     else:  # we still need a list for the big zip
         buildproperties = list(range(len(builds)))
 
     if want_previous_build:
         prev_builds = yield defer.gatherResults(
-            [getPreviousBuild(master, build) for build in builds])
+            [getPreviousBuild(master, build, report_context=report_context)
+             for build in builds])
     else:  # we still need a list for the big zip
         prev_builds = list(range(len(builds)))
 
@@ -136,18 +227,32 @@ def getDetailsForBuilds(master, buildset, builds, want_properties=False, want_st
 
     if want_steps:  # pylint: disable=too-many-nested-blocks
         buildsteps = yield defer.gatherResults(
-            [master.data.get(("builds", build['buildid'], 'steps'))
+            [data.get(("builds", build['buildid'], 'steps'))
              for build in builds])
         if want_logs:
-            for build, build_steps in zip(builds, buildsteps):
+            buildlogs = yield defer.gatherResults(
+                [data.get(("builds", build['buildid'], 'logs'))
+                 for build in builds])
+            if want_logs_content:
+                buildcontents = yield defer.gatherResults(
+                    [get_logs_contents(master, build['buildid'], max_bytes=LOG_CONTENT_MAX_BYTES,
+                                       report_context=report_context)
+                     for build in builds])
+            else:
+                buildcontents = [{}] * len(builds)
+
+            for build, build_steps, logs, contents in zip(builds, buildsteps, buildlogs,
+                                                          buildcontents):
+                logs_by_stepid = {}
+                for l in logs:
+                    logs_by_stepid.setdefault(l['stepid'], []).append(l)
                 for s in build_steps:
-                    logs = yield master.data.get(("steps", s['stepid'], 'logs'))
-                    s['logs'] = list(logs)
+                    s['logs'] = logs_by_stepid.get(s['stepid'], [])
                     for l in s['logs']:
                         l['url'] = get_url_for_log(master, build['builderid'], build['number'],
                                                    s['number'], l['slug'])
                         if want_logs_content:
-                            l['content'] = yield master.data.get(("logs", l['logid'], 'contents'))
+                            l['content'] = contents[l['logid']]
 
     else:  # we still need a list for the big zip
         buildsteps = list(range(len(builds)))
@@ -169,6 +274,24 @@ def getDetailsForBuilds(master, buildset, builds, want_properties=False, want_st
             build['prev_build'] = prev
 
 
+@defer.inlineCallbacks
+def get_logs_contents(master, buildid, logids=None, max_bytes=LOG_CONTENT_MAX_BYTES,
+                      report_context=None):
+    """
+    Get the contents of the logs of a build, or of the given logs of the
+    build, as a dictionary mapping each logid to its log chunk.  Only the
+    first C{max_bytes} bytes of each log are read.
+    """
+    data = _get_data(master, report_context)
+    filters = []
+    if logids is not None:
+        filters.append(resultspec.Filter('logid', 'in', sorted(logids)))
+    if max_bytes is not None:
+        filters.append(resultspec.Filter('max_bytes', 'eq', [max_bytes]))
+    contents = yield data.get(("builds", buildid, "logs", "contents"), filters=filters)
+    return {c['logid']: c for c in contents}
+
+
 # perhaps we need data api for users with sourcestamps/:id/users
 @defer.inlineCallbacks
 def getResponsibleUsersForSourceStamp(master, sourcestampid):
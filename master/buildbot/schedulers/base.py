@@ -170,6 +170,9 @@ class BaseScheduler(ClusteredBuildbotService, StateMixin):
         return self.master.data.updates.trySetSchedulerMaster(self.serviceid,
                                                               None)
 
+    def _claimServices(self, serviceids):
+        return self.master.data.updates.claimSchedulers(serviceids, self.master.masterid)
+
     # status queries
 
     # deprecated: these aren't compatible with distributed schedulers
@@ -102,13 +102,22 @@ class SetPropertyFromCommand(buildstep.ShellMixin, buildstep.BuildStep):
         if self.extract_fn:
             self.includeStderr = True
 
+    @defer.inlineCallbacks
+    def run(self):
+        # created once collectMaxMemory is rendered
         self.observer = logobserver.BufferLogObserver(
             wantStdout=self.includeStdout,
-            wantStderr=self.includeStderr)
+            wantStderr=self.includeStderr,
+            maxMemory=self.collectMaxMemory)
         self.addLogObserver('stdio', self.observer)
+        try:
+            res = yield self._run()
+        finally:
+            self.observer.close()
+        return res
 
     @defer.inlineCallbacks
-    def run(self):
+    def _run(self):
         cmd = yield self.makeRemoteShellCommand()
 
         yield self.runCommand(cmd)
@@ -377,8 +377,8 @@ class Repo(Source):
                 self.descriptionDone = f"download failed: {download}"
                 raise buildstep.BuildStepFailed()
 
-            if hasattr(self.lastCommand, 'stderr'):
-                lines = self.lastCommand.stderr.split("\n")
+            if hasattr(self.lastCommand, 'stderr_collector'):
+                lines = self.lastCommand.stderr_collector.lines()
                 match1 = match2 = False
                 for line in lines:
                     if not match1:
@@ -263,7 +263,7 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
     def __init__(self, workersrcs=None, masterdest=None,
                  workdir=None, maxsize=None, blocksize=16 * 1024, glob=False,
                  mode=None, compress=None, keepstamp=False, url=None, urlText=None,
-                 **buildstep_kwargs):
+                 maxParallel=1, **buildstep_kwargs):
 
         # Emulate that first two arguments are positional.
         if workersrcs is None or masterdest is None:
@@ -287,6 +287,38 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
         self.keepstamp = keepstamp
         self.url = url
         self.urlText = urlText
+        if not isinstance(maxParallel, int) or maxParallel < 1:
+            config.error('maxParallel must be a positive integer')
+        self.maxParallel = maxParallel
+        self._running_cmds = set()
+        self._interrupted = False
+        self._uploaded_bytes = 0
+
+    @defer.inlineCallbacks
+    def runCommand(self, command):
+        # keep track of all commands, as several may be running at once
+        self._running_cmds.add(command)
+        try:
+            res = yield super().runCommand(command)
+        finally:
+            self._running_cmds.discard(command)
+        return res
+
+    @defer.inlineCallbacks
+    def runTransferCommand(self, cmd, writer=None):
+        try:
+            res = yield super().runTransferCommand(cmd, writer)
+        finally:
+            if writer:
+                self._uploaded_bytes += writer.bytes_written
+        return res
+
+    @defer.inlineCallbacks
+    def interrupt(self, reason):
+        yield self.addCompleteLog('interrupt', str(reason))
+        self._interrupted = True
+        yield defer.DeferredList([cmd.interrupt(reason) for cmd in list(self._running_cmds)],
+                                 consumeErrors=True)
 
     def uploadFile(self, source, masterdest):
         fileWriter = remotetransfer.FileWriter(
@@ -401,17 +433,47 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
         if not sources:
             result = SKIPPED
         else:
-            result = SUCCESS
-            for source in sources:
-                result_single = yield self.startUpload(source, masterdest)
-                if result_single == FAILURE:
-                    result = FAILURE
-                    break
+            result = yield self.startUploads(sources, masterdest)
 
         yield self.allUploadsDone(result, sources, masterdest)
 
         return result
 
+    @defer.inlineCallbacks
+    def startUploads(self, sources, masterdest):
+        # concurrent uploads are only possible if the worker can run several
+        # commands at once, otherwise they are done one after another
+        parallel = self.maxParallel if self.remote.supports_concurrent_commands else 1
+        semaphore = defer.DeferredSemaphore(parallel)
+        results = []
+        started_at = self.master.reactor.seconds()
+
+        @defer.inlineCallbacks
+        def upload(source):
+            # stop starting new uploads after the first failure
+            if FAILURE in results or self._interrupted:
+                return
+            try:
+                result_single = yield self.startUpload(source, masterdest)
+            except Exception:
+                results.append(FAILURE)
+                raise
+            results.append(result_single)
+
+        uploads = yield defer.DeferredList([semaphore.run(upload, source) for source in sources],
+                                           consumeErrors=True)
+
+        duration = self.master.reactor.seconds() - started_at
+        self.setStatistic('uploaded_files', len([r for r in results if r != FAILURE]))
+        self.setStatistic('uploaded_bytes', self._uploaded_bytes)
+        if duration > 0:
+            self.setStatistic('upload_rate', self._uploaded_bytes / duration)
+
+        for success, value in uploads:
+            if not success:
+                value.raiseException()
+        return FAILURE if FAILURE in results else SUCCESS
+
 
 class FileDownload(_TransferBuildStep):
 
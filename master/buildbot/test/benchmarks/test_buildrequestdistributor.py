@@ -0,0 +1,93 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+from unittest import mock
+
+from twisted.internet import defer
+
+from buildbot.process import buildrequestdistributor
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.util import benchmark
+from buildbot.test.util import db
+
+
+class BuildRequestDistributor(TestReactorMixin, db.RealDatabaseWithConnectorMixin,
+                              benchmark.BenchmarkTestCase):
+
+    BUILDERS = 200
+    REQUESTS_PER_BUILDER = 25
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.botmaster = mock.Mock(name='botmaster')
+        self.botmaster.builders = {}
+        self.master = self.botmaster.master = \
+            fakemaster.make_master(self, wantData=True)
+        yield self.setUpRealDatabaseWithConnector(
+            self.master,
+            table_names=['buildrequests', 'buildrequest_claims', 'buildsets',
+                         'buildset_properties', 'buildset_sourcestamps', 'sourcestamps',
+                         'patches', 'builders', 'builds', 'masters', 'workers', 'projects'])
+        self.brd = buildrequestdistributor.BuildRequestDistributor(self.botmaster)
+        self.brd.parent = self.botmaster
+
+        rows = [fakedb.SourceStamp(id=21)]
+        brid = 1
+        for builderid in range(1, self.BUILDERS + 1):
+            name = f'builder{builderid}'
+            rows.append(fakedb.Builder(id=builderid, name=name))
+            self.createBuilder(name, builderid)
+            for i in range(self.REQUESTS_PER_BUILDER):
+                rows.append(fakedb.Buildset(id=brid, reason='because'))
+                rows.append(fakedb.BuildsetSourceStamp(buildsetid=brid, sourcestampid=21))
+                rows.append(fakedb.BuildRequest(id=brid, buildsetid=brid, builderid=builderid,
+                                                priority=i % 3, submitted_at=1000 + brid))
+                brid += 1
+        yield self.insert_test_data(rows)
+
+    def tearDown(self):
+        return self.tearDownRealDatabaseWithConnector()
+
+    def createBuilder(self, name, builderid):
+        bldr = mock.Mock(name=name)
+        bldr.name = name
+        bldr.getBuilderId = lambda: defer.succeed(builderid)
+        self.botmaster.builders[name] = bldr
+        return bldr
+
+    def test_sortBuilders(self):
+        names = sorted(self.botmaster.builders)
+        return self.benchmarkDeferred(
+            f'sortBuilders {self.BUILDERS} builders x {self.REQUESTS_PER_BUILDER} requests',
+            lambda: self.brd._sortBuilders(names), number=20)
+
+    def test_fetchUnclaimedBrdicts(self):
+        builders = list(self.botmaster.builders.values())
+
+        @defer.inlineCallbacks
+        def fetchAll():
+            # what the build choosers of a full activity loop fetch
+            for bldr in builders:
+                bc = self.brd.createBuildChooser(bldr, self.master)
+                yield bc._fetchUnclaimedBrdicts()
+
+        return self.benchmarkDeferred(
+            f'fetchUnclaimedBrdicts {self.BUILDERS} builders x '
+            f'{self.REQUESTS_PER_BUILDER} requests',
+            fetchAll, number=2)
@@ -0,0 +1,185 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+from unittest import mock
+
+from twisted.internet import defer
+from twisted.python import log
+
+from buildbot.data import connector
+from buildbot.process import log as plog
+from buildbot.process import remotecommand
+from buildbot.process.properties import Properties
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.util import benchmark
+from buildbot.test.util import db
+
+
+class LogsBenchmarkMixin(db.RealDatabaseWithConnectorMixin):
+
+    # what a typical compiler or test runner outputs
+    LINE = 'building target {}: compiling src/module/file.c with -O2 -Wall -Werror'
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.master = fakemaster.make_master(self, wantRealReactor=True, wantMq=True)
+        self.master.config.logCompressionMethod = 'gz'
+        yield self.setUpRealDatabaseWithConnector(
+            self.master,
+            table_names=['logs', 'logchunks', 'steps', 'builds', 'builders', 'masters',
+                         'buildrequests', 'buildsets', 'workers', 'projects'])
+        yield self.insert_test_data([
+            fakedb.Worker(id=47, name='linux'),
+            fakedb.Buildset(id=20),
+            fakedb.Builder(id=88, name='b1'),
+            fakedb.BuildRequest(id=41, buildsetid=20, builderid=88),
+            fakedb.Master(id=88),
+            fakedb.Build(id=30, buildrequestid=41, number=7, masterid=88,
+                         builderid=88, workerid=47),
+            fakedb.Step(id=101, buildid=30, number=1, name='one'),
+        ])
+        self.numlogs = 0
+
+    def tearDown(self):
+        return self.tearDownRealDatabaseWithConnector()
+
+    def makeLines(self, count, start=0):
+        return ''.join(self.LINE.format(i) + '\n' for i in range(start, start + count))
+
+    @defer.inlineCallbacks
+    def addLog(self, appends=0, lines_per_append=0):
+        self.numlogs += 1
+        name = f'log{self.numlogs}'
+        logid = yield self.master.db.logs.addLog(101, name, name, 's')
+        for i in range(appends):
+            yield self.master.db.logs.appendLog(
+                logid, self.makeLines(lines_per_append, i * lines_per_append))
+        return logid
+
+
+class AppendLog(LogsBenchmarkMixin, benchmark.BenchmarkTestCase):
+
+    @defer.inlineCallbacks
+    def test_appendLog(self):
+        logid = yield self.addLog()
+        for lines in (1, 100):
+            content = self.makeLines(lines)
+            yield self.benchmarkDeferred(
+                f'appendLog {lines} lines',
+                lambda: self.master.db.logs.appendLog(logid, content), number=100)
+
+
+class GetLogLines(LogsBenchmarkMixin, benchmark.BenchmarkTestCase):
+
+    LINES = 20000
+
+    @defer.inlineCallbacks
+    def test_getLogLines(self):
+        logid = yield self.addLog(appends=self.LINES // 100, lines_per_append=100)
+        yield self.master.db.logs.compressLog(logid)
+
+        yield self.benchmarkDeferred(
+            f'getLogLines all {self.LINES} lines',
+            lambda: self.master.db.logs.getLogLines(logid, 0, self.LINES - 1), number=5)
+        middle = self.LINES // 2
+        yield self.benchmarkDeferred(
+            'getLogLines 100 lines',
+            lambda: self.master.db.logs.getLogLines(logid, middle, middle + 99), number=100)
+
+
+class CompressLog(LogsBenchmarkMixin, benchmark.BenchmarkTestCase):
+
+    @defer.inlineCallbacks
+    def test_compressLog(self):
+        number = 5
+        # compressing a log is only ever done once, so each call needs its
+        # own log, made of many small chunks as written by a chatty step
+        logids = []
+        for _ in range(number * self.REPEAT):
+            logid = yield self.addLog(appends=200, lines_per_append=10)
+            logids.append(logid)
+        logids = iter(logids)
+
+        yield self.benchmarkDeferred(
+            'compressLog 2000 lines in 200 chunks',
+            lambda: self.master.db.logs.compressLog(next(logids)), number=number)
+
+
+class StdioThroughput(LogsBenchmarkMixin, benchmark.BenchmarkTestCase):
+
+    # output of a chatty step, as sent by the worker in msgpack updates
+    UPDATES = 20
+    LINES_PER_UPDATE = 1000
+
+    timeout = 600
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        yield super().setUp()
+        self.master.mq.verifyMessages = False
+        # compressing the chunks would hide the time spent on the master side
+        self.master.config.logCompressionMethod = 'raw'
+        self.master.data = connector.DataConnector()
+        yield self.master.data.setServiceParent(self.master)
+
+    def makeUpdates(self):
+        updates = []
+        for i in range(self.UPDATES):
+            text = self.makeLines(self.LINES_PER_UPDATE, i * self.LINES_PER_UPDATE)
+            # the worker sends the index of each newline, and the time at
+            # which each line was received
+            indexes = [pos for pos, c in enumerate(text) if c == '\n']
+            updates.append([('stdout', (text, indexes, [0.0] * len(indexes)))])
+        return updates
+
+    def makePbUpdates(self):
+        # the PB protocol only carries the text
+        return [[[{'stdout': update[0][1][0]}, num]]
+                for num, update in enumerate(self.makeUpdates())]
+
+    @defer.inlineCallbacks
+    def runCommand(self, updates, pb=False):
+        logid = yield self.addLog()
+        stdio = plog.Log.new(self.master, 'stdio', 's', logid, 'utf-8')
+        cmd = remotecommand.RemoteCommand('shell', {})
+        cmd.step = mock.Mock()
+        cmd.step.build.properties = Properties()
+        cmd.worker = mock.Mock()
+        cmd.active = True
+        cmd.useLog(stdio, closeWhenFinished=False)
+        for update in updates:
+            if pb:
+                cmd.remote_update(update)
+            else:
+                cmd.remote_update_msgpack(update)
+        # the appends are queued on the log's lock
+        yield stdio.lock.run(lambda: None)
+
+    @defer.inlineCallbacks
+    def benchmarkThroughput(self, name, updates, pb=False):
+        size = sum(len(self.makeLines(self.LINES_PER_UPDATE, i * self.LINES_PER_UPDATE))
+                   for i in range(self.UPDATES))
+        best = yield self.benchmarkDeferred(
+            f'{name} stdout of {self.UPDATES * self.LINES_PER_UPDATE} lines',
+            lambda: self.runCommand(updates, pb=pb), number=3)
+        log.msg(f"benchmark {self.id()} {name}: {size / best / 1e6:.1f} MB/s")
+
+    def test_msgpack_stdout(self):
+        return self.benchmarkThroughput('msgpack', self.makeUpdates())
+
+    def test_pb_stdout(self):
+        return self.benchmarkThroughput('pb', self.makePbUpdates(), pb=True)
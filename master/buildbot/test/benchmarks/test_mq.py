@@ -0,0 +1,86 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from twisted.internet import defer
+
+from buildbot.mq import simple
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.util import benchmark
+from buildbot.util import tuplematch
+
+
+class SimpleMQProduce(TestReactorMixin, benchmark.BenchmarkTestCase):
+
+    SUBSCRIPTIONS = 10000
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = fakemaster.make_master(self)
+        self.mq = simple.SimpleMQ()
+        yield self.mq.setServiceParent(self.master)
+        yield self.mq.startService()
+        self.delivered = 0
+
+        # a mix of what web clients, schedulers and reporters subscribe to
+        for i in range(self.SUBSCRIPTIONS):
+            kind = i % 4
+            if kind == 0:
+                filter = ('builds', str(i), None)
+            elif kind == 1:
+                filter = ('logs', str(i), 'append')
+            elif kind == 2:
+                filter = ('builders', str(i % 1500), 'builds', None, None)
+            else:
+                filter = ('steps', str(i), None)
+            yield self.mq.startConsuming(self.callback, filter)
+        yield self.mq.startConsuming(self.callback, ('buildsets', None, 'complete'))
+        yield self.mq.startConsuming(self.callback, ('builds', None, 'finished'))
+
+    @defer.inlineCallbacks
+    def tearDown(self):
+        if self.mq.running:
+            yield self.mq.stopService()
+
+    def callback(self, routingKey, data):
+        self.delivered += 1
+
+    def produce_linear(self, routingKey, data):
+        # the matching strategy used before the routing table was introduced
+        for qref in self.mq.qrefs:
+            if tuplematch.matchTuple(routingKey, qref.filter):
+                self.mq.invokeQref(qref, routingKey, data)
+
+    def test_produce(self):
+        keys = [
+            ('builds', '4', 'finished'),
+            ('logs', '5', 'append'),
+            ('builders', '6', 'builds', '12', 'new'),
+            ('buildsets', '3', 'complete'),
+            ('changes', '1', 'new'),
+        ]
+
+        def produce():
+            for key in keys:
+                self.mq.produce(key, None)
+
+        def produce_linear():
+            for key in keys:
+                self.produce_linear(key, None)
+
+        indexed = self.benchmark('produce indexed', produce, number=1000)
+        linear = self.benchmark('produce linear', produce_linear, number=20)
+        self.assertLess(indexed, linear)
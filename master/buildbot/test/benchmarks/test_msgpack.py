@@ -0,0 +1,95 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+from unittest import mock
+
+import msgpack
+
+from buildbot.process import remotecommand
+from buildbot.process.properties import Properties
+from buildbot.test.util import benchmark
+from buildbot.worker.protocols.manager.msgpack import BuildbotWebSocketServerProtocol
+
+
+class NullLog:
+
+    # a log which only counts what it is given, so that the storage of the
+    # log content does not end up in the measurements
+    def __init__(self, name):
+        self.name = name
+        self.received = 0
+
+    def getName(self):
+        return self.name
+
+    def add_stdout_lines(self, data):
+        self.received += len(data)
+
+    add_stderr_lines = add_header_lines = add_stdout_lines
+
+
+class WorkerUpdate(benchmark.BenchmarkTestCase):
+
+    LINE = 'building target {}: compiling src/module/file.c with -O2 -Wall -Werror\n'
+
+    def setUp(self):
+        self.protocol = BuildbotWebSocketServerProtocol()
+        self.protocol.debug = False
+        self.protocol.sendMessage = lambda payload, isBinary: None
+        self.protocol.connection = mock.Mock()
+
+        self.cmd = remotecommand.RemoteCommand('shell', {})
+        self.cmd.worker = mock.Mock()
+        self.cmd.active = True
+        self.cmd.step = mock.Mock()
+        self.cmd.step.build.properties = Properties()
+        self.log = NullLog('stdio')
+        self.cmd.useLog(self.log)
+        self.protocol.command_id_to_command_map = {'1': self.cmd}
+        self.seq_number = 0
+
+    def makeUpdate(self, lines):
+        text = ''.join(self.LINE.format(i) for i in range(lines))
+        self.seq_number += 1
+        msg = {
+            'op': 'update',
+            'seq_number': self.seq_number,
+            'command_id': '1',
+            'args': [['stdout', [text]], ['stderr', [text]]],
+        }
+        return msgpack.packb(msg, use_bin_type=True), 2 * len(text)
+
+    def benchmarkUpdate(self, name, lines, number):
+        payload, size = self.makeUpdate(lines)
+
+        def onMessage():
+            self.protocol.onMessage(payload, True)
+
+        # make sure the update made it all the way to the log
+        self.log.received = 0
+        onMessage()
+        self.assertEqual(self.log.received, size)
+
+        self.benchmark(f'{name} ({size} bytes per update)', onMessage, number=number)
+
+    def test_update(self):
+        self.benchmarkUpdate('update 1 line', lines=1, number=5000)
+        self.benchmarkUpdate('update 100 lines', lines=100, number=1000)
+
+    def test_update_with_secrets(self):
+        for i in range(10):
+            self.cmd.step.build.properties.useSecret(f'secret-value-{i}', f'secret{i}')
+        self.benchmarkUpdate('update 100 lines with 10 secrets', lines=100, number=1000)
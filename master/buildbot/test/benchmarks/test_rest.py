@@ -0,0 +1,72 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+import json
+
+from twisted.internet import defer
+
+from buildbot.test import fakedb
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.util import benchmark
+from buildbot.test.util import www
+from buildbot.www import rest
+
+
+class RenderCollection(TestReactorMixin, www.WwwTestMixin, benchmark.BenchmarkTestCase):
+
+    BUILDS = 2000
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = self.make_master(url='h:/')
+
+        def allow(*args, **kw):
+            return
+        self.master.www.assertUserAllowed = allow
+
+        self.rsrc = rest.V2RootResource(self.master)
+        self.rsrc.reconfigResource(self.master.config)
+
+        rows = [
+            fakedb.Master(id=1),
+            fakedb.Worker(id=1, name='linux'),
+            fakedb.Builder(id=1, name='b1'),
+            fakedb.Buildset(id=1),
+            fakedb.BuildRequest(id=1, buildsetid=1, builderid=1),
+        ]
+        for i in range(1, self.BUILDS + 1):
+            rows.append(fakedb.Build(id=i, number=i, buildrequestid=1, masterid=1,
+                                     builderid=1, workerid=1, state_string=f'build {i}'))
+        yield self.master.db.insert_test_data(rows)
+
+    @defer.inlineCallbacks
+    def benchmarkRender(self, name, path, number, expected_count):
+        # make sure we are timing what we think we are timing
+        content = yield self.render_resource(self.rsrc, path)
+        self.assertEqual(len(json.loads(content)['builds']), expected_count)
+
+        yield self.benchmarkDeferred(
+            name, lambda: self.render_resource(self.rsrc, path), number=number)
+
+    def test_render_builds(self):
+        return self.benchmarkRender(f'render /builds with {self.BUILDS} builds',
+                                    b'/builds', number=5, expected_count=self.BUILDS)
+
+    def test_render_builds_page(self):
+        return self.benchmarkRender(f'render /builds?limit=50 with {self.BUILDS} builds',
+                                    b'/builds?limit=50&order=-number', number=20,
+                                    expected_count=50)
@@ -0,0 +1,107 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+import itertools
+
+from twisted.internet import defer
+from twisted.python import log
+
+from buildbot.data import connector
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.util import benchmark
+from buildbot.test.util import db
+from buildbot.util.test_result_submitter import TestResultSubmitter
+
+
+class TestResultsBenchmarkMixin(db.RealDatabaseWithConnectorMixin):
+
+    RESULTS = 30000
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.master = fakemaster.make_master(self, wantRealReactor=True, wantMq=True)
+        yield self.setUpRealDatabaseWithConnector(
+            self.master,
+            table_names=['test_names', 'test_code_paths', 'test_results', 'test_result_sets',
+                         'steps', 'builds', 'builders', 'masters', 'buildrequests', 'buildsets',
+                         'workers', 'projects'])
+        yield self.insert_test_data([
+            fakedb.Worker(id=47, name='linux'),
+            fakedb.Buildset(id=20),
+            fakedb.Builder(id=88, name='b1'),
+            fakedb.BuildRequest(id=41, buildsetid=20, builderid=88),
+            fakedb.Master(id=88),
+            fakedb.Build(id=30, buildrequestid=41, number=7, masterid=88,
+                         builderid=88, workerid=47),
+            fakedb.Step(id=131, number=1, name='test', buildid=30),
+        ])
+        self.master.data = connector.DataConnector()
+        yield self.master.data.setServiceParent(self.master)
+        self.builds = itertools.count()
+
+    def tearDown(self):
+        return self.tearDownRealDatabaseWithConnector()
+
+    @defer.inlineCallbacks
+    def submitResults(self):
+        # every build of the builder runs the same tests
+        build = next(self.builds)
+        sub = TestResultSubmitter()
+        yield sub.setup_by_ids(self.master, 88, 30, 131, f'run {build}', 'pass_fail', 'boolean')
+        for i in range(self.RESULTS):
+            sub.add_test_result('1', test_name=f'test_module{i // 100}.test_case{i}',
+                                test_code_path=f'tests/test_module{i // 100}.py',
+                                duration_ns=1000 * i)
+        yield sub.finish()
+
+    def logThroughput(self, name, best):
+        log.msg(f"benchmark {self.id()} {name}: {self.RESULTS / best:.0f} results per second")
+
+
+class SubmitTestResults(TestResultsBenchmarkMixin, benchmark.BenchmarkTestCase):
+
+    timeout = 600
+
+    @defer.inlineCallbacks
+    def test_submit_new_tests(self):
+        # each run uses a new builder, so that all the names are new
+        number = 1
+        builderids = iter(range(1000, 1000 + number * self.REPEAT))
+
+        @defer.inlineCallbacks
+        def submit():
+            builderid = next(builderids)
+            yield self.insert_test_data([fakedb.Builder(id=builderid, name=f'b{builderid}')])
+            sub = TestResultSubmitter()
+            yield sub.setup_by_ids(self.master, builderid, 30, 131, 'desc', 'pass_fail',
+                                   'boolean')
+            for i in range(self.RESULTS):
+                sub.add_test_result('1', test_name=f'test_module{i // 100}.test_case{i}',
+                                    test_code_path=f'tests/test_module{i // 100}.py')
+            yield sub.finish()
+
+        best = yield self.benchmarkDeferred(f'submit {self.RESULTS} results with new names',
+                                            submit, number=number)
+        self.logThroughput('new names', best)
+
+    @defer.inlineCallbacks
+    def test_submit_known_tests(self):
+        # the names and code paths are known from a previous build
+        yield self.submitResults()
+        best = yield self.benchmarkDeferred(f'submit {self.RESULTS} results with known names',
+                                            self.submitResults, number=1)
+        self.logThroughput('known names', best)
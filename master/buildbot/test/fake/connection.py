@@ -19,6 +19,7 @@ from twisted.internet import defer
 class FakeConnection:
 
     is_fake_test_connection = True
+    supports_concurrent_commands = True
 
     _waiting_for_interrupt = False
 
@@ -44,10 +44,14 @@ class TestsEndpoint(base.Endpoint):
     /test
     """
     rootLinkName = 'tests'
+    queryParameters = {'maxid': types.Integer()}
 
     def get(self, resultSpec, kwargs):
+        maxid = resultSpec.popOneFilter('maxid', 'eq')
         # results are sorted by ID for test stability
-        return defer.succeed(sorted(testData.values(), key=lambda v: v['testid']))
+        return defer.succeed(sorted((v for v in testData.values()
+                                     if maxid is None or v['testid'] <= maxid),
+                                    key=lambda v: v['testid']))
 
 
 class RawTestsEndpoint(base.Endpoint):
@@ -62,6 +66,31 @@ class RawTestsEndpoint(base.Endpoint):
         })
 
 
+class RawStreamTestsEndpoint(base.Endpoint):
+    kind = base.EndpointKind.RAW_INLINE
+    pathPatterns = "/rawstreamtest"
+
+    class Reader:
+
+        def __init__(self):
+            self.pieces = ['value ', '', 'in ', 'pieces']
+
+        def read(self):
+            return defer.succeed(self.pieces.pop(0) if self.pieces else None)
+
+    def get(self, resultSpec, kwargs):
+        return defer.succeed({
+            "mime-type": "text/test",
+            'raw': 'value in pieces'
+        })
+
+    def stream(self, resultSpec, kwargs):
+        return defer.succeed({
+            "mime-type": "text/test",
+            'raw': self.Reader()
+        })
+
+
 class FailEndpoint(base.Endpoint):
     kind = base.EndpointKind.SINGLE
     pathPatterns = "/test/fail"
@@ -124,7 +153,8 @@ class Step(base.ResourceType):
 class Test(base.ResourceType):
     name = "test"
     plural = "tests"
-    endpoints = [TestsEndpoint, TestEndpoint, FailEndpoint, RawTestsEndpoint]
+    endpoints = [TestsEndpoint, TestEndpoint, FailEndpoint, RawTestsEndpoint,
+                 RawStreamTestsEndpoint]
     keyField = "testid"
     subresources = ["Step"]
 
@@ -292,6 +292,32 @@ class FakeUpdates(service.AsyncService):
         self.changesourceMasters[changesourceid] = masterid
         return defer.succeed(True)
 
+    def claimSchedulers(self, schedulerids, masterid):
+        claimed = set()
+        for schedulerid in schedulerids:
+            currentMasterid = self.schedulerMasters.get(schedulerid)
+            if isinstance(currentMasterid, Exception):
+                return defer.fail(failure.Failure(
+                    currentMasterid))
+            if not currentMasterid:
+                self.schedulerMasters[schedulerid] = currentMasterid = masterid
+            if currentMasterid == masterid:
+                claimed.add(schedulerid)
+        return defer.succeed(claimed)
+
+    def claimChangeSources(self, changesourceids, masterid):
+        claimed = set()
+        for changesourceid in changesourceids:
+            currentMasterid = self.changesourceMasters.get(changesourceid)
+            if isinstance(currentMasterid, Exception):
+                return defer.fail(failure.Failure(
+                    currentMasterid))
+            if not currentMasterid:
+                self.changesourceMasters[changesourceid] = currentMasterid = masterid
+            if currentMasterid == masterid:
+                claimed.add(changesourceid)
+        return defer.succeed(claimed)
+
     def addBuild(self, builderid, buildrequestid, workerid):
         validation.verifyType(self.testcase, 'builderid', builderid,
                               validation.IntValidator())
@@ -414,6 +440,9 @@ class FakeUpdates(service.AsyncService):
         self.logs[logid]['content'].append(content)
         return defer.succeed(None)
 
+    def waitForLogAppendCapacity(self):
+        return defer.succeed(None)
+
     def findWorkerId(self, name):
         validation.verifyType(self.testcase, 'worker name', name,
                               validation.IdentifierValidator(50))
@@ -547,8 +576,9 @@ class FakeDataConnector(service.AsyncMultiService):
             raise TypeError('path must be a tuple')
         return self.realConnector.control(action, args, path)
 
-    def resultspec_from_jsonapi(self, args, entityType, is_collection):
-        return self.realConnector.resultspec_from_jsonapi(args, entityType, is_collection)
+    def resultspec_from_jsonapi(self, args, entityType, is_collection, queryParameters=None):
+        return self.realConnector.resultspec_from_jsonapi(args, entityType, is_collection,
+                                                          queryParameters)
 
     def getResourceTypeForGraphQlType(self, type):
         return self.realConnector.getResourceTypeForGraphQlType(type)
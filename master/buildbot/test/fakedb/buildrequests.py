@@ -20,6 +20,7 @@ from buildbot.db import buildrequests
 from buildbot.test.fakedb.base import FakeDBComponent
 from buildbot.test.fakedb.row import Row
 from buildbot.util import datetime2epoch
+from buildbot.util import epoch2datetime
 
 
 class BuildRequest(Row):
@@ -137,6 +138,20 @@ class FakeBuildRequestsComponent(FakeDBComponent):
             rv = self.applyResultSpec(rv, resultSpec)
         return rv
 
+    def getUnclaimedBuildRequestsSummary(self, builderids):
+        rv = {}
+        for br in self.reqs.values():
+            if br.builderid not in builderids or br.complete or br.id in self.claims:
+                continue
+            submitted_at = epoch2datetime(br.submitted_at)
+            if br.builderid not in rv:
+                rv[br.builderid] = {"priority": br.priority, "submitted_at": submitted_at}
+                continue
+            summary = rv[br.builderid]
+            summary['priority'] = max(summary['priority'], br.priority)
+            summary['submitted_at'] = min(summary['submitted_at'], submitted_at)
+        return defer.succeed(rv)
+
     def claimBuildRequests(self, brids, claimed_at=None):
         for brid in brids:
             if brid not in self.reqs or brid in self.claims:
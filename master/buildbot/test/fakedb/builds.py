@@ -99,6 +99,19 @@ class FakeBuildsComponent(FakeDBComponent):
                 return defer.succeed(self._row2dict(row))
         return defer.succeed(None)
 
+    def getPreviousCompletedBuild(self, builderid, number, exclude_results=None):
+        prev = None
+        for row in self.builds.values():
+            if row['builderid'] != builderid or row['number'] >= number:
+                continue
+            if row['results'] is None or row['results'] in (exclude_results or ()):
+                continue
+            if prev is None or row['number'] > prev['number']:
+                prev = row
+        if prev is None:
+            return defer.succeed(None)
+        return defer.succeed(self._row2dict(prev))
+
     def getBuilds(self, builderid=None, buildrequestid=None, workerid=None, complete=None,
                   resultSpec=None):
         ret = []
@@ -163,6 +176,13 @@ class FakeBuildsComponent(FakeDBComponent):
         ret = {v['name']: (v['value'], v['source']) for v in ret}
         return defer.succeed(ret)
 
+    def getBuildPropertiesForBuilds(self, buildids, names=None):
+        ret = {}
+        for bid in buildids:
+            props = self.builds[bid]['properties'] if bid in self.builds else {}
+            ret[bid] = {k: v for k, v in props.items() if names is None or k in names}
+        return defer.succeed(ret)
+
     def setBuildProperty(self, bid, name, value, source):
         assert bid in self.builds
         self.builds[bid]['properties'][name] = (value, source)
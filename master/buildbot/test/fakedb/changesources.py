@@ -108,6 +108,17 @@ class FakeChangeSourcesComponent(FakeDBComponent):
         self.changesource_masters[changesourceid] = masterid
         return defer.succeed(None)
 
+    def claimChangeSources(self, changesourceids, masterid):
+        claimed = set()
+        for changesourceid in changesourceids:
+            if changesourceid not in self.changesources:
+                continue
+            if self.changesource_masters.get(changesourceid) is None:
+                self.changesource_masters[changesourceid] = masterid
+            if self.changesource_masters[changesourceid] == masterid:
+                claimed.add(changesourceid)
+        return defer.succeed(claimed)
+
     # fake methods
 
     def fakeChangeSource(self, name, changesourceid):
@@ -16,6 +16,7 @@
 
 from twisted.internet import defer
 
+from buildbot.db.logs import LogLinesReader
 from buildbot.test.fakedb.base import FakeDBComponent
 from buildbot.test.fakedb.row import Row
 from buildbot.test.util import validation
@@ -40,9 +41,10 @@ class LogChunk(Row):
     # 'content' column is sa.LargeBinary, it's bytestring.
     binary_columns = ('content',)
 
-    def __init__(self, logid=None, first_line=0, last_line=0, content='', compressed=0):
+    def __init__(self, logid=None, first_line=0, last_line=0, content='', compressed=0,
+                 line_offsets=None):
         super().__init__(logid=logid, first_line=first_line, last_line=last_line, content=content,
-                         compressed=compressed)
+                         compressed=compressed, line_offsets=line_offsets)
 
 
 class FakeLogsComponent(FakeDBComponent):
@@ -98,7 +100,14 @@ class FakeLogsComponent(FakeDBComponent):
             return defer.succeed(None)
         return defer.succeed(self._row2dict(row))
 
-    def getLogs(self, stepid=None):
+    def getLogs(self, stepid=None, buildid=None):
+        if buildid is not None:
+            stepids = {step['id'] for step in self.db.steps.steps.values()
+                       if step['buildid'] == buildid}
+            return defer.succeed([
+                self._row2dict(row)
+                for row in self.logs.values()
+                if row['stepid'] in stepids and stepid in (None, row['stepid'])])
         return defer.succeed([
             self._row2dict(row)
             for row in self.logs.values()
@@ -111,6 +120,38 @@ class FakeLogsComponent(FakeDBComponent):
         rv = lines[first_line:last_line + 1]
         return defer.succeed('\n'.join(rv) + '\n' if rv else '')
 
+    def getLogsLines(self, logids, max_bytes=None):
+        rv = {}
+        for logid in logids:
+            if logid not in self.logs:
+                continue
+            lines = []
+            size = 0
+            num_lines = self.logs[logid]['num_lines']
+            for line in self.log_lines.get(logid, [])[:num_lines]:
+                size += len(line.encode('utf-8')) + 1
+                if max_bytes is not None and size > max_bytes:
+                    break
+                lines.append(line + '\n')
+            rv[logid] = ''.join(lines)
+        return defer.succeed(rv)
+
+    def getLogLinesReader(self, logid, first_line, last_line):
+        return LogLinesReader(self, logid, first_line, last_line)
+
+    def getLogChunks(self, logid, first_line, last_line, limit):
+        # the fake does not store chunks, use a fixed number of lines instead
+        chunk_lines = 2
+        if logid not in self.logs or first_line > last_line:
+            return defer.succeed([])
+        lines = self.log_lines.get(logid, [])[:last_line + 1]
+        rv = []
+        while first_line < len(lines) and len(rv) < limit:
+            chunk = lines[first_line:first_line + chunk_lines]
+            rv.append((first_line, first_line + len(chunk) - 1, '\n'.join(chunk)))
+            first_line += len(chunk)
+        return defer.succeed(rv)
+
     def addLog(self, stepid, name, slug, type):
         id = self._newId()
         self.logs[id] = {
@@ -137,14 +178,24 @@ class FakeLogsComponent(FakeDBComponent):
         num_lines = self.logs[logid]['num_lines'] = len(lines)
         return defer.succeed((num_lines - len(content), num_lines - 1))
 
+    def waitForAppendCapacity(self):
+        return defer.succeed(None)
+
+    def flushPendingAppends(self):
+        return defer.succeed(None)
+
     def finishLog(self, logid):
         if id in self.logs:
             self.logs['id'].complete = 1
         return defer.succeed(None)
 
-    def compressLog(self, logid, force=False):
+    def compressLog(self, logid, force=False, recompress=False):
         return defer.succeed(None)
 
+    def getLogIdsToRecompress(self, limit=None):
+        # fake log chunks are never compressed
+        return defer.succeed([])
+
     def deleteOldLogChunks(self, older_than_timestamp):
         # not implemented
         self._deleted = older_than_timestamp
@@ -188,6 +188,17 @@ class FakeSchedulersComponent(FakeDBComponent):
         self.scheduler_masters[schedulerid] = masterid
         return defer.succeed(None)
 
+    def claimSchedulers(self, schedulerids, masterid):
+        claimed = set()
+        for schedulerid in schedulerids:
+            if schedulerid not in self.schedulers:
+                continue
+            if self.scheduler_masters.get(schedulerid) is None:
+                self.scheduler_masters[schedulerid] = masterid
+            if self.scheduler_masters[schedulerid] == masterid:
+                claimed.add(schedulerid)
+        return defer.succeed(claimed)
+
     # fake methods
 
     def fakeClassifications(self, schedulerid, classifications):
@@ -204,3 +204,7 @@ class TransferStepsMasterPb(RunMasterBase):
 
 class TransferStepsMasterNull(TransferStepsMasterPb):
     proto = "null"
+
+
+class TransferStepsMasterMsgpack(TransferStepsMasterPb):
+    proto = "msgpack"
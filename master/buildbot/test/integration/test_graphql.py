@@ -16,6 +16,7 @@
 
 import json
 import os
+from unittest import mock
 
 from twisted.internet import defer
 from twisted.trial import unittest
@@ -275,3 +276,35 @@ class GraphQL(unittest.TestCase, TestReactorMixin):
         for br in data.data["buildrequests"]:
             for build in br["builds"]:
                 self.assertEqual(build["buildrequestid"], br["buildrequestid"])
+
+    @defer.inlineCallbacks
+    def test_builds_properties_loaded_at_once(self):
+        getBuildProperties = mock.Mock(wraps=self.master.db.builds.getBuildProperties)
+        self.patch(self.master.db.builds, 'getBuildProperties', getBuildProperties)
+        getBuildPropertiesForBuilds = mock.Mock(
+            wraps=self.master.db.builds.getBuildPropertiesForBuilds)
+        self.patch(self.master.db.builds, 'getBuildPropertiesForBuilds',
+                   getBuildPropertiesForBuilds)
+
+        data = yield self.master.graphql.query(
+            '{builds{buildid, _properties(name__in: ["reason", "owner"]){name, value}}}'
+        )
+
+        self.assertEqual(data.errors, None)
+        self.assertEqual([b['_properties'] for b in data.data['builds']], [
+            [],
+            [],
+            [{'name': 'reason', 'value': '"\\"force build\\""'},
+             {'name': 'owner', 'value': '"\\"some@example.com\\""'}],
+        ])
+        getBuildProperties.assert_not_called()
+        getBuildPropertiesForBuilds.assert_called_once_with([1, 2, 3], {'reason', 'owner'})
+
+    @defer.inlineCallbacks
+    def test_builds_properties_fragment(self):
+        data = yield self.master.graphql.query(
+            '{builds(buildid: 3){...props}} fragment props on Build {_properties{name}}'
+        )
+
+        self.assertEqual(data.errors, None)
+        self.assertEqual(len(data.data['builds'][0]['_properties']), 5)
@@ -178,6 +178,7 @@ class TestSetupPyEntryPoints(unittest.TestCase):
             'buildbot.reporters.telegram.TelegramPollingBot',
             'buildbot.reporters.telegram.TelegramStatusBot',
             'buildbot.reporters.telegram.TelegramWebhookBot',
+            'buildbot.reporters.utils.ReportContext',
             'buildbot.reporters.words.Channel',
             'buildbot.reporters.words.Contact',
             'buildbot.reporters.words.ForceOptions',
@@ -373,6 +373,7 @@ class ExpectUploadDirectory(Expect):
         super().__init__('uploadDirectory', args, interrupted=interrupted)
 
     def upload_tar_file(self, filename, members, error=None, out_writers=None):
+        @defer.inlineCallbacks
         def behavior(command):
             f = BytesIO()
             archive = tarfile.TarFile(fileobj=f, name=filename, mode='w')  # noqa pylint: disable=consider-using-with
@@ -384,8 +385,8 @@ class ExpectUploadDirectory(Expect):
             if out_writers is not None:
                 out_writers.append(writer)
 
-            writer.remote_write(f.getvalue())
-            writer.remote_unpack()
+            yield writer.remote_write(f.getvalue())
+            yield writer.remote_unpack()
 
             if error is not None:
                 writer.cancel = mock.Mock(wraps=writer.cancel)
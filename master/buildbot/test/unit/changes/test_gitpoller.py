@@ -29,11 +29,26 @@ from buildbot.test.util import changesource
 from buildbot.test.util import config
 from buildbot.test.util import logging
 from buildbot.util import bytes2unicode
-from buildbot.util import unicode2bytes
 
 # Test that environment variables get propagated to subprocesses (See #2116)
 os.environ['TEST_THAT_ENVIRONMENT_GETS_PASSED_TO_SUBPROCESSES'] = 'TRUE'
 
+COMMIT_LOG_ARGS = ['-z', '--name-only',
+                   '--format=%x00%H%x00%ct%x00%aN <%aE>%x00%cN <%cE>%x00%s%n%b']
+
+
+def commit_log(*revs):
+    """
+    Build the output of git log for the given commits, as done with
+    COMMIT_LOG_ARGS. Each commit is authored by 'by:<rev>' and changes the
+    '/etc/<rev>' file.
+    """
+    output = b''
+    for rev in revs:
+        output += b'\0'.join([b'', rev, b'1273258009', b'by:' + rev[:8], b'by:' + rev[:8],
+                              b'hello!\n', b'\n/etc/' + rev[:3], b''])
+    return output
+
 
 class TestGitPollerBase(MasterRunProcessMixin,
                         changesource.ChangeSourceMixin,
@@ -67,121 +82,60 @@ class TestGitPollerBase(MasterRunProcessMixin,
 
 class TestGitPoller(TestGitPollerBase):
 
-    dummyRevStr = '12345abcde'
-
-    @defer.inlineCallbacks
-    def _perform_git_output_test(self, methodToTest, args,
-                                 desiredGoodOutput, desiredGoodResult,
-                                 emptyRaisesException=True):
-
-        self.expect_commands(
-            ExpectMasterShell(['git'] + args)
-            .workdir(self.POLLER_WORKDIR),
-        )
-
-        # we should get an Exception with empty output from git
-        try:
-            yield methodToTest(self.dummyRevStr)
-            if emptyRaisesException:
-                self.fail("run_process should have failed on empty output")
-        except Exception as e:
-            if not emptyRaisesException:
-                import traceback
-                traceback.print_exc()
-                self.fail("run_process should NOT have failed on empty output: " + repr(e))
-
-        self.assert_all_commands_ran()
-
-        # and the method shouldn't suppress any exceptions
-        self.expect_commands(
-            ExpectMasterShell(['git'] + args)
-            .workdir(self.POLLER_WORKDIR)
-            .exit(1),
-        )
-
-        try:
-            yield methodToTest(self.dummyRevStr)
-            self.fail("run_process should have failed on stderr output")
-        except Exception:
-            pass
-
-        self.assert_all_commands_ran()
-
-        # finally we should get what's expected from good output
-        self.expect_commands(
-            ExpectMasterShell(['git'] + args)
-            .workdir(self.POLLER_WORKDIR)
-            .stdout(desiredGoodOutput)
-        )
+    # output of git log for an empty commit, followed by a commit with a
+    # multiline message changing a file with a space and a non ASCII file
+    commitLogOutput = (
+        '\0' 'f6d92407082f005aeef745efa4b03da2e7fdd7f9\0' '1273258009\0'
+        'Sammy Jankis <email@example.com>\0' 'Leonard <leonard@example.com>\0'
+        'single line message\n\0'
+        '\0' '4703f0349ed8d540044a253d2259f7f82689db27\0' '1273258010\0'
+        'Sammy Jankis <email@example.com>\0' 'Sammy Jankis <email@example.com>\0'
+        'this is a commit message\nthat is multiline\n\0'
+        '\ndirectory with space/file1\0' 'f\u00efl\u00e9\0'
+    )
+
+    def test_split_commit_log(self):
+        self.assertEqual(self.poller._split_commit_log(self.commitLogOutput), [
+            'f6d92407082f005aeef745efa4b03da2e7fdd7f9\0' '1273258009\0'
+            'Sammy Jankis <email@example.com>\0' 'Leonard <leonard@example.com>\0'
+            'single line message\n',
+            '4703f0349ed8d540044a253d2259f7f82689db27\0' '1273258010\0'
+            'Sammy Jankis <email@example.com>\0' 'Sammy Jankis <email@example.com>\0'
+            'this is a commit message\nthat is multiline\n\0'
+            '\ndirectory with space/file1\0' 'f\u00efl\u00e9',
+        ])
 
-        r = yield methodToTest(self.dummyRevStr)
+    def test_split_commit_log_empty(self):
+        self.assertEqual(self.poller._split_commit_log(''), [])
+
+    def test_parse_commit(self):
+        commits = self.poller._split_commit_log(self.commitLogOutput)
+        self.assertEqual([self.poller._parse_commit(commit) for commit in commits], [
+            ('f6d92407082f005aeef745efa4b03da2e7fdd7f9', 1273258009,
+             'Sammy Jankis <email@example.com>', 'Leonard <leonard@example.com>',
+             [], 'single line message'),
+            ('4703f0349ed8d540044a253d2259f7f82689db27', 1273258010,
+             'Sammy Jankis <email@example.com>', 'Sammy Jankis <email@example.com>',
+             ['directory with space/file1', 'f\u00efl\u00e9'],
+             'this is a commit message\nthat is multiline'),
+        ])
 
-        self.assertEqual(r, desiredGoodResult)
-        # check types
-        if isinstance(r, str):
-            self.assertIsInstance(r, str)
-        elif isinstance(r, list):
-            for e in r:
-                self.assertIsInstance(e, str)
+    def test_parse_commit_no_timestamps(self):
+        self.poller.usetimestamps = False
+        commit = self.poller._split_commit_log(self.commitLogOutput)[0]
+        self.assertEqual(self.poller._parse_commit(commit)[1], None)
 
-        self.assert_all_commands_ran()
+    def test_parse_commit_bad_timestamp(self):
+        with self.assertRaises(ValueError):
+            self.poller._parse_commit('12345abcde\0notastamp\0a <a@b>\0a <a@b>\0msg')
 
-    def test_get_commit_author(self):
-        authorStr = 'Sammy Jankis <email@example.com>'
-        authorBytes = unicode2bytes(authorStr)
-        return self._perform_git_output_test(self.poller._get_commit_author,
-                                             ['log', '--no-walk', '--format=%aN <%aE>',
-                                                 self.dummyRevStr, '--'],
-                                             authorBytes, authorStr)
-
-    def test_get_commit_committer(self):
-        committerStr = 'Sammy Jankis <email@example.com>'
-        committerBytes = unicode2bytes(committerStr)
-        return self._perform_git_output_test(self.poller._get_commit_committer,
-                                             ['log', '--no-walk', '--format=%cN <%cE>',
-                                                 self.dummyRevStr, '--'],
-                                             committerBytes, committerStr)
-
-    def _test_get_commit_comments(self, commentStr):
-        commentBytes = unicode2bytes(commentStr)
-        return self._perform_git_output_test(self.poller._get_commit_comments,
-                                             ['log', '--no-walk', '--format=%s%n%b',
-                                                 self.dummyRevStr, '--'],
-                                             commentBytes, commentStr, emptyRaisesException=False)
-
-    def test_get_commit_comments(self):
-        comments = ['this is a commit message\n\nthat is multiline',
-                    'single line message', '']
-        return defer.DeferredList([self._test_get_commit_comments(commentStr)
-                                  for commentStr in comments])
-
-    def test_get_commit_files(self):
-        filesBytes = b'\n\nfile1\nfile2\n"\146ile_octal"\nfile space'
-        filesRes = ['file1', 'file2', 'file_octal', 'file space']
-        return self._perform_git_output_test(self.poller._get_commit_files,
-                                             ['log', '--name-only', '--no-walk',
-                                              '--format=%n', self.dummyRevStr, '--'],
-                                             filesBytes, filesRes, emptyRaisesException=False)
-
-    def test_get_commit_files_with_space_in_changed_files(self):
-        filesBytes = b'normal_directory/file1\ndirectory with space/file2'
-        filesStr = bytes2unicode(filesBytes)
-        return self._perform_git_output_test(
-            self.poller._get_commit_files,
-            ['log', '--name-only', '--no-walk',
-             '--format=%n', self.dummyRevStr, '--'],
-            filesBytes,
-            [l for l in filesStr.splitlines() if l.strip()],
-            emptyRaisesException=False,
-        )
+    def test_parse_commit_no_author(self):
+        with self.assertRaises(EnvironmentError):
+            self.poller._parse_commit('12345abcde\0' + '1273258009\0\0a <a@b>\0msg')
 
-    def test_get_commit_timestamp(self):
-        stampBytes = b'1273258009'
-        stampStr = bytes2unicode(stampBytes)
-        return self._perform_git_output_test(self.poller._get_commit_timestamp,
-                                             ['log', '--no-walk', '--format=%ct',
-                                                 self.dummyRevStr, '--'],
-                                             stampBytes, float(stampStr))
+    def test_parse_commit_no_committer(self):
+        with self.assertRaises(EnvironmentError):
+            self.poller._parse_commit('12345abcde\0' + '1273258009\0a <a@b>\0 \0msg')
 
     def test_describe(self):
         self.assertSubstring("GitPoller", self.poller.describe())
@@ -339,8 +293,7 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
@@ -413,8 +366,7 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '--'])
@@ -491,54 +443,28 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([
+            .stdout(commit_log(
                 b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                b'4423cdbcbb89c14e50dd5f4152415afd686c5241'])),
+                b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
             ExpectMasterShell(['git', 'rev-parse',
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/release'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
                           '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([
-                b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'
-            ])),
+            .stdout(commit_log(b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.branches = ['master', 'release']
         self.poller.lastRev = {
@@ -622,8 +548,7 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/release'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '--'])
@@ -663,37 +588,18 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/release'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b''),
+            ExpectMasterShell(['git', 'log', '--no-walk'] + COMMIT_LOG_ARGS + [
+                          '4423cdbcbb89c14e50dd5f4152415afd686c5241', '--'])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(commit_log(b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.branches = ['release']
         self.poller.lastRev = {
@@ -743,38 +649,19 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/release'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^0ba9d553b7217ab4bbad89ad56dc0332c7d57a8c',
                           '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b''),
+            ExpectMasterShell(['git', 'log', '--no-walk'] + COMMIT_LOG_ARGS + [
+                          '4423cdbcbb89c14e50dd5f4152415afd686c5241', '--'])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(commit_log(b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.branches = ['release']
         self.poller.lastRev = {
@@ -825,37 +712,18 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/release'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^0ba9d553b7217ab4bbad89ad56dc0332c7d57a8c',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b''),
+            ExpectMasterShell(['git', 'log', '--no-walk'] + COMMIT_LOG_ARGS + [
+                          '4423cdbcbb89c14e50dd5f4152415afd686c5241', '--'])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(commit_log(b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.branches = ['release']
         self.poller.lastRev = {
@@ -904,38 +772,16 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing', '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([
+            .stdout(commit_log(
                 b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                b'4423cdbcbb89c14e50dd5f4152415afd686c5241'])),
+                b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.branches = True
         self.poller.lastRev = {
@@ -990,8 +836,7 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '--'])
@@ -1029,50 +874,28 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing', '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([
+            .stdout(commit_log(
                 b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                b'4423cdbcbb89c14e50dd5f4152415afd686c5241'])),
+                b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
             ExpectMasterShell(['git', 'rev-parse', 'refs/buildbot/' + self.REPOURL_QUOTED +
                                '/release'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing', '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
                           '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'])),
+            .stdout(commit_log(b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.branches = True
         self.poller.lastRev = {
@@ -1133,39 +956,17 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing', '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([
+            .stdout(commit_log(
                 b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                b'4423cdbcbb89c14e50dd5f4152415afd686c5241']))
+                b'4423cdbcbb89c14e50dd5f4152415afd686c5241'))
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         class TestCallable:
 
@@ -1227,37 +1028,15 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/refs/pull/410/head'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing', '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
                           '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'])),
+            .stdout(commit_log(b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         def pullFilter(branch):
             """
             Note that this isn't useful in practice, because it will only
@@ -1311,40 +1090,16 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing',
-                          '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([
+            .stdout(commit_log(
                 b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                b'4423cdbcbb89c14e50dd5f4152415afd686c5241'
-            ])),
+                b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.lastRev = {
             'master': 'fa3ae8ed68e664d4db24798611b352e3c6509930'
@@ -1411,38 +1166,16 @@ class TestGitPoller(TestGitPollerBase):
                           'refs/buildbot/' + self.REPOURL_QUOTED + '/master'])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b'4423cdbcbb89c14e50dd5f4152415afd686c5241\n'),
-            ExpectMasterShell(['git', 'log', '--ignore-missing', '--format=%H',
+            ExpectMasterShell(['git', 'log', '--ignore-missing'] + COMMIT_LOG_ARGS + [
                           '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                           '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                           '--'])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([
+            .stdout(commit_log(
                 b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                b'4423cdbcbb89c14e50dd5f4152415afd686c5241'])),
+                b'4423cdbcbb89c14e50dd5f4152415afd686c5241')),
         )
 
-        # and patch out the _get_commit_foo methods which were already tested
-        # above
-        def timestamp(rev):
-            return defer.succeed(1273258009)
-        self.patch(self.poller, '_get_commit_timestamp', timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-        self.patch(self.poller, '_get_commit_comments', comments)
-
         # do the poll
         self.poller.branches = True
 
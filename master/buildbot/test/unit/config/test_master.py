@@ -16,6 +16,7 @@
 import builtins
 import os
 import re
+import sys
 import textwrap
 from unittest import mock
 
@@ -50,11 +51,14 @@ global_defaults = {
     "title": 'Buildbot',
     "titleURL": 'http://buildbot.net',
     "buildbotURL": 'http://localhost:8080/',
+    "logChunkCacheSize": 16 * 1024 * 1024,
+    "logCompressionLevel": None,
     "logCompressionLimit": 4096,
     "logCompressionMethod": 'gz',
     "logEncoding": 'utf-8',
     "logMaxTailSize": None,
     "logMaxSize": None,
+    "logWriteBehind": None,
     "properties": properties.Properties(),
     "collapseRequests": None,
     "prioritizeBuilders": None,
@@ -468,7 +472,38 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
             self.cfg.load_global(self.filename, {'logCompressionMethod': 'foo'})
 
         self.assertConfigError(
-            errors, "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz' or 'lz4'")
+            errors, "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4' or 'zstd'")
+
+    def test_load_global_logCompressionMethod_zstd(self):
+        with mock.patch.dict(sys.modules, {'zstandard': mock.Mock()}):
+            self.do_test_load_global({"logCompressionMethod": 'zstd'},
+                                     logCompressionMethod='zstd')
+
+    def test_load_global_logCompressionMethod_zstd_not_installed(self):
+        with mock.patch.dict(sys.modules, {'zstandard': None}):
+            with capture_config_errors() as errors:
+                self.cfg.load_global(self.filename, {'logCompressionMethod': 'zstd'})
+
+        self.assertConfigError(errors, "you must install the zstandard library")
+
+    def test_load_global_logCompressionLevel(self):
+        self.do_test_load_global({"logCompressionMethod": 'bz2', "logCompressionLevel": 5},
+                                 logCompressionMethod='bz2', logCompressionLevel=5)
+
+    def test_load_global_logCompressionLevel_out_of_range(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logCompressionLevel': 10})
+
+        self.assertConfigError(errors, "c['logCompressionLevel'] must be between 0 and 9 for 'gz'")
+
+    def test_load_global_logCompressionLevel_unsupported_method(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logCompressionMethod': 'raw',
+                                                 'logCompressionLevel': 3})
+
+        self.assertConfigError(
+            errors, "c['logCompressionLevel'] can not be used with "
+                    "c['logCompressionMethod'] = 'raw'")
 
     def test_load_global_codebaseGenerator(self):
         func = lambda _: "dummy"
@@ -483,6 +518,14 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
                                "codebaseGenerator must be a callable "
                                "accepting a dict and returning a str")
 
+    def test_load_global_logChunkCacheSize(self):
+        self.do_test_load_global({"logChunkCacheSize": 0}, logChunkCacheSize=0)
+
+    def test_load_global_logChunkCacheSize_negative(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logChunkCacheSize': -1})
+        self.assertConfigError(errors, "c['logChunkCacheSize'] must not be negative")
+
     def test_load_global_logMaxSize(self):
         self.do_test_load_global({"logMaxSize": 123}, logMaxSize=123)
 
@@ -492,6 +535,44 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
     def test_load_global_logEncoding(self):
         self.do_test_load_global({"logEncoding": 'latin-2'}, logEncoding='latin-2')
 
+    def test_load_global_logWriteBehind_true(self):
+        self.do_test_load_global({"logWriteBehind": True}, logWriteBehind={
+            "flushInterval": 0.1,
+            "flushSize": 1024 * 1024,
+            "maxPendingSize": 16 * 1024 * 1024,
+        })
+
+    def test_load_global_logWriteBehind_dict(self):
+        self.do_test_load_global({"logWriteBehind": {"flushInterval": 1, "flushSize": 100}},
+                                 logWriteBehind={
+            "flushInterval": 1,
+            "flushSize": 100,
+            "maxPendingSize": 16 * 1024 * 1024,
+        })
+
+    def test_load_global_logWriteBehind_false(self):
+        self.do_test_load_global({"logWriteBehind": False}, logWriteBehind=None)
+
+    def test_load_global_logWriteBehind_unknown_key(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logWriteBehind': {'foo': 1}})
+
+        self.assertConfigError(errors, "unrecognized key(s) in c['logWriteBehind']: foo")
+
+    def test_load_global_logWriteBehind_invalid_value(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logWriteBehind': {'flushSize': -1}})
+
+        self.assertConfigError(errors,
+                               "c['logWriteBehind']['flushSize'] must be a positive number")
+
+    def test_load_global_logWriteBehind_pending_smaller_than_flush(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logWriteBehind': {
+                'flushSize': 100, 'maxPendingSize': 10}})
+
+        self.assertConfigError(errors, "must not be smaller than")
+
     def test_load_global_properties(self):
         exp = properties.Properties()
         exp.setProperty('x', 10, self.filename)
@@ -955,6 +1036,15 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
 
         self.assertConfigError(errors, 'Invalid www configuration value of versions')
 
+    def test_load_www_event_coalescing_window(self):
+        self.cfg.load_www(self.filename, {'www': {"event_coalescing_window": 0.1}})
+        self.assertEqual(self.cfg.www['event_coalescing_window'], 0.1)
+
+    def test_load_www_event_coalescing_window_negative(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_www(self.filename, {'www': {"event_coalescing_window": -1}})
+        self.assertConfigError(errors, 'Invalid www["event_coalescing_window"]')
+
     def test_load_www_cookie_expiration_time_not_timedelta(self):
         with capture_config_errors() as errors:
             self.cfg.load_www(self.filename, {'www': {"cookie_expiration_time": 1}})
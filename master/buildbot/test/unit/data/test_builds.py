@@ -21,6 +21,8 @@ from twisted.trial import unittest
 
 from buildbot.data import builds
 from buildbot.data import resultspec
+from buildbot.process.results import RETRY
+from buildbot.process.results import SUCCESS
 from buildbot.test import fakedb
 from buildbot.test.fake import fakemaster
 from buildbot.test.reactor import TestReactorMixin
@@ -126,6 +128,53 @@ class BuildEndpoint(endpoint.EndpointMixin, unittest.TestCase):
             buildrequest)
 
 
+class PreviousBuildEndpoint(endpoint.EndpointMixin, unittest.TestCase):
+
+    endpointClass = builds.PreviousBuildEndpoint
+    resourceTypeClass = builds.Build
+
+    def setUp(self):
+        self.setUpEndpoint()
+        self.db.insert_test_data([
+            fakedb.Builder(id=77, name='builder77'),
+            fakedb.Master(id=88),
+            fakedb.Worker(id=13, name='wrk'),
+            fakedb.Buildset(id=8822),
+            fakedb.BuildRequest(id=82, buildsetid=8822, builderid=77),
+            fakedb.Build(id=13, builderid=77, masterid=88, workerid=13,
+                         buildrequestid=82, number=3, complete_at=1, results=SUCCESS),
+            fakedb.Build(id=14, builderid=77, masterid=88, workerid=13,
+                         buildrequestid=82, number=4, complete_at=1, results=RETRY),
+            fakedb.Build(id=15, builderid=77, masterid=88, workerid=13,
+                         buildrequestid=82, number=5),
+        ])
+
+    def tearDown(self):
+        self.tearDownEndpoint()
+
+    @defer.inlineCallbacks
+    def test_get_builder_number(self):
+        build = yield self.callGet(('builders', 77, 'builds', 6, 'previous'))
+        self.validateData(build)
+        self.assertEqual(build['buildid'], 13)
+
+    @defer.inlineCallbacks
+    def test_get_buildername_number(self):
+        build = yield self.callGet(('builders', 'builder77', 'builds', 4, 'previous'))
+        self.validateData(build)
+        self.assertEqual(build['buildid'], 13)
+
+    @defer.inlineCallbacks
+    def test_get_first_build(self):
+        build = yield self.callGet(('builders', 77, 'builds', 3, 'previous'))
+        self.assertEqual(build, None)
+
+    @defer.inlineCallbacks
+    def test_get_missing_builder(self):
+        build = yield self.callGet(('builders', 'builder77_nope', 'builds', 5, 'previous'))
+        self.assertEqual(build, None)
+
+
 class BuildsEndpoint(endpoint.EndpointMixin, unittest.TestCase):
 
     endpointClass = builds.BuildsEndpoint
@@ -267,6 +316,25 @@ class BuildsEndpoint(endpoint.EndpointMixin, unittest.TestCase):
 
         self.assertTrue(any(('reason' in b['properties']) for b in builds))
 
+    @defer.inlineCallbacks
+    def test_properties_loaded_at_once(self):
+        self.patch(self.master.db.builds, 'getBuildPropertiesForBuilds',
+                   mock.Mock(wraps=self.master.db.builds.getBuildPropertiesForBuilds))
+        resultSpec = resultspec.OptimisedResultSpec(
+            properties=[resultspec.Property(b'property', 'eq', ['reason', 'owner'])])
+        builds = yield self.callGet(('builds',), resultSpec=resultSpec)
+
+        self.master.db.builds.getBuildPropertiesForBuilds.assert_called_once_with(
+            [b['buildid'] for b in builds], ['reason', 'owner'])
+
+    @defer.inlineCallbacks
+    def test_properties_wildcard(self):
+        resultSpec = resultspec.OptimisedResultSpec(
+            properties=[resultspec.Property(b'property', 'eq', '*')])
+        builds = yield self.callGet(('builds',), resultSpec=resultSpec)
+
+        self.assertTrue(any(('reason' in b['properties']) for b in builds))
+
     @defer.inlineCallbacks
     def test_get_filter_eq(self):
         resultSpec = resultspec.OptimisedResultSpec(
@@ -211,6 +211,22 @@ class ChangeSource(TestReactorMixin, interfaces.InterfaceTests,
         else:
             self.fail("The RuntimeError did not propagate")
 
+    def test_signature_claimChangeSources(self):
+        @self.assertArgSpecMatches(
+            self.master.data.updates.claimChangeSources,  # fake
+            self.rtype.claimChangeSources)  # real
+        def claimChangeSources(self, changesourceids, masterid):
+            pass
+
+    @defer.inlineCallbacks
+    def test_claimChangeSources(self):
+        self.master.db.changesources.claimChangeSources = mock.Mock(
+            return_value=defer.succeed({10}))
+        result = yield self.rtype.claimChangeSources([10, 11], 20)
+        self.assertEqual(result, {10})
+        self.master.db.changesources.claimChangeSources.assert_called_with(
+            [10, 11], 20)
+
     @defer.inlineCallbacks
     def test__masterDeactivated(self):
         yield self.master.db.insert_test_data([
@@ -20,6 +20,7 @@ from twisted.trial import unittest
 
 from buildbot.data import logchunks
 from buildbot.data import resultspec
+from buildbot.db.logs import LogLinesReader
 from buildbot.test import fakedb
 from buildbot.test.util import endpoint
 
@@ -172,6 +173,95 @@ class LogChunkEndpoint(LogChunkEndpointBase):
         self.assertEqual(logchunk['logid'], 61)
 
 
+class BuildLogChunksEndpoint(endpoint.EndpointMixin, unittest.TestCase):
+
+    endpointClass = logchunks.BuildLogChunksEndpoint
+    resourceTypeClass = logchunks.LogChunk
+
+    def setUp(self):
+        self.setUpEndpoint()
+        self.db.insert_test_data([
+            fakedb.Builder(id=77),
+            fakedb.Worker(id=13, name='wrk'),
+            fakedb.Master(id=88),
+            fakedb.Buildset(id=8822),
+            fakedb.BuildRequest(id=82, buildsetid=8822),
+            fakedb.Build(id=13, builderid=77, masterid=88, workerid=13,
+                         buildrequestid=82, number=3),
+            fakedb.Build(id=14, builderid=77, masterid=88, workerid=13,
+                         buildrequestid=82, number=4),
+            fakedb.Step(id=50, buildid=13, number=9, name='make'),
+            fakedb.Step(id=51, buildid=14, number=9, name='make'),
+            fakedb.Log(id=60, stepid=50, name='stdio', slug='stdio', type='s',
+                       num_lines=2),
+            fakedb.LogChunk(logid=60, first_line=0, last_line=1, compressed=0,
+                            content="oline zero\noline 1"),
+            fakedb.Log(id=61, stepid=50, name='errors', slug='errors', type='t',
+                       num_lines=1),
+            fakedb.LogChunk(logid=61, first_line=0, last_line=0, compressed=0,
+                            content="an error"),
+            fakedb.Log(id=62, stepid=50, name='notes', slug='notes', type='t',
+                       num_lines=0),
+            fakedb.Log(id=70, stepid=51, name='stdio', slug='stdio', type='s',
+                       num_lines=1),
+            fakedb.LogChunk(logid=70, first_line=0, last_line=0, compressed=0,
+                            content="oother build"),
+        ])
+
+    def tearDown(self):
+        self.tearDownEndpoint()
+
+    @defer.inlineCallbacks
+    def test_get(self):
+        logchunks = yield self.callGet(('builds', 13, 'logs', 'contents'))
+        for logchunk in logchunks:
+            self.validateData(logchunk)
+        self.assertEqual(logchunks, [
+            {'logid': 60, 'firstline': 0, 'content': 'oline zero\noline 1\n'},
+            {'logid': 61, 'firstline': 0, 'content': 'an error\n'},
+            {'logid': 62, 'firstline': 0, 'content': ''},
+        ])
+
+    @defer.inlineCallbacks
+    def test_get_by_builder(self):
+        logchunks = yield self.callGet(('builders', 77, 'builds', 4, 'logs', 'contents'))
+        self.assertEqual(logchunks, [
+            {'logid': 70, 'firstline': 0, 'content': 'oother build\n'},
+        ])
+
+    @defer.inlineCallbacks
+    def test_get_missing(self):
+        logchunks = yield self.callGet(('builders', 77, 'builds', 5, 'logs', 'contents'))
+        self.assertEqual(logchunks, [])
+
+    @defer.inlineCallbacks
+    def test_get_logids(self):
+        # logs of other builds are ignored
+        resultSpec = resultspec.ResultSpec(
+            filters=[resultspec.Filter('logid', 'in', [61, 70])])
+        logchunks = yield self.callGet(('builds', 13, 'logs', 'contents'),
+                                       resultSpec=resultSpec)
+        self.assertEqual(logchunks, [
+            {'logid': 61, 'firstline': 0, 'content': 'an error\n'},
+        ])
+
+    @defer.inlineCallbacks
+    def test_get_max_bytes(self):
+        resultSpec = resultspec.ResultSpec(
+            filters=[resultspec.Filter('max_bytes', 'eq', [12])])
+        logchunks = yield self.callGet(('builds', 13, 'logs', 'contents'),
+                                       resultSpec=resultSpec)
+        self.assertEqual([c['content'] for c in logchunks],
+                         ['oline zero\n', 'an error\n', ''])
+
+    @defer.inlineCallbacks
+    def test_get_default_max_bytes(self):
+        self.patch(logchunks.BuildLogChunksEndpoint, 'DEFAULT_MAX_BYTES', 12)
+        logchunks_ = yield self.callGet(('builds', 13, 'logs', 'contents'))
+        self.assertEqual([c['content'] for c in logchunks_],
+                         ['oline zero\n', 'an error\n', ''])
+
+
 class RawLogChunkEndpoint(LogChunkEndpointBase):
 
     endpointClass = logchunks.RawLogChunkEndpoint
@@ -196,3 +286,39 @@ class RawLogChunkEndpoint(LogChunkEndpointBase):
 
         self.assertEqual(logchunk,
                          {'filename': expFilename, 'mime-type': "text/plain", 'raw': expContent})
+
+    @defer.inlineCallbacks
+    def do_test_stream(self, logid, expContent, expReads):
+        self.patch(LogLinesReader, 'chunksPerRead', 1)
+        data = yield self.ep.stream(resultspec.ResultSpec(), {'logid': logid})
+        reader = data.pop('raw')
+        self.assertEqual(data['mime-type'], "text/plain")
+
+        pieces = []
+        while True:
+            piece = yield reader.read()
+            if piece is None:
+                break
+            pieces.append(piece)
+        self.assertEqual(len(pieces), expReads)
+        self.assertEqual(''.join(pieces), expContent)
+
+        # the streamed content is the same as the one returned by get
+        logchunk = yield self.callGet(('logs', logid, self.endpointname))
+        self.assertEqual(logchunk['raw'], expContent)
+
+    def test_stream_stdio(self):
+        expContent = '\n'.join([line[1:] for line in self.log60Lines])
+        return self.do_test_stream(60, expContent, 4)
+
+    def test_stream_text(self):
+        expContent = '\n'.join(self.log61Lines) + '\n'
+        return self.do_test_stream(61, expContent, 50)
+
+    def test_stream_empty(self):
+        return self.do_test_stream(62, '', 0)
+
+    @defer.inlineCallbacks
+    def test_stream_missing(self):
+        data = yield self.ep.stream(resultspec.ResultSpec(), {'logid': 99})
+        self.assertIsNone(data)
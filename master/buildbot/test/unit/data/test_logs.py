@@ -195,6 +195,26 @@ class LogsEndpoint(endpoint.EndpointMixin, unittest.TestCase):
         self.assertEqual(sorted([b['name'] for b in logs]),
                          ['results_html', 'stdio'])
 
+    @defer.inlineCallbacks
+    def test_get_buildid(self):
+        logs = yield self.callGet(('builds', 13, 'logs'))
+
+        for log in logs:
+            self.validateData(log)
+
+        self.assertEqual([(b['stepid'], b['name']) for b in logs],
+                         [(50, 'stdio'), (50, 'errors'), (51, 'stdio'), (51, 'results_html')])
+
+    @defer.inlineCallbacks
+    def test_get_builder_build_number(self):
+        logs = yield self.callGet(('builders', 77, 'builds', 3, 'logs'))
+        self.assertEqual(len(logs), 4)
+
+    @defer.inlineCallbacks
+    def test_get_buildid_missing(self):
+        logs = yield self.callGet(('builders', 77, 'builds', 4, 'logs'))
+        self.assertEqual(logs, [])
+
 
 class Log(TestReactorMixin, interfaces.InterfaceTests, unittest.TestCase):
 
@@ -275,3 +295,14 @@ class Log(TestReactorMixin, interfaces.InterfaceTests, unittest.TestCase):
         self.do_test_callthrough('appendLog',
                                  self.rtype.appendLog,
                                  logid=10, content='foo\nbar\n')
+
+    def test_signature_waitForLogAppendCapacity(self):
+        @self.assertArgSpecMatches(
+            self.master.data.updates.waitForLogAppendCapacity,  # fake
+            self.rtype.waitForLogAppendCapacity)  # real
+        def waitForLogAppendCapacity(self):
+            pass
+
+    def test_waitForLogAppendCapacity(self):
+        self.do_test_callthrough('waitForAppendCapacity',
+                                 self.rtype.waitForLogAppendCapacity)
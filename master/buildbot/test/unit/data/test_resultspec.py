@@ -22,6 +22,7 @@ from buildbot.data import base
 from buildbot.data import resultspec
 from buildbot.data.resultspec import NoneComparator
 from buildbot.data.resultspec import ReverseComparator
+from buildbot.util import epoch2datetime
 
 
 def mklist(fld, *values):
@@ -240,6 +241,39 @@ class ResultSpec(unittest.TestCase):
         with self.assertRaises(AssertionError):
             resultspec.ResultSpec(filters=[f]).apply(data)
 
+    def test_apply_after(self):
+        data = mklist(('a', 'b'), (1, 1), (1, 2), (2, 1), (2, 2), (3, 1))
+        random.shuffle(data)
+        # the total includes the items before the cursor
+        self.assertEqual(
+            list(resultspec.ResultSpec(order=['a', 'b'], after=[1, 2]).apply(data)),
+            mklist(('a', 'b'), (2, 1), (2, 2), (3, 1)))
+        self.assertEqual(
+            resultspec.ResultSpec(order=['-a', 'b'], after=[2, 1], limit=2).apply(data),
+            base.ListResult(mklist(('a', 'b'), (2, 2), (1, 1)), offset=None, total=5, limit=2))
+
+    def test_apply_after_datetime(self):
+        data = mklist(('a', 'b'), (epoch2datetime(10), 1), (epoch2datetime(20), 2))
+        self.assertEqual(
+            list(resultspec.ResultSpec(order=['a'], after=[10]).apply(data)),
+            mklist(('a', 'b'), (epoch2datetime(20), 2)))
+
+    def test_apply_without_total(self):
+        data = mklist('x', *list(range(101, 131)))
+        self.assertListResultEqual(
+            resultspec.ResultSpec(limit=2, countTotal=False).apply(data),
+            base.ListResult(mklist('x', 101, 102), total=None, limit=2))
+
+    def test_cursor(self):
+        token = resultspec.encodeCursor([12, 'abc'])
+        self.assertEqual(resultspec.decodeCursor(token), [12, 'abc'])
+
+    def test_cursor_invalid(self):
+        for token in ['!!', resultspec.encodeCursor({'a': 1}),
+                      resultspec.encodeCursor([[1]])]:
+            with self.assertRaises(ValueError):
+                resultspec.decodeCursor(token)
+
     def test_popProperties(self):
         expected = ['prop1', 'prop2']
         rs = resultspec.ResultSpec(properties=[
@@ -245,6 +245,23 @@ class Scheduler(TestReactorMixin, interfaces.InterfaceTests,
         else:
             self.fail("The RuntimeError did not propagate")
 
+    def test_signature_claimSchedulers(self):
+        @self.assertArgSpecMatches(
+            self.master.data.updates.claimSchedulers,  # fake
+            self.rtype.claimSchedulers)  # real
+        def claimSchedulers(self, schedulerids, masterid):
+            pass
+
+    @defer.inlineCallbacks
+    def test_claimSchedulers(self):
+        self.master.db.schedulers.claimSchedulers = mock.Mock(
+            return_value=defer.succeed({10}))
+
+        result = yield self.rtype.claimSchedulers([10, 11], 20)
+
+        self.assertEqual(result, {10})
+        self.master.db.schedulers.claimSchedulers.assert_called_with([10, 11], 20)
+
     @defer.inlineCallbacks
     def test__masterDeactivated(self):
         yield self.master.db.insert_test_data([
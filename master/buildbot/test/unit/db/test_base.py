@@ -25,6 +25,7 @@ from twisted.trial import unittest
 from buildbot.db import base
 from buildbot.test import fakedb
 from buildbot.test.util import connector_component
+from buildbot.test.util import logging
 from buildbot.util import sautils
 
 
@@ -160,6 +161,43 @@ class TestBaseAsConnectorComponent(unittest.TestCase,
         self.assertEqual(id, None)
 
 
+class TestClaimServices(unittest.TestCase, logging.LoggingMixin):
+
+    def setUp(self):
+        self.setUpLogging()
+        meta = sa.MetaData()
+        self.tbl = sautils.Table('services', meta,
+                                 sa.Column('id', sa.Integer, primary_key=True))
+        self.claims_tbl = sautils.Table('service_masters', meta,
+                                        sa.Column('serviceid', sa.Integer, primary_key=True),
+                                        sa.Column('masterid', sa.Integer))
+        self.comp = base.DBConnectorComponent(mock.Mock())
+        self.conn = mock.Mock()
+
+    def failInserts(self, exception):
+        def execute(q):
+            if isinstance(q, sa.sql.expression.Insert):
+                raise exception
+            return [(2,)]
+        self.conn.execute.side_effect = execute
+
+    def claimServices(self):
+        return self.comp.thdClaimServices(self.conn, self.tbl, self.claims_tbl,
+                                          self.claims_tbl.c.serviceid, [1, 2], 13)
+
+    def test_claimServices_retries_exhausted(self):
+        self.failInserts(sa.exc.IntegrityError('insert', {}, Exception()))
+        self.assertEqual(self.claimServices(), {2})
+        self.assertEqual(self.conn.execute.call_count, 4)
+        self.assertLogged("could not claim services .* after 3 attempts")
+
+    def test_claimServices_other_error(self):
+        self.failInserts(sa.exc.ProgrammingError('insert', {}, Exception()))
+        with self.assertRaises(sa.exc.ProgrammingError):
+            self.claimServices()
+        self.assertEqual(self.conn.execute.call_count, 1)
+
+
 class TestCachedDecorator(unittest.TestCase):
 
     def setUp(self):
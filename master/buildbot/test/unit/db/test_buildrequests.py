@@ -16,6 +16,7 @@
 import datetime
 
 from twisted.internet import defer
+from twisted.python import log
 from twisted.trial import unittest
 
 from buildbot.db import buildrequests
@@ -99,6 +100,42 @@ class Tests(interfaces.InterfaceTests):
 
         self.assertEqual(brdict, None)
 
+    @defer.inlineCallbacks
+    def test_getUnclaimedBuildRequestsSummary(self):
+        yield self.insert_test_data([
+            fakedb.BuildRequest(id=44, buildsetid=self.BSID, builderid=self.BLDRID1,
+                                priority=3, submitted_at=self.SUBMITTED_AT_EPOCH + 10),
+            fakedb.BuildRequest(id=45, buildsetid=self.BSID, builderid=self.BLDRID1,
+                                priority=1, submitted_at=self.SUBMITTED_AT_EPOCH),
+            # claimed, so ignored
+            fakedb.BuildRequest(id=46, buildsetid=self.BSID, builderid=self.BLDRID1,
+                                priority=10, submitted_at=self.SUBMITTED_AT_EPOCH - 10),
+            fakedb.BuildRequestClaim(brid=46, masterid=self.MASTER_ID,
+                                     claimed_at=self.CLAIMED_AT_EPOCH),
+            # complete, so ignored
+            fakedb.BuildRequest(id=47, buildsetid=self.BSID, builderid=self.BLDRID2,
+                                priority=10, complete=1, submitted_at=self.SUBMITTED_AT_EPOCH),
+            fakedb.BuildRequest(id=48, buildsetid=self.BSID, builderid=self.BLDRID2,
+                                priority=2, submitted_at=self.SUBMITTED_AT_EPOCH + 20),
+            # builder not asked for
+            fakedb.BuildRequest(id=49, buildsetid=self.BSID, builderid=self.BLDRID3,
+                                priority=2, submitted_at=self.SUBMITTED_AT_EPOCH),
+        ])
+        summary = yield self.db.buildrequests.getUnclaimedBuildRequestsSummary(
+            [self.BLDRID1, self.BLDRID2])
+
+        self.assertEqual(summary, {
+            self.BLDRID1: {"priority": 3, "submitted_at": self.SUBMITTED_AT},
+            self.BLDRID2: {"priority": 2,
+                           "submitted_at": epoch2datetime(self.SUBMITTED_AT_EPOCH + 20)},
+        })
+
+    @defer.inlineCallbacks
+    def test_getUnclaimedBuildRequestsSummary_empty(self):
+        summary = yield self.db.buildrequests.getUnclaimedBuildRequestsSummary(
+            [self.BLDRID1])
+        self.assertEqual(summary, {})
+
     @defer.inlineCallbacks
     def do_test_getBuildRequests_claim_args(self, **kwargs):
         expected = kwargs.pop('expected')
@@ -666,3 +703,53 @@ class TestRealDB(unittest.TestCase,
 
     def tearDown(self):
         return self.tearDownConnectorComponent()
+
+    def captureMetrics(self):
+        events = []
+
+        def observer(event):
+            if 'metric' in event:
+                events.append(event['metric'])
+        log.addObserver(observer)
+        self.addCleanup(log.removeObserver, observer)
+        return events
+
+    @defer.inlineCallbacks
+    def test_claimBuildRequests_metrics(self):
+        events = self.captureMetrics()
+        yield self.insert_test_data([
+            fakedb.BuildRequest(id=44, buildsetid=self.BSID, builderid=self.BLDRID1),
+            fakedb.BuildRequest(id=45, buildsetid=self.BSID, builderid=self.BLDRID1),
+        ])
+        yield self.db.buildrequests.claimBuildRequests(brids=[44, 45])
+
+        self.assertEqual([(e.timer, e.elapsed >= 0) for e in events if hasattr(e, 'timer')],
+                         [('BuildRequestsConnectorComponent.claimBuildRequests()', True)])
+        self.assertEqual([(e.counter, e.count) for e in events if hasattr(e, 'counter')],
+                         [('BuildRequestsConnectorComponent.claimed', 2)])
+
+    @defer.inlineCallbacks
+    def test_claimBuildRequests_missing_brid(self):
+        yield self.insert_test_data([
+            fakedb.BuildRequest(id=44, buildsetid=self.BSID, builderid=self.BLDRID1),
+        ])
+        # 45 does not exist, or was deleted in the meantime
+        with self.assertRaises(buildrequests.AlreadyClaimedError):
+            yield self.db.buildrequests.claimBuildRequests(brids=[44, 45])
+
+        results = yield self.db.buildrequests.getBuildRequests(claimed=True)
+        self.assertEqual(results, [])
+
+    @defer.inlineCallbacks
+    def test_claimBuildRequests_conflict_metrics(self):
+        events = self.captureMetrics()
+        yield self.insert_test_data([
+            fakedb.BuildRequest(id=44, buildsetid=self.BSID, builderid=self.BLDRID1),
+            fakedb.BuildRequestClaim(brid=44, masterid=self.OTHER_MASTER_ID,
+                                     claimed_at=1300103810),
+        ])
+        with self.assertRaises(buildrequests.AlreadyClaimedError):
+            yield self.db.buildrequests.claimBuildRequests(brids=[44])
+
+        self.assertEqual([(e.counter, e.count) for e in events if hasattr(e, 'counter')],
+                         [('BuildRequestsConnectorComponent.claim-conflicts', 1)])
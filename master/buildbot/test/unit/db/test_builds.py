@@ -91,6 +91,11 @@ class Tests(interfaces.InterfaceTests):
         def getBuild(self, builderid, number):
             pass
 
+    def test_signature_getPreviousCompletedBuild(self):
+        @self.assertArgSpecMatches(self.db.builds.getPreviousCompletedBuild)
+        def getPreviousCompletedBuild(self, builderid, number, exclude_results=None):
+            pass
+
     def test_signature_getBuilds(self):
         @self.assertArgSpecMatches(self.db.builds.getBuilds)
         def getBuilds(self, builderid=None, buildrequestid=None, workerid=None,
@@ -118,6 +123,11 @@ class Tests(interfaces.InterfaceTests):
         def getBuildProperties(self, bid, resultSpec=None):
             pass
 
+    def test_signature_getBuildPropertiesForBuilds(self):
+        @self.assertArgSpecMatches(self.db.builds.getBuildPropertiesForBuilds)
+        def getBuildPropertiesForBuilds(self, buildids, names=None):
+            pass
+
     def test_signature_setBuildProperty(self):
         @self.assertArgSpecMatches(self.db.builds.setBuildProperty)
         def setBuildProperty(self, bid, name, value, source):
@@ -155,6 +165,28 @@ class Tests(interfaces.InterfaceTests):
         validation.verifyDbDict(self, 'dbbuilddict', bdict)
         self.assertEqual(bdict['id'], 50)
 
+    @defer.inlineCallbacks
+    def test_getPreviousCompletedBuild(self):
+        yield self.insert_test_data(self.backgroundData + self.threeBuilds + [
+            fakedb.Build(id=53, buildrequestid=40, number=8, masterid=88,
+                         builderid=77, workerid=13, started_at=TIME4,
+                         complete_at=TIME4, results=4),
+            fakedb.Build(id=54, buildrequestid=41, number=9, masterid=88,
+                         builderid=77, workerid=13, started_at=TIME4),
+        ])
+        bdict = yield self.db.builds.getPreviousCompletedBuild(77, 10)
+        validation.verifyDbDict(self, 'dbbuilddict', bdict)
+        self.assertEqual(bdict['id'], 53)
+
+        # builds which are not complete are skipped as well
+        bdict = yield self.db.builds.getPreviousCompletedBuild(77, 10, exclude_results=[4])
+        self.assertEqual(bdict, self.threeBdicts[52])
+
+        bdict = yield self.db.builds.getPreviousCompletedBuild(77, 10, exclude_results=[4, 5])
+        self.assertEqual(bdict, None)
+        bdict = yield self.db.builds.getPreviousCompletedBuild(77, 7)
+        self.assertEqual(bdict, None)
+
     @defer.inlineCallbacks
     def test_getBuilds(self):
         yield self.insert_test_data(self.backgroundData + self.threeBuilds)
@@ -351,6 +383,31 @@ class Tests(interfaces.InterfaceTests):
             'prop': (42, 'test'),
         })
 
+    @defer.inlineCallbacks
+    def test_getBuildPropertiesForBuilds(self):
+        yield self.insert_test_data(self.backgroundData + self.threeBuilds)
+        yield self.db.builds.setBuildProperty(50, 'prop', 42, 'test')
+        yield self.db.builds.setBuildProperty(50, 'prop2', 43, 'test')
+        yield self.db.builds.setBuildProperty(52, 'prop', 44, 'test')
+        props = yield self.db.builds.getBuildPropertiesForBuilds([50, 51, 52])
+        self.assertEqual(props, {
+            50: {'prop': (42, 'test'), 'prop2': (43, 'test')},
+            51: {},
+            52: {'prop': (44, 'test')},
+        })
+
+    @defer.inlineCallbacks
+    def test_getBuildPropertiesForBuilds_names(self):
+        yield self.insert_test_data(self.backgroundData + self.threeBuilds)
+        yield self.db.builds.setBuildProperty(50, 'prop', 42, 'test')
+        yield self.db.builds.setBuildProperty(50, 'prop2', 43, 'test')
+        yield self.db.builds.setBuildProperty(52, 'prop2', 44, 'test')
+        props = yield self.db.builds.getBuildPropertiesForBuilds([50, 52], ['prop2', 'prop3'])
+        self.assertEqual(props, {
+            50: {'prop2': (43, 'test')},
+            52: {'prop2': (44, 'test')},
+        })
+
     @defer.inlineCallbacks
     def testsetandgetProperties(self):
         yield self.insert_test_data(self.backgroundData + self.threeBuilds)
@@ -464,6 +521,32 @@ class RealTests(Tests):
         ordered_bdicts = rs.apply(bdicts2)
         self.assertEqual(ordered_bdicts, bdicts)
 
+    @defer.inlineCallbacks
+    def test_getBuilds_after(self):
+        rs = resultspec.ResultSpec(order=['-builderid', '-id'], limit=2, after=[88, 51])
+        rs.fieldMapping = {'builderid': 'builds.builderid', 'id': 'builds.id'}
+        yield self.insert_test_data(self.backgroundData + self.threeBuilds)
+        bdicts = yield self.db.builds.getBuilds(resultSpec=rs)
+        self.assertEqual(rs.after, None)
+        self.assertEqual([bd['id'] for bd in bdicts], [52, 50])
+        # the total is the one of the whole collection
+        self.assertEqual(bdicts.total, 3)
+
+        # assert applying the same cursor at the data layer will give the same
+        # results
+        rs = resultspec.ResultSpec(order=['-builderid', '-id'], limit=2, after=[88, 51])
+        bdicts2 = yield self.db.builds.getBuilds()
+        self.assertEqual(list(rs.apply(bdicts2)), list(bdicts))
+
+    @defer.inlineCallbacks
+    def test_getBuilds_limit_without_total(self):
+        rs = resultspec.ResultSpec(order=['id'], limit=2, countTotal=False)
+        rs.fieldMapping = {'id': 'builds.id'}
+        yield self.insert_test_data(self.backgroundData + self.threeBuilds)
+        bdicts = yield self.db.builds.getBuilds(resultSpec=rs)
+        self.assertEqual([bd['id'] for bd in bdicts], [50, 51])
+        self.assertEqual(bdicts.total, None)
+
     @defer.inlineCallbacks
     def test_getBuilds_resultSpecFilterEqTwoValues(self):
         rs = resultspec.ResultSpec(
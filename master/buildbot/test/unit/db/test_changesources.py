@@ -117,6 +117,26 @@ class Tests(interfaces.InterfaceTests):
         cs = yield self.db.changesources.getChangeSource(87)
         self.assertEqual(cs['masterid'], None)
 
+    def test_signature_claimChangeSources(self):
+        """claimChangeSources has the right signature"""
+        @self.assertArgSpecMatches(self.db.changesources.claimChangeSources)
+        def claimChangeSources(self, changesourceids, masterid):
+            pass
+
+    @defer.inlineCallbacks
+    def test_claimChangeSources(self):
+        """claimChangeSources claims the unclaimed changesources only"""
+        yield self.insert_test_data([
+            self.cs42, self.master13, self.cs42master13,
+            self.cs87, self.master14,
+        ])
+        claimed = yield self.db.changesources.claimChangeSources([42, 87, 99], 14)
+        self.assertEqual(claimed, {87})
+        cs = yield self.db.changesources.getChangeSource(42)
+        self.assertEqual(cs['masterid'], 13)
+        cs = yield self.db.changesources.getChangeSource(87)
+        self.assertEqual(cs['masterid'], 14)
+
     def test_signature_getChangeSource(self):
         """getChangeSource has the right signature"""
         @self.assertArgSpecMatches(self.db.changesources.getChangeSource)
@@ -14,6 +14,7 @@
 # Copyright Buildbot Team Members
 
 
+import array
 import base64
 import bz2
 import textwrap
@@ -111,7 +112,12 @@ class Tests(interfaces.InterfaceTests):
 
     def test_signature_getLogs(self):
         @self.assertArgSpecMatches(self.db.logs.getLogs)
-        def getLogs(self, stepid=None):
+        def getLogs(self, stepid=None, buildid=None):
+            pass
+
+    def test_signature_getLogsLines(self):
+        @self.assertArgSpecMatches(self.db.logs.getLogsLines)
+        def getLogsLines(self, logids, max_bytes=None):
             pass
 
     def test_signature_getLogLines(self):
@@ -119,6 +125,11 @@ class Tests(interfaces.InterfaceTests):
         def getLogLines(self, logid, first_line, last_line):
             pass
 
+    def test_signature_getLogChunks(self):
+        @self.assertArgSpecMatches(self.db.logs.getLogChunks)
+        def getLogChunks(self, logid, first_line, last_line, limit):
+            pass
+
     def test_signature_addLog(self):
         @self.assertArgSpecMatches(self.db.logs.addLog)
         def addLog(self, stepid, name, slug, type):
@@ -129,6 +140,16 @@ class Tests(interfaces.InterfaceTests):
         def appendLog(self, logid, content):
             pass
 
+    def test_signature_waitForAppendCapacity(self):
+        @self.assertArgSpecMatches(self.db.logs.waitForAppendCapacity)
+        def waitForAppendCapacity(self):
+            pass
+
+    def test_signature_flushPendingAppends(self):
+        @self.assertArgSpecMatches(self.db.logs.flushPendingAppends)
+        def flushPendingAppends(self):
+            pass
+
     def test_signature_finishLog(self):
         @self.assertArgSpecMatches(self.db.logs.finishLog)
         def finishLog(self, logid):
@@ -136,7 +157,12 @@ class Tests(interfaces.InterfaceTests):
 
     def test_signature_compressLog(self):
         @self.assertArgSpecMatches(self.db.logs.compressLog)
-        def compressLog(self, logid, force=False):
+        def compressLog(self, logid, force=False, recompress=False):
+            pass
+
+    def test_signature_getLogIdsToRecompress(self):
+        @self.assertArgSpecMatches(self.db.logs.getLogIdsToRecompress)
+        def getLogIdsToRecompress(self, limit=None):
             pass
 
     def test_signature_deleteOldLogChunks(self):
@@ -205,6 +231,44 @@ class Tests(interfaces.InterfaceTests):
             validation.verifyDbDict(self, 'logdict', logdict)
         self.assertEqual(sorted([ld['id'] for ld in logdicts]), [201, 202])
 
+    @defer.inlineCallbacks
+    def test_getLogs_buildid(self):
+        yield self.insert_test_data(self.backgroundData + [
+            fakedb.Build(id=31, buildrequestid=41, number=8, masterid=88,
+                         builderid=88, workerid=47),
+            fakedb.Step(id=103, buildid=31, number=1, name='one'),
+            fakedb.Log(id=201, stepid=101, name='stdio', slug='stdio',
+                       complete=0, num_lines=200, type='s'),
+            fakedb.Log(id=202, stepid=102, name='stdio', slug='stdio',
+                       complete=1, num_lines=300, type='s'),
+            fakedb.Log(id=203, stepid=103, name='stdio', slug='stdio',
+                       complete=0, num_lines=200, type='s'),
+        ])
+        logdicts = yield self.db.logs.getLogs(buildid=30)
+        for logdict in logdicts:
+            validation.verifyDbDict(self, 'logdict', logdict)
+        self.assertEqual(sorted([ld['id'] for ld in logdicts]), [201, 202])
+
+    @defer.inlineCallbacks
+    def test_getLogsLines(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines + self.bug3101Rows)
+        lines = yield self.db.logs.getLogsLines([201, 1470, 999])
+        self.assertEqual(lines, {
+            201: (yield self.db.logs.getLogLines(201, 0, 6)),
+            1470: (yield self.db.logs.getLogLines(1470, 0, 10)),
+        })
+
+    @defer.inlineCallbacks
+    def test_getLogsLines_max_bytes(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        expLines = ['line zero', 'line 1' + "x" * 200, 'line TWO', '', 'line 2**2',
+                    'another line', 'yet another line']
+        for max_bytes, num_lines in [(0, 0), (10, 1), (216, 1), (217, 2), (226, 3), (227, 4),
+                                     (236, 4), (237, 5), (1000, 7)]:
+            lines = yield self.db.logs.getLogsLines([201], max_bytes=max_bytes)
+            self.assertEqual(lines, {201: "".join(line + "\n"
+                                                  for line in expLines[:num_lines])})
+
     @defer.inlineCallbacks
     def test_getLogLines(self):
         yield self.insert_test_data(self.backgroundData + self.testLogLines)
@@ -236,6 +300,59 @@ class Tests(interfaces.InterfaceTests):
         self.assertEqual((yield self.db.logs.getLogLines(1470, 0, 0)),
                          expected)
 
+    @defer.inlineCallbacks
+    def test_getLogChunks(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        expLines = ['line zero', 'line 1' + "x" * 200, 'line TWO', '', 'line 2**2',
+                    'another line', 'yet another line']
+        for first_line in range(0, 7):
+            for last_line in range(first_line, 7):
+                got_lines = []
+                next_line = first_line
+                while True:
+                    chunks = yield self.db.logs.getLogChunks(201, next_line, last_line, 2)
+                    if not chunks:
+                        break
+                    self.assertLessEqual(len(chunks), 2)
+                    for chunk_first_line, chunk_last_line, content in chunks:
+                        self.assertEqual(chunk_first_line, next_line)
+                        self.assertEqual(content,
+                                         "\n".join(expLines[next_line:chunk_last_line + 1]))
+                        next_line = chunk_last_line + 1
+                        got_lines.append(content)
+                self.assertEqual(got_lines and "\n".join(got_lines),
+                                 "\n".join(expLines[first_line:last_line + 1]))
+
+    @defer.inlineCallbacks
+    def test_getLogChunks_empty(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.assertEqual((yield self.db.logs.getLogChunks(201, 7, 99, 10)), [])
+        self.assertEqual((yield self.db.logs.getLogChunks(201, 6, 3, 10)), [])
+        self.assertEqual((yield self.db.logs.getLogChunks(201, 1, 0, 10)), [])
+        self.assertEqual((yield self.db.logs.getLogChunks(999, 0, 99, 10)), [])
+
+    @defer.inlineCallbacks
+    def test_getLogLinesReader(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.patch(logs.LogLinesReader, 'chunksPerRead', 2)
+        for first_line in range(0, 7):
+            expected = yield self.db.logs.getLogLines(201, first_line, 6)
+            reader = self.db.logs.getLogLinesReader(201, first_line, 6)
+            pieces = []
+            while True:
+                text = yield reader.read()
+                if text is None:
+                    break
+                pieces.append(text)
+            self.assertEqual(''.join(pieces), expected)
+            self.assertLessEqual(len(pieces), 2)
+
+    @defer.inlineCallbacks
+    def test_getLogLinesReader_empty(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.assertIsNone((yield self.db.logs.getLogLinesReader(201, 7, 99).read()))
+        self.assertIsNone((yield self.db.logs.getLogLinesReader(999, 0, 99).read()))
+
     @defer.inlineCallbacks
     def test_addLog_getLog(self):
         yield self.insert_test_data(self.backgroundData)
@@ -312,6 +429,15 @@ class Tests(interfaces.InterfaceTests):
 
 class RealTests(Tests):
 
+    @defer.inlineCallbacks
+    def test_getLogsLines_max_bytes_reads_chunks_in_batches(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.patch(logs.LogLinesReader, 'chunksPerRead', 1)
+        lines = yield self.db.logs.getLogsLines([201], max_bytes=237)
+        self.assertEqual(lines[201], (yield self.db.logs.getLogLines(201, 0, 4)))
+        lines = yield self.db.logs.getLogsLines([201], max_bytes=1000)
+        self.assertEqual(lines[201], (yield self.db.logs.getLogLines(201, 0, 6)))
+
     @defer.inlineCallbacks
     def test_addLogLines_db(self):
         yield self.insert_test_data(self.backgroundData + self.testLogLines)
@@ -331,7 +457,186 @@ class RealTests(Tests):
             'first_line': 7,
             'last_line': 10,
             'content': b'abc\ndef\nghi\njkl',
-            'compressed': 0})
+            'compressed': 0,
+            'line_offsets': b'\x04\x00\x08\x00\x0c\x00'})
+
+    @defer.inlineCallbacks
+    def test_appendLog_write_behind_interval(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines + [
+            fakedb.Log(id=202, stepid=101, name='other', slug='other',
+                       complete=0, num_lines=0, type='s'),
+        ])
+        self.db.master.config.logWriteBehind = {
+            "flushInterval": 0.5, "flushSize": 1000, "maxPendingSize": 2000}
+
+        results = []
+        self.db.logs.appendLog(201, 'abc\n').addCallback(results.append)
+        self.db.logs.appendLog(202, 'first\n').addCallback(results.append)
+        self.db.logs.appendLog(201, 'def\nghi\n').addCallback(results.append)
+        self.assertEqual(results, [])
+        self.assertEqual((yield self.db.logs.getLogLines(201, 7, 9)), '')
+
+        self.reactor.advance(0.5)
+        yield self.db.logs.flushPendingAppends()
+        self.assertEqual(results, [(7, 7), (0, 0), (8, 9)])
+        self.assertEqual((yield self.db.logs.getLogLines(201, 7, 9)), 'abc\ndef\nghi\n')
+        self.assertEqual((yield self.db.logs.getLogLines(202, 0, 0)), 'first\n')
+        logdict = yield self.db.logs.getLog(201)
+        self.assertEqual(logdict['num_lines'], 10)
+
+    @defer.inlineCallbacks
+    def test_appendLog_write_behind_size(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.db.master.config.logWriteBehind = {
+            "flushInterval": 0.5, "flushSize": 10, "maxPendingSize": 20}
+
+        results = []
+        self.db.logs.appendLog(201, 'abc\n').addCallback(results.append)
+        self.assertEqual(results, [])
+        # the size threshold is reached, so the queue flushes without waiting
+        # for the timer
+        yield self.db.logs.appendLog(201, 'defghijkl\n').addCallback(results.append)
+        self.assertEqual(results, [(7, 7), (8, 8)])
+
+    @defer.inlineCallbacks
+    def test_appendLog_write_behind_backpressure(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.db.master.config.logWriteBehind = {
+            "flushInterval": 0.5, "flushSize": 10, "maxPendingSize": 10}
+        queue = self.db.logs._getWriteBehindQueue()
+
+        # hold the flush so that data piles up in the queue
+        flush = defer.Deferred()
+        self.patch(queue, '_flush', lambda batch: flush)
+        self.db.logs.appendLog(201, 'abcdefghijklmnop\n')
+        self.db.logs.appendLog(201, 'abcdefghijklmnop\n')
+
+        waited = []
+        self.db.logs.waitForAppendCapacity().addCallback(waited.append)
+        self.assertEqual(waited, [])
+        flush.callback(None)
+        self.assertEqual(waited, [None])
+
+    @defer.inlineCallbacks
+    def test_finishLog_write_behind_flushes(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.db.master.config.logWriteBehind = {
+            "flushInterval": 0.5, "flushSize": 1000, "maxPendingSize": 2000}
+
+        self.db.logs.appendLog(201, 'abc\n')
+        yield self.db.logs.finishLog(201)
+        self.assertEqual((yield self.db.logs.getLogLines(201, 7, 7)), 'abc\n')
+        logdict = yield self.db.logs.getLog(201)
+        self.assertTrue(logdict['complete'])
+
+    def getLineOffsets(self, logid):
+        def thd(conn):
+            tbl = self.db.model.logchunks
+            q = sa.select([tbl.c.first_line, tbl.c.line_offsets])
+            q = q.where(tbl.c.logid == logid).order_by(tbl.c.first_line)
+            return [(row.first_line, row.line_offsets) for row in conn.execute(q)]
+        return self.db.pool.do(thd)
+
+    @defer.inlineCallbacks
+    def test_getLogLines_line_offsets(self):
+        self.db.master.config.logChunkCacheSize = 0
+        yield self.insert_test_data(self.backgroundData + [
+            fakedb.Log(id=201, stepid=101, name='stdio', slug='stdio',
+                       complete=0, num_lines=0, type='s'),
+        ])
+        lines = [f'line {i} ' + 'é' * i for i in range(20)]
+        yield self.db.logs.appendLog(201, '\n'.join(lines[:7]) + '\n')
+        yield self.db.logs.appendLog(201, '\n'.join(lines[7:]) + '\n')
+
+        # the stored offsets are used, the chunks are not scanned for newlines
+        def lineOffsets(data):
+            raise AssertionError("chunk is not indexed")
+        self.patch(logs, 'lineOffsets', lineOffsets)
+        for first_line in range(20):
+            for last_line in range(first_line, 20):
+                self.assertEqual((yield self.db.logs.getLogLines(201, first_line, last_line)),
+                                 ''.join(line + '\n' for line in lines[first_line:last_line + 1]))
+
+    @defer.inlineCallbacks
+    def test_compressLog_indexes_chunks(self):
+        # chunks written before line offsets were introduced
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.assertEqual((yield self.getLineOffsets(201)),
+                         [(0, None), (2, None), (5, None), (6, None)])
+
+        yield self.db.logs.compressLog(201, recompress=True)
+        self.assertEqual((yield self.getLineOffsets(201)),
+                         [(0, logs.encodeLineOffsets(b'line zero\nline 1' + b'x' * 200 +
+                                                     b'\nline TWO\n\nline 2**2\n'
+                                                     b'another line\nyet another line'))])
+        yield self.checkTestLogLines()
+
+    @defer.inlineCallbacks
+    def test_getLogIdsToRecompress_unindexed(self):
+        yield self.insert_test_data(self.backgroundData + self.insertBz2Log(201) + [
+            fakedb.Log(id=202, stepid=101, name='log202', slug='log202',
+                       complete=1, num_lines=1, type='s'),
+            fakedb.LogChunk(logid=202, first_line=0, last_line=0, compressed=1,
+                            content=zlib.compress(b'xy' * 20000, 9)),
+        ])
+        self.db.master.config.logCompressionMethod = 'bz2'
+        self.assertEqual((yield self.db.logs.getLogIdsToRecompress()), [202])
+
+        yield self.db.logs.compressLog(202, recompress=True)
+        self.assertEqual((yield self.db.logs.getLogIdsToRecompress()), [])
+
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        yield self.checkTestLogLines()
+        cache = self.db.logs._chunk_cache
+        # each of the four chunks was decompressed only once
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(sorted(cache._entries), [(201, 0), (201, 2), (201, 5), (201, 6)])
+
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache_compressLog(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        yield self.checkTestLogLines()
+        yield self.db.logs.compressLog(201)
+        self.assertEqual(self.db.logs._chunk_cache._entries, {})
+        yield self.checkTestLogLines()
+
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache_stale_entry(self):
+        # a cached chunk which has since been gathered with the following
+        # ones by compressLog is not used
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        yield self.checkTestLogLines()
+        stale = (b'stale', logs.lineOffsets(b'stale'))
+        self.db.logs._chunk_cache.put(201, 0, 6, *stale)
+        yield self.db.logs.compressLog(201)
+        self.db.logs._chunk_cache.put(201, 0, 1, *stale)
+        yield self.checkTestLogLines()
+
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache_appendLog(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        self.assertEqual((yield self.db.logs.getLogLines(201, 5, 8)),
+                         "another line\nyet another line\n")
+        yield self.db.logs.appendLog(201, 'abc\ndef\n')
+        self.assertEqual((yield self.db.logs.getLogLines(201, 5, 8)),
+                         "another line\nyet another line\nabc\ndef\n")
+
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache_disabled(self):
+        self.db.master.config.logChunkCacheSize = 0
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        yield self.checkTestLogLines()
+        self.assertIsNone(self.db.logs._chunk_cache)
+
+    @defer.inlineCallbacks
+    def test_deleteOldLogChunks_clears_chunk_cache(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        yield self.checkTestLogLines()
+        yield self.db.logs.deleteOldLogChunks(self.TIMESTAMP_STEP102)
+        self.assertEqual(self.db.logs._chunk_cache.size, 0)
+        self.assertEqual((yield self.db.logs.getLogLines(201, 0, 6)), '')
 
     @defer.inlineCallbacks
     def test_addLogLines_huge_lines(self):
@@ -373,7 +678,8 @@ class RealTests(Tests):
             'first_line': 7,
             'last_line': 7,
             'content': b'abc',
-            'compressed': 0})
+            'compressed': 0,
+            'line_offsets': b''})
 
     @defer.inlineCallbacks
     def test_raw_compress_big_chunk(self):
@@ -397,7 +703,8 @@ class RealTests(Tests):
             'first_line': 7,
             'last_line': 7,
             'content': unicode2bytes(line),
-            'compressed': 0})
+            'compressed': 0,
+            'line_offsets': b''})
 
     @defer.inlineCallbacks
     def test_gz_compress_big_chunk(self):
@@ -421,7 +728,8 @@ class RealTests(Tests):
             'first_line': 7,
             'last_line': 7,
             'content': zlib.compress(unicode2bytes(line), 9),
-            'compressed': 1})
+            'compressed': 1,
+            'line_offsets': b''})
 
     @defer.inlineCallbacks
     def test_bz2_compress_big_chunk(self):
@@ -445,7 +753,8 @@ class RealTests(Tests):
             'first_line': 7,
             'last_line': 7,
             'content': bz2.compress(unicode2bytes(line), 9),
-            'compressed': 2})
+            'compressed': 2,
+            'line_offsets': b''})
 
     @defer.inlineCallbacks
     def test_lz4_compress_big_chunk(self):
@@ -473,7 +782,101 @@ class RealTests(Tests):
             'first_line': 7,
             'last_line': 7,
             'content': logs.dumps_lz4(line.encode('utf-8')),
-            'compressed': 3})
+            'compressed': 3,
+            'line_offsets': b''})
+
+    @defer.inlineCallbacks
+    def test_zstd_compress_big_chunk(self):
+        if logs.zstandard is None:
+            raise unittest.SkipTest("zstandard not installed, skip the test")
+
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        line = 'xy' * 10000
+        self.db.master.config.logCompressionMethod = "zstd"
+        self.db.master.config.logCompressionLevel = 10
+        self.assertEqual(
+            (yield self.db.logs.appendLog(201, line + '\n')),
+            (7, 7))
+
+        def thd(conn):
+            res = conn.execute(self.db.model.logchunks.select(
+                whereclause=self.db.model.logchunks.c.first_line > 6))
+            row = res.fetchone()
+            res.close()
+            return dict(row)
+        newRow = yield self.db.pool.do(thd)
+        self.assertEqual(newRow['compressed'], 4)
+        self.assertEqual(logs.read_zstd(newRow['content']), line.encode('utf-8'))
+        lines = yield self.db.logs.getLogLines(201, 7, 7)
+        self.assertEqual(lines, line + '\n')
+
+    @defer.inlineCallbacks
+    def test_gz_compression_level(self):
+        yield self.insert_test_data(self.backgroundData + self.testLogLines)
+        line = 'xy' * 10000
+        self.db.master.config.logCompressionLevel = 1
+        yield self.db.logs.appendLog(201, line + '\n')
+
+        def thd(conn):
+            res = conn.execute(self.db.model.logchunks.select(
+                whereclause=self.db.model.logchunks.c.first_line > 6))
+            row = res.fetchone()
+            res.close()
+            return dict(row)
+        newRow = yield self.db.pool.do(thd)
+        self.assertEqual(newRow['content'], zlib.compress(unicode2bytes(line), 1))
+
+    def insertBz2Log(self, logid, complete=1):
+        # a log written while logCompressionMethod was 'bz2', in two chunks
+        # which are too big to be gathered
+        return [
+            fakedb.Log(id=logid, stepid=101, name=f'log{logid}', slug=f'log{logid}',
+                       complete=complete, num_lines=2, type='s'),
+            fakedb.LogChunk(logid=logid, first_line=0, last_line=0, compressed=2,
+                            content=bz2.compress(b'xy' * 20000, 9), line_offsets=b''),
+            fakedb.LogChunk(logid=logid, first_line=1, last_line=1, compressed=0,
+                            content='z' * 65500, line_offsets=b''),
+        ]
+
+    def getChunkCompression(self, logid):
+        def thd(conn):
+            tbl = self.db.model.logchunks
+            res = conn.execute(sa.select([tbl.c.first_line, tbl.c.compressed])
+                               .where(tbl.c.logid == logid)
+                               .order_by(tbl.c.first_line))
+            rv = [tuple(row) for row in res]
+            res.close()
+            return rv
+        return self.db.pool.do(thd)
+
+    @defer.inlineCallbacks
+    def test_compressLog_recompress(self):
+        # gz is the configured compression method
+        yield self.insert_test_data(self.backgroundData + self.insertBz2Log(201))
+        wholeLog = yield self.db.logs.getLogLines(201, 0, 1)
+
+        yield self.db.logs.compressLog(201)
+        self.assertEqual((yield self.getChunkCompression(201)), [(0, 2), (1, 0)])
+
+        yield self.db.logs.compressLog(201, recompress=True)
+        # the raw chunk is left alone
+        self.assertEqual((yield self.getChunkCompression(201)), [(0, 1), (1, 0)])
+        self.assertEqual((yield self.db.logs.getLogLines(201, 0, 1)), wholeLog)
+
+    @defer.inlineCallbacks
+    def test_getLogIdsToRecompress(self):
+        yield self.insert_test_data(
+            self.backgroundData + self.insertBz2Log(201) + self.insertBz2Log(202) +
+            self.insertBz2Log(203, complete=0))
+        self.assertEqual((yield self.db.logs.getLogIdsToRecompress()), [201, 202])
+        self.assertEqual((yield self.db.logs.getLogIdsToRecompress(limit=1)), [201])
+
+        self.db.master.config.logCompressionMethod = 'bz2'
+        self.assertEqual((yield self.db.logs.getLogIdsToRecompress()), [])
+
+        self.db.master.config.logCompressionMethod = 'gz'
+        yield self.db.logs.compressLog(201, recompress=True)
+        self.assertEqual((yield self.db.logs.getLogIdsToRecompress()), [202])
 
     @defer.inlineCallbacks
     def do_addLogLines_huge_log(self, NUM_CHUNKS=3000, chunk=('xy' * 70 + '\n') * 3):
@@ -572,6 +975,105 @@ class RealTests(Tests):
             self.assertEqual(lines, '')
 
 
+class TestLogChunkCache(unittest.TestCase):
+
+    def put(self, cache, logid, first_line, last_line, data):
+        cache.put(logid, first_line, last_line, data, logs.lineOffsets(data))
+
+    def get(self, cache, logid, first_line, last_line):
+        cached = cache.get(logid, first_line, last_line)
+        return None if cached is None else cached[0]
+
+    def test_get_put(self):
+        cache = logs.LogChunkCache(100)
+        self.assertIsNone(cache.get(1, 0, 1))
+        cache.put(1, 0, 1, b'abc\nd', logs.lineOffsets(b'abc\nd'))
+        self.assertEqual(cache.get(1, 0, 1), (b'abc\nd', array.array('H', [4])))
+        # the chunk was rewritten with more lines
+        self.assertIsNone(cache.get(1, 0, 19))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_size_includes_offsets(self):
+        cache = logs.LogChunkCache(100)
+        self.put(cache, 1, 0, 2, b'a\nb\nc')
+        self.assertEqual(cache.size, 9)
+
+    def test_evicts_least_recently_used(self):
+        cache = logs.LogChunkCache(10)
+        self.put(cache, 1, 0, 0, b'aaaa')
+        self.put(cache, 1, 1, 1, b'bbbb')
+        cache.get(1, 0, 0)
+        self.put(cache, 1, 2, 2, b'cccc')
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(self.get(cache, 1, 0, 0), b'aaaa')
+        self.assertIsNone(cache.get(1, 1, 1))
+        self.assertEqual(self.get(cache, 1, 2, 2), b'cccc')
+
+    def test_put_too_big(self):
+        cache = logs.LogChunkCache(3)
+        self.put(cache, 1, 0, 0, b'abcd')
+        self.assertIsNone(cache.get(1, 0, 0))
+        self.assertEqual(cache.size, 0)
+
+    def test_put_replaces(self):
+        cache = logs.LogChunkCache(10)
+        self.put(cache, 1, 0, 0, b'aaaa')
+        self.put(cache, 1, 0, 1, b'aaaa\nb')
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(self.get(cache, 1, 0, 1), b'aaaa\nb')
+
+    def test_invalidate(self):
+        cache = logs.LogChunkCache(100)
+        self.put(cache, 1, 0, 0, b'aaaa')
+        self.put(cache, 2, 0, 0, b'bbbb')
+        cache.invalidate(1)
+        self.assertIsNone(cache.get(1, 0, 0))
+        self.assertEqual(self.get(cache, 2, 0, 0), b'bbbb')
+        self.assertEqual(cache.size, 4)
+
+    def test_setMaxSize(self):
+        cache = logs.LogChunkCache(100)
+        self.put(cache, 1, 0, 0, b'aaaa')
+        self.put(cache, 1, 1, 1, b'bbbb')
+        cache.setMaxSize(5)
+        self.assertIsNone(cache.get(1, 0, 0))
+        self.assertEqual(self.get(cache, 1, 1, 1), b'bbbb')
+
+
+class TestLineOffsets(unittest.TestCase):
+
+    def test_encode_decode(self):
+        data = b'zero\none\n\nthree'
+        packed = logs.encodeLineOffsets(data)
+        self.assertEqual(packed, b'\x05\x00\x09\x00\x0a\x00')
+        self.assertEqual(list(logs.decodeLineOffsets(packed, 3)), [5, 9, 10])
+
+    def test_encode_decode_big_chunk(self):
+        data = b'x' * 70000 + b'\ny'
+        packed = logs.encodeLineOffsets(data)
+        self.assertEqual(len(packed), 4)
+        self.assertEqual(list(logs.decodeLineOffsets(packed, 1)), [70001])
+
+    def test_decode_single_line(self):
+        self.assertEqual(list(logs.decodeLineOffsets(b'', 0)), [])
+
+    def test_decode_unindexed(self):
+        self.assertIsNone(logs.decodeLineOffsets(None, 3))
+
+    def test_decode_mismatch(self):
+        self.assertIsNone(logs.decodeLineOffsets(b'\x05\x00\x09', 2))
+
+    def test_sliceLines(self):
+        data = b'zero\none\n\nthree'
+        offsets = logs.lineOffsets(data)
+        lines = data.split(b'\n')
+        for first_line in range(10, 14):
+            for last_line in range(first_line, 14):
+                self.assertEqual(
+                    logs.sliceLines(data, offsets, 10, 13, first_line, last_line),
+                    b'\n'.join(lines[first_line - 10:last_line - 9]))
+
+
 class TestFakeDB(unittest.TestCase, connector_component.FakeConnectorComponentMixin, Tests):
 
     @defer.inlineCallbacks
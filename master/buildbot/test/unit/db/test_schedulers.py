@@ -240,6 +240,32 @@ class Tests(interfaces.InterfaceTests):
         sch = yield self.db.schedulers.getScheduler(25)
         self.assertEqual(sch['masterid'], None)
 
+    def test_signature_claimSchedulers(self):
+        @self.assertArgSpecMatches(self.db.schedulers.claimSchedulers)
+        def claimSchedulers(self, schedulerids, masterid):
+            pass
+
+    @defer.inlineCallbacks
+    def test_claimSchedulers(self):
+        yield self.insert_test_data([
+            self.scheduler24, self.master13, self.scheduler24master,
+            self.scheduler25, self.master14,
+            fakedb.Scheduler(id=26, name='schname3'),
+            fakedb.SchedulerMaster(schedulerid=26, masterid=14),
+        ])
+        claimed = yield self.db.schedulers.claimSchedulers([24, 25, 26, 27], 14)
+        self.assertEqual(claimed, {25, 26})
+        sch = yield self.db.schedulers.getScheduler(24)
+        self.assertEqual(sch['masterid'], 13)
+        sch = yield self.db.schedulers.getScheduler(25)
+        self.assertEqual(sch['masterid'], 14)
+
+    @defer.inlineCallbacks
+    def test_claimSchedulers_none(self):
+        yield self.insert_test_data([self.scheduler24, self.master13])
+        claimed = yield self.db.schedulers.claimSchedulers([], 13)
+        self.assertEqual(claimed, set())
+
     def test_signature_getScheduler(self):
         @self.assertArgSpecMatches(self.db.schedulers.getScheduler)
         def getScheduler(self, schedulerid):
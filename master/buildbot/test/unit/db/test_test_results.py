@@ -13,6 +13,8 @@
 #
 # Copyright Buildbot Team Members
 
+from unittest import mock
+
 from twisted.internet import defer
 from twisted.trial import unittest
 
@@ -155,6 +157,31 @@ class Tests(interfaces.InterfaceTests):
         path_dicts = yield self.db.test_results.getTestCodePaths(builderid=88, path_prefix='path11')
         self.assertEqual(path_dicts, ['path116', 'path117'])
 
+    @defer.inlineCallbacks
+    def test_add_results_concurrently(self):
+        yield self.insert_test_data(self.common_data)
+
+        d1 = self.db.test_results.addTestResults(builderid=88, test_result_setid=13, result_values=[
+            {'test_name': 'name1', 'test_code_path': 'path1', 'value': '1'},
+            {'test_name': 'name2', 'value': '2'},
+        ])
+        d2 = self.db.test_results.addTestResults(builderid=88, test_result_setid=13, result_values=[
+            {'test_name': 'name2', 'value': '3'},
+            {'test_name': 'name3', 'test_code_path': 'path1', 'value': '4'},
+        ])
+        yield defer.gatherResults([d1, d2])
+
+        names = yield self.db.test_results.getTestNames(builderid=88)
+        self.assertEqual(sorted(names), ['name1', 'name2', 'name3'])
+        paths = yield self.db.test_results.getTestCodePaths(builderid=88)
+        self.assertEqual(paths, ['path1'])
+
+        result_dicts = yield self.db.test_results.getTestResults(builderid=88, test_result_setid=13)
+        result_dicts = sorted(result_dicts, key=lambda x: x['id'])
+        self.assertEqual([(d['test_name'], d['value']) for d in result_dicts], [
+            ('name1', '1'), ('name2', '2'), ('name2', '3'), ('name3', '4'),
+        ])
+
 
 class TestFakeDB(Tests, connector_component.FakeConnectorComponentMixin, unittest.TestCase):
 
@@ -178,3 +205,31 @@ class TestRealDB(unittest.TestCase,
 
     def tearDown(self):
         return self.tearDownConnectorComponent()
+
+    def add_result(self, builderid, value):
+        return self.db.test_results.addTestResults(
+            builderid=builderid, test_result_setid=13,
+            result_values=[{'test_name': 'name1', 'test_code_path': 'path1', 'value': value}])
+
+    @defer.inlineCallbacks
+    def test_ids_cached(self):
+        yield self.insert_test_data(self.common_data)
+        yield self.add_result(88, '1')
+        names = yield self.db.test_results.getTestNames(builderid=88)
+
+        self.db.pool.do = mock.Mock(side_effect=self.db.pool.do)
+        yield self.add_result(88, '2')
+        # only the results were inserted
+        self.assertEqual(self.db.pool.do.call_count, 1)
+        self.assertEqual((yield self.db.test_results.getTestNames(builderid=88)), names)
+
+    @defer.inlineCallbacks
+    def test_ids_cache_evicts_least_recently_used_builder(self):
+        yield self.insert_test_data(self.common_data + [
+            fakedb.Builder(id=89, name='b2'),
+        ])
+        self.db.test_results.ID_CACHE_SIZE = 3
+        yield self.add_result(88, '1')
+        yield self.add_result(89, '1')
+        self.assertEqual(list(self.db.test_results._id_caches), [89])
+        self.assertEqual(self.db.test_results._id_cache_entries, 2)
@@ -28,7 +28,6 @@ from buildbot.test import fakedb
 from buildbot.test.fake import fakemaster
 from buildbot.test.reactor import TestReactorMixin
 from buildbot.test.util.warnings import assertProducesWarning
-from buildbot.util import epoch2datetime
 from buildbot.util.eventual import fireEventually
 from buildbot.warnings import DeprecatedApiWarning
 
@@ -260,42 +259,34 @@ class Test(TestBRDBase):
 
     @defer.inlineCallbacks
     def do_test_sortBuilders(self, prioritizeBuilders, oldestRequestTimes,
-                             highestPriorities, expected, returnDeferred=False):
+                             highestPriorities, expected):
         self.useMock_maybeStartBuildsOnBuilder()
-        self.addBuilders(list(oldestRequestTimes))
+        yield self.addBuilders(list(oldestRequestTimes))
         self.master.config.prioritizeBuilders = prioritizeBuilders
 
-        def mklambda(t):  # work around variable-binding issues
-            if returnDeferred:
-                return lambda: defer.succeed(t)
-            return lambda: t
-
-        for n, t in oldestRequestTimes.items():
-            if t is not None:
-                t = epoch2datetime(t)
-            self.builders[n].getOldestRequestTime = mklambda(t)
-
-        for n, t in highestPriorities.items():
-            self.builders[n].get_highest_priority = mklambda(t)
+        rows = []
+        for i, (n, t) in enumerate(oldestRequestTimes.items()):
+            if t is None:
+                continue
+            rows += [
+                fakedb.Buildset(id=100 + i, reason='because'),
+                fakedb.BuildRequest(id=10 + i, buildsetid=100 + i,
+                                    builderid=self.builders[n].getBuilderId(),
+                                    priority=highestPriorities[n], submitted_at=t),
+            ]
+        yield self.master.db.insert_test_data(rows)
 
         result = yield self.brd._sortBuilders(list(oldestRequestTimes))
 
         self.assertEqual(result, expected)
         self.checkAllCleanedUp()
 
-    def test_sortBuilders_default_sync(self):
+    def test_sortBuilders_default(self):
         return self.do_test_sortBuilders(None,  # use the default sort
                                          {"bldr1": 777, "bldr2": 999, "bldr3": 888},
                                          {"bldr1": 10, "bldr2": 15, "bldr3": 5},
                                          ['bldr2', 'bldr1', 'bldr3'])
 
-    def test_sortBuilders_default_asyn(self):
-        return self.do_test_sortBuilders(None,  # use the default sort
-                                         {"bldr1": 777, "bldr2": 999, "bldr3": 888},
-                                         {"bldr1": 10, "bldr2": 15, "bldr3": 5},
-                                         ['bldr2', 'bldr1', 'bldr3'],
-                                         returnDeferred=True)
-
     def test_sortBuilders_default_None(self):
         return self.do_test_sortBuilders(None,  # use the default sort
                                          {"bldr1": 777, "bldr2": None, "bldr3": 888},
@@ -308,6 +299,34 @@ class Test(TestBRDBase):
                                          {"bldr1": 10, "bldr2": 10, "bldr3": 10},
                                          ['bldr1', 'bldr3', 'bldr2'])
 
+    @defer.inlineCallbacks
+    def test_sortBuilders_default_multiple_requests(self):
+        self.useMock_maybeStartBuildsOnBuilder()
+        yield self.addBuilders(['bldr1', 'bldr2'])
+        self.master.config.prioritizeBuilders = None  # use the default sort
+        bldr1_id = self.builders['bldr1'].getBuilderId()
+        bldr2_id = self.builders['bldr2'].getBuilderId()
+        yield self.master.db.insert_test_data([
+            fakedb.Buildset(id=100, reason='because'),
+            # bldr1 has the oldest request, but bldr2 has the highest priority
+            fakedb.BuildRequest(id=10, buildsetid=100, builderid=bldr1_id,
+                                priority=5, submitted_at=100),
+            fakedb.BuildRequest(id=11, buildsetid=100, builderid=bldr2_id,
+                                priority=1, submitted_at=200),
+            fakedb.BuildRequest(id=12, buildsetid=100, builderid=bldr2_id,
+                                priority=7, submitted_at=300),
+            # claimed requests do not count
+            fakedb.BuildRequest(id=13, buildsetid=100, builderid=bldr1_id,
+                                priority=20, submitted_at=300),
+            fakedb.BuildRequestClaim(brid=13, masterid=fakedb.FakeBuildRequestsComponent.MASTER_ID,
+                                     claimed_at=300),
+        ])
+
+        result = yield self.brd._sortBuilders(['bldr1', 'bldr2'])
+
+        self.assertEqual(result, ['bldr2', 'bldr1'])
+        self.checkAllCleanedUp()
+
     def test_sortBuilders_custom(self):
         def prioritizeBuilders(master, builders):
             self.assertIdentical(master, self.master)
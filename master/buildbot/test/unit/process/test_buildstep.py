@@ -1117,6 +1117,16 @@ class SimpleShellCommand(buildstep.ShellMixin, buildstep.BuildStep):
         return cmd.results()
 
 
+class CollectingShellCommand(SimpleShellCommand):
+
+    @defer.inlineCallbacks
+    def run(self):
+        self.collecting_cmd = yield self.makeRemoteShellCommand(collectStdout=True)
+        yield self.runCommand(self.collecting_cmd)
+        self.collected_stdout = self.collecting_cmd.stdout
+        return self.collecting_cmd.results()
+
+
 class TestShellMixin(TestBuildStepMixin,
                      config.ConfigErrorsMixin,
                      TestReactorMixin,
@@ -1255,6 +1265,23 @@ class TestShellMixin(TestBuildStepMixin,
         self.expect_outcome(result=SUCCESS)
         yield self.run_step()
 
+    @defer.inlineCallbacks
+    def test_collect_max_memory(self):
+        step = self.setup_step(CollectingShellCommand(command=['cmd'], collectMaxMemory=10))
+        self.expect_commands(
+            ExpectShell(workdir='wkdir', command=['cmd'])
+            .stdout('some output\n' * 3)
+            .exit(0)
+        )
+        self.expect_outcome(result=SUCCESS)
+        yield self.run_step()
+
+        self.assertEqual(step.collecting_cmd.stdout_collector.max_memory, 10)
+        self.assertEqual(step.collected_stdout, 'some output\n' * 3)
+        # the collected output is discarded once the step is finished
+        self.assertFalse(step.collecting_cmd.stdout_collector.spilled)
+        self.assertEqual(step.collecting_cmd.stdout, '')
+
     @defer.inlineCallbacks
     def test_step_env_default(self):
         env = {'ENV': 'TRUE'}
@@ -181,6 +181,33 @@ class Tests(TestReactorMixin, unittest.TestCase):
             'type': 's',
         })
 
+    @defer.inlineCallbacks
+    def test_updates_stream_whole_lines(self):
+        _log = yield self.makeLog('s')
+
+        _log.add_stdout_lines('hello\n\ncruel world\n')
+        _log.add_stderr_lines('oh noes!\n')
+        _log.add_header_lines('header\n')
+        yield _log.finish()
+
+        self.assertEqual(self.master.data.updates.logs[_log.logid]['content'], [
+            'ohello\no\nocruel world\n', 'eoh noes!\n', 'hheader\n'])
+
+    @defer.inlineCallbacks
+    def test_updates_write_behind_backpressure(self):
+        self.master.config.logWriteBehind = {
+            "flushInterval": 0.1, "flushSize": 10, "maxPendingSize": 10}
+        capacity = defer.Deferred()
+        self.patch(self.master.data.updates, 'waitForLogAppendCapacity', lambda: capacity)
+        _log = yield self.makeLog('t')
+
+        d = _log.addContent('hello\n')
+        # the lines are queued right away, but the caller waits for capacity
+        self.assertEqual(self.master.data.updates.logs[_log.logid]['content'], ['hello\n'])
+        self.assertFalse(d.called)
+        capacity.callback(None)
+        self.assertTrue(d.called)
+
     @defer.inlineCallbacks
     def test_unyielded_finish(self):
         _log = yield self.makeLog('s')
@@ -245,3 +245,16 @@ class TestBufferObserver(TestReactorMixin, unittest.TestCase):
         yield self.do_test_sequence(lo)
         self.assertEqual(lo.getStdout(), 'hello\nmulti\nline\nchunk\n')
         self.assertEqual(lo.getStderr(), 'cruel\n')
+
+    @defer.inlineCallbacks
+    def test_max_memory(self):
+        lo = logobserver.BufferLogObserver(wantStdout=True, wantStderr=True, maxMemory=8)
+        yield self.do_test_sequence(lo)
+        self.assertTrue(lo.stdout.spilled)
+        self.assertFalse(lo.stderr.spilled)
+        self.assertEqual(lo.getStdout(), 'hello\nmulti\nline\nchunk\n')
+        self.assertEqual(lo.getStderr(), 'cruel\n')
+
+        lo.close()
+        self.assertFalse(lo.stdout.spilled)
+        self.assertEqual(lo.getStdout(), '')
@@ -1073,6 +1073,22 @@ class TestProperties(unittest.TestCase):
         res = yield self.props.render(Renderable())
         self.assertEqual(res, 'yz')
 
+    def test_cleanupTextFromSecrets(self):
+        self.props.useSecret('s3cr3t', 'pass')
+        self.props.useSecret('s3cr3t-longer', 'longpass')
+        self.props.useSecret('  ', 'blank')
+        self.assertEqual(self.props.cleanupTextFromSecrets('s3cr3t-longer s3cr3t   '),
+                         '<longpass> <pass>   ')
+
+    def test_getSecretRedactor_cached(self):
+        self.props.useSecret('s3cr3t', 'pass')
+        redactor = self.props.getSecretRedactor()
+        self.props.useSecret('s3cr3t', 'pass')
+        self.assertIdentical(self.props.getSecretRedactor(), redactor)
+        self.props.useSecret('other', 'other')
+        self.assertNotIdentical(self.props.getSecretRedactor(), redactor)
+        self.assertEqual(self.props.cleanupTextFromSecrets('other'), '<other>')
+
 
 class MyPropertiesThing(PropertiesMixin):
     set_runtime_properties = True
@@ -15,9 +15,11 @@
 
 from unittest import mock
 
+from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.process import remotecommand
+from buildbot.process.properties import Properties
 from buildbot.test.fake import logfile
 from buildbot.test.util import interfaces
 from buildbot.test.util.warnings import assertNotProducesWarnings
@@ -56,6 +58,174 @@ class TestRemoteShellCommand(unittest.TestCase):
         self.assertEqual(cmd.command, command)
         self.assertEqual(cmd.fake_command, command)
 
+
+class TestRemoteCommandSecrets(unittest.TestCase):
+
+    def setUp(self):
+        self.cmd = remotecommand.RemoteCommand('cmd', {}, collectStdout=True)
+        self.cmd.step = mock.Mock()
+        self.cmd.step.build.properties = Properties()
+        self.log = logfile.FakeLogFile('stdio')
+        self.cmd.useLog(self.log)
+
+    def useSecret(self, value, name):
+        self.cmd.step.build.properties.useSecret(value, name)
+
+    @defer.inlineCallbacks
+    def test_secret_in_single_update(self):
+        self.useSecret('s3cr3t', 'pass')
+        yield self.cmd.remoteUpdate('stdout', 'the s3cr3t\n', False)
+        yield self.cmd.remoteUpdate('stderr', 's3cr3t!\n', False)
+        yield self.cmd.remoteUpdate('header', 'header s3cr3t\n', False)
+        self.assertEqual(self.log.stdout, 'the <pass>\n')
+        self.assertEqual(self.log.stderr, '<pass>!\n')
+        self.assertEqual(self.log.header, 'header <pass>\n')
+        self.assertEqual(self.cmd.stdout, 'the <pass>\n')
+
+    @defer.inlineCallbacks
+    def test_multiline_secret_split_between_updates(self):
+        self.useSecret('BEGIN\nkey\nEND', 'key')
+        yield self.cmd.remoteUpdate('stdout', 'first\nBEGIN\n', False)
+        self.assertEqual(self.log.stdout, 'first\n')
+        yield self.cmd.remoteUpdate('stdout', 'key\n', False)
+        yield self.cmd.remoteUpdate('stdout', 'END\nlast\n', False)
+        self.assertEqual(self.log.stdout, 'first\n<key>\nlast\n')
+
+    @defer.inlineCallbacks
+    def test_held_back_text_flushed_on_complete(self):
+        self.useSecret('BEGIN\nkey\nEND', 'key')
+        yield self.cmd.remoteUpdate('stdout', 'BEGIN\nkey\n', False)
+        yield self.cmd.remoteUpdate('log', ('stdio', 'BEGIN\n'), False)
+        self.assertEqual(self.log.stdout, '')
+        yield self.cmd.remoteComplete(None)
+        self.assertEqual(self.log.stdout, 'BEGIN\nkey\nBEGIN\n')
+        self.assertEqual(self.cmd.stdout, 'BEGIN\nkey\n')
+
+    @defer.inlineCallbacks
+    def test_held_back_text_flushed_before_exit_code(self):
+        self.useSecret('BEGIN\nkey\nEND', 'key')
+        yield self.cmd.remoteUpdate('stdout', 'out\nBEGIN\n', False)
+        yield self.cmd.remoteUpdate('stderr', 'BEGIN\nkey\n', False)
+        yield self.cmd.remoteUpdate('header', 'BEGIN\n', False)
+
+        header_lines = []
+
+        def add_header_lines(data):
+            header_lines.append((data, self.log.stdout, self.log.stderr))
+        self.patch(self.log, 'add_header_lines', add_header_lines)
+
+        yield self.cmd.remoteUpdate('rc', 0, False)
+        self.assertEqual(header_lines, [
+            ('BEGIN\n', 'out\nBEGIN\n', 'BEGIN\nkey\n'),
+            ('program finished with exit code 0\n', 'out\nBEGIN\n', 'BEGIN\nkey\n'),
+        ])
+
+
+class TestOutputCollector(unittest.TestCase):
+
+    def test_empty(self):
+        collector = remotecommand.OutputCollector()
+        self.assertEqual(collector.getvalue(), '')
+        self.assertEqual(list(collector), [])
+        self.assertEqual(list(collector.lines()), [])
+        self.assertFalse(collector)
+
+    def test_in_memory(self):
+        collector = remotecommand.OutputCollector(max_memory=100)
+        for data in ['ab', '', 'c\nd', 'e\n']:
+            collector.append(data)
+        self.assertFalse(collector.spilled)
+        self.assertEqual(len(collector), 7)
+        self.assertEqual(list(collector), ['ab', 'c\nd', 'e\n'])
+        self.assertEqual(collector.getvalue(), 'abc\nde\n')
+        self.assertEqual(list(collector.lines()), ['abc\n', 'de\n'])
+        collector.append('f')
+        self.assertEqual(collector.getvalue(), 'abc\nde\nf')
+
+    def test_spilled(self):
+        collector = remotecommand.OutputCollector(max_memory=10)
+        self.addCleanup(collector.close)
+        collector.append('line 1\n')
+        self.assertFalse(collector.spilled)
+        collector.append('line 2\n')
+        self.assertTrue(collector.spilled)
+        collector.append('line \u00e9\nend')
+        self.assertEqual(len(collector), 24)
+        self.assertEqual(collector.getvalue(), 'line 1\nline 2\nline \u00e9\nend')
+        self.assertEqual(list(collector.lines()),
+                         ['line 1\n', 'line 2\n', 'line \u00e9\n', 'end'])
+        # appending still works after reading
+        collector.append('\r\n')
+        self.assertEqual(collector.getvalue()[-6:], '\nend\r\n')
+
+    def test_spilled_iterated_by_chunks(self):
+        collector = remotecommand.OutputCollector(max_memory=10)
+        self.addCleanup(collector.close)
+        collector.READ_SIZE = 4
+        collector.append('0123456789abcdef\nxyz')
+        self.assertEqual(list(collector), ['0123', '4567', '89ab', 'cdef', '\nxyz'])
+        self.assertEqual(list(collector.lines()), ['0123456789abcdef\n', 'xyz'])
+
+    def test_close(self):
+        collector = remotecommand.OutputCollector(max_memory=1)
+        collector.append('abc')
+        collector.close()
+        self.assertFalse(collector.spilled)
+        self.assertEqual(collector.getvalue(), '')
+
+
+class TestRemoteCommandCollect(unittest.TestCase):
+
+    def makeRemoteCommand(self, **kwargs):
+        cmd = remotecommand.RemoteCommand('cmd', {}, **kwargs)
+        cmd.step = mock.Mock()
+        cmd.step.build.properties = Properties()
+        return cmd
+
+    @defer.inlineCallbacks
+    def test_collect_stdout_and_stderr(self):
+        cmd = self.makeRemoteCommand(collectStdout=True, collectStderr=True)
+        yield cmd.remoteUpdate('stdout', 'out 1\n', False)
+        yield cmd.remoteUpdate('stderr', 'err\n', False)
+        yield cmd.remoteUpdate('stdout', 'out 2\n', False)
+        self.assertEqual(cmd.stdout, 'out 1\nout 2\n')
+        self.assertEqual(cmd.stderr, 'err\n')
+
+    @defer.inlineCallbacks
+    def test_not_collected(self):
+        cmd = self.makeRemoteCommand()
+        yield cmd.remoteUpdate('stdout', 'out\n', False)
+        yield cmd.remoteUpdate('stderr', 'err\n', False)
+        self.assertEqual(cmd.stdout, '')
+        self.assertEqual(cmd.stderr, '')
+
+    @defer.inlineCallbacks
+    def test_collect_max_memory(self):
+        cmd = self.makeRemoteCommand(collectStdout=True, collectMaxMemory=10)
+        self.addCleanup(cmd.stdout_collector.close)
+        for i in range(10):
+            yield cmd.remoteUpdate('stdout', f'line {i}\n', False)
+        self.assertTrue(cmd.stdout_collector.spilled)
+        self.assertEqual(list(cmd.stdout_collector.lines()),
+                         [f'line {i}\n' for i in range(10)])
+        self.assertEqual(cmd.stdout, ''.join(f'line {i}\n' for i in range(10)))
+
+    @defer.inlineCallbacks
+    def test_close_output_collectors(self):
+        cmd = self.makeRemoteCommand(collectStdout=True, collectStderr=True,
+                                     collectMaxMemory=4)
+        yield cmd.remoteUpdate('stdout', 'some output\n', False)
+        yield cmd.remoteUpdate('stderr', 'some error\n', False)
+        self.assertTrue(cmd.stdout_collector.spilled)
+        self.assertTrue(cmd.stderr_collector.spilled)
+
+        cmd.closeOutputCollectors()
+        self.assertFalse(cmd.stdout_collector.spilled)
+        self.assertFalse(cmd.stderr_collector.spilled)
+        self.assertEqual(cmd.stdout, '')
+        self.assertEqual(cmd.stderr, '')
+
+
 # NOTE:
 #
 # This interface is considered private to Buildbot and may change without
@@ -73,7 +243,7 @@ class Tests(interfaces.InterfaceTests, unittest.TestCase):
         def __init__(self, remote_command, args, ignore_updates=False,
                      collectStdout=False, collectStderr=False,
                      decodeRC=None,
-                     stdioLogName='stdio'):
+                     stdioLogName='stdio', collectMaxMemory=None):
             pass
 
     def test_signature_RemoteShellCommand_constructor(self):
@@ -83,7 +253,7 @@ class Tests(interfaces.InterfaceTests, unittest.TestCase):
                      usePTY=None, logEnviron=True, collectStdout=False,
                      collectStderr=False, interruptSignal=None, initialStdin=None,
                      decodeRC=None,
-                     stdioLogName='stdio'):
+                     stdioLogName='stdio', collectMaxMemory=None):
             pass
 
     def test_signature_run(self):
@@ -15,10 +15,14 @@
 
 
 import os
+import shutil
 import stat
+import tarfile
 import tempfile
+from io import BytesIO
 from unittest.mock import Mock
 
+from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.process import remotetransfer
@@ -74,3 +78,87 @@ class TestStringFileWriter(unittest.TestCase):
         sfw.remote_write(b'bytes')
         sfw.remote_write(' or str')
         self.assertEqual(sfw.buffer, 'bytes or str')
+
+
+class TestDirectoryWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.destroot = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.destroot)
+
+    def make_tarball(self, members, compress=None):
+        f = BytesIO()
+        mode = 'w:' + (compress or '')
+        with tarfile.open(fileobj=f, mode=mode) as archive:
+            for name, content in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                archive.addfile(info, BytesIO(content))
+        return f.getvalue()
+
+    def read_dest(self, name):
+        with open(os.path.join(self.destroot, name), 'rb') as f:
+            return f.read()
+
+    @defer.inlineCallbacks
+    def write_chunks(self, writer, data, blocksize=1000):
+        for i in range(0, len(data), blocksize):
+            yield writer.remote_write(data[i:i + blocksize])
+
+    @defer.inlineCallbacks
+    def test_unpack_streamed(self):
+        data = self.make_tarball({'a': b'a' * 20000, 'sub/b': b'b' * 100}, compress='gz')
+        writer = remotetransfer.DirectoryWriter(self.destroot, None, 'gz', 0o600)
+
+        yield self.write_chunks(writer, data)
+        yield writer.remote_unpack()
+        writer.cancel()
+
+        self.assertEqual(self.read_dest('a'), b'a' * 20000)
+        self.assertEqual(self.read_dest(os.path.join('sub', 'b')), b'b' * 100)
+        # the thread may still be exiting after handing its result back
+        writer._thread.join(5)
+        self.assertFalse(writer._thread.is_alive())
+
+    @defer.inlineCallbacks
+    def test_unpack_pipelined_writes(self):
+        data = self.make_tarball({'a': b'a' * 20000})
+        writer = remotetransfer.DirectoryWriter(self.destroot, None, None, 0o600)
+
+        # writes are not waited for before sending the next ones
+        yield defer.gatherResults([writer.remote_write(data[i:i + 1000])
+                                   for i in range(0, len(data), 1000)])
+        yield writer.remote_unpack()
+
+        self.assertEqual(self.read_dest('a'), b'a' * 20000)
+
+    @defer.inlineCallbacks
+    def test_unpack_corrupted(self):
+        writer = remotetransfer.DirectoryWriter(self.destroot, None, 'gz', 0o600)
+
+        yield writer.remote_write(b'not a gzip stream' * 10)
+        with self.assertRaises(tarfile.ReadError):
+            yield writer.remote_unpack()
+        with self.assertRaises(tarfile.ReadError):
+            yield writer.remote_write(b'more data')
+
+    @defer.inlineCallbacks
+    def test_maxsize(self):
+        data = self.make_tarball({'a': b'a' * 20000})
+        writer = remotetransfer.DirectoryWriter(self.destroot, 10000, None, 0o600)
+
+        yield self.write_chunks(writer, data)
+        with self.assertRaises(tarfile.ReadError):
+            yield writer.remote_unpack()
+
+    @defer.inlineCallbacks
+    def test_cancel(self):
+        data = self.make_tarball({'a': b'a' * 20000})
+        writer = remotetransfer.DirectoryWriter(self.destroot, None, None, 0o600)
+
+        yield writer.remote_write(data[:5000])
+        writer.cancel()
+        writer._thread.join(5)
+        self.assertFalse(writer._thread.is_alive())
+        # late writes are ignored
+        yield writer.remote_write(data[5000:])
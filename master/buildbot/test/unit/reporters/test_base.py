@@ -20,6 +20,7 @@ from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.process.results import FAILURE
+from buildbot.reporters import utils
 from buildbot.reporters.base import ReporterBase
 from buildbot.reporters.generators.build import BuildStatusGenerator
 from buildbot.reporters.generators.worker import WorkerMissingGenerator
@@ -107,6 +108,29 @@ class TestReporterBase(ConfigErrorsMixin, TestReactorMixin, LoggingMixin,
         self.assertEqual(mn.sendMessage.call_count, 1)
         mn.sendMessage.assert_called_with([report])
 
+    @defer.inlineCallbacks
+    def test_data_fetched_once_for_all_reporters(self):
+        build = yield self.insert_build_finished(FAILURE)
+        formatter = MessageFormatter(want_properties=True, want_steps=True, want_logs=True)
+        notifiers = []
+        for mode in [("failing",), ("failing", "warnings"), ("failing", "exception")]:
+            mn = yield self.setupNotifier(generators=[BuildStatusGenerator(
+                mode=mode, message_formatter=formatter)])
+            notifiers.append(mn)
+        get = mock.Mock(wraps=self.master.data.get)
+        self.patch(self.master.data, 'get', get)
+
+        self.master.mq.verifyMessages = False
+        self.master.mq.callConsumer(('builds', '20', 'finished'), build)
+        self.reactor.advance(0)
+
+        # the three reporters share the data fetched for the message
+        paths = [call[0][0] for call in get.call_args_list]
+        for path in [('buildrequests', 11), ('builders', 79), ('builds', 20, 'steps'),
+                     ('builds', 20, 'logs')]:
+            self.assertEqual(paths.count(path), 1)
+        self.assertEqual([mn.sendMessage.call_count for mn in notifiers], [1, 1, 1])
+
     @defer.inlineCallbacks
     def test_worker_missing_sends_message(self):
         generator = WorkerMissingGenerator(workers=['myworker'])
@@ -187,6 +211,30 @@ class TestReporterBase(ConfigErrorsMixin, TestReactorMixin, LoggingMixin,
         self.assertEqual(len(self.flushLoggedErrors(TestException)), 1)
         self.assertLogged('Got exception when handling reporter events')
 
+    @defer.inlineCallbacks
+    def test_generator_report_context(self):
+        gen = self.setup_mock_generator([('fake1', None, None)])
+        gen_old = self.setup_mock_generator([('fake1', None, None)])
+        contexts = []
+
+        def generate(master, reporter, key, message, report_context=None):
+            contexts.append(report_context)
+
+        def generate_old(master, reporter, key, message):
+            contexts.append(None)
+
+        gen.generate = generate
+        gen_old.generate = generate_old
+
+        notifier = yield self.setupNotifier(generators=[gen, gen_old])
+
+        yield notifier._got_event(('fake1', None, None), {})
+
+        # generators which do not take a report context are still supported
+        self.assertEqual(len(contexts), 2)
+        self.assertIsInstance(contexts[0], utils.ReportContext)
+        self.assertIsNone(contexts[1])
+
     @defer.inlineCallbacks
     def test_reports_sent_in_order_despite_slow_generator(self):
         gen = self.setup_mock_generator([('builds', None, None)])
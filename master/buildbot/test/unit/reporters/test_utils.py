@@ -15,6 +15,7 @@
 
 import datetime
 import textwrap
+from unittest import mock
 
 from dateutil.tz import tzutc
 
@@ -155,6 +156,24 @@ class TestDataUtils(TestReactorMixin, unittest.TestCase, logging.LoggingMixin):
         self.assertEqual(build1['steps'][0]['logs'][0]['url'],
                          'http://localhost:8080/#/builders/80/builds/2/steps/29/logs/stdio')
 
+    @defer.inlineCallbacks
+    def test_getDetailsForBuildsetWithLogs_truncated(self):
+        self.setupDb()
+        self.patch(utils, 'LOG_CONTENT_MAX_BYTES', 12)
+        res = yield utils.getDetailsForBuildset(self.master, 98, want_logs_content=True)
+
+        build1 = res['builds'][0]
+        self.assertEqual(build1['steps'][0]['logs'][0]['content']['content'], 'line zero\n')
+
+    @defer.inlineCallbacks
+    def test_get_logs_contents(self):
+        self.setupDb()
+        res = yield utils.get_logs_contents(self.master, 20, max_bytes=None)
+        self.assertEqual(res, {80: {'logid': 80, 'firstline': 0, 'content': self.LOGCONTENT}})
+
+        res = yield utils.get_logs_contents(self.master, 20, logids=[81])
+        self.assertEqual(res, {})
+
     @defer.inlineCallbacks
     def test_get_details_for_buildset_all(self):
         self.setupDb()
@@ -452,6 +471,101 @@ class TestDataUtils(TestReactorMixin, unittest.TestCase, logging.LoggingMixin):
         self.assertEqual(res['buildid'], 18)
 
 
+class TestReportContext(TestReactorMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = fakemaster.make_master(self, wantData=True, wantDb=True)
+        self.master.db.insert_test_data([
+            fakedb.Master(id=92),
+            fakedb.Worker(id=13, name='wrk'),
+            fakedb.Buildset(id=98),
+            fakedb.Builder(id=80, name='Builder1'),
+            fakedb.BuildRequest(id=11, buildsetid=98, builderid=80),
+            fakedb.Build(id=20, number=2, builderid=80, buildrequestid=11, workerid=13,
+                         masterid=92, results=SUCCESS),
+            fakedb.Step(id=120, buildid=20, name="step1"),
+        ])
+        self.get = mock.Mock(wraps=self.master.data.get)
+        self.patch(self.master.data, 'get', self.get)
+
+    @defer.inlineCallbacks
+    def test_get_memoised(self):
+        context = utils.ReportContext(self.master, {})
+        steps1 = yield context.get(('builds', 20, 'steps'))
+        steps2 = yield context.get(('builds', 20, 'steps'))
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(steps1, steps2)
+
+        # every caller gets its own copy
+        steps1[0]['logs'] = []
+        self.assertNotIn('logs', steps2[0])
+
+        yield context.get(('builds', 20, 'steps'), limit=1)
+        self.assertEqual(self.get.call_count, 2)
+
+    @defer.inlineCallbacks
+    def test_get_concurrent(self):
+        d = defer.Deferred()
+        self.get.side_effect = lambda *args, **kwargs: d
+        context = utils.ReportContext(self.master, {})
+        d1 = context.get(('builders', 80))
+        d2 = context.get(('builders', 80))
+        self.assertEqual(self.get.call_count, 1)
+
+        d.callback({'builderid': 80})
+        builder1 = yield d1
+        builder2 = yield d2
+        self.assertEqual(builder1, {'builderid': 80})
+        self.assertIsNot(builder1, builder2)
+
+    @defer.inlineCallbacks
+    def test_get_failure_not_cached(self):
+        self.get.side_effect = lambda *args, **kwargs: defer.fail(RuntimeError('oops'))
+        context = utils.ReportContext(self.master, {})
+        with self.assertRaises(RuntimeError):
+            yield context.get(('builders', 80))
+
+        self.get.side_effect = None
+        builder = yield context.get(('builders', 80))
+        self.assertEqual(builder['name'], 'Builder1')
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_acquire_release(self):
+        msg = {'buildid': 20}
+        context = utils.ReportContext.acquire(self.master, msg)
+        self.assertIs(utils.ReportContext.acquire(self.master, msg), context)
+        other = utils.ReportContext.acquire(self.master, {'buildid': 20})
+        self.assertIsNot(other, context)
+        other.release()
+
+        context.release()
+        context.release()
+        # the context lives until the other consumers of the message had a
+        # chance to acquire it
+        self.assertIs(utils.ReportContext.acquire(self.master, msg), context)
+        context.release()
+
+        self.reactor.advance(0)
+        self.assertIsNot(utils.ReportContext.acquire(self.master, msg), context)
+
+    @defer.inlineCallbacks
+    def test_getDetailsForBuild_uses_context(self):
+        build = yield self.master.data.get(("builds", 20))
+        self.get.reset_mock()
+        context = utils.ReportContext(self.master, build)
+        yield utils.getDetailsForBuild(self.master, build, want_steps=True,
+                                       report_context=context)
+        call_count = self.get.call_count
+
+        # a copy of the build still shares the data of the context
+        build = dict(build)
+        yield utils.getDetailsForBuild(self.master, build, want_steps=True,
+                                       report_context=context)
+        self.assertEqual(self.get.call_count, call_count)
+        self.assertEqual(build['steps'][0]['stepid'], 120)
+
+
 class TestURLUtils(TestReactorMixin, unittest.TestCase):
 
     def setUp(self):
@@ -276,6 +276,25 @@ class SetPropertyFromCommand(TestBuildStepMixin, TestReactorMixin,
         self.expect_log_file('property changes', r"res: " + repr('abcdef'))
         return self.run_step()
 
+    @defer.inlineCallbacks
+    def test_run_property_collect_max_memory(self):
+        step = self.setup_step(shell.SetPropertyFromCommand(property="res", command="cmd",
+                                                            collectMaxMemory=4))
+        self.expect_commands(
+            ExpectShell(workdir='wkdir',
+                        command="cmd")
+            .stdout('\n\nabc')
+            .stdout('def\n')
+            .exit(0)
+        )
+        self.expect_outcome(result=SUCCESS,
+                           state_string="property 'res' set")
+        self.expect_property("res", "abcdef")
+        yield self.run_step()
+        self.assertEqual(step.observer.stdout.max_memory, 4)
+        # the buffered output is discarded once the step is finished
+        self.assertEqual(step.observer.getStdout(), '')
+
     def test_renderable_workdir(self):
         self.setup_step(
             shell.SetPropertyFromCommand(property="res", command="cmd",
@@ -31,6 +31,7 @@ from buildbot.process.results import FAILURE
 from buildbot.process.results import SKIPPED
 from buildbot.process.results import SUCCESS
 from buildbot.steps import transfer
+from buildbot.test.fake import connection
 from buildbot.test.reactor import TestReactorMixin
 from buildbot.test.steps import ExpectDownloadFile
 from buildbot.test.steps import ExpectGlob
@@ -752,6 +753,97 @@ class TestMultipleFileUpload(TestBuildStepMixin, TestReactorMixin,
         self.assertEqual(
             len(self.flushLoggedErrors(RuntimeError)), 1)
 
+    @defer.inlineCallbacks
+    def test_parallel(self):
+        self.setup_step(
+            transfer.MultipleFileUpload(workersrcs=["srcfile", "srcdir"],
+                                        masterdest=self.destdir, maxParallel=2))
+
+        self.expect_commands(
+            ExpectStat(file="srcfile", workdir='wkdir')
+            .stat_file()
+            .exit(0),
+            ExpectStat(file="srcdir", workdir='wkdir')
+            .stat_dir()
+            .exit(0),
+            ExpectUploadFile(workersrc="srcfile", workdir='wkdir',
+                             blocksize=16384, maxsize=None, keepstamp=False,
+                             writer=ExpectRemoteRef(remotetransfer.FileWriter))
+            .upload_string("Hello world!\n")
+            .exit(0),
+            ExpectUploadDirectory(workersrc="srcdir", workdir='wkdir',
+                                  blocksize=16384, compress=None, maxsize=None,
+                                  writer=ExpectRemoteRef(remotetransfer.DirectoryWriter))
+            .upload_tar_file('fake.tar', {"test": "Hello world!"})
+            .exit(0))
+
+        self.expect_outcome(
+            result=SUCCESS, state_string="uploading 2 files")
+        yield self.run_step()
+
+        self.assertEqual(self.step.getStatistic('uploaded_files'), 2)
+        self.assertGreater(self.step.getStatistic('uploaded_bytes'), len("Hello world!\n"))
+
+    @defer.inlineCallbacks
+    def test_parallel_failure(self):
+        self.setup_step(
+            transfer.MultipleFileUpload(workersrcs=["srcfile", "srcfile2", "srcfile3"],
+                                        masterdest=self.destdir, maxParallel=2))
+
+        self.expect_commands(
+            ExpectStat(file="srcfile", workdir='wkdir')
+            .stat_file()
+            .exit(0),
+            ExpectStat(file="srcfile2", workdir='wkdir')
+            .stat_file()
+            .exit(0),
+            ExpectUploadFile(workersrc="srcfile", workdir='wkdir',
+                             blocksize=16384, maxsize=None, keepstamp=False,
+                             writer=ExpectRemoteRef(remotetransfer.FileWriter))
+            .exit(1),
+            ExpectUploadFile(workersrc="srcfile2", workdir='wkdir',
+                             blocksize=16384, maxsize=None, keepstamp=False,
+                             writer=ExpectRemoteRef(remotetransfer.FileWriter))
+            .upload_string("Hello world!\n")
+            .exit(0))
+
+        self.expect_outcome(
+            result=FAILURE, state_string="uploading 3 files (failure)")
+        yield self.run_step()
+
+    @defer.inlineCallbacks
+    def test_parallel_not_supported_by_connection(self):
+        self.setup_step(
+            transfer.MultipleFileUpload(workersrcs=["srcfile", "srcfile2"],
+                                        masterdest=self.destdir, maxParallel=2))
+        self.patch(connection.FakeConnection, 'supports_concurrent_commands', False)
+
+        self.expect_commands(
+            ExpectStat(file="srcfile", workdir='wkdir')
+            .stat_file()
+            .exit(0),
+            ExpectUploadFile(workersrc="srcfile", workdir='wkdir',
+                             blocksize=16384, maxsize=None, keepstamp=False,
+                             writer=ExpectRemoteRef(remotetransfer.FileWriter))
+            .upload_string("Hello world!\n")
+            .exit(0),
+            ExpectStat(file="srcfile2", workdir='wkdir')
+            .stat_file()
+            .exit(0),
+            ExpectUploadFile(workersrc="srcfile2", workdir='wkdir',
+                             blocksize=16384, maxsize=None, keepstamp=False,
+                             writer=ExpectRemoteRef(remotetransfer.FileWriter))
+            .upload_string("Hello world!\n")
+            .exit(0))
+
+        self.expect_outcome(
+            result=SUCCESS, state_string="uploading 2 files")
+        yield self.run_step()
+
+    def test_init_max_parallel_invalid(self):
+        with self.assertRaisesRegex(config.ConfigErrors, 'maxParallel must be a positive integer'):
+            transfer.MultipleFileUpload(['srcfile'], 'dstfile', maxParallel=0)
+
     @defer.inlineCallbacks
     def testSubclass(self):
         class CustomStep(transfer.MultipleFileUpload):
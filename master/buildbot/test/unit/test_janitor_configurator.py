@@ -28,6 +28,7 @@ from buildbot.configurators.janitor import JANITOR_NAME
 from buildbot.configurators.janitor import BuildDataJanitor
 from buildbot.configurators.janitor import JanitorConfigurator
 from buildbot.configurators.janitor import LogChunksJanitor
+from buildbot.configurators.janitor import LogRecompressJanitor
 from buildbot.process.results import SUCCESS
 from buildbot.schedulers.forcesched import ForceScheduler
 from buildbot.schedulers.timed import Nightly
@@ -53,6 +54,9 @@ class JanitorConfiguratorTests(configurators.ConfiguratorMixin, unittest.Synchro
         ('logs_build_data', {'build_data_horizon': timedelta(weeks=1),
                              'logHorizon': timedelta(weeks=1)},
          [LogChunksJanitor, BuildDataJanitor]),
+        ('log_recompress', {'log_recompress_limit': 100}, [LogRecompressJanitor]),
+        ('logs_log_recompress', {'logHorizon': timedelta(weeks=1), 'log_recompress_limit': 100},
+         [LogChunksJanitor, LogRecompressJanitor]),
     ])
     def test_steps(self, name, configuration, exp_steps):
         self.setupConfigurator(**configuration)
@@ -88,6 +92,18 @@ class LogChunksJanitorTests(TestBuildStepMixin,
         expected_timestamp = datetime2epoch(datetime.datetime(year=2016, month=12, day=25))
         self.master.db.logs.deleteOldLogChunks.assert_called_with(expected_timestamp)
 
+    @defer.inlineCallbacks
+    def test_log_recompress(self):
+        self.setup_step(LogRecompressJanitor(limit=10))
+        self.master.db.logs.getLogIdsToRecompress = mock.Mock(return_value=[201, 202])
+        self.master.db.logs.compressLog = mock.Mock(side_effect=[100, 50])
+        self.expect_outcome(result=SUCCESS,
+                            state_string="recompressed 2 logs, saved 150 bytes")
+        yield self.run_step()
+        self.master.db.logs.getLogIdsToRecompress.assert_called_with(limit=10)
+        self.master.db.logs.compressLog.assert_has_calls([
+            mock.call(201, recompress=True), mock.call(202, recompress=True)])
+
     @defer.inlineCallbacks
     def test_build_data(self):
         self.setup_step(BuildDataJanitor(build_data_horizon=timedelta(weeks=1)))
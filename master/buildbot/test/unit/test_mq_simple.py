@@ -83,3 +83,39 @@ class SimpleMQ(TestReactorMixin, unittest.TestCase):
         self.assertFalse(d.called)
         d1.callback(None)
         self.assertTrue(d.called)
+
+    @defer.inlineCallbacks
+    def test_forward_data_registration_order(self):
+        calls = []
+        yield self.mq.startConsuming(lambda k, d: calls.append('exact'), ('a', 'b'))
+        yield self.mq.startConsuming(lambda k, d: calls.append('wild1'), ('a', None))
+        yield self.mq.startConsuming(lambda k, d: calls.append('wild2'), (None, 'b'))
+        yield self.mq.startConsuming(lambda k, d: calls.append('other'), ('a', 'c'))
+        yield self.mq.startConsuming(lambda k, d: calls.append('all'), (None, None))
+        yield self.mq.produce(('a', 'b'), 'foo')
+        self.assertEqual(calls, ['exact', 'wild1', 'wild2', 'all'])
+
+    @defer.inlineCallbacks
+    def test_stop_consuming_prunes_routing_table(self):
+        callback = mock.Mock()
+        qref1 = yield self.mq.startConsuming(callback, ('a', 'b', None))
+        qref2 = yield self.mq.startConsuming(callback, ('a', None, 'c'))
+        yield qref1.stopConsuming()
+        yield self.mq.produce(('a', 'b', 'd'), 'foo')
+        self.assertFalse(callback.called)
+        self.assertEqual(list(self.mq.routing_table.roots[3].children['a'].children), [None])
+
+        yield qref2.stopConsuming()
+        self.assertEqual(self.mq.routing_table.roots, {})
+        self.assertEqual(self.mq.qrefs, [])
+
+    @defer.inlineCallbacks
+    def test_same_filter_multiple_consumers(self):
+        callback1 = mock.Mock()
+        callback2 = mock.Mock()
+        qref1 = yield self.mq.startConsuming(callback1, ('a', None))
+        yield self.mq.startConsuming(callback2, ('a', None))
+        yield qref1.stopConsuming()
+        yield self.mq.produce(('a', 'b'), 'foo')
+        self.assertFalse(callback1.called)
+        callback2.assert_called_with(('a', 'b'), 'foo')
@@ -0,0 +1,90 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+from twisted.trial import unittest
+
+from buildbot.util.secret_redaction import SecretRedactor
+
+
+class TestSecretRedactor(unittest.TestCase):
+
+    def redact_stream(self, redactor, chunks):
+        result = []
+        carry = ''
+        for chunk in chunks:
+            text, carry = redactor.redact_partial(carry + chunk)
+            if text:
+                self.assertEqual(text[-1], '\n')
+            result.append(text)
+        result.append(redactor.redact(carry))
+        return ''.join(result)
+
+    def test_no_secrets(self):
+        redactor = SecretRedactor({})
+        self.assertEqual(redactor.redact('some text\n'), 'some text\n')
+        self.assertEqual(redactor.redact_partial('some text\n'), ('some text\n', ''))
+
+    def test_redact(self):
+        redactor = SecretRedactor({'s3cr3t': '<pass>', 'tok': '<token>'})
+        self.assertEqual(redactor.redact('a s3cr3t and tok, s3cr3ts\n'),
+                         'a <pass> and <token>, <pass>s\n')
+
+    def test_redact_regex_characters(self):
+        redactor = SecretRedactor({'a.b*(c': '<secret>'})
+        self.assertEqual(redactor.redact('a.b*(c aXbb(c\n'), '<secret> aXbb(c\n')
+
+    def test_redact_longest_match(self):
+        redactor = SecretRedactor({'abc': '<short>', 'abcdef': '<long>'})
+        self.assertEqual(redactor.redact('abcdef abcde\n'), '<long> <short>de\n')
+
+    def test_redact_partial_whole_lines(self):
+        redactor = SecretRedactor({'s3cr3t': '<pass>'})
+        self.assertEqual(redactor.redact_partial('s3cr3t\nline\n'),
+                         ('<pass>\nline\n', ''))
+
+    def test_redact_partial_long_line_split(self):
+        redactor = SecretRedactor({'s3cr3t': '<pass>'})
+        self.assertEqual(redactor.redact_partial('first\nlong s3c'),
+                         ('first\n', 'long s3c'))
+
+    def test_redact_partial_multiline_secret(self):
+        key = '-----BEGIN KEY-----\nabcdef\n-----END KEY-----'
+        redactor = SecretRedactor({key: '<key>'})
+        text = 'before\n' + key + '\nafter\n'
+        for split in range(1, len(text)):
+            head, tail = text[:split], text[split:]
+            # split on line boundaries, as line boundary finders do
+            head_end = head.rfind('\n') + 1
+            chunks = [head[:head_end], head[head_end:] + tail]
+            self.assertEqual(self.redact_stream(redactor, chunks),
+                             'before\n<key>\nafter\n')
+
+    def test_redact_partial_multiline_secret_per_line(self):
+        key = '-----BEGIN KEY-----\nabcdef\n-----END KEY-----'
+        redactor = SecretRedactor({key: '<key>', 'abc': '<abc>'})
+        text = 'abc\nbefore\n' + key + '\nabc\n'
+        chunks = [line + '\n' for line in text.split('\n')[:-1]]
+        self.assertEqual(self.redact_stream(redactor, chunks),
+                         '<abc>\nbefore\n<key>\n<abc>\n')
+
+    def test_redact_partial_holds_back_crossing_match(self):
+        key = 'line1\nline2'
+        redactor = SecretRedactor({key: '<key>', 'x': '<x>'})
+        self.assertEqual(redactor.redact_partial('x\nline1\nline2 tail\n'),
+                         ('<x>\n<key> tail\n', ''))
+        # the end of the line could be the beginning of another secret
+        self.assertEqual(redactor.redact_partial('x\nline1\nline2line1\n'),
+                         ('<x>\n', 'line1\nline2line1\n'))
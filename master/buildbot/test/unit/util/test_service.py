@@ -21,6 +21,8 @@ from twisted.trial import unittest
 
 from buildbot import config
 from buildbot.process.properties import Interpolate
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
 from buildbot.util import service
 
 
@@ -538,6 +540,166 @@ class ClusteredBuildbotService(unittest.TestCase):
         self.assertEqual(False, self.svc.isActive())
 
 
+class ClaimCoordinator(TestReactorMixin, unittest.TestCase):
+
+    class BatchService(service.ClusteredBuildbotService):
+
+        def _getServiceId(self):
+            return self.testcase.serviceids[self.name]
+
+        def _claimService(self):
+            return self.testcase.owners.setdefault(self.serviceid, 'here') == 'here'
+
+        def _unclaimService(self):
+            del self.testcase.owners[self.serviceid]
+
+        @defer.inlineCallbacks
+        def _claimServices(self, serviceids):
+            self.testcase.batches.append(sorted(serviceids))
+            if self.testcase.claimPending is not None:
+                yield self.testcase.claimPending
+            if self.testcase.claimError:
+                raise self.testcase.claimError
+            return {serviceid for serviceid in serviceids
+                    if self.testcase.owners.setdefault(serviceid, 'here') == 'here'}
+
+    class OtherBatchService(BatchService):
+
+        # claimed separately from the BatchService-es
+        def _claimServices(self, serviceids):
+            return super()._claimServices(serviceids)
+
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = fakemaster.make_master(self)
+        self.serviceids = {}
+        self.owners = {}
+        self.batches = []
+        self.claimError = None
+        self.claimPending = None
+
+    @defer.inlineCallbacks
+    def makeService(self, name, serviceid, owner=None, cls=None):
+        svc = (cls or self.BatchService)(name=name)
+        svc.testcase = self
+        self.serviceids[name] = serviceid
+        if owner is not None:
+            self.owners[serviceid] = owner
+        yield svc.setServiceParent(self.master)
+        return svc
+
+    def coordinator(self):
+        return service.ClaimCoordinator.getCoordinator(self.master)
+
+    @defer.inlineCallbacks
+    def test_claimed_at_start(self):
+        svc = yield self.makeService('a', 1)
+        yield svc.startService()
+        self.assertTrue(svc.isActive())
+        self.assertEqual(self.batches, [])
+        self.assertFalse(self.reactor.getDelayedCalls())
+
+    @defer.inlineCallbacks
+    def test_waiting_services_claimed_in_one_batch(self):
+        a = yield self.makeService('a', 1, owner='other')
+        b = yield self.makeService('b', 2, owner='other')
+        c = yield self.makeService('c', 3, owner='other')
+        yield a.startService()
+        yield b.startService()
+        yield c.startService()
+        self.assertFalse(a.isActive() or b.isActive() or c.isActive())
+
+        self.reactor.advance(a.POLL_INTERVAL_SEC)
+        self.assertEqual(self.batches, [[1, 2, 3]])
+
+        # the other master goes away
+        del self.owners[1]
+        del self.owners[3]
+        self.reactor.advance(a.POLL_INTERVAL_SEC * 0.95)
+        self.assertEqual(len(self.batches), 1)
+        self.reactor.advance(a.POLL_INTERVAL_SEC * 0.05)
+        self.assertEqual(self.batches[1:], [[1, 2, 3]])
+        self.assertTrue(a.isActive())
+        self.assertFalse(b.isActive())
+        self.assertTrue(c.isActive())
+
+        # only the services still waiting are polled for
+        self.reactor.advance(a.POLL_INTERVAL_SEC)
+        self.assertEqual(self.batches[2:], [[2]])
+
+    @defer.inlineCallbacks
+    def test_waits_at_most_its_interval(self):
+        a = yield self.makeService('a', 1, owner='other')
+        yield a.startService()
+        self.reactor.advance(a.POLL_INTERVAL_SEC / 2)
+
+        b = yield self.makeService('b', 2, owner='other')
+        b.POLL_INTERVAL_SEC = a.POLL_INTERVAL_SEC / 4
+        yield b.startService()
+        self.reactor.advance(b.POLL_INTERVAL_SEC)
+        self.assertEqual(self.batches, [[1, 2]])
+
+    @defer.inlineCallbacks
+    def test_stop_while_waiting(self):
+        a = yield self.makeService('a', 1, owner='other')
+        yield a.startService()
+        yield a.stopService()
+        self.assertFalse(self.reactor.getDelayedCalls())
+
+        self.reactor.advance(a.POLL_INTERVAL_SEC)
+        self.assertEqual(self.batches, [])
+
+    @defer.inlineCallbacks
+    def test_stop_while_other_group_claimed(self):
+        a = yield self.makeService('a', 1, owner='other')
+        b = yield self.makeService('b', 2, owner='other', cls=self.OtherBatchService)
+        yield a.startService()
+        yield b.startService()
+        del self.owners[1]
+        del self.owners[2]
+
+        self.claimPending = d = defer.Deferred()
+        self.reactor.advance(a.POLL_INTERVAL_SEC)
+        self.assertEqual(self.batches, [[1]])
+
+        # b is stopped while the group of a is being claimed
+        self.claimPending = None
+        yield b.stopService()
+        d.callback(None)
+
+        self.assertTrue(a.isActive())
+        self.assertFalse(b.isActive())
+        self.assertEqual(self.batches, [[1]])
+        self.assertEqual(self.owners, {1: 'here'})
+
+    @defer.inlineCallbacks
+    def test_claim_error(self):
+        a = yield self.makeService('a', 1, owner='other')
+        yield a.startService()
+        self.claimError = RuntimeError('oh noes')
+        self.reactor.advance(a.POLL_INTERVAL_SEC)
+        self.assertEqual(len(self.flushLoggedErrors(RuntimeError)), 1)
+
+        # it keeps polling
+        self.claimError = None
+        del self.owners[1]
+        self.reactor.advance(a.POLL_INTERVAL_SEC)
+        self.assertTrue(a.isActive())
+        self.assertEqual(len(self.batches), 2)
+
+    @defer.inlineCallbacks
+    def test_stop_and_unclaim_after_activation(self):
+        a = yield self.makeService('a', 1, owner='other')
+        yield a.startService()
+        del self.owners[1]
+        self.reactor.advance(a.POLL_INTERVAL_SEC)
+        self.assertTrue(a.isActive())
+
+        yield a.stopService()
+        self.assertFalse(a.isActive())
+        self.assertEqual(self.owners, {})
+
+
 class MyService(service.BuildbotService):
 
     def checkConfig(self, foo, a=None):
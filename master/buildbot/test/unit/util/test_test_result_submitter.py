@@ -183,6 +183,36 @@ class TestTestResultSubmitter(TestReactorMixin, unittest.TestCase):
             {'test_name': 'name5', 'value': '5'},
         ])
 
+    @defer.inlineCallbacks
+    def test_batches_pipelined(self):
+        sub = TestResultSubmitter(batch_n=1, max_batches_in_flight=2)
+        yield sub.setup_by_ids(self.master, 88, 30, 131, 'desc', 'cat', 'unit')
+
+        calls = []
+
+        def addTestResults(builderid, setid, batch):
+            d = defer.Deferred()
+            calls.append((batch[0]['value'], d))
+            return d
+        self.master.data.updates.addTestResults = addTestResults
+
+        sub.add_test_result('1', 'name1')
+        sub.add_test_result('2', 'name2')
+        sub.add_test_result('3', 'name3')
+        sub.add_test_result('4', 'name4')
+        d = sub.finish()
+        self.assertEqual([value for value, _ in calls], ['1', '2'])
+
+        calls[1][1].callback(None)
+        self.assertEqual([value for value, _ in calls], ['1', '2', '3'])
+        calls[0][1].callback(None)
+        self.assertEqual([value for value, _ in calls], ['1', '2', '3', '4'])
+
+        self.assertNoResult(d)
+        calls[2][1].callback(None)
+        calls[3][1].callback(None)
+        yield d
+
     @defer.inlineCallbacks
     def test_counts_pass_fail(self):
         sub = TestResultSubmitter(batch_n=3)
@@ -440,13 +440,47 @@ class TestBuildbotWebSocketServerProtocol(unittest.TestCase):
         command_id = 1
 
         command = mock.Mock()
+        command.remote_read.return_value = b'd'
         self.protocol.command_id_to_reader_map = {command_id: command}
 
         msg = {'op': 'update_read_file', 'length': 1, 'command_id': command_id}
-        expected = {'op': 'response', 'result': None}
+        expected = {'op': 'response', 'result': b'd'}
         yield self.send_msg_check_response(self.protocol, msg, expected)
         command.remote_read.assert_called_once_with(msg['length'])
 
+    @defer.inlineCallbacks
+    def test_update_upload_file_write_pipelined_in_order(self):
+        yield self.connect_authenticated_worker()
+        command_id = 1
+
+        writes = []
+        pending = []
+
+        def remote_write(data):
+            writes.append(data)
+            d = defer.Deferred()
+            pending.append(d)
+            return d
+
+        writer = mock.Mock()
+        writer.remote_write.side_effect = remote_write
+        self.protocol.command_id_to_writer_map = {command_id: writer}
+
+        for i, data in enumerate([b'1', b'2', b'3']):
+            msg = {'op': 'update_upload_file_write', 'args': data, 'command_id': command_id,
+                   'seq_number': i}
+            self.protocol.onMessage(msgpack.packb(msg), True)
+
+        # the following writes wait for the first one to complete
+        self.assertEqual(writes, [b'1'])
+        pending[0].callback(None)
+        self.assertEqual(writes, [b'1', b'2'])
+        pending[1].callback(None)
+        pending[2].callback(None)
+        yield self.protocol._deferwaiter.wait()
+        self.assertEqual(writes, [b'1', b'2', b'3'])
+        self.assertEqual(self.protocol.sendMessage.call_count, 3)
+
     @defer.inlineCallbacks
     def test_update_read_file_close_success(self):
         yield self.connect_authenticated_worker()
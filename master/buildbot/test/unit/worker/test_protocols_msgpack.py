@@ -385,6 +385,36 @@ class TestConnection(TestReactorMixin, unittest.TestCase):
                                                              'command_name': 'command',
                                                              'args': expected_args})
 
+    @parameterized.expand([
+        ('uploadFile', 'upload_file', 'workersrc', 'writer'),
+        ('uploadDirectory', 'upload_directory', 'workersrc', 'writer'),
+        ('downloadFile', 'download_file', 'workerdest', 'reader'),
+    ])
+    @defer.inlineCallbacks
+    def test_remote_start_command_transfer_window(self, command_name, expected_command_name,
+                                                  path_arg, transfer_arg):
+        self.protocol.get_message_result.return_value = defer.succeed(None)
+        self.protocol.command_id_to_command_map = {}
+        self.protocol.command_id_to_reader_map = {}
+        self.protocol.command_id_to_writer_map = {}
+        self.conn.info = {'environ': {}}
+        self.conn.path_module = os.path
+        self.conn.path_expanduser = lambda path, environ: path
+        self.conn.builder_basedirs = {'builder': 'basedir'}
+        self.conn.transfer_window = 4
+
+        rc_instance = base.RemoteCommandImpl()
+        transfer = mock.Mock()
+        args = {'workdir': 'wkdir', path_arg: 'file', 'blocksize': 16, transfer_arg: transfer}
+
+        yield self.conn.remoteStartCommand(rc_instance, 'builder', 1, command_name, args)
+
+        msg = self.protocol.get_message_result.call_args[0][0]
+        self.assertEqual(msg['command_name'], expected_command_name)
+        self.assertEqual(msg['args']['window'], 4)
+        self.assertEqual(msg['args']['path'], os.path.join('basedir', 'wkdir', 'file'))
+        self.assertNotIn(transfer_arg, msg['args'])
+
     @defer.inlineCallbacks
     def test_remote_shutdown(self):
         self.protocol.get_message_result.return_value = defer.succeed(None)
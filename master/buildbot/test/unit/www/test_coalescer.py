@@ -0,0 +1,150 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.www import coalescer
+
+
+class EventCoalescer(TestReactorMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = fakemaster.make_master(self, wantMq=True)
+        self.master.mq.verifyMessages = False
+        self.master.config.www['event_coalescing_window'] = 0.1
+        self.coalescer = coalescer.EventCoalescer(self.master)
+        self.events = []
+
+    @defer.inlineCallbacks
+    def startConsuming(self, name, filter=(None, None, None)):
+        def callback(key, data):
+            self.events.append((name, key, data))
+        qref = yield self.coalescer.startConsuming(callback, filter)
+        return qref
+
+    def produce(self, key, data):
+        self.master.mq.callConsumer(key, data)
+
+    @defer.inlineCallbacks
+    def test_disabled(self):
+        self.master.config.www['event_coalescing_window'] = 0
+        qref = yield self.startConsuming('c')
+        self.assertNotIsInstance(qref, coalescer.CoalescingConsumer)
+        self.produce(('builds', '1', 'update'), {'state_string': 'a'})
+        self.produce(('builds', '1', 'update'), {'state_string': 'b'})
+        self.assertEqual(self.events, [
+            ('c', ('builds', '1', 'update'), {'state_string': 'a'}),
+            ('c', ('builds', '1', 'update'), {'state_string': 'b'}),
+        ])
+
+    @defer.inlineCallbacks
+    def test_updates_coalesced(self):
+        yield self.startConsuming('c')
+        self.produce(('builds', '1', 'update'), {'state_string': 'a'})
+        self.produce(('builds', '2', 'update'), {'state_string': 'x'})
+        self.produce(('builds', '1', 'update'), {'state_string': 'b'})
+        self.reactor.advance(0.05)
+        self.assertEqual(self.events, [])
+
+        self.reactor.advance(0.05)
+        self.assertEqual(self.events, [
+            ('c', ('builds', '1', 'update'), {'state_string': 'b'}),
+            ('c', ('builds', '2', 'update'), {'state_string': 'x'}),
+        ])
+
+        # a new window starts with the next update
+        self.produce(('builds', '1', 'update'), {'state_string': 'c'})
+        self.reactor.advance(0.1)
+        self.assertEqual(self.events[2:], [
+            ('c', ('builds', '1', 'update'), {'state_string': 'c'}),
+        ])
+
+    @defer.inlineCallbacks
+    def test_other_events_not_delayed(self):
+        yield self.startConsuming('c')
+        self.produce(('builds', '1', 'new'), {'state_string': 'a'})
+        self.assertEqual(self.events, [
+            ('c', ('builds', '1', 'new'), {'state_string': 'a'}),
+        ])
+
+    @defer.inlineCallbacks
+    def test_other_event_flushes_pending_update(self):
+        yield self.startConsuming('c')
+        self.produce(('builds', '1', 'update'), {'state_string': 'a'})
+        self.produce(('builds', '2', 'update'), {'state_string': 'x'})
+        self.produce(('builds', '1', 'finished'), {'state_string': 'b'})
+        self.assertEqual(self.events, [
+            ('c', ('builds', '1', 'update'), {'state_string': 'a'}),
+            ('c', ('builds', '1', 'finished'), {'state_string': 'b'}),
+        ])
+        self.reactor.advance(0.1)
+        self.assertEqual(self.events[2:], [
+            ('c', ('builds', '2', 'update'), {'state_string': 'x'}),
+        ])
+
+    @defer.inlineCallbacks
+    def test_properties_merged(self):
+        yield self.startConsuming('c', ('builds', None, 'properties', None))
+        self.produce(('builds', '1', 'properties', 'update'), {'a': (1, 'src')})
+        self.produce(('builds', '1', 'properties', 'update'), {'b': (2, 'src')})
+        self.produce(('builds', '1', 'properties', 'update'), {'a': (3, 'src')})
+        self.reactor.advance(0.1)
+        self.assertEqual(self.events, [
+            ('c', ('builds', '1', 'properties', 'update'), {'a': (3, 'src'), 'b': (2, 'src')}),
+        ])
+
+    @defer.inlineCallbacks
+    def test_shared_between_consumers(self):
+        yield self.startConsuming('c1')
+        yield self.startConsuming('c2')
+        self.produce(('builds', '1', 'update'), {'state_string': 'a'})
+        self.produce(('steps', '1', 'updated'), {'state_string': 'x'})
+        self.produce(('builds', '1', 'update'), {'state_string': 'b'})
+        self.reactor.advance(0.1)
+        self.assertEqual([(name, key) for name, key, _ in self.events], [
+            ('c1', ('builds', '1', 'update')),
+            ('c2', ('builds', '1', 'update')),
+            ('c1', ('steps', '1', 'updated')),
+            ('c2', ('steps', '1', 'updated')),
+        ])
+        # both consumers get the same object, so that it is only encoded once
+        self.assertIs(self.events[0][2], self.events[1][2])
+
+    @defer.inlineCallbacks
+    def test_stopConsuming_drops_pending(self):
+        qref = yield self.startConsuming('c1')
+        yield self.startConsuming('c2')
+        self.produce(('builds', '1', 'update'), {'state_string': 'a'})
+        yield qref.stopConsuming()
+        self.reactor.advance(0.1)
+        self.assertEqual(self.events, [
+            ('c2', ('builds', '1', 'update'), {'state_string': 'a'}),
+        ])
+
+    @defer.inlineCallbacks
+    def test_disabled_by_reconfig_flushes(self):
+        yield self.startConsuming('c1')
+        self.produce(('builds', '1', 'update'), {'state_string': 'a'})
+        self.master.config.www['event_coalescing_window'] = 0
+        yield self.startConsuming('c2')
+        self.assertEqual(self.events, [
+            ('c1', ('builds', '1', 'update'), {'state_string': 'a'}),
+        ])
+        self.produce(('builds', '1', 'update'), {'state_string': 'b'})
+        self.assertEqual(len(self.events), 3)
@@ -0,0 +1,115 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+import datetime
+import json
+from unittest import mock
+
+from twisted.trial import unittest
+
+from buildbot.util import UTC
+from buildbot.www import json_encoder
+
+DATA = {
+    'b': [1, 'two', None, True],
+    'a': datetime.datetime(2023, 1, 2, 3, 4, 5, tzinfo=UTC),
+    'c': {'z': b'bytes', 'y': 'café'},
+}
+
+EXPECTED = {
+    'b': [1, 'two', None, True],
+    'a': 1672628645,
+    'c': {'z': None, 'y': 'café'},
+}
+
+
+class EncoderTests:
+
+    def test_dumps(self):
+        data = self.encoder.dumps(DATA)
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(json.loads(data), EXPECTED)
+
+    def test_dumps_compact(self):
+        self.assertEqual(self.encoder.dumps({'a': [1, 2]}), b'{"a":[1,2]}')
+
+    def test_dumps_keeps_key_order(self):
+        self.assertEqual(self.encoder.dumps({'b': 1, 'a': 2}), b'{"b":1,"a":2}')
+
+
+class StdlibJsonEncoder(EncoderTests, unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = json_encoder.StdlibJsonEncoder()
+
+
+class OrjsonEncoder(EncoderTests, unittest.TestCase):
+
+    if json_encoder.orjson is None:
+        skip = "orjson not installed"
+
+    def setUp(self):
+        self.encoder = json_encoder.OrjsonEncoder()
+
+    def test_dumps_big_integer(self):
+        self.assertEqual(json.loads(self.encoder.dumps({'a': 2 ** 70})), {'a': 2 ** 70})
+
+
+class GetEncoder(unittest.TestCase):
+
+    def test_without_orjson(self):
+        with mock.patch.object(json_encoder, 'orjson', None):
+            self.assertIsInstance(json_encoder.get_encoder(), json_encoder.StdlibJsonEncoder)
+
+    def test_with_orjson(self):
+        with mock.patch.object(json_encoder, 'orjson', mock.Mock()):
+            self.assertIsInstance(json_encoder.get_encoder(), json_encoder.OrjsonEncoder)
+
+
+class DumpsReadable(unittest.TestCase):
+
+    def test_dumps_readable(self):
+        self.assertEqual(json_encoder.dumps_readable({'b': 1, 'a': DATA['a']}),
+                         b'{\n  "a": 1672628645,\n  "b": 1\n}')
+
+
+class EventEncoder(unittest.TestCase):
+
+    def setUp(self):
+        self.encode = mock.Mock(side_effect=lambda key, data: repr((key, data)).encode())
+        self.encoder = json_encoder.EventEncoder(self.encode)
+
+    def test_same_event_encoded_once(self):
+        key = ('builds', '1', 'new')
+        data = {'buildid': 1}
+        first = self.encoder.encode(key, data)
+        self.assertIs(self.encoder.encode(key, data), first)
+        self.assertEqual(self.encode.call_count, 1)
+
+    def test_equal_events_encoded_again(self):
+        # another event, even with the same content, may be different by the
+        # time it is delivered
+        self.encoder.encode(('builds', '1', 'new'), {'buildid': 1})
+        self.encoder.encode(('builds', '1', 'new'), {'buildid': 1})
+        self.assertEqual(self.encode.call_count, 2)
+
+    def test_other_key_encoded(self):
+        data = {'buildid': 1}
+        self.assertEqual(self.encoder.encode(('builds', '1', 'new'), data),
+                         repr((('builds', '1', 'new'), data)).encode())
+        self.assertEqual(self.encoder.encode(('builds', '1', 'finished'), data),
+                         repr((('builds', '1', 'finished'), data)).encode())
+        self.assertEqual(self.encode.call_count, 2)
@@ -20,9 +20,11 @@ from unittest import mock
 from twisted.internet import defer
 from twisted.trial import unittest
 
+from buildbot.data import types
 from buildbot.data.base import Endpoint
 from buildbot.data.base import EndpointKind
 from buildbot.data.exceptions import InvalidQueryParameter
+from buildbot.data.resultspec import encodeCursor
 from buildbot.test.fake import endpoint
 from buildbot.test.reactor import TestReactorMixin
 from buildbot.test.util import www
@@ -263,9 +265,11 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
         endpoint.TestsEndpoint.rtype = mock.MagicMock()
         endpoint.Test.kind = EndpointKind.COLLECTION
         endpoint.Test.rtype = endpoint.Test
+        endpoint.Test.queryParameters = {}
 
     def assertRestCollection(self, typeName, items,
-                             total=None, contentType=None, orderSignificant=False):
+                             total=None, contentType=None, orderSignificant=False,
+                             nextCursor=None):
         self.assertFalse(isinstance(self.request.written, str))
         got = {}
         got['content'] = json.loads(bytes2unicode(self.request.written))
@@ -275,6 +279,8 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
         meta = {}
         if total is not None:
             meta['total'] = total
+        if nextCursor is not None:
+            meta['next'] = nextCursor
 
         exp = {}
         exp['content'] = {typeName: items, 'meta': meta}
@@ -341,6 +347,16 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
             responseCode=200,
             headers={b"content-disposition": [b'attachment; filename=test.txt']})
 
+    @defer.inlineCallbacks
+    def test_raw_stream(self):
+        yield self.render_resource(self.rsrc, b'/rawstreamtest')
+        self.assertRequest(
+            content=b"value in pieces",
+            contentType=b'text/test; charset=utf-8',
+            responseCode=200)
+        self.assertNotIn(b"content-disposition", self.request.headers)
+        self.assertIsNone(self.request.producer)
+
     @defer.inlineCallbacks
     def test_api_head(self):
         get = yield self.render_resource(self.rsrc, b'/test', method=b'GET')
@@ -357,19 +373,19 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
                                   total=8)
 
     @defer.inlineCallbacks
-    def do_test_api_collection_pagination(self, query, ids, links):
+    def do_test_api_collection_pagination(self, query, ids, links, nextCursor=None):
         yield self.render_resource(self.rsrc, b'/test' + query)
         self.assertRestCollection(typeName='tests',
                                   items=[v for k, v in endpoint.testData.items()
                                          if k in ids],
-                                  total=8)
+                                  total=8, nextCursor=nextCursor)
 
     def test_api_collection_limit(self):
         return self.do_test_api_collection_pagination(b'?limit=2',
                                                       [13, 14], {
                                                           'self': '%(self)s?limit=2',
                                                           'next': '%(self)s?offset=2&limit=2',
-                                                      })
+                                                      }, nextCursor=encodeCursor([14]))
 
     def test_api_collection_offset(self):
         return self.do_test_api_collection_pagination(b'?offset=2',
@@ -385,7 +401,7 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
                                                           'prev': '%(self)s?offset=3&limit=2',
                                                           'next': '%(self)s?offset=7&limit=2',
                                                           'self': '%(self)s?offset=5&limit=2',
-                                                      })
+                                                      }, nextCursor=encodeCursor([19]))
 
     def test_api_collection_limit_at_end(self):
         return self.do_test_api_collection_pagination(b'?offset=5&limit=3',
@@ -393,7 +409,7 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
                                                           'first': '%(self)s?limit=3',
                                                           'prev': '%(self)s?offset=2&limit=3',
                                                           'self': '%(self)s?offset=5&limit=3',
-                                                      })
+                                                      }, nextCursor=encodeCursor([20]))
 
     def test_api_collection_limit_past_end(self):
         return self.do_test_api_collection_pagination(b'?offset=5&limit=20',
@@ -443,6 +459,29 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
             contentType=b'text/plain; charset=utf-8',
             responseCode=400)
 
+    @defer.inlineCallbacks
+    def test_api_collection_query_parameter(self):
+        yield self.render_resource(self.rsrc, b'/test?maxid=14')
+        self.assertRestCollection(typeName='tests',
+                                  items=[endpoint.testData[13], endpoint.testData[14]],
+                                  total=2)
+
+    @defer.inlineCallbacks
+    def test_api_collection_query_parameter_with_fields(self):
+        # query parameters are not fields, so they need not be selected
+        yield self.render_resource(self.rsrc, b'/test?maxid=14&field=info')
+        self.assertRestCollection(typeName='tests',
+                                  items=[{'info': 'ok'}, {'info': 'failed'}],
+                                  total=2)
+
+    @defer.inlineCallbacks
+    def test_api_collection_invalid_query_parameter_value(self):
+        yield self.render_resource(self.rsrc, b'/test?maxid=many')
+        self.assertRequest(
+            contentJson={"error": 'invalid value for maxid'},
+            contentType=b'text/plain; charset=utf-8',
+            responseCode=400)
+
     @defer.inlineCallbacks
     def test_api_collection_fields(self):
         yield self.render_resource(self.rsrc, b'/test?field=success&field=info')
@@ -533,11 +572,92 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin,
     def test_api_collection_filter_pagination(self):
         yield self.render_resource(self.rsrc, b'/test?success=false&limit=2')
         # note that the limit/offset and total are *after* the filter
+        items = sorted([v for v in endpoint.testData.values() if not v['success']],
+                       key=lambda v: v['testid'])[:2]
+        self.assertRestCollection(typeName='tests', items=items, total=3,
+                                  nextCursor=encodeCursor([items[-1]['testid']]))
+
+    @defer.inlineCallbacks
+    def test_api_collection_after(self):
+        yield self.render_resource(self.rsrc,
+                                   b'/test?limit=2&after=' + encodeCursor([14]).encode())
         self.assertRestCollection(typeName='tests',
-                                  items=sorted(
-                                      [v for v in endpoint.testData.values()
-                                       if not v['success']], key=lambda v: v['testid'])[:2],
-                                  total=3)
+                                  items=[endpoint.testData[15], endpoint.testData[16]],
+                                  total=8, nextCursor=encodeCursor([16]))
+
+    @defer.inlineCallbacks
+    def test_api_collection_after_order(self):
+        yield self.render_resource(
+            self.rsrc,
+            b'/test?order=-success&limit=2&after=' + encodeCursor([True, 15]).encode())
+        # the key is used as tie-breaker, in the same direction as the order
+        items = sorted(endpoint.testData.values(),
+                       key=lambda v: (not v['success'], -v['testid']))
+        items = items[items.index(endpoint.testData[15]) + 1:][:2]
+        self.assertRestCollection(
+            typeName='tests', items=items, total=8, orderSignificant=True,
+            nextCursor=encodeCursor([items[-1]['success'], items[-1]['testid']]))
+
+    @defer.inlineCallbacks
+    def test_api_collection_after_last_page(self):
+        yield self.render_resource(self.rsrc,
+                                   b'/test?limit=3&after=' + encodeCursor([19]).encode())
+        self.assertRestCollection(typeName='tests', items=[endpoint.testData[20]], total=8)
+
+    @defer.inlineCallbacks
+    def test_api_collection_after_invalid(self):
+        yield self.render_resource(self.rsrc, b'/test?limit=2&after=xx')
+        self.assertRequest(
+            contentJson={"error": 'invalid after'},
+            contentType=b'text/plain; charset=utf-8',
+            responseCode=400)
+
+    @defer.inlineCallbacks
+    def test_api_collection_after_wrong_length(self):
+        yield self.render_resource(self.rsrc,
+                                   b'/test?limit=2&after=' + encodeCursor([1, 2]).encode())
+        self.assertRequest(
+            contentJson={"error": 'invalid after'},
+            contentType=b'text/plain; charset=utf-8',
+            responseCode=400)
+
+    def makeInfoNullable(self):
+        fields = dict(endpoint.Test.entityType.fields)
+        fields['info'] = types.NoneOk(types.String())
+        self.patch(endpoint.Test.entityType, 'fields', fields)
+
+    @defer.inlineCallbacks
+    def test_api_collection_after_nullable_order_fails(self):
+        self.makeInfoNullable()
+        yield self.render_resource(
+            self.rsrc, b'/test?order=info&limit=2&after=' + encodeCursor(['failed', 14]).encode())
+        self.assertRequest(
+            contentJson={"error": "cannot use after when ordering on nullable field 'info'"},
+            contentType=b'text/plain; charset=utf-8',
+            responseCode=400)
+
+    @defer.inlineCallbacks
+    def test_api_collection_nullable_order_no_next_cursor(self):
+        self.makeInfoNullable()
+        yield self.render_resource(self.rsrc, b'/test?order=info&limit=2')
+        items = sorted(endpoint.testData.values(), key=lambda v: (v['info'], v['testid']))[:2]
+        self.assertRestCollection(typeName='tests', items=items, total=8,
+                                  orderSignificant=True)
+
+    @defer.inlineCallbacks
+    def test_api_collection_total_none(self):
+        yield self.render_resource(self.rsrc, b'/test?limit=2&total=none')
+        self.assertRestCollection(typeName='tests',
+                                  items=[endpoint.testData[13], endpoint.testData[14]],
+                                  nextCursor=encodeCursor([14]))
+
+    @defer.inlineCallbacks
+    def test_api_details_after_fails(self):
+        yield self.render_resource(self.rsrc, b'/test/13?after=' + encodeCursor([1]).encode())
+        self.assertRequest(
+            contentJson={"error": 'this is not a collection'},
+            contentType=b'text/plain; charset=utf-8',
+            responseCode=400)
 
     @defer.inlineCallbacks
     def test_api_details(self):
@@ -965,6 +1085,52 @@ class V2RootResource_JSONRPC2(TestReactorMixin, www.WwwTestMixin,
             responseCode=200)
 
 
+class RawDataProducer(unittest.TestCase):
+
+    def setUp(self):
+        self.request = mock.Mock()
+        self.reads = []
+        self.reader = mock.Mock()
+        self.reader.read = self.read
+
+    def read(self):
+        d = defer.Deferred()
+        self.reads.append(d)
+        return d
+
+    def test_produce(self):
+        producer = rest.RawDataProducer(self.request, self.reader)
+        d = producer.produce()
+        self.request.registerProducer.assert_called_with(producer, True)
+
+        self.reads[0].callback('abc')
+        self.request.write.assert_called_with(b'abc')
+
+        # no more reads while the transport is paused
+        producer.pauseProducing()
+        self.reads[1].callback('def')
+        self.assertEqual(len(self.reads), 2)
+        producer.resumeProducing()
+        self.assertEqual(len(self.reads), 3)
+
+        self.reads[2].callback(None)
+        self.assertEqual(self.request.write.call_count, 2)
+        self.request.unregisterProducer.assert_called_with()
+        self.assertTrue(d.called)
+
+    def test_stop_producing(self):
+        producer = rest.RawDataProducer(self.request, self.reader)
+        d = producer.produce()
+        producer.pauseProducing()
+        self.reads[0].callback('abc')
+        producer.stopProducing()
+
+        self.assertEqual(len(self.reads), 1)
+        self.request.write.assert_called_once_with(b'abc')
+        self.request.unregisterProducer.assert_called_with()
+        self.assertTrue(d.called)
+
+
 class ContentTypeParser(unittest.TestCase):
 
     def test_simple(self):
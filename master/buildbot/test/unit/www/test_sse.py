@@ -16,6 +16,7 @@
 
 import datetime
 import json
+from unittest import mock
 
 from twisted.trial import unittest
 
@@ -61,6 +62,21 @@ class EventResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
         with self.assertRaises(AssertionError):
             self.assertReceivesChangeNewMessage(request)
 
+    def test_listen_two_consumers(self):
+        self.render_resource(self.sse, b'/listen/changes/*/*')
+        request1 = self.request
+        self.readUUID(request1)
+        self.render_resource(self.sse, b'/listen/changes/*/*')
+        request2 = self.request
+        self.readUUID(request2)
+        with mock.patch.object(self.sse.event_encoder, '_encode',
+                               wraps=self.sse.event_encoder._encode) as encode:
+            self.master.mq.callConsumer(
+                ("changes", "500", "new"), test_changes.Change.changeEvent)
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(request1.written, request2.written)
+        self.assertEqual(self.readEvent(request1)[b"event"], b"event")
+
     def test_listen_add_then_remove(self):
         self.render_resource(self.sse, b'/listen')
         request = self.request
@@ -173,6 +173,37 @@ class WsResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
             self.proto.sendMessage, {"k": "builds/1/new", "m": {"buildid": 1}}
         )
 
+    def test_startConsuming_event_shared(self):
+        other = self.ws._factory.buildProtocol("other")
+        other.sendMessage = Mock(spec=other.sendMessage)
+        for proto in (self.proto, other):
+            proto.onMessage(
+                json.dumps({"cmd": 'startConsuming', "path": 'builds/*/*', "_id": 1}), False
+            )
+        self.master.mq.verifyMessages = False
+        self.master.mq.callConsumer(("builds", "1", "new"), {"buildid": 1})
+        self.assert_called_with_json(
+            other.sendMessage, {"k": "builds/1/new", "m": {"buildid": 1}}
+        )
+        # the event was only encoded once
+        self.assertIs(self.proto.sendMessage.call_args[0][0], other.sendMessage.call_args[0][0])
+
+    def test_startConsuming_coalesced(self):
+        self.master.config.www['event_coalescing_window'] = 0.1
+        self.proto.onMessage(
+            json.dumps({"cmd": 'startConsuming', "path": 'builds/*/*', "_id": 1}), False
+        )
+        self.master.mq.verifyMessages = False
+        self.proto.sendMessage.reset_mock()
+        self.master.mq.callConsumer(("builds", "1", "update"), {"state_string": "a"})
+        self.master.mq.callConsumer(("builds", "1", "update"), {"state_string": "b"})
+        self.proto.sendMessage.assert_not_called()
+        self.reactor.advance(0.1)
+        self.assertEqual(self.proto.sendMessage.call_count, 1)
+        self.assert_called_with_json(
+            self.proto.sendMessage, {"k": "builds/1/update", "m": {"state_string": "b"}}
+        )
+
     def test_startConsumingBadPath(self):
         self.proto.onMessage(
             json.dumps({"cmd": 'startConsuming', "path": {}, "_id": 1}), False
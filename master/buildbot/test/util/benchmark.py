@@ -0,0 +1,93 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+import json
+import os
+import sys
+import time
+import timeit
+
+import sqlalchemy as sa
+
+from twisted.internet import defer
+from twisted.python import log
+from twisted.trial import unittest
+
+
+class BenchmarkTestCase(unittest.TestCase):
+
+    """
+    Base class for benchmarks.  Benchmarks take a while to run and their
+    results only make sense on a quiet machine, so they are skipped unless
+    BUILDBOT_BENCHMARK is set in the environment.
+    """
+
+    if 'BUILDBOT_BENCHMARK' not in os.environ:
+        skip = "set BUILDBOT_BENCHMARK to run benchmarks"
+
+    # each measurement is repeated this many times, and the best run is kept
+    REPEAT = 5
+
+    def _dbBackend(self):
+        # only set for benchmarks running against a real database; the url
+        # itself may contain credentials
+        db_url = getattr(self, 'db_url', None)
+        if db_url is None:
+            return None
+        return sa.engine.url.make_url(db_url).get_backend_name()
+
+    def recordResult(self, name, best, number):
+        log.msg(f"benchmark {self.id()} {name}: {best * 1e6:.2f} us per call")
+        path = os.environ.get('BUILDBOT_BENCHMARK_RESULTS')
+        if not path:
+            return
+        result = {
+            'benchmark': self.id(),
+            'name': name,
+            'seconds_per_call': best,
+            'number': number,
+            'repeat': self.REPEAT,
+            'python': sys.version.split()[0],
+            'db': self._dbBackend(),
+            'timestamp': time.time(),
+        }
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result, sort_keys=True) + '\n')
+
+    def benchmark(self, name, func, number):
+        """
+        Time C{number} calls of C{func}, and return the best time per call,
+        in seconds.
+        """
+        timer = timeit.Timer(func)
+        best = min(timer.repeat(repeat=self.REPEAT, number=number)) / number
+        self.recordResult(name, best, number)
+        return best
+
+    @defer.inlineCallbacks
+    def benchmarkDeferred(self, name, func, number):
+        """
+        Like L{benchmark}, for a C{func} returning a Deferred.  The calls are
+        made one after the other, each waiting for the previous one to fire.
+        """
+        times = []
+        for _ in range(self.REPEAT):
+            start = time.perf_counter()
+            for _ in range(number):
+                yield func()
+            times.append(time.perf_counter() - start)
+        best = min(times) / number
+        self.recordResult(name, best, number)
+        return best
@@ -15,7 +15,6 @@
 
 
 from twisted.internet import defer
-from twisted.internet import task
 
 from buildbot.test.fake import fakemaster
 
@@ -70,8 +69,9 @@ class ChangeSourceMixin:
             pass
 
         # also, now that changesources are ClusteredServices, setting up
-        # the clock here helps in the unit tests that check that behavior
-        self.changesource.clock = task.Clock()
+        # the clock here helps in the unit tests that check that behavior;
+        # their claims are polled for by the master, on its reactor
+        self.changesource.clock = self.master.reactor
         return cs
 
     def startChangeSource(self):
@@ -51,6 +51,7 @@ class FakeRequest:
     method = b'GET'
     path = b'/req.path'
     responseCode = 200
+    producer = None
 
     def __init__(self, path=None):
         self.headers = {}
@@ -75,6 +76,12 @@ class FakeRequest:
     def write(self, data):
         self.written = self.written + data
 
+    def registerProducer(self, producer, streaming):
+        self.producer = producer
+
+    def unregisterProducer(self):
+        self.producer = None
+
     def redirect(self, url):
         self.redirected_to = url
 
@@ -35,6 +35,10 @@ class LineBoundaryFinder:
     # we also convert cursor control sequence to newlines
     # and ugly \b+ (use of backspace to implement progress bar)
     newline_re = re.compile(r'(\r\n|\r(?=.)|\033\[u|\033\[[0-9]+;[0-9]+[Hf]|\033\[2J|\x08+)')
+    # every match of newline_re starts with one of those characters; looking
+    # for them is much faster than running the regexp over text which has
+    # none, as most output
+    newline_re_chars = ('\r', '\033', '\x08')
 
     def __init__(self, callback=None):
         if callback is not None:
@@ -64,7 +68,8 @@ class LineBoundaryFinder:
                 return result
             text = self.partialLine + text
             self.partialLine = None
-        text = self.newline_re.sub('\n', text)
+        if any(c in text for c in self.newline_re_chars):
+            text = self.newline_re.sub('\n', text)
         if text:
             if text[-1] != '\n':
                 i = text.rfind('\n')
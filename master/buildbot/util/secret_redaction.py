@@ -0,0 +1,109 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+import re
+
+
+class SecretRedactor:
+
+    """
+    Replace a set of secret values by their replacement in a single pass.
+
+    All secrets are compiled into one alternation, sorted longest first, so
+    that when several secrets match at the same position the longest one
+    wins, exactly as the previous one-replace-per-secret implementation did.
+
+    L{redact_partial} supports streams of whole lines (as produced by
+    L{buildbot.util.lineboundaries.LineBoundaryFinder}) where a secret may be
+    split between two chunks: the tail of the text which could still be the
+    beginning of a secret is returned separately, and must be prepended to the
+    next chunk.
+    """
+
+    __slots__ = ['replacements', 'max_length', 'multiline', 'first_chars', 'regex']
+
+    def __init__(self, secrets):
+        """
+        @param secrets: dictionary mapping secret values to their replacement
+        """
+        self.replacements = {k: v for k, v in secrets.items() if k}
+        self.max_length = max((len(k) for k in self.replacements), default=0)
+        self.multiline = any('\n' in k for k in self.replacements)
+        self.first_chars = frozenset(k[0] for k in self.replacements)
+        if self.replacements:
+            keys = sorted(self.replacements, key=len, reverse=True)
+            self.regex = re.compile('|'.join(re.escape(k) for k in keys))
+        else:
+            self.regex = None
+
+    def _replace(self, match):
+        return self.replacements[match.group(0)]
+
+    def redact(self, text):
+        if self.regex is None:
+            return text
+        return self.regex.sub(self._replace, text)
+
+    def _safe_length(self, text):
+        # Any match starting before this position has enough following
+        # characters to be matched completely, including its longest variant
+        cut = max(len(text) - self.max_length + 1, 0)
+        if not self.multiline:
+            # secrets never span lines, so all complete lines are safe
+            cut = max(cut, text.rfind('\n') + 1)
+        # the rest only needs to be held back from where it could be the
+        # beginning of a secret
+        for i in range(cut, len(text)):
+            if text[i] in self.first_chars:
+                tail = text[i:]
+                if any(k.startswith(tail) for k in self.replacements):
+                    break
+        else:
+            return len(text)
+        # only ever hold back whole lines
+        return text.rfind('\n', 0, i) + 1
+
+    def redact_partial(self, text):
+        """
+        Redact the part of C{text} which can not be affected by data that is
+        yet to come.
+
+        @returns: tuple of (redacted text, raw text held back)
+        """
+        if self.regex is None:
+            return text, ''
+
+        cut = self._safe_length(text)
+        matches = []
+        for match in self.regex.finditer(text):
+            if match.start() >= cut:
+                break
+            matches.append(match)
+        # a match crossing the boundary is held back, together with the
+        # beginning of its first line
+        while matches and matches[-1].end() > cut:
+            cut = text.rfind('\n', 0, matches[-1].start()) + 1
+            while matches and matches[-1].start() >= cut:
+                matches.pop()
+
+        pieces = []
+        pos = 0
+        for match in matches:
+            pieces.append(text[pos:match.start()])
+            pieces.append(self.replacements[match.group(0)])
+            pos = match.end()
+        pieces.append(text[pos:cut])
+        return ''.join(pieces), text[cut:]
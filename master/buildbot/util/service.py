@@ -14,6 +14,7 @@
 # Copyright Buildbot Team Members
 
 import hashlib
+import weakref
 
 from twisted.application import service
 from twisted.internet import defer
@@ -289,6 +290,7 @@ class ClusteredBuildbotService(BuildbotService):
         self.active = False
         self._activityPollCall = None
         self._activityPollDeferred = None
+        self._activityPolling = False
         super().__init__(*args, **kwargs)
 
     # activity handling
@@ -324,6 +326,13 @@ class ClusteredBuildbotService(BuildbotService):
         # a Deferred.
         raise NotImplementedError
 
+    def _claimServices(self, serviceids):
+        # Attempt to claim the services with the given ids for this master, on behalf
+        # of all the services sharing this implementation. Should return the ids of
+        # the services this master now owns (optionally via a Deferred). Services
+        # which do not implement it poll for their claim one at a time.
+        raise NotImplementedError
+
     # default implementation to delegate to the above methods
 
     @defer.inlineCallbacks
@@ -360,7 +369,14 @@ class ClusteredBuildbotService(BuildbotService):
 
         yield super().stopService()
 
+    def _canClaimInBatch(self):
+        return type(self)._claimServices is not ClusteredBuildbotService._claimServices
+
     def _startActivityPolling(self):
+        if self._canClaimInBatch():
+            self._startCoordinatedActivityPolling()
+            return
+
         self._activityPollCall = task.LoopingCall(self._activityPoll)
         # plug in a clock if we have one, for tests
         if hasattr(self, 'clock'):
@@ -372,7 +388,23 @@ class ClusteredBuildbotService(BuildbotService):
         # this should never happen, but just in case:
         d.addErrback(log.err, 'while polling for service activity:')
 
+    def _startCoordinatedActivityPolling(self):
+        # try to claim the service right away, and if another master owns it,
+        # leave the polling to the claim coordinator of this master
+        self._activityPolling = True
+        d = self._activityPoll()
+        self._activityPollDeferred = d
+
+        @d.addCallback
+        def waitForClaim(_):
+            if self._activityPolling and not self.active:
+                ClaimCoordinator.getCoordinator(self.master).register(self)
+
     def _stopActivityPolling(self):
+        if self._activityPolling:
+            self._activityPolling = False
+            ClaimCoordinator.getCoordinator(self.master).unregister(self)
+            return self._activityPollDeferred
         if self._activityPollCall:
             self._activityPollCall.stop()
             self._activityPollCall = None
@@ -410,30 +442,126 @@ class ClusteredBuildbotService(BuildbotService):
                 self._callbackStartServiceDeferred()
                 return
 
-            try:
-                # this master is responsible for this service
-                # we activate it
-                self.active = True
-                yield self.activate()
-            except Exception:
-                # this service is half-active, and noted as such in the db..
-                msg = f'WARNING: ClusteredService({self.name}) is only partially active'
-                log.err(_why=msg)
-            finally:
-                # cannot wait for its deactivation
-                # with yield self._stopActivityPolling
-                # as we're currently executing the
-                # _activityPollCall callback
-                # we just call it without waiting its stop
-                # (that may open race conditions)
-                self._stopActivityPolling()
-                self._callbackStartServiceDeferred()
+            yield self._activateClaimed()
         except Exception:
             # don't pass exceptions into LoopingCall, which can cause it to
             # fail
             msg = f'WARNING: ClusteredService({self.name}) failed during activity poll'
             log.err(_why=msg)
 
+    @defer.inlineCallbacks
+    def _activateClaimed(self):
+        try:
+            # this master is responsible for this service
+            # we activate it
+            self.active = True
+            yield self.activate()
+        except Exception:
+            # this service is half-active, and noted as such in the db..
+            msg = f'WARNING: ClusteredService({self.name}) is only partially active'
+            log.err(_why=msg)
+        finally:
+            # cannot wait for its deactivation
+            # with yield self._stopActivityPolling
+            # as we're currently executing the
+            # _activityPollCall callback
+            # we just call it without waiting its stop
+            # (that may open race conditions)
+            self._stopActivityPolling()
+            self._callbackStartServiceDeferred()
+
+
+class ClaimCoordinator:
+
+    """
+    Poll for the ClusteredBuildbotService-es of a master which are owned by
+    another master, in order to take them over when that master stops.
+
+    Rather than each service running its own timer and claim query, all the
+    waiting services of the master are polled together, once per poll
+    interval, and the services sharing the same C{_claimServices}
+    implementation (e.g. all the schedulers) are claimed with a single call to
+    it.  A service never waits more than its C{POLL_INTERVAL_SEC} after it
+    started waiting for its claim.
+    """
+
+    _coordinators = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def getCoordinator(cls, master):
+        coordinator = cls._coordinators.get(master)
+        if coordinator is None:
+            coordinator = cls._coordinators[master] = cls(master)
+        return coordinator
+
+    def __init__(self, master):
+        self.master = master
+        # used as an ordered set
+        self._services = {}
+        self._pollCall = None
+
+    def register(self, svc):
+        self._services[svc] = None
+        self._schedulePoll(svc.POLL_INTERVAL_SEC)
+
+    def unregister(self, svc):
+        self._services.pop(svc, None)
+        if not self._services and self._pollCall is not None:
+            self._pollCall.cancel()
+            self._pollCall = None
+
+    def _schedulePoll(self, interval):
+        reactor = self.master.reactor
+        if self._pollCall is not None:
+            if self._pollCall.getTime() <= reactor.seconds() + interval:
+                return
+            self._pollCall.cancel()
+        self._pollCall = reactor.callLater(interval, self._poll)
+
+    @defer.inlineCallbacks
+    def _poll(self):
+        self._pollCall = None
+        groups = {}
+        for svc in self._services:
+            groups.setdefault(type(svc)._claimServices, []).append(svc)
+        for services in groups.values():
+            yield self._claimServices(services)
+
+        if self._services:
+            self._schedulePoll(min(svc.POLL_INTERVAL_SEC for svc in self._services))
+
+    @defer.inlineCallbacks
+    def _claimServices(self, services):
+        # the services can be stopped while they are being claimed, in which
+        # case they wait for the end of their activation, and then release
+        # their claim; those stopped while the previous groups were being
+        # claimed are not waited for anymore, and must not be claimed
+        polls = {}
+        for svc in services:
+            if not svc.active and svc._activityPolling and svc in self._services:
+                polls[svc] = svc._activityPollDeferred = defer.Deferred()
+
+        batch = [svc for svc in polls if svc.serviceid is not None]
+        claimed = ()
+        try:
+            if batch:
+                claimed = yield batch[0]._claimServices([svc.serviceid for svc in batch])
+        except Exception:
+            log.err(_why='WARNING: ClaimCoordinator got exception while trying to claim')
+            batch = []
+
+        for svc, d in polls.items():
+            try:
+                if svc.serviceid is None:
+                    # its first claim failed before it got an id
+                    yield svc._activityPoll()
+                elif svc.serviceid in claimed:
+                    yield svc._activateClaimed()
+                elif svc in batch:
+                    svc._callbackStartServiceDeferred()
+            finally:
+                d.callback(None)
+
 
 class BuildbotServiceManager(AsyncMultiService, config.ConfiguredMixin,
                              ReconfigurableServiceMixin):
@@ -21,10 +21,12 @@ from buildbot.util import deferwaiter
 
 class TestResultSubmitter:
 
-    def __init__(self, batch_n=3000):
+    def __init__(self, batch_n=3000, max_batches_in_flight=2):
         self._batch_n = batch_n
+        self._max_batches_in_flight = max_batches_in_flight
         self._curr_batch = []
         self._pending_batches = []
+        self._batch_processors = 0
         self._waiter = deferwaiter.DeferWaiter()
         self._master = None
         self._builderid = None
@@ -71,17 +73,24 @@ class TestResultSubmitter:
             return
 
         self._pending_batches.append(batch)
-        if self._waiter.has_waited():
+        if self._batch_processors >= self._max_batches_in_flight:
             return
 
         self._waiter.add(self._process_batches())
 
     @defer.inlineCallbacks
     def _process_batches(self):
-        # at most one instance of this function may be running at the same time
-        while self._pending_batches:
-            batch = self._pending_batches.pop(0)
-            yield self._master.data.updates.addTestResults(self._builderid, self._setid, batch)
+        # at most max_batches_in_flight instances of this function may be running at the same
+        # time, so that a batch is prepared while the previous one is written. The database
+        # still writes the batches of a builder in order.
+        self._batch_processors += 1
+        try:
+            while self._pending_batches:
+                batch = self._pending_batches.pop(0)
+                yield self._master.data.updates.addTestResults(self._builderid, self._setid,
+                                                               batch)
+        finally:
+            self._batch_processors -= 1
 
     def _initialize_pass_fail_recording(self, function):
         self._add_pass_fail_result = function
@@ -74,6 +74,8 @@ class UpdateRegistrationListener(Listener):
 
 class Connection:
     proxies = {}
+    # whether the worker can run several commands of the same builder at once
+    supports_concurrent_commands = False
 
     def __init__(self, name):
         self._disconnectSubs = subscription.SubscriptionPoint(f"disconnections from {name}")
@@ -80,6 +80,7 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
         self.command_id_to_command_map = {}
         self.command_id_to_reader_map = {}
         self.command_id_to_writer_map = {}
+        self.command_id_to_transfer_lock = {}
         yield self.initialize()
 
     def maybe_log_worker_to_master_msg(self, message):
@@ -113,6 +114,14 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
         finally:
             eventually(dispatcher.master.initLock.release)
 
+    def run_transfer_op(self, command_id, f, *args):
+        # The worker may send several transfer messages of a command without
+        # waiting for their responses. They are applied in the order they
+        # were received, even if the reader or writer returns Deferreds.
+        if command_id not in self.command_id_to_transfer_lock:
+            self.command_id_to_transfer_lock[command_id] = defer.DeferredLock()
+        return self.command_id_to_transfer_lock[command_id].run(f, *args)
+
     @defer.inlineCallbacks
     def call_update(self, msg):
         result = None
@@ -149,6 +158,8 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 del self.command_id_to_reader_map[msg['command_id']]
             if msg['command_id'] in self.command_id_to_writer_map:
                 del self.command_id_to_writer_map[msg['command_id']]
+            if msg['command_id'] in self.command_id_to_transfer_lock:
+                del self.command_id_to_transfer_lock[msg['command_id']]
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -165,7 +176,7 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 raise KeyError('unknown "command_id"')
 
             file_writer = self.command_id_to_writer_map[msg['command_id']]
-            yield file_writer.remote_write(msg['args'])
+            yield self.run_transfer_op(msg['command_id'], file_writer.remote_write, msg['args'])
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -182,7 +193,8 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 raise KeyError('unknown "command_id"')
 
             file_writer = self.command_id_to_writer_map[msg['command_id']]
-            yield file_writer.remote_utime('access_time', 'modified_time')
+            yield self.run_transfer_op(msg['command_id'], file_writer.remote_utime,
+                                       'access_time', 'modified_time')
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -199,7 +211,7 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 raise KeyError('unknown "command_id"')
 
             file_writer = self.command_id_to_writer_map[msg['command_id']]
-            yield file_writer.remote_close()
+            yield self.run_transfer_op(msg['command_id'], file_writer.remote_close)
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -216,7 +228,8 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 raise KeyError('unknown "command_id"')
 
             file_reader = self.command_id_to_reader_map[msg['command_id']]
-            yield file_reader.remote_read(msg['length'])
+            result = yield self.run_transfer_op(msg['command_id'], file_reader.remote_read,
+                                                msg['length'])
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -233,7 +246,7 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 raise KeyError('unknown "command_id"')
 
             file_reader = self.command_id_to_reader_map[msg['command_id']]
-            yield file_reader.remote_close()
+            yield self.run_transfer_op(msg['command_id'], file_reader.remote_close)
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -250,7 +263,7 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 raise KeyError('unknown "command_id"')
 
             directory_writer = self.command_id_to_writer_map[msg['command_id']]
-            yield directory_writer.remote_unpack()
+            yield self.run_transfer_op(msg['command_id'], directory_writer.remote_unpack)
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -267,7 +280,8 @@ class BuildbotWebSocketServerProtocol(WebSocketServerProtocol):
                 raise KeyError('unknown "command_id"')
 
             directory_writer = self.command_id_to_writer_map[msg['command_id']]
-            yield directory_writer.remote_write(msg['args'])
+            yield self.run_transfer_op(msg['command_id'], directory_writer.remote_write,
+                                       msg['args'])
         except Exception as e:
             is_exception = True
             result = str(e)
@@ -89,6 +89,10 @@ class Connection(base.Connection):
     keepalive_timer = None
     keepalive_interval = 3600
     info = None
+    # number of file transfer blocks the worker may send or request without
+    # waiting for the master's response to the first one
+    transfer_window = 16
+    supports_concurrent_commands = True
 
     def __init__(self, master, worker, protocol):
         super().__init__(worker.workername)
@@ -325,6 +329,9 @@ class Connection(base.Connection):
                                                  args['workdir'],
                                                  self.path_expanduser(args['workerdest'],
                                                                       self.info['environ']))
+        if commandName in ("upload_file", "upload_directory", "download_file"):
+            args['window'] = self.transfer_window
+
         if "want_stdout" in args:
             if args["want_stdout"] == 1:
                 args["want_stdout"] = True
@@ -43,6 +43,8 @@ class ProxyMixin():
             log.msg(f"{method} didn't accept {args} and {kw}")
             raise
         # break callback recursion for large transfers by using fireEventually
+        if isinstance(state, defer.Deferred):
+            return state.addCallback(fireEventually)
         return fireEventually(state)
 
     def notifyOnDisconnect(self, cb):
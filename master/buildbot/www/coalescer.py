@@ -0,0 +1,147 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from twisted.internet import defer
+
+from buildbot.mq import base
+
+# events whose message holds the whole resource, so that a later one makes
+# the previous ones useless
+COALESCED_EVENTS = frozenset(['update', 'updated', 'append', 'state_updated'])
+
+
+class PendingEvent:
+
+    __slots__ = ['data', 'last_data', 'consumers']
+
+    def __init__(self, data):
+        self.data = data
+        # the message as received from the message queue, which is handed to
+        # every matching consumer in turn
+        self.last_data = data
+        # used as an ordered set
+        self.consumers = {}
+
+
+class CoalescingConsumer(base.QueueRef):
+
+    __slots__ = ['coalescer', 'qref']
+
+    def __init__(self, coalescer, callback):
+        super().__init__(callback)
+        self.coalescer = coalescer
+        self.qref = None
+
+    def onMessage(self, routingKey, data):
+        return self.coalescer.consume(self, routingKey, data)
+
+    def stopConsuming(self):
+        # pending events are dropped when they are flushed
+        self.callback = None
+        return self.qref.stopConsuming()
+
+
+class EventCoalescer:
+    """
+    Delay the update events sent to web clients by up to
+    C{c['www']['event_coalescing_window']} seconds, and only deliver the last
+    update of each routing key received in that time.  Build, step and log
+    updates carry the whole resource, so clients still end up with the latest
+    state, but at a bounded rate.
+
+    Any other event for a resource first delivers the updates of that
+    resource which are still pending for the consumer, so that the events of a
+    resource are never reordered.  A single coalescer is shared by all the
+    clients of a protocol: pending events are flushed one event at a time to
+    all of their consumers, so that each of them is only encoded once.
+    """
+
+    def __init__(self, master):
+        self.master = master
+        self.window = 0
+        self._pending = {}
+        self._timer = None
+
+    def setWindow(self, window):
+        self.window = window
+        if not window:
+            self.flush()
+
+    def startConsuming(self, callback, filter):
+        # the window is read from the configuration for every new
+        # subscription, so that it follows reconfigurations
+        self.setWindow(self.master.config.www.get('event_coalescing_window', 0))
+        if not self.window:
+            return self.master.mq.startConsuming(callback, filter)
+
+        consumer = CoalescingConsumer(self, callback)
+        d = self.master.mq.startConsuming(consumer.onMessage, filter)
+
+        @d.addCallback
+        def setQref(qref):
+            consumer.qref = qref
+            return consumer
+        return d
+
+    def consume(self, consumer, routingKey, data):
+        if not self.window:
+            return consumer.invoke(routingKey, data)
+
+        if routingKey[-1] not in COALESCED_EVENTS:
+            self._flushConsumer(consumer, routingKey[:-1])
+            return consumer.invoke(routingKey, data)
+
+        pending = self._pending.get(routingKey)
+        if pending is None:
+            pending = self._pending[routingKey] = PendingEvent(data)
+        elif pending.last_data is not data:
+            pending.data = self._merge(routingKey, pending.data, data)
+            pending.last_data = data
+        pending.consumers[consumer] = None
+        if self._timer is None:
+            self._timer = self.master.reactor.callLater(self.window, self.flush)
+        return None
+
+    def _merge(self, routingKey, old, new):
+        if routingKey[-2:] == ('properties', 'update'):
+            # property updates only hold the properties which were set
+            merged = dict(old)
+            merged.update(new)
+            return merged
+        return new
+
+    def _flushConsumer(self, consumer, path):
+        for event in COALESCED_EVENTS:
+            routingKey = path + (event,)
+            pending = self._pending.get(routingKey)
+            if pending is not None and consumer in pending.consumers:
+                del pending.consumers[consumer]
+                if not pending.consumers:
+                    del self._pending[routingKey]
+                consumer.invoke(routingKey, pending.data)
+
+    def flush(self):
+        if self._timer is not None:
+            if self._timer.active():
+                self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        dl = []
+        for routingKey, event in pending.items():
+            for consumer in event.consumers:
+                d = consumer.invoke(routingKey, event.data)
+                if isinstance(d, defer.Deferred):
+                    dl.append(d)
+        return defer.DeferredList(dl)
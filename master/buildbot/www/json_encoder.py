@@ -0,0 +1,99 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+
+import json
+
+from buildbot.util import toJson
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class StdlibJsonEncoder:
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=toJson, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonEncoder:
+
+    name = 'orjson'
+
+    # datetimes are left to toJson, which turns them into epoch times, the
+    # same as with the json module
+    OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+               if orjson is not None else 0)
+
+    def __init__(self):
+        self._fallback = StdlibJsonEncoder()
+
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj, default=toJson, option=self.OPTIONS)
+        except TypeError:
+            # orjson is stricter than the json module, e.g. about integers
+            # which do not fit in 64 bits
+            return self._fallback.dumps(obj)
+
+
+def get_encoder():
+    """
+    Return the fastest available encoder producing compact JSON, as bytes.
+    Keys are not sorted.
+    """
+    if orjson is not None:
+        return OrjsonEncoder()
+    return StdlibJsonEncoder()
+
+
+def dumps_readable(obj):
+    # for humans: sorted keys and indentation, as bytes
+    return json.dumps(obj, default=toJson, sort_keys=True, indent=2).encode('utf-8')
+
+
+class EventEncoder:
+
+    """
+    Encode the message queue events sent to web clients only once per event.
+
+    The message queue hands the same routing key and data objects to all the
+    consumers of an event, one after the other, so remembering the last
+    encoded event is enough for all the clients subscribed to it to share the
+    same bytes.
+
+    @param encode: function taking the routing key and data of an event, and
+    returning the bytes to send
+    """
+
+    def __init__(self, encode):
+        self._encode = encode
+        self._last_event = None
+        self._last_encoded = None
+
+    def encode(self, key, data):
+        last_event = self._last_event
+        if last_event is not None and last_event[0] is key and last_event[1] is data:
+            return self._last_encoded
+        encoded = self._encode(key, data)
+        # keep a reference to the event, so that its objects can not be reused
+        # for another event while we compare their identity
+        self._last_event = (key, data)
+        self._last_encoded = encoded
+        return encoded
@@ -22,14 +22,19 @@ from contextlib import contextmanager
 from urllib.parse import urlparse
 
 from twisted.internet import defer
+from twisted.internet import interfaces
 from twisted.python import log
 from twisted.web.error import Error
+from zope.interface import implementer
 
 from buildbot.data import exceptions
+from buildbot.data import resultspec
+from buildbot.data import types
 from buildbot.data.base import EndpointKind
 from buildbot.util import bytes2unicode
 from buildbot.util import toJson
 from buildbot.util import unicode2bytes
+from buildbot.www import json_encoder
 from buildbot.www import resource
 from buildbot.www.authz import Forbidden
 
@@ -98,6 +103,52 @@ JSONRPC_CODES = {
 }
 
 
+@implementer(interfaces.IPushProducer)
+class RawDataProducer:
+
+    """
+    Write the pieces returned by a raw endpoint reader to the request as they
+    are read, pausing whenever the transport asks us to.
+    """
+
+    def __init__(self, request, reader):
+        self.request = request
+        self.reader = reader
+        self.paused = False
+        self.stopped = False
+        self._resumed = None
+
+    def pauseProducing(self):
+        self.paused = True
+
+    def resumeProducing(self):
+        self.paused = False
+        if self._resumed is not None:
+            d, self._resumed = self._resumed, None
+            d.callback(None)
+
+    def stopProducing(self):
+        self.stopped = True
+        self.resumeProducing()
+
+    @defer.inlineCallbacks
+    def produce(self):
+        self.request.registerProducer(self, True)
+        try:
+            while not self.stopped:
+                if self.paused:
+                    self._resumed = defer.Deferred()
+                    yield self._resumed
+                    continue
+                data = yield self.reader.read()
+                if data is None:
+                    break
+                if data and not self.stopped:
+                    self.request.write(unicode2bytes(data))
+        finally:
+            self.request.unregisterProducer()
+
+
 class V2RootResource(resource.Resource):
 
     # For GETs, this API follows http://jsonapi.org.  The getter API does not
@@ -118,6 +169,9 @@ class V2RootResource(resource.Resource):
     # enable reconfigResource calls
     needsReconfig = True
 
+    # encoder of the compact JSON responses
+    encoder = json_encoder.get_encoder()
+
     @defer.inlineCallbacks
     def getEndpoint(self, request, method, params):
         # note that trailing slashes are not allowed
@@ -250,20 +304,52 @@ class V2RootResource(resource.Resource):
     def decodeResultSpec(self, request, endpoint):
         args = request.args
         entityType = endpoint.rtype.entityType
-        return self.master.data.resultspec_from_jsonapi(
+        rspec = self.master.data.resultspec_from_jsonapi(
             args,
             entityType,
-            endpoint.kind == EndpointKind.COLLECTION
+            endpoint.kind == EndpointKind.COLLECTION,
+            endpoint.queryParameters
         )
 
+        # paginated collections are also ordered by their key, so that the
+        # ordering fields of the last item identify the next page
+        keyField = endpoint.rtype.keyField
+        if endpoint.kind == EndpointKind.COLLECTION and \
+                (rspec.limit is not None or rspec.after is not None) and \
+                keyField in entityType.fieldNames and \
+                (rspec.fields is None or keyField in rspec.fields):
+            order = tuple(rspec.order or ())
+            if keyField not in [o.lstrip('-') for o in order]:
+                reverse = '-' if order and order[-1].startswith('-') else ''
+                rspec.order = order + (reverse + keyField,)
+        if rspec.after is not None and len(rspec.after) != len(rspec.order or ()):
+            raise exceptions.InvalidQueryParameter("invalid after")
+        return rspec
+
+    def nextPageCursor(self, data, order, limit, entityType):
+        # the cursor of the last item, if the page is full
+        if limit is None or not order or len(data) != limit or not data:
+            return None
+        fields = [o.lstrip('-') for o in order]
+        # such a cursor would be rejected
+        if any(isinstance(entityType.fields.get(f), types.NoneOk) for f in fields):
+            return None
+        last = max(data, key=lambda elem: resultspec.sortKey(elem, order))
+        if any(last.get(f) is None for f in fields):
+            return None
+        return resultspec.encodeCursor([resultspec.cursorValue(last[f]) for f in fields])
+
     def encodeRaw(self, data, request, is_inline):
         request.setHeader(b"content-type",
                           unicode2bytes(data['mime-type']) + b'; charset=utf-8')
         if not is_inline:
             request.setHeader(b"content-disposition",
                               b'attachment; filename=' + unicode2bytes(data['filename']))
-        request.write(unicode2bytes(data['raw']))
-        return
+        raw = data['raw']
+        if isinstance(raw, (str, bytes)):
+            request.write(unicode2bytes(raw))
+            return None
+        return RawDataProducer(request, raw).produce()
 
     @defer.inlineCallbacks
     def renderRest(self, request):
@@ -281,7 +367,12 @@ class V2RootResource(resource.Resource):
             ep, kwargs = yield self.getEndpoint(request, bytes2unicode(request.method), {})
 
             rspec = self.decodeResultSpec(request, ep)
-            data = yield ep.get(rspec, kwargs)
+            # the endpoint consumes these while applying them
+            order, limit = rspec.order, rspec.limit
+            if ep.kind in (EndpointKind.RAW, EndpointKind.RAW_INLINE):
+                data = yield ep.stream(rspec, kwargs)
+            else:
+                data = yield ep.get(rspec, kwargs)
             if data is None:
                 msg = (f"not found while getting from {repr(ep)} with "
                        f"arguments {repr(rspec)} and {str(kwargs)}")
@@ -290,11 +381,11 @@ class V2RootResource(resource.Resource):
                 return
 
             if ep.kind == EndpointKind.RAW:
-                self.encodeRaw(data, request, False)
+                yield self.encodeRaw(data, request, False)
                 return
 
             if ep.kind == EndpointKind.RAW_INLINE:
-                self.encodeRaw(data, request, True)
+                yield self.encodeRaw(data, request, True)
                 return
 
             # post-process any remaining parts of the resultspec
@@ -311,6 +402,11 @@ class V2RootResource(resource.Resource):
                 if total is not None:
                     meta['total'] = total
 
+                # add the cursor of the next page, if any
+                cursor = self.nextPageCursor(data, order, limit, ep.rtype.entityType)
+                if cursor is not None:
+                    meta['next'] = cursor
+
                 # get the real list instance out of the ListResult
                 data = data.data
             else:
@@ -344,18 +440,16 @@ class V2RootResource(resource.Resource):
                 request.setHeader(b"Expires", expiresBytes)
                 request.setHeader(b"Pragma", b"no-cache")
 
-            # filter out blanks if necessary and render the data
+            # filter out blanks if necessary and render the data; keys are
+            # only sorted for humans
             if compact:
-                data = json.dumps(data, default=toJson,
-                                  sort_keys=True, separators=(',', ':'))
+                data = self.encoder.dumps(data)
             else:
-                data = json.dumps(data, default=toJson,
-                                  sort_keys=True, indent=2)
+                data = json_encoder.dumps_readable(data)
 
             if request.method == b"HEAD":
                 request.setHeader(b"content-length", unicode2bytes(str(len(data))))
             else:
-                data = unicode2bytes(data)
                 request.write(data)
 
     def reconfigResource(self, new_config):
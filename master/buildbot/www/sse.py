@@ -13,7 +13,6 @@
 #
 # Copyright Buildbot Team Members
 
-import json
 import uuid
 
 from twisted.python import log
@@ -22,15 +21,17 @@ from twisted.web import server
 
 from buildbot.data.exceptions import InvalidPathError
 from buildbot.util import bytes2unicode
-from buildbot.util import toJson
 from buildbot.util import unicode2bytes
+from buildbot.www import coalescer
+from buildbot.www import json_encoder
 
 
 class Consumer:
 
-    def __init__(self, request):
+    def __init__(self, request, event_encoder):
         self.request = request
         self.qrefs = {}
+        self.event_encoder = event_encoder
 
     def stopConsuming(self, key=None):
         if key is not None:
@@ -41,13 +42,7 @@ class Consumer:
             self.qrefs = {}
 
     def onMessage(self, event, data):
-        request = self.request
-        key = [bytes2unicode(e) for e in event]
-        msg = {"key": key, "message": data}
-        request.write(b"event: " + b"event" + b"\n")
-        request.write(
-            b"data: " + unicode2bytes(json.dumps(msg, default=toJson)) + b"\n")
-        request.write(b"\n")
+        self.request.write(self.event_encoder.encode(event, data))
 
     def registerQref(self, path, qref):
         self.qrefs[path] = qref
@@ -61,6 +56,16 @@ class EventResource(resource.Resource):
 
         self.master = master
         self.consumers = {}
+        encoder = json_encoder.get_encoder()
+
+        def encode_event(event, data):
+            key = [bytes2unicode(e) for e in event]
+            msg = {"key": key, "message": data}
+            return b"event: event\ndata: " + encoder.dumps(msg) + b"\n\n"
+
+        # shared by all the consumers, so that each event is encoded once
+        self.event_encoder = json_encoder.EventEncoder(encode_event)
+        self.coalescer = coalescer.EventCoalescer(master)
 
     def decodePath(self, path):
         for i, p in enumerate(path):
@@ -86,7 +91,7 @@ class EventResource(resource.Resource):
 
         if command == b"listen":
             cid = unicode2bytes(str(uuid.uuid4()))
-            consumer = Consumer(request)
+            consumer = Consumer(request, self.event_encoder)
 
         elif command in (b"add", b"remove"):
             if path:
@@ -108,7 +113,7 @@ class EventResource(resource.Resource):
                     options[k] = options[k][1]
 
             try:
-                d = self.master.mq.startConsuming(consumer.onMessage,
+                d = self.coalescer.startConsuming(consumer.onMessage,
                                                   tuple(bytes2unicode(p) for p in path))
 
                 @d.addCallback
@@ -25,6 +25,8 @@ from twisted.python import log
 from buildbot.util import bytes2unicode
 from buildbot.util import debounce
 from buildbot.util import toJson
+from buildbot.www import coalescer
+from buildbot.www import json_encoder
 
 
 class Subscription:
@@ -150,10 +152,11 @@ class WsProtocol(WebSocketServerProtocol):
             return
 
         def callback(key, message):
-            # protocol is deliberately concise in size
-            return self.send_json_message(k="/".join(key), m=message)
+            # the same event is usually sent to many clients, so it is only
+            # encoded once
+            return self.sendMessage(self.factory.event_encoder.encode(key, message))
 
-        qref = yield self.master.mq.startConsuming(callback, self.parsePath(path))
+        qref = yield self.factory.coalescer.startConsuming(callback, self.parsePath(path))
 
         # race conditions handling
         if self.qrefs is None or path in self.qrefs:
@@ -231,7 +234,7 @@ class WsProtocol(WebSocketServerProtocol):
         sub = Subscription(payload.get("query"), id)
         if not self.graphql_subs:
             # consume all events!
-            self.graphql_consumer = yield self.master.mq.startConsuming(
+            self.graphql_consumer = yield self.factory.coalescer.startConsuming(
                 self.graphql_got_event, (None, None, None)
             )
 
@@ -274,6 +277,11 @@ class WsProtocolFactory(WebSocketServerFactory):
     def __init__(self, master):
         super().__init__()
         self.master = master
+        encoder = json_encoder.get_encoder()
+        # protocol is deliberately concise in size
+        self.event_encoder = json_encoder.EventEncoder(
+            lambda key, message: encoder.dumps({"k": "/".join(key), "m": message}))
+        self.coalescer = coalescer.EventCoalescer(master)
         pingInterval = self.master.config.www.get("ws_ping_interval", 0)
         self.setProtocolOptions(webStatus=False, autoPingInterval=pingInterval)
 
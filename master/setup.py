@@ -198,6 +198,7 @@ setup_args = {
         "buildbot.test.fake",
         "buildbot.test.fakedb",
     ] + ([] if BUILDING_WHEEL else [  # skip tests for wheels (save 50% of the archive)
+        "buildbot.test.benchmarks",
         "buildbot.test.fuzz",
         "buildbot.test.integration",
         "buildbot.test.integration.interop",
@@ -508,6 +509,10 @@ test_deps = [
     'moto',
     "Markdown>=3.0.0",
     'parameterized',
+    # zstandard required for log compression tests.
+    'zstandard',
+    # orjson required for the fast JSON encoder tests.
+    'orjson',
 ]
 if sys.platform != 'win32':
     test_deps += [
@@ -0,0 +1 @@
+The default builder prioritization of ``BuildRequestDistributor`` now fetches the highest priority and the oldest request time of all builders with a single database query, instead of two queries per builder.
@@ -0,0 +1 @@
+``claimBuildRequests`` now claims build requests with one statement per batch of 100 requests, skips conflicting rows without raising database errors on PostgreSQL and MySQL, and reports its latency and conflict count as metrics.
@@ -0,0 +1 @@
+The builds data API loads the requested properties of all builds in a single query, for both REST and GraphQL, instead of loading every property of each build separately.
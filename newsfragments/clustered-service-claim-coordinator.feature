@@ -0,0 +1 @@
+Schedulers and change sources waiting for another master to release them are now polled for with one database query per poll interval, instead of one query per service.
@@ -0,0 +1 @@
+``DirectoryUpload`` now streams the directory tarball: the worker creates it in a separate thread while sending it and the master unpacks it in a separate thread as it arrives, without temporary tarballs on either side.
@@ -0,0 +1 @@
+:bb:chsrc:`GitPoller` now reads the metadata of all new commits with a single ``git log`` invocation instead of running five ``git`` processes per commit.
@@ -0,0 +1 @@
+Decompressed log chunks are now cached in memory, limited by the new :bb:cfg:`logChunkCacheSize` option, and large logs can be read a few chunks at a time with the new ``getLogLinesReader`` database method.
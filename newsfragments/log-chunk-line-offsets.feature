@@ -0,0 +1 @@
+Log chunks now store the offset of each of their lines, so that serving a window of a log does not need to scan whole chunks; existing logs are indexed when they are recompressed by the ``log_recompress_limit`` janitor or ``buildbot cleanupdb --force``.
@@ -0,0 +1 @@
+Added the ``zstd`` log compression method, the :bb:cfg:`logCompressionLevel` setting, and a ``log_recompress_limit`` option to :bb:configurator:`JanitorConfigurator` to recompress existing logs with the current compression method.
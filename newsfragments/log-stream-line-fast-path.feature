@@ -0,0 +1 @@
+The master processes the stdio output of remote commands faster: line splitting skips its regular expression for output without control characters, and stream log lines are prefixed without a regular expression.
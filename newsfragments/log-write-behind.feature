@@ -0,0 +1 @@
+Added the :bb:cfg:`logWriteBehind` option which coalesces log appends from all running steps into a single database transaction per flush interval.
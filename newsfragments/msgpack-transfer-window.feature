@@ -0,0 +1 @@
+File uploads and downloads over the msgpack worker protocol now keep up to 16 data blocks in flight instead of waiting for a round-trip per block.
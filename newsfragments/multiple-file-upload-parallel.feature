@@ -0,0 +1 @@
+:bb:step:`MultipleFileUpload` accepts ``maxParallel`` to upload several sources at once on workers using the msgpack protocol, and records aggregate upload statistics.
@@ -0,0 +1 @@
+The ``/logs/n:logid/raw`` and ``/logs/n:logid/raw_inline`` REST endpoints now stream the log a few chunks at a time instead of loading the whole log in memory.
@@ -0,0 +1 @@
+Output collected by ``RemoteCommand`` with ``collectStdout`` or ``collectStderr``, and by ``SetPropertyFromCommand``, is now accumulated in linear time, and is written to a temporary file past ``collectMaxMemory`` characters, which shell steps accept as an argument.
@@ -0,0 +1 @@
+Reporters including logs now fetch the logs and their contents for a whole build with a few queries, through the new ``/builds/:buildid/logs`` and ``/builds/:buildid/logs/contents`` data API endpoints, and only include the first megabyte of each log.
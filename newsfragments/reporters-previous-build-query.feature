@@ -0,0 +1 @@
+Reporters now find the previous build of a build with a single database query, through the new ``/builders/:builderid/builds/:number/previous`` data API endpoint.
@@ -0,0 +1 @@
+Reporters handling the same event now share the data fetched from the data API for their reports, instead of each fetching it again.
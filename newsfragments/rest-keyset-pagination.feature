@@ -0,0 +1 @@
+The REST API supports keyset pagination of collections with the ``after`` query parameter and the ``meta.next`` token, and ``total=none`` to skip counting the results.
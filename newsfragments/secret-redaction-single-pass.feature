@@ -0,0 +1 @@
+Secrets are now redacted from logs in a single pass, and secrets split between log chunks received from the worker are redacted as well.
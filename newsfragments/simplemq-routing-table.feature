@@ -0,0 +1 @@
+``SimpleMQ`` now indexes consumers by filter, so that producing a message only visits the consumers which can match its routing key.
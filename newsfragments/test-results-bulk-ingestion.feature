@@ -0,0 +1 @@
+Test results are stored several times faster: their names and code paths are cached per builder, results are inserted with ``executemany``, and the batches of a ``TestResultSubmitter`` are pipelined.
@@ -0,0 +1 @@
+Added the ``event_coalescing_window`` www option, which coalesces superseded update events pushed to web clients over websocket and server-sent events.
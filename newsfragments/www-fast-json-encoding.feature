@@ -0,0 +1 @@
+The REST API, websocket and server-sent events endpoints now encode JSON with orjson when it is installed, and encode each message queue event once for all connected clients.
@@ -16,11 +16,14 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import collections
 import os
 import tarfile
-import tempfile
+import threading
 
 from twisted.internet import defer
+from twisted.internet import threads
+from twisted.python import failure
 from twisted.python import log
 
 from buildbot_worker.commands.base import Command
@@ -50,6 +53,24 @@ class TransferCommand(Command):
         # now we wait for the next trip around the loop.  It abandon the file
         # when it sees self.interrupted set.
 
+    @defer.inlineCallbacks
+    def _run_pipelined(self, loop):
+        # Runs loop(in_flight), which keeps the Deferreds of the requests sent
+        # to the master but not answered yet in the in_flight deque.  Once the
+        # loop is over, wait for all of them, so that none fails unnoticed
+        # after the transfer is over.
+        in_flight = collections.deque()
+        try:
+            yield loop(in_flight)
+        except Exception:
+            f = failure.Failure()
+            yield defer.DeferredList(list(in_flight), consumeErrors=True)
+            f.raiseException()
+        results = yield defer.DeferredList(list(in_flight), consumeErrors=True)
+        for success, result in results:
+            if not success:
+                result.raiseException()
+
 
 class WorkerFileUploadCommand(TransferCommand):
 
@@ -62,6 +83,8 @@ class WorkerFileUploadCommand(TransferCommand):
         - ['maxsize']:   max size (in bytes) of file to write
         - ['blocksize']: max size for each data block
         - ['keepstamp']: whether to preserve file modified and accessed times
+        - ['window']:    number of blocks that may be sent before the first one is
+                         acknowledged by the master (1 if not given)
     """
     debug = False
 
@@ -73,6 +96,7 @@ class WorkerFileUploadCommand(TransferCommand):
         self.remaining = args['maxsize']
         self.blocksize = args['blocksize']
         self.keepstamp = args.get('keepstamp', False)
+        self.window = args.get('window', 1)
         self.stderr = None
         self.rc = 0
         self.fp = None
@@ -135,26 +159,31 @@ class WorkerFileUploadCommand(TransferCommand):
         return d
 
     def _loop(self, fire_when_done):
-        d = defer.maybeDeferred(self._writeBlock)
-
-        def _done(finished):
-            if finished:
-                fire_when_done.callback(None)
-            else:
-                self._loop(fire_when_done)
-
-        def _err(why):
-            fire_when_done.errback(why)
-        d.addCallbacks(_done, _err)
+        d = self._run_pipelined(self._writeBlocks)
+        d.addCallbacks(fire_when_done.callback, fire_when_done.errback)
         return None
 
-    def _writeBlock(self):
-        """Write a block of data to the remote writer"""
+    @defer.inlineCallbacks
+    def _writeBlocks(self, in_flight):
+        # Each block sent takes a credit from the window granted by the
+        # master, which is given back when the write is acknowledged.  This
+        # keeps the link busy instead of waiting a round-trip for each block.
+        while True:
+            while len(in_flight) >= self.window:
+                yield in_flight.popleft()
+            data = yield self._readBlock()
+            if not data:
+                return
+            in_flight.append(self.do_protocol_write(data))
+
+    @defer.inlineCallbacks
+    def _readBlock(self):
+        """Read the next block of data to send, an empty block means the end"""
 
         if self.interrupted or self.fp is None:
             if self.debug:
-                self.log_msg('WorkerFileUploadCommand._writeBlock(): end')
-            return True
+                self.log_msg('WorkerFileUploadCommand._readBlock(): end')
+            defer.returnValue(b'')
 
         length = self.blocksize
         if self.remaining is not None and length > self.remaining:
@@ -165,29 +194,38 @@ class WorkerFileUploadCommand(TransferCommand):
                 self.stderr = 'Maximum filesize reached, truncating file \'{0}\''.format(
                     self.path)
                 self.rc = 1
-            data = ''
+            data = b''
         else:
-            data = self.fp.read(length)
+            data = yield self.do_read(length)
 
         if self.debug:
-            self.log_msg('WorkerFileUploadCommand._writeBlock(): ' +
+            self.log_msg('WorkerFileUploadCommand._readBlock(): ' +
                          'allowed={0} readlen={1}'.format(length, len(data)))
         if not data:
             self.log_msg("EOF: callRemote(close)")
-            return True
+            defer.returnValue(b'')
 
         if self.remaining is not None:
             self.remaining = self.remaining - len(data)
             assert self.remaining >= 0
-        d = self.do_protocol_write(data)
-        d.addCallback(lambda res: False)
-        return d
+        defer.returnValue(data)
+
+    def do_read(self, length):
+        return self.fp.read(length)
 
     def do_protocol_write(self, data):
         return self.protocol_command.protocol_update_upload_file_write(self.writer, data)
 
 
 class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
+
+    """
+    Upload a directory from worker to build master, as a tarball.
+
+    The tarball is created by a separate thread and read from a pipe while
+    it is being sent, so that it is neither stored in a temporary file nor
+    created in the reactor thread.
+    """
     debug = False
     requiredArgs = ['path', 'writer', 'blocksize']
 
@@ -197,8 +235,10 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
         self.remaining = args['maxsize']
         self.blocksize = args['blocksize']
         self.compress = args['compress']
+        self.window = args.get('window', 1)
         self.stderr = None
         self.rc = 0
+        self.fp = None
 
     def start(self):
         if self.debug:
@@ -207,58 +247,96 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
         if self.debug:
             self.log_msg("path: {0!r}".format(self.path))
 
-        # Create temporary archive
-        fd, self.tarname = tempfile.mkstemp(prefix='buildbot-transfer-')
-        self.fp = os.fdopen(fd, "rb+")
-
-        if self.compress == 'bz2':
-            mode = 'w|bz2'
-        elif self.compress == 'gz':
-            mode = 'w|gz'
-        else:
-            mode = 'w'
-        # TODO: Use 'with' when depending on Python 2.7
-        # Not possible with older versions:
-        # exceptions.AttributeError: 'TarFile' object has no attribute '__exit__'
-        archive = tarfile.open(mode=mode, fileobj=self.fp)
         try:
-            archive.add(self.path, '')
+            os.lstat(self.path)
         except OSError as e:
             # if directory does not exist, bail out with an error
             self.stderr = "Cannot read directory '{0}' for upload: {1}".format(self.path, e)
             self.rc = 1
-            archive.close()
             d = defer.succeed(False)
             d.addCallback(self.finished)
             return d
 
-        archive.close()
-
-        # Transfer it
-        self.fp.seek(0)
+        read_fd, write_fd = os.pipe()
+        self.fp = os.fdopen(read_fd, 'rb')
+        self._archived = defer.Deferred()
+        archiver = threading.Thread(target=self._thd_archive, args=(os.fdopen(write_fd, 'wb'),))
+        archiver.daemon = True
+        archiver.start()
 
         self.sendStatus([('header', "sending {0}\n".format(self.path))])
 
         d = defer.Deferred()
         self._reactor.callLater(0, self._loop, d)
 
-        def unpack(res):
+        @defer.inlineCallbacks
+        def check_archive(res):
+            if self.interrupted:
+                defer.returnValue(res)
+            # the transfer stops early once maxsize is reached; the archiving
+            # thread may then be blocked writing to the pipe, so close it
+            truncated = self.stderr is not None
+            if truncated:
+                self.fp.close()
+                self.fp = None
+            error = yield self._archived
+            if error is not None and not truncated:
+                self.stderr = "Cannot read directory '{0}' for upload: {1}".format(
+                    self.path, error)
+                self.rc = 1
+                defer.returnValue(False)
+            defer.returnValue(True)
+
+        def unpack(archive_ok):
+            if archive_ok is False:
+                return None
             d1 = self.protocol_command.protocol_update_upload_directory(self.writer)
 
             def unpack_err(f):
                 self.rc = 1
                 return f
             d1.addErrback(unpack_err)
-            d1.addCallback(lambda ignored: res)
+            d1.addCallback(lambda ignored: None)
             return d1
+
+        def transfer_err(f):
+            self.rc = 1
+            return f
+        d.addCallback(check_archive)
         d.addCallback(unpack)
+        d.addErrback(transfer_err)
         d.addBoth(self.finished)
         return d
 
+    def _thd_archive(self, fp):
+        # runs in its own thread, the pipe blocks it whenever it gets ahead of
+        # the transfer
+        if self.compress == 'bz2':
+            mode = 'w|bz2'
+        elif self.compress == 'gz':
+            mode = 'w|gz'
+        else:
+            mode = 'w|'
+        error = None
+        try:
+            with tarfile.open(mode=mode, fileobj=fp) as archive:
+                archive.add(self.path, '')
+        except Exception as e:
+            error = e
+        try:
+            fp.close()
+        except Exception as e:
+            error = error or e
+        self._reactor.callFromThread(self._archived.callback, error)
+
+    def do_read(self, length):
+        return threads.deferToThread(self.fp.read, length)
+
     def finished(self, res):
-        self.fp.close()
+        if self.fp:
+            # this also stops the archiving thread if the transfer was aborted
+            self.fp.close()
         self.fp = None
-        os.remove(self.tarname)
         return TransferCommand.finished(self, res)
 
     def do_protocol_write(self, data):
@@ -276,6 +354,8 @@ class WorkerFileDownloadCommand(TransferCommand):
         - ['maxsize']:   max size (in bytes) of file to write
         - ['blocksize']: max size for each data block
         - ['mode']:      access mode for the new file
+        - ['window']:    number of blocks that may be requested before the first one
+                         is received from the master (1 if not given)
     """
     debug = False
     requiredArgs = ['path', 'reader', 'blocksize']
@@ -286,6 +366,7 @@ class WorkerFileDownloadCommand(TransferCommand):
         self.bytes_remaining = args['maxsize']
         self.blocksize = args['blocksize']
         self.mode = args['mode']
+        self.window = args.get('window', 1)
         self.stderr = None
         self.rc = 0
         self.fp = None
@@ -335,45 +416,47 @@ class WorkerFileDownloadCommand(TransferCommand):
         return d
 
     def _loop(self, fire_when_done):
-        d = defer.maybeDeferred(self._readBlock)
-
-        def _done(finished):
-            if finished:
-                fire_when_done.callback(None)
-            else:
-                self._loop(fire_when_done)
-
-        def _err(why):
-            fire_when_done.errback(why)
-        d.addCallbacks(_done, _err)
+        d = self._run_pipelined(self._readBlocks)
+        d.addCallbacks(fire_when_done.callback, fire_when_done.errback)
         return None
 
-    def _readBlock(self):
-        """Read a block of data from the remote reader."""
-
-        if self.interrupted or self.fp is None:
-            if self.debug:
-                self.log_msg('WorkerFileDownloadCommand._readBlock(): end')
-            return True
-
-        length = self.blocksize
-        if self.bytes_remaining is not None and length > self.bytes_remaining:
-            length = self.bytes_remaining
-
-        if length <= 0:
-            if self.stderr is None:
-                self.stderr = "Maximum filesize reached, truncating file '{0}'".format(
-                    self.path)
-                self.rc = 1
-            return True
-        else:
-            d = self.protocol_command.protocol_update_read_file(self.reader, length)
-            d.addCallback(self._writeData)
-            return d
+    @defer.inlineCallbacks
+    def _readBlocks(self, in_flight):
+        # Up to self.window blocks are requested ahead.  The master answers
+        # the requests in order, so the data is written to the file in the
+        # order in which the blocks were requested.
+        to_request = self.bytes_remaining
+        while True:
+            while not self.interrupted and self.fp is not None and \
+                    len(in_flight) < self.window:
+                length = self.blocksize
+                if to_request is not None:
+                    if to_request <= 0:
+                        break
+                    length = min(length, to_request)
+                    to_request -= length
+                in_flight.append(
+                    self.protocol_command.protocol_update_read_file(self.reader, length))
+
+            if self.interrupted or self.fp is None:
+                if self.debug:
+                    self.log_msg('WorkerFileDownloadCommand._readBlocks(): end')
+                return
+
+            if not in_flight:
+                if self.stderr is None:
+                    self.stderr = "Maximum filesize reached, truncating file '{0}'".format(
+                        self.path)
+                    self.rc = 1
+                return
+
+            data = yield in_flight.popleft()
+            if self._writeData(data):
+                return
 
     def _writeData(self, data):
         if self.debug:
-            self.log_msg('WorkerFileDownloadCommand._readBlock(): readlen={0}'.format(len(data)))
+            self.log_msg('WorkerFileDownloadCommand._writeData(): readlen={0}'.format(len(data)))
         if not data:
             return True
 
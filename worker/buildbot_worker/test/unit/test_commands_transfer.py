@@ -57,6 +57,22 @@ class FakeMasterMethods(object):
         self.read = False
         self.data = b''
 
+        # requests not answered yet, when delaying writes or reads
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _delay(self, result):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        def done(res):
+            self.in_flight -= 1
+            return res
+        d = defer.Deferred()
+        d.addCallback(done)
+        reactor.callLater(0.01, d.callback, result)
+        return d
+
     def remote_write(self, data):
         if self.write_out_of_space_at is not None:
             self.write_out_of_space_at -= len(data)
@@ -73,9 +89,7 @@ class FakeMasterMethods(object):
             self.data += data
 
         if self.delay_write:
-            d = defer.Deferred()
-            reactor.callLater(0.01, d.callback, None)
-            return d
+            return self._delay(None)
         return None
 
     def remote_read(self, length):
@@ -90,9 +104,7 @@ class FakeMasterMethods(object):
 
         _slice, self.data = self.data[:length], self.data[length:]
         if self.delay_read:
-            d = defer.Deferred()
-            reactor.callLater(0.01, d.callback, _slice)
-            return d
+            return self._delay(_slice)
         return _slice
 
     def remote_unpack(self):
@@ -273,6 +285,55 @@ class TestUploadFile(CommandTestMixin, unittest.TestCase):
             ('rc', 0)
         ])
 
+    @defer.inlineCallbacks
+    def test_window(self):
+        self.fakemaster.count_writes = True    # get actual byte counts
+        self.fakemaster.delay_write = True
+        self.fakemaster.keep_data = True
+
+        path = os.path.join(self.basedir, 'workdir', os.path.expanduser('data'))
+        self.make_command(transfer.WorkerFileUploadCommand, {
+            'path': path,
+            'writer': FakeRemote(self.fakemaster),
+            'maxsize': 1000,
+            'blocksize': 16,
+            'keepstamp': False,
+            'window': 4,
+        })
+
+        yield self.run_command()
+
+        self.assertUpdates([
+            ('header', 'sending {0}\n'.format(self.datafile)),
+        ] + ['write 16'] * 11 + ['write 4', 'close', ('rc', 0)])
+        self.assertEqual(self.fakemaster.data, b"this is some data\n" * 10)
+        self.assertEqual(self.fakemaster.max_in_flight, 4)
+
+    @defer.inlineCallbacks
+    def test_window_out_of_space(self):
+        self.fakemaster.write_out_of_space_at = 70
+        self.fakemaster.delay_write = True
+
+        path = os.path.join(self.basedir, 'workdir', os.path.expanduser('data'))
+        self.make_command(transfer.WorkerFileUploadCommand, {
+            'path': path,
+            'writer': FakeRemote(self.fakemaster),
+            'maxsize': 1000,
+            'blocksize': 16,
+            'keepstamp': False,
+            'window': 8,
+        })
+
+        yield self.assertFailure(self.run_command(), RuntimeError)
+
+        self.assertUpdates([
+            ('header', 'sending {0}\n'.format(self.datafile)),
+            'write(s)', 'close',
+            ('rc', 1)
+        ])
+        # the close is only sent once all the writes in flight are answered
+        self.assertEqual(self.fakemaster.in_flight, 0)
+
 
 class TestWorkerDirectoryUpload(CommandTestMixin, unittest.TestCase):
 
@@ -362,6 +423,85 @@ class TestWorkerDirectoryUpload(CommandTestMixin, unittest.TestCase):
             ('rc', 1)
         ])
 
+    @defer.inlineCallbacks
+    def test_window(self):
+        self.fakemaster.keep_data = True
+        self.fakemaster.delay_write = True
+        path = os.path.join(self.basedir, 'workdir', os.path.expanduser('data'))
+        self.make_command(transfer.WorkerDirectoryUploadCommand, {
+            'path': path,
+            'writer': FakeRemote(self.fakemaster),
+            'maxsize': None,
+            'blocksize': 512,
+            'compress': None,
+            'window': 4,
+        })
+
+        yield self.run_command()
+
+        self.assertUpdates([
+            ('header', 'sending {0}\n'.format(self.datadir)),
+            'write(s)', 'unpack',
+            ('rc', 0)
+        ])
+        self.assertEqual(self.fakemaster.max_in_flight, 4)
+        with tarfile.open(fileobj=io.BytesIO(self.fakemaster.data), mode="r") as a:
+            self.assertEqual(a.extractfile('aa').read(), b"lots of a" * 100)
+
+    @defer.inlineCallbacks
+    def test_out_of_space_write(self):
+        # more than fits in a pipe, so that the archiving thread is blocked
+        # when the transfer fails
+        with open(os.path.join(self.datadir, "cc"), mode="wb") as f:
+            f.write(b"c" * 1024 * 1024)
+        self.fakemaster.write_out_of_space_at = 4096
+        path = os.path.join(self.basedir, 'workdir', os.path.expanduser('data'))
+
+        self.make_command(transfer.WorkerDirectoryUploadCommand, {
+            'path': path,
+            'writer': FakeRemote(self.fakemaster),
+            'maxsize': None,
+            'blocksize': 512,
+            'compress': None
+        })
+
+        yield self.assertFailure(self.run_command(), RuntimeError)
+
+        self.assertUpdates([
+            ('header', 'sending {0}\n'.format(self.datadir)),
+            'write(s)',
+            ('rc', 1)
+        ])
+        # the archiving thread stops once the transfer is over
+        error = yield self.cmd._archived
+        self.assertIsInstance(error, (IOError, OSError))
+
+    @defer.inlineCallbacks
+    def test_truncated(self):
+        # more than fits in a pipe, so that the archiving thread is blocked
+        # when maxsize is reached
+        with open(os.path.join(self.datadir, "cc"), mode="wb") as f:
+            f.write(b"c" * 2 * 1024 * 1024)
+        self.fakemaster.count_writes = True
+        path = os.path.join(self.basedir, 'workdir', os.path.expanduser('data'))
+
+        self.make_command(transfer.WorkerDirectoryUploadCommand, {
+            'path': path,
+            'writer': FakeRemote(self.fakemaster),
+            'maxsize': 1000,
+            'blocksize': 512,
+            'compress': None
+        })
+
+        yield self.run_command()
+
+        self.assertUpdates([
+            ('header', 'sending {0}\n'.format(self.datadir)),
+            'write 512', 'write 488', 'unpack',
+            ('rc', 1),
+            ('stderr', "Maximum filesize reached, truncating file '{0}'".format(self.datadir))
+        ])
+
 
 class TestWorkerDirectoryUploadNoDir(CommandTestMixin, unittest.TestCase):
 
@@ -549,3 +689,53 @@ class TestDownloadFile(CommandTestMixin, unittest.TestCase):
         self.assertUpdates([
             'read(s)', 'close', ('rc', 1)
         ])
+
+    @defer.inlineCallbacks
+    def test_window(self):
+        self.fakemaster.count_reads = True    # get actual byte counts
+        self.fakemaster.delay_read = True
+        self.fakemaster.data = test_data = b'1234' * 13
+
+        path = os.path.join(self.basedir, os.path.expanduser('data'))
+        self.make_command(transfer.WorkerFileDownloadCommand, {
+            'path': path,
+            'reader': FakeRemote(self.fakemaster),
+            'maxsize': None,
+            'blocksize': 8,
+            'mode': None,
+            'window': 4,
+        })
+
+        yield self.run_command()
+
+        # reads are requested ahead, so a few are sent after the end of file
+        self.assertUpdates(['read 8'] * 11 + ['close', ('rc', 0)])
+        self.assertEqual(self.fakemaster.max_in_flight, 4)
+        with open(os.path.join(self.basedir, 'data'), mode="rb") as f:
+            self.assertEqual(f.read(), test_data)
+
+    @defer.inlineCallbacks
+    def test_window_truncated(self):
+        self.fakemaster.count_reads = True    # get actual byte counts
+        self.fakemaster.data = test_data = b'tenchars--' * 10
+
+        path = os.path.join(self.basedir, os.path.expanduser('data'))
+        self.make_command(transfer.WorkerFileDownloadCommand, {
+            'path': path,
+            'reader': FakeRemote(self.fakemaster),
+            'maxsize': 50,
+            'blocksize': 32,
+            'mode': None,
+            'window': 4,
+        })
+        yield self.run_command()
+
+        # no more than maxsize is ever requested
+        self.assertUpdates([
+            'read 32', 'read 18', 'close',
+            ('rc', 1),
+            ('stderr', "Maximum filesize reached, truncating file '{0}'".format(
+             os.path.join(self.basedir, 'data')))
+        ])
+        with open(os.path.join(self.basedir, 'data'), mode="rb") as f:
+            self.assertEqual(f.read(), test_data[:50])